@@ -3,6 +3,9 @@
 Authorization: Bearer <token> ヘッダーからFirebase ID Tokenを検証し、
 ユーザー情報を返す。
 
+署名検証（同期API）はスレッド数上限付きのエグゼキューターで実行し、
+イベントループを止めない。検証済みのトークンはキャッシュから返す。
+
 開発用バイパス:
     DEV_AUTH_BYPASS=true を設定すると認証をスキップし、
     テスト用のユーザー情報を返す（本番環境では絶対に使用しないこと）
@@ -20,6 +23,8 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from app.core.config import get_settings
 from app.infra.firebase import verify_id_token
 from app.services.rate_limiter import get_rate_limiter
+from app.services.token_cache import TokenVerificationCache
+from app.utils.executor import BoundedExecutor
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +38,17 @@ _DEV_USER: dict[str, Any] = {
     "email": "dev@example.com",
 }
 
+# 署名検証を実行するワーカースレッド
+_verify_executor = BoundedExecutor(
+    "auth.verify", max_workers=_settings.AUTH_VERIFY_MAX_WORKERS
+)
+
+# 検証済みトークンのキャッシュ
+_token_cache = TokenVerificationCache(
+    max_entries=_settings.AUTH_TOKEN_CACHE_SIZE,
+    revocation_check_interval=_settings.AUTH_TOKEN_REVOCATION_CHECK_SECONDS,
+)
+
 # UUID正規表現パターン
 _UUID_PATTERN = re.compile(
     r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$",
@@ -81,7 +97,7 @@ async def get_current_user(
         )
 
     try:
-        decoded = verify_id_token(token)
+        decoded = await _verify_token(token)
     except Exception as exc:
         logger.warning("Token verification failed: %s", exc)
         raise HTTPException(
@@ -98,7 +114,7 @@ async def get_current_user(
     return user_info
 
 
-def verify_websocket_token(token: str) -> dict[str, Any]:
+async def verify_websocket_token(token: str) -> dict[str, Any]:
     """WebSocket接続用のトークン検証.
 
     Args:
@@ -121,7 +137,7 @@ def verify_websocket_token(token: str) -> dict[str, Any]:
         raise ValueError("Missing authentication token")
 
     try:
-        decoded = verify_id_token(token)
+        decoded = await _verify_token(token)
     except Exception as exc:
         logger.warning("WebSocket token verification failed: %s", exc)
         raise ValueError("Invalid or expired token") from exc
@@ -132,6 +148,20 @@ def verify_websocket_token(token: str) -> dict[str, Any]:
     }
 
 
+async def _verify_token(token: str) -> dict[str, Any]:
+    """トークンを検証する（検証済みのトークンはキャッシュから返す）。"""
+    return await _token_cache.verify(token, _verify_id_token_off_loop)
+
+
+async def _verify_id_token_off_loop(
+    token: str, check_revoked: bool = False
+) -> dict[str, Any]:
+    """verify_id_token をワーカースレッドで実行する。"""
+    if check_revoked:
+        return await _verify_executor.run(verify_id_token, token, check_revoked=True)
+    return await _verify_executor.run(verify_id_token, token)
+
+
 def _normalize_path(path: str) -> str:
     """パスパラメータ（UUID）を * に置換してパスを正規化。"""
     parts = path.split("/")
@@ -0,0 +1,87 @@
+"""WebSocketバイナリフレームのエンコード/デコード.
+
+音声付きメッセージをBase64-in-JSONではなく、1つのバイナリフレームで送るための形式:
+
+    +----------------------+----------------------+------------------+
+    | ヘッダー長 (4byte BE) | JSONヘッダー (UTF-8)  | ペイロード (raw)  |
+    +----------------------+----------------------+------------------+
+
+ヘッダーは通常のJSONメッセージと同じフィールド（type, session_id,
+emotion_scores, audio_format など）を持ち、audio_data の代わりに
+ペイロード部分に生の音声バイト列を置く。
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+from dataclasses import dataclass
+from typing import Any
+
+HEADER_LENGTH_FORMAT = ">I"
+HEADER_LENGTH_SIZE = struct.calcsize(HEADER_LENGTH_FORMAT)
+MAX_HEADER_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class BinaryFrame:
+    """デコード済みバイナリフレーム."""
+
+    header: dict[str, Any]
+    """JSONヘッダー."""
+
+    payload: memoryview
+    """ペイロード（元のバッファへのゼロコピービュー）."""
+
+
+def decode_binary_frame(data: bytes) -> BinaryFrame:
+    """バイナリフレームをヘッダーとペイロードに分解する.
+
+    ペイロードはコピーせず、受信バッファへの memoryview として返す。
+
+    Args:
+        data: 受信したバイナリフレーム
+
+    Returns:
+        BinaryFrame: ヘッダーとペイロード
+
+    Raises:
+        ValueError: フレーム形式が不正な場合
+    """
+    if len(data) < HEADER_LENGTH_SIZE:
+        raise ValueError("Binary frame is too short")
+
+    (header_length,) = struct.unpack_from(HEADER_LENGTH_FORMAT, data, 0)
+    if header_length > MAX_HEADER_SIZE:
+        raise ValueError(f"Binary frame header is too large: {header_length} bytes")
+
+    header_end = HEADER_LENGTH_SIZE + header_length
+    if header_end > len(data):
+        raise ValueError("Binary frame header length exceeds frame size")
+
+    view = memoryview(data)
+    try:
+        header = json.loads(view[HEADER_LENGTH_SIZE:header_end].tobytes())
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid binary frame header: {e}") from e
+
+    if not isinstance(header, dict):
+        raise ValueError("Binary frame header must be a JSON object")
+
+    return BinaryFrame(header=header, payload=view[header_end:])
+
+
+def encode_binary_frame(header: dict[str, Any], payload: bytes = b"") -> bytes:
+    """ヘッダーとペイロードからバイナリフレームを組み立てる.
+
+    Args:
+        header: JSONヘッダー
+        payload: 生のペイロード
+
+    Returns:
+        バイナリフレーム
+    """
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    if len(header_bytes) > MAX_HEADER_SIZE:
+        raise ValueError(f"Binary frame header is too large: {len(header_bytes)} bytes")
+    return struct.pack(HEADER_LENGTH_FORMAT, len(header_bytes)) + header_bytes + payload
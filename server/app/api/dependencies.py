@@ -1,21 +1,77 @@
+import uuid
+from datetime import datetime, timezone
+
+from app.core.config import get_settings
+from app.core.exceptions import STTError
+from app.core.interfaces.session_repo import SessionRepository
+from app.dto.audio import StreamingTranscript, TranscriptionResult
+from app.dto.processing import (
+    AnalysisResponse,
+    ResponseMode,
+    TranscriptFinalMessage,
+    TranscriptPartialMessage,
+)
+from app.infra.backplane import create_backplane
+from app.infra.repositories.firestore_session_repo import FirestoreSessionRepository
 from app.infra.repositories.in_memory_session_repo import InMemorySessionRepository
+from app.services.analysis_queue import AnalysisQueue
+from app.services.backplane_relay import BackplaneRelay
 from app.services.connection_manager import ConnectionManager
 from app.services.conversation_service import ConversationService
 from app.services.emotion_interpreter import EmotionInterpreterService
 from app.services.llm_service import LLMService
-from app.services.response_generator import ResponseGeneratorService
+from app.services.response_generator import (
+    AnalysisStageMessage,
+    ResponseGeneratorService,
+)
 from app.services.session_service import SessionService
+from app.services.streaming_transcription import StreamingTranscriptionManager
 from app.services.stt_service import STTService
 
-_session_repository = InMemorySessionRepository()
+
+def _create_backplane_relay() -> BackplaneRelay | None:
+    """設定に応じて他インスタンスへの中継を生成する（未設定ならNone）."""
+    settings = get_settings()
+    backplane = create_backplane(
+        settings.REALTIME_BACKPLANE_URL, settings.REALTIME_BACKPLANE_CHANNEL
+    )
+    if backplane is None:
+        return None
+    return BackplaneRelay(
+        backplane, batch_window=settings.REALTIME_BACKPLANE_BATCH_WINDOW_MS / 1000
+    )
+
+
+def _create_session_repository() -> SessionRepository:
+    """設定（SESSION_REPOSITORY）に応じてセッションの保存先を生成する.
+
+    複数インスタンスで動かす場合、WebSocket はセッションを作成したのとは別の
+    インスタンスに接続しうるため、"firestore" で全インスタンスから参照できるようにする。
+    """
+    kind = get_settings().SESSION_REPOSITORY
+    if kind == "memory":
+        return InMemorySessionRepository()
+    if kind == "firestore":
+        return FirestoreSessionRepository()
+    raise ValueError(f"Unsupported SESSION_REPOSITORY: {kind}")
+
+
+_session_repository = _create_session_repository()
 _session_service = SessionService(_session_repository)
-_connection_manager = ConnectionManager()
+_connection_manager = ConnectionManager(
+    send_timeout=get_settings().REALTIME_SEND_TIMEOUT_SECONDS,
+    max_missed_sends=get_settings().REALTIME_MAX_MISSED_SENDS,
+    outbound_queue_size=get_settings().REALTIME_OUTBOUND_QUEUE_SIZE,
+    backplane_relay=_create_backplane_relay(),
+)
 
 _stt_service: STTService | None = None
 _conversation_service: ConversationService | None = None
 _emotion_interpreter: EmotionInterpreterService | None = None
 _llm_service: LLMService | None = None
 _response_generator: ResponseGeneratorService | None = None
+_analysis_queue: AnalysisQueue | None = None
+_streaming_transcription: StreamingTranscriptionManager | None = None
 
 
 def get_session_service() -> SessionService:
@@ -58,6 +114,12 @@ def get_llm_service() -> LLMService:
     return llm_service
 
 
+async def aclose_llm_service() -> None:
+    """LLM推論サービスの裏の処理を停止する（未初期化なら何もしない）."""
+    if _llm_service is not None:
+        await _llm_service.aclose()
+
+
 def get_response_generator() -> ResponseGeneratorService:
     global _response_generator
     if _response_generator is None:
@@ -69,3 +131,141 @@ def get_response_generator() -> ResponseGeneratorService:
         )
     response_generator = _response_generator
     return response_generator
+
+
+async def _deliver_analysis_result(session_id: str, result: AnalysisResponse) -> None:
+    """解析結果を一括配信（single）を選択した接続に配信する."""
+    await _connection_manager.send_to_session(
+        session_id, result, response_mode=ResponseMode.SINGLE
+    )
+
+
+async def _deliver_analysis_stage(
+    session_id: str, message: AnalysisStageMessage
+) -> None:
+    """段階ごとの部分結果を段階配信（progressive）を選択した接続に配信する."""
+    await _connection_manager.send_to_session(
+        session_id, message, response_mode=ResponseMode.PROGRESSIVE
+    )
+
+
+def create_analysis_queue(
+    response_generator: ResponseGeneratorService,
+) -> AnalysisQueue:
+    return AnalysisQueue(
+        response_generator,
+        on_result=_deliver_analysis_result,
+        on_stage=_deliver_analysis_stage,
+        max_merged_clips=get_settings().REALTIME_MAX_MERGED_CLIPS,
+    )
+
+
+def get_analysis_queue() -> AnalysisQueue:
+    global _analysis_queue
+    if _analysis_queue is None:
+        _analysis_queue = create_analysis_queue(get_response_generator())
+    analysis_queue = _analysis_queue
+    return analysis_queue
+
+
+async def cancel_session_analysis(session_id: str, reason: str) -> bool:
+    """セッションの解析をキャンセルする（解析キューが未初期化なら何もしない）."""
+    if _analysis_queue is None:
+        return False
+    return await _analysis_queue.cancel_session(session_id, reason=reason)
+
+
+async def _deliver_transcript_partial(
+    session_id: str, transcript: StreamingTranscript
+) -> None:
+    """ストリーミング認識の途中結果をセッションの全接続に配信する."""
+    await _connection_manager.send_to_session(
+        session_id,
+        TranscriptPartialMessage(
+            timestamp=datetime.now(timezone.utc),
+            text=transcript.text,
+            stability=transcript.stability,
+        ),
+    )
+
+
+async def _analyze_final_transcript(
+    session_id: str,
+    transcription: TranscriptionResult,
+    emotion_scores: dict[str, float],
+) -> None:
+    """確定した発話を配信し、その発話で解析を開始する."""
+    request_id = uuid.uuid4().hex
+    await _connection_manager.send_to_session(
+        session_id,
+        TranscriptFinalMessage(
+            request_id=request_id,
+            timestamp=datetime.now(timezone.utc),
+            transcription=transcription,
+        ),
+    )
+    # 発話は解析の中で会話履歴に追加される。結果は解析キューから配信される
+    get_analysis_queue().submit(
+        session_id, emotion_scores, request_id=request_id, transcripts=[transcription]
+    )
+
+
+async def _report_transcription_error(
+    session_id: str, error: STTError, gave_up: bool
+) -> None:
+    """ストリーミング認識の失敗をセッションの全接続に ERROR として通知する."""
+    await _connection_manager.send_to_session(
+        session_id,
+        {
+            "type": "ERROR",
+            "message": (
+                "Streaming recognition stopped"
+                if gave_up
+                else "Streaming recognition failed"
+            ),
+            "detail": {"error": str(error), "retrying": not gave_up},
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        },
+    )
+
+
+def get_streaming_transcription() -> StreamingTranscriptionManager:
+    global _streaming_transcription
+    if _streaming_transcription is None:
+        _streaming_transcription = StreamingTranscriptionManager(
+            get_stt_service(),
+            on_partial=_deliver_transcript_partial,
+            on_final=_analyze_final_transcript,
+            on_error=_report_transcription_error,
+        )
+    streaming_transcription = _streaming_transcription
+    return streaming_transcription
+
+
+async def finish_streaming_transcription(session_id: str) -> bool:
+    """セッションのストリーミング認識に音声の終わりを伝える（未初期化なら何もしない）."""
+    if _streaming_transcription is None:
+        return False
+    return await _streaming_transcription.finish(session_id)
+
+
+async def close_streaming_transcription(session_id: str) -> bool:
+    """セッションのストリーミング認識を中断する（未初期化なら何もしない）."""
+    if _streaming_transcription is None:
+        return False
+    return await _streaming_transcription.close(session_id)
+
+
+async def aclose_streaming_transcription() -> None:
+    """全セッションのストリーミング認識を中断する（未初期化なら何もしない）."""
+    if _streaming_transcription is not None:
+        await _streaming_transcription.aclose()
+
+
+async def _cancel_closed_session(session_id: str) -> None:
+    """セッションの全接続が切断されたら、配信先のない認識と解析を止める."""
+    await close_streaming_transcription(session_id)
+    await cancel_session_analysis(session_id, reason="disconnect")
+
+
+_connection_manager.add_session_closed_listener(_cancel_closed_session)
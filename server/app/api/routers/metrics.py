@@ -0,0 +1,14 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from app.api.auth import check_rate_limit
+from app.core.metrics import get_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+# 内部メトリクスのため、他の /api と同じく認証済みユーザーのみ取得できる
+@router.get("/metrics", dependencies=[Depends(check_rate_limit)])
+def read_metrics() -> dict[str, Any]:
+    return get_metrics().snapshot()
@@ -1,27 +1,45 @@
 from __future__ import annotations
 
+import asyncio
 import base64
+import json
 import logging
+import uuid
 from datetime import datetime, timezone
 from typing import Any
 
 from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect
 
 from app.api.auth import verify_websocket_token
+from app.api.binary_frame import decode_binary_frame
 from app.api.dependencies import (
+    cancel_session_analysis,
+    close_streaming_transcription,
+    finish_streaming_transcription,
+    get_analysis_queue,
     get_connection_manager,
-    get_response_generator,
     get_session_service,
+    get_streaming_transcription,
 )
 from app.core.config import get_settings
-from app.dto.audio import AudioFormat
+from app.core.exceptions import STTError
+from app.dto.audio import AudioClip, AudioFormat
+from app.dto.processing import ResponseMode
+from app.services.connection_dispatcher import ConnectionDispatcher
 from app.services.connection_manager import ConnectionManager
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["realtime"])
 
-_ALLOWED_TYPES = {"PING", "RESET", "ERROR_REPORT", "ANALYSIS_REQUEST"}
+_ALLOWED_TYPES = {
+    "PING",
+    "RESET",
+    "ERROR_REPORT",
+    "ANALYSIS_REQUEST",
+    "AUDIO_CHUNK",
+    "AUDIO_END",
+}
 
 
 def _utc_iso() -> str:
@@ -36,11 +54,38 @@ def _error_payload(message: str, detail: Any | None = None) -> dict[str, Any]:
     return payload
 
 
+async def _receive_message(websocket: WebSocket) -> tuple[Any, memoryview | None]:
+    """テキスト/バイナリいずれかのフレームを受信する.
+
+    テキストフレームはJSONとして、バイナリフレームは
+    ヘッダー + 生ペイロード形式（app.api.binary_frame）として解釈する。
+
+    Returns:
+        (メッセージ, バイナリペイロード) のタプル。テキストフレームの場合ペイロードはNone
+
+    Raises:
+        WebSocketDisconnect: 切断された場合
+        ValueError: JSONまたはバイナリフレームが不正な場合
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+
+    raw_bytes = message.get("bytes")
+    if raw_bytes is not None:
+        frame = decode_binary_frame(raw_bytes)
+        return frame.header, frame.payload
+
+    return json.loads(message.get("text") or ""), None
+
+
 @router.websocket("/realtime")
 async def realtime(
     websocket: WebSocket,
     session_id: str = Query(...),
     token: str | None = Query(None),
+    response_mode: ResponseMode = Query(ResponseMode.SINGLE),
+    conflate: bool = Query(False),
     connection_manager: ConnectionManager = Depends(get_connection_manager),
 ) -> None:
     # 先に accept() を実行
@@ -54,7 +99,7 @@ async def realtime(
         return
 
     try:
-        user_info = verify_websocket_token(token or "")
+        user_info = await verify_websocket_token(token or "")
     except ValueError as exc:
         await websocket.close(code=4001, reason=str(exc))
         return
@@ -62,7 +107,8 @@ async def realtime(
     # セッション所有者検証（DEV_AUTH_BYPASS時はスキップ）
     if not settings.DEV_AUTH_BYPASS:
         session_service = get_session_service()
-        session = session_service.get_session(session_id)
+        # Firestore の場合はネットワークI/Oになるため、イベントループを止めない
+        session = await asyncio.to_thread(session_service.get_session, session_id)
         if session is None:
             await websocket.close(code=4004, reason="Session not found")
             return
@@ -73,13 +119,22 @@ async def realtime(
             )
             return
 
-    await connection_manager.register(websocket, session_id)
+    await connection_manager.register(websocket, session_id, response_mode, conflate)
+    # 解析リクエストはタスクとして実行し、受信ループは常にフレームを読み続ける
+    dispatcher = ConnectionDispatcher(settings.REALTIME_MAX_CONCURRENT_ANALYSES)
     try:
         while True:
             try:
-                data = await websocket.receive_json()
-            except ValueError:
-                await websocket.send_json(_error_payload("Invalid JSON"))
+                data, binary_payload = await _receive_message(websocket)
+            except json.JSONDecodeError:
+                await connection_manager.send_to_connection(
+                    websocket, _error_payload("Invalid JSON")
+                )
+                continue
+            except ValueError as e:
+                await connection_manager.send_to_connection(
+                    websocket, _error_payload("Invalid binary frame", str(e))
+                )
                 continue
 
             message_type = None
@@ -87,51 +142,153 @@ async def realtime(
                 message_type = data.get("type")
 
             if message_type not in _ALLOWED_TYPES:
-                await websocket.send_json(
-                    _error_payload("Unsupported message type", message_type)
+                await connection_manager.send_to_connection(
+                    websocket, _error_payload("Unsupported message type", message_type)
                 )
                 continue
 
             if message_type == "PING":
-                await websocket.send_json({"type": "PONG", "timestamp": _utc_iso()})
+                await connection_manager.send_to_connection(
+                    websocket, {"type": "PONG", "timestamp": _utc_iso()}
+                )
                 continue
 
             if message_type == "RESET":
-                await websocket.send_json(
-                    {"type": "RESET_ACK", "timestamp": _utc_iso()}
+                # ストリーミング認識と実行中・待機中の解析を止めてからACKする
+                await close_streaming_transcription(session_id)
+                await cancel_session_analysis(session_id, reason="reset")
+                await connection_manager.send_to_connection(
+                    websocket, {"type": "RESET_ACK", "timestamp": _utc_iso()}
                 )
                 continue
 
             if message_type == "ERROR_REPORT":
                 logger.warning("Client error report", extra={"payload": data})
-                await websocket.send_json(
-                    {"type": "ERROR_ACK", "timestamp": _utc_iso()}
+                await connection_manager.send_to_connection(
+                    websocket, {"type": "ERROR_ACK", "timestamp": _utc_iso()}
                 )
                 continue
 
+            if message_type == "AUDIO_CHUNK":
+                await _handle_audio_chunk(
+                    websocket, data, connection_manager, session_id, binary_payload
+                )
+                continue
+
+            if message_type == "AUDIO_END":
+                await finish_streaming_transcription(session_id)
+                continue
+
             if message_type == "ANALYSIS_REQUEST":
-                await _handle_analysis_request(
-                    websocket, data, connection_manager, session_id
+                submitted = dispatcher.try_submit(
+                    _handle_analysis_request(
+                        websocket, data, connection_manager, session_id, binary_payload
+                    )
                 )
+                if not submitted:
+                    await connection_manager.send_to_connection(
+                        websocket,
+                        _error_payload(
+                            "Too many concurrent analysis requests",
+                            {"max_concurrent": dispatcher.max_concurrent},
+                        ),
+                    )
     except WebSocketDisconnect:
+        pass
+    finally:
+        await dispatcher.aclose()
         await connection_manager.disconnect(websocket)
 
 
+async def _handle_audio_chunk(
+    websocket: WebSocket,
+    message: dict[str, Any],
+    connection_manager: ConnectionManager,
+    ws_session_id: str,
+    binary_payload: memoryview | None = None,
+) -> None:
+    """AUDIO_CHUNKの処理.
+
+    音声チャンクをセッションのストリーミング認識に渡す（受信ループ内で即座に終わる）。
+    認識の途中結果は TRANSCRIPT_PARTIAL、発話の確定結果は TRANSCRIPT_FINAL として
+    セッションの全接続に配信され、確定した発話で解析が開始される。
+
+    Args:
+        websocket: WebSocket接続（チャンクの送信元）
+        message: 受信したメッセージ（バイナリフレームの場合はヘッダー）
+        connection_manager: エラー応答を送信キューに積むための接続管理
+        ws_session_id: WebSocket接続時のセッションID
+        binary_payload: バイナリフレームで受信した音声チャンク
+    """
+    chunk: bytes | memoryview | None = binary_payload
+    if chunk is None and message.get("audio_data"):
+        try:
+            chunk = base64.b64decode(message["audio_data"])
+        except Exception as e:
+            await connection_manager.send_to_connection(
+                websocket, _error_payload("Invalid audio data", str(e))
+            )
+            return
+    if not chunk:
+        await connection_manager.send_to_connection(
+            websocket, _error_payload("Missing audio chunk")
+        )
+        return
+
+    try:
+        audio_format = AudioFormat(message.get("audio_format", "pcm"))
+        sample_rate = int(message.get("sample_rate", 16000))
+    except ValueError as e:
+        await connection_manager.send_to_connection(
+            websocket, _error_payload("Invalid audio parameters", str(e))
+        )
+        return
+
+    emotion_scores = message.get("emotion_scores")
+    try:
+        accepted = get_streaming_transcription().feed(
+            ws_session_id,
+            chunk,
+            audio_format=audio_format,
+            sample_rate=sample_rate,
+            language=str(message.get("language", "ja")),
+            emotion_scores=emotion_scores if isinstance(emotion_scores, dict) else None,
+        )
+    except STTError as e:
+        await connection_manager.send_to_connection(
+            websocket, _error_payload("Streaming not available", str(e))
+        )
+        return
+    if not accepted:
+        await connection_manager.send_to_connection(
+            websocket, _error_payload("Audio chunk dropped")
+        )
+
+
 async def _handle_analysis_request(
     websocket: WebSocket,
     message: dict[str, Any],
     connection_manager: ConnectionManager,
     ws_session_id: str,
+    binary_payload: memoryview | None = None,
 ) -> None:
     """ANALYSIS_REQUESTの処理.
 
-    同じセッションの全WebSocket接続（Android/Unity両方）にレスポンスを配信する。
+    セッション単位の解析キューに投入する。解析の完了は待たないため、実行中の
+    解析に統合されるのを待つリクエストが接続の同時実行数の枠を占有しない。
+    レスポンスはキューから同じセッションの全WebSocket接続（Android/Unity両方）に
+    配信される。接続時に response_mode=progressive を指定した接続には
+    ANALYSIS_EMOTION / ANALYSIS_TRANSCRIPT / ANALYSIS_SUGGESTIONS が段階的に、
+    それ以外の接続には ANALYSIS_RESPONSE が1通届く。
+    後続のリクエストに統合された場合は何も送信しない。解析が失敗した場合は
+    この接続にだけ ERROR を返す。
 
     Args:
         websocket: WebSocket接続（リクエスト元）
-        message: 受信したメッセージ
+        message: 受信したメッセージ（バイナリフレームの場合はヘッダー）
         connection_manager: セッション内の全接続を管理
         ws_session_id: WebSocket接続時のセッションID
+        binary_payload: バイナリフレームで受信した生の音声データ
     """
     # 必須フィールドのバリデーション
     session_id = message.get("session_id")
@@ -143,44 +300,81 @@ async def _handle_analysis_request(
             missing_fields.append("session_id")
         if not emotion_scores:
             missing_fields.append("emotion_scores")
-        await websocket.send_json(
-            _error_payload(f"Missing required fields: {', '.join(missing_fields)}")
+        await connection_manager.send_to_connection(
+            websocket,
+            _error_payload(f"Missing required fields: {', '.join(missing_fields)}"),
         )
         return
 
     # 音声データのデコード（存在する場合）
-    audio_data: bytes | None = None
+    audio_data: bytes | memoryview | None = None
     audio_format: AudioFormat | None = None
+    sample_rate = 16000
 
-    if message.get("audio_data"):
+    if binary_payload is not None and len(binary_payload) > 0:
+        # バイナリフレーム: 生の音声バイト列をコピーせずそのまま渡す
+        try:
+            audio_format = AudioFormat(message.get("audio_format", "wav"))
+            sample_rate = int(message.get("sample_rate", 16000))
+            audio_data = binary_payload
+        except (TypeError, ValueError) as e:
+            logger.warning("Unsupported audio parameters in binary frame: %s", e)
+            audio_data = None
+            audio_format = None
+    elif message.get("audio_data"):
         try:
             audio_data = base64.b64decode(message["audio_data"])
             format_str = message.get("audio_format", "wav")
             audio_format = AudioFormat(format_str)
+            sample_rate = int(message.get("sample_rate", 16000))
         except Exception as e:
             logger.warning("Failed to decode audio data: %s", e)
             # 音声デコード失敗時は処理を継続（音声なしとして扱う）
             audio_data = None
             audio_format = None
 
+    audio_clips: list[AudioClip] = []
+    if audio_data and audio_format:
+        audio_clips.append(
+            AudioClip(data=audio_data, format=audio_format, sample_rate=sample_rate)
+        )
+
+    # 段階配信メッセージと最終結果を対応付けるID（クライアント指定がなければ採番）
+    request_id = message.get("request_id")
+    if not isinstance(request_id, str) or not request_id:
+        request_id = uuid.uuid4().hex
+
     try:
-        # ResponseGeneratorServiceを取得して処理
-        response_generator = get_response_generator()
-        result = await response_generator.process(
-            session_id=session_id,
-            emotion_scores=emotion_scores,
-            audio_data=audio_data,
-            audio_format=audio_format,
+        # 解析キューに投入（実行中の解析があれば latest-wins で統合される）
+        analysis_queue = get_analysis_queue()
+        future = analysis_queue.submit(
+            session_id, emotion_scores, audio_clips, request_id=request_id
         )
+    except Exception as e:
+        await connection_manager.send_to_connection(
+            websocket, _analysis_error_payload(e)
+        )
+        return
 
-        # セッション内の全接続にレスポンスを配信
-        await connection_manager.send_to_session(
-            session_id, result.model_dump(mode="json")
+    # 結果はキューからセッションに配信される。この接続が切断されても
+    # セッションの解析自体は継続させ、失敗した場合だけこの接続に通知する
+    def report_failure(done: asyncio.Future[Any]) -> None:
+        error = None if done.cancelled() else done.exception()
+        if error is None:
+            return
+        asyncio.ensure_future(
+            connection_manager.send_to_connection(
+                websocket, _analysis_error_payload(error)
+            )
         )
 
-    except NotImplementedError as e:
-        logger.error("ResponseGeneratorService not implemented: %s", e)
-        await websocket.send_json(_error_payload("Service not available", str(e)))
-    except Exception as e:
-        logger.exception("Analysis request failed: %s", e)
-        await websocket.send_json(_error_payload(f"Analysis failed: {str(e)}"))
+    future.add_done_callback(report_failure)
+
+
+def _analysis_error_payload(error: BaseException) -> dict[str, Any]:
+    """解析の失敗をERRORメッセージにする."""
+    if isinstance(error, NotImplementedError):
+        logger.error("ResponseGeneratorService not implemented: %s", error)
+        return _error_payload("Service not available", str(error))
+    logger.error("Analysis request failed: %s", error, exc_info=error)
+    return _error_payload(f"Analysis failed: {str(error)}")
@@ -18,14 +18,29 @@ class Settings(BaseSettings):
     VERTEX_CREDENTIALS_PATH: str = ""  # Vertex AI用サービスアカウントキーのパス
 
     # LLMプロバイダー設定
-    LLM_PROVIDER: str = ""  # "gemini" or "groq"
-    GROQ_API_KEY: str = ""  # Groq APIキー（LLM_PROVIDER=groq時に必須）
+    LLM_PROVIDER: str = ""  # "gemini" or "groq" or "race"（両方に送り先に返った方を使う）or "route"（リクエストごとに選ぶ）
+    GROQ_API_KEY: str = ""  # Groq APIキー（LLM_PROVIDER=groq, race, route時に必須）
     GROQ_MODEL: str = ""  # Groqモデル名
+    LLM_RACE_QUALITY_WAIT_MS: float = 0.0  # race時、Groqが先に返ってもFTモデルを待つ時間（ミリ秒, 0で待たない）
+    LLM_ROUTER_SHORT_PROMPT_CHARS: int = 400  # route時、この文字数以下のプロンプトはGroq、超える場合はFTモデルに送る
+    LLM_ROUTER_LATENCY_BUDGET_MS: float = 2000.0  # route時の1リクエストの待ち時間の目安（超えそうなら速いプロバイダーに送る）
+    LLM_ROUTER_MAX_ERROR_RATE: float = 0.2  # route時、エラー率がこれ以上のプロバイダーは避ける
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5  # プロバイダーごとに呼び出しを止める連続失敗回数（0で無効）
+    LLM_BREAKER_RESET_SECONDS: float = 30.0  # 呼び出しを止めてから裏で回復を確認するまでの時間（秒）
+    LLM_STREAMING_ENABLED: bool = True  # 段階配信時に応答候補を逐次生成する
+    LLM_CACHE_SIZE: int = 512  # 同一プロンプトの応答キャッシュの最大件数（0で無効）
+    LLM_CACHE_TTL_SECONDS: float = 30.0  # 同一プロンプトの応答キャッシュの有効期間（秒）
+    LLM_SEMANTIC_CACHE_ENABLED: bool = False  # 感情と似た発話の応答候補をセッションをまたいで再利用
+    LLM_SEMANTIC_CACHE_SIZE: int = 2048  # 類似発話キャッシュの最大件数
+    LLM_SEMANTIC_CACHE_TTL_SECONDS: float = 3600.0  # 類似発話キャッシュの有効期間（秒）
+    LLM_SEMANTIC_CACHE_THRESHOLD: float = 0.8  # ヒットとみなす発話の類似度（文字 n-gram のコサイン類似度）
+    LLM_SEMANTIC_CACHE_MAX_CHARS: int = 30  # 対象とする発話の最大文字数（長い発話は内容に依存するため対象外）
+    LLM_SEMANTIC_CACHE_REFRESH_SECONDS: float = 300.0  # ヒット時に裏で再生成するエントリの古さ（秒）
 
     @model_validator(mode="after")
     def validate_ft_model_id(self) -> "Settings":
         """LLM_PROVIDERがgeminiまたは未設定の場合、FT_MODEL_IDが必須."""
-        if self.LLM_PROVIDER in ("", "gemini") and not self.FT_MODEL_ID:
+        if self.LLM_PROVIDER in ("", "gemini", "race", "route") and not self.FT_MODEL_ID:
             raise ValueError(
                 "FT_MODEL_ID must be set when LLM_PROVIDER is "
                 f"'{self.LLM_PROVIDER}' (gemini). "
@@ -36,8 +51,8 @@ class Settings(BaseSettings):
 
     @model_validator(mode="after")
     def validate_groq_settings(self) -> "Settings":
-        """LLM_PROVIDER='groq'の場合、GROQ_API_KEYとGROQ_MODELが必須."""
-        if self.LLM_PROVIDER == "groq":
+        """LLM_PROVIDER='groq', 'race', 'route'の場合、GROQ_API_KEYとGROQ_MODELが必須."""
+        if self.LLM_PROVIDER in ("groq", "race", "route"):
             missing: list[str] = []
             if not self.GROQ_API_KEY.strip():
                 missing.append("GROQ_API_KEY")
@@ -45,7 +60,7 @@ class Settings(BaseSettings):
                 missing.append("GROQ_MODEL")
             if missing:
                 raise ValueError(
-                    f"LLM_PROVIDER='groq' requires: {', '.join(missing)}"
+                    f"LLM_PROVIDER='{self.LLM_PROVIDER}' requires: {', '.join(missing)}"
                 )
         return self
 
@@ -56,6 +71,12 @@ class Settings(BaseSettings):
     # 開発用認証バイパス（本番環境では絶対にtrueにしないこと）
     DEV_AUTH_BYPASS: bool = False
 
+    # 認証トークンキャッシュ設定
+    AUTH_TOKEN_CACHE_SIZE: int = 10000  # 検証済みトークンの最大保持数（0で無効）
+    AUTH_TOKEN_REVOCATION_CHECK_SECONDS: int = 0  # 失効確認の間隔（0で確認しない）
+    AUTH_VERIFY_MAX_WORKERS: int = 4  # 署名検証を実行するスレッド数
+    AUTH_CERT_REFRESH_MARGIN_SECONDS: int = 300  # 公開鍵を期限の何秒前に再取得するか
+
     # CORS設定
     ALLOWED_ORIGINS: str = ""  # カンマ区切りのオリジンリスト
 
@@ -63,6 +84,36 @@ class Settings(BaseSettings):
     RATE_LIMIT_DEFAULT: int = 100  # デフォルト: 100 req/min
     RATE_LIMIT_WINDOW_SECONDS: int = 60  # ウィンドウ: 60秒
 
+    # 音声認識（STT）設定
+    STT_MAX_CONCURRENCY: int = 8  # インスタンス全体の同時認識数
+    STT_TIMEOUT_SECONDS: float = 10.0  # 1回の認識の期限（待ち時間を含む）
+    STT_VAD_ENABLED: bool = False  # 認識前に無音を除き、発話のないクリップは認識しない
+    STT_CHUNK_SECONDS: float = 50.0  # これより長い PCM/WAV は無音で分けて並列に認識（0で無効）
+    STT_HEDGE_ENABLED: bool = False  # 遅い認識に同じリクエストを重ねて送る（ヘッジ）
+    STT_HEDGE_QUANTILE: float = 0.9  # ヘッジまでの待ち時間にする所要時間の分位
+    STT_HEDGE_BUDGET: float = 0.05  # ヘッジするリクエストの割合の上限
+    STT_CACHE_SIZE: int = 1024  # 認識結果のキャッシュの最大件数（0で無効。音声自体は保持しない）
+    STT_CACHE_TTL_SECONDS: float = 300.0  # 認識結果のキャッシュの有効期間（秒）
+    STT_STREAM_MAX_SECONDS: float = 280.0  # 1ストリームの最長時間（API上限は約5分）
+    STT_STREAM_IDLE_SECONDS: float = 3.0  # 音声が途切れたらストリームを閉じるまでの時間
+    STT_STREAM_MAX_BUFFERED_CHUNKS: int = 200  # 認識待ちの音声チャンク上限（超過分は破棄）
+    STT_STREAM_MAX_CONSECUTIVE_ERRORS: int = 3  # 認識を諦めるまでの連続失敗回数
+    STT_STREAM_RETRY_DELAY_SECONDS: float = 0.5  # 失敗後に次のストリームを開くまでの待機（倍々に延長）
+    STT_STREAM_MAX_RETRY_DELAY_SECONDS: float = 5.0  # 失敗後の待機時間の上限
+
+    # リアルタイム（WebSocket）設定
+    REALTIME_MAX_CONCURRENT_ANALYSES: int = 2  # 接続あたりの受付処理中の解析リクエスト数（解析キューへの投入まで）
+    REALTIME_SEND_TIMEOUT_SECONDS: float = 1.0  # 1接続あたりの送信期限（秒）
+    REALTIME_MAX_MISSED_SENDS: int = 3  # 連続で送信期限を超えた接続を切断する回数
+    REALTIME_OUTBOUND_QUEUE_SIZE: int = 32  # 接続ごとの送信キュー上限（超過で切断）
+    REALTIME_MAX_MERGED_CLIPS: int = 8  # 解析中に統合する音声クリップ・確定済み発話の上限（超過分は古いものから破棄）
+    # インスタンス間配信（空: プロセス内のみ, "memory://", "redis://host:6379"）
+    REALTIME_BACKPLANE_URL: str = ""
+    REALTIME_BACKPLANE_CHANNEL: str = "era:realtime"  # バックプレーンのチャンネル名
+    REALTIME_BACKPLANE_BATCH_WINDOW_MS: int = 5  # 中継メッセージをまとめる待機時間
+    # セッションの保存先（"memory": プロセス内, "firestore": 全インスタンスで共有）
+    SESSION_REPOSITORY: str = "memory"
+
     # ヘルスチェック設定
     HEALTH_CHECK_MODEL_ENABLED: bool = True  # モデル疎通確認の有効/無効
     HEALTH_CHECK_MODEL_CACHE_TTL: int = 30  # モデル疎通確認結果のキャッシュ時間（秒）
@@ -14,9 +14,17 @@ class LLMResponseParseError(LLMError):
     """LLMレスポンスパースエラー."""
 
 
+class LLMUnavailableError(LLMError):
+    """LLMプロバイダーが障害中のため呼び出さなかった（サーキットブレーカーが開いている）."""
+
+
 class STTError(ERAException):
     """音声認識エラー."""
 
 
 class SessionPermissionError(ERAException):
     """セッションへのアクセス権限がない."""
+
+
+class BackplaneError(ERAException):
+    """インスタンス間メッセージ配信（バックプレーン）エラー."""
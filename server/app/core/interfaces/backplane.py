@@ -0,0 +1,28 @@
+"""インスタンス間メッセージ配信（バックプレーン）インターフェース定義."""
+
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+from typing import Protocol
+
+BackplaneHandler = Callable[[bytes], Awaitable[None]]
+
+
+class Backplane(Protocol):
+    """全インスタンスにメッセージを届ける pub/sub のプロトコル.
+
+    publish したメッセージは、publish したインスタンス自身を含む
+    全ての購読者に届く（送信元での除外は呼び出し側で行う）。
+    """
+
+    async def start(self, handler: BackplaneHandler) -> None:
+        """購読を開始する. 受信したメッセージごとに handler が呼ばれる."""
+        ...
+
+    async def publish(self, data: bytes) -> None:
+        """メッセージを全インスタンスに配信する."""
+        ...
+
+    async def close(self) -> None:
+        """購読を終了し、接続を閉じる."""
+        ...
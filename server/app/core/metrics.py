@@ -0,0 +1,137 @@
+"""プロセス内メトリクス（カウンター / ゲージ / ヒストグラム）.
+
+外部依存なしで各サービスの計測値を集計する。
+集計結果は GET /api/metrics からスナップショットとして取得できる。
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+# ヒストグラムのバケット上限（ミリ秒想定）
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    5,
+    10,
+    25,
+    50,
+    100,
+    250,
+    500,
+    1000,
+    2500,
+    5000,
+    10000,
+)
+
+
+@dataclass
+class _Histogram:
+    """固定バケットのヒストグラム."""
+
+    buckets: tuple[float, ...]
+    counts: list[int] = field(default_factory=list)
+    count: int = 0
+    total: float = 0.0
+    min: float | None = None
+    max: float | None = None
+
+    def __post_init__(self) -> None:
+        # 最後の要素は +Inf バケット
+        self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def to_dict(self) -> dict[str, Any]:
+        labels = [str(b) for b in self.buckets] + ["+Inf"]
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min,
+            "max": self.max,
+            "avg": self.total / self.count if self.count else None,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class MetricsRegistry:
+    """スレッドセーフなメトリクスレジストリ."""
+
+    def __init__(self) -> None:
+        self._counters: dict[str, float] = {}
+        self._gauges: dict[str, float] = {}
+        self._histograms: dict[str, _Histogram] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1.0) -> None:
+        """カウンターを加算する."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0.0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """ゲージに現在値を設定する."""
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        """ヒストグラムに観測値を記録する."""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = _Histogram(buckets=buckets)
+                self._histograms[name] = histogram
+            histogram.observe(value)
+
+    def get_counter(self, name: str) -> float:
+        """カウンターの現在値を取得する."""
+        with self._lock:
+            return self._counters.get(name, 0.0)
+
+    def get_gauge(self, name: str) -> float | None:
+        """ゲージの現在値を取得する."""
+        with self._lock:
+            return self._gauges.get(name)
+
+    def get_histogram(self, name: str) -> dict[str, Any] | None:
+        """ヒストグラムの集計値を取得する."""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            return histogram.to_dict() if histogram is not None else None
+
+    def snapshot(self) -> dict[str, Any]:
+        """全メトリクスのスナップショットを返す."""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "histograms": {
+                    name: histogram.to_dict()
+                    for name, histogram in self._histograms.items()
+                },
+            }
+
+    def clear(self) -> None:
+        """全データをクリア（テスト用）."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+
+@lru_cache
+def get_metrics() -> MetricsRegistry:
+    """メトリクスレジストリのシングルトンを取得."""
+    return MetricsRegistry()
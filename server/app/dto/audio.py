@@ -1,5 +1,6 @@
 """音声関連のDTO定義."""
 
+from dataclasses import dataclass
 from enum import Enum
 
 from pydantic import BaseModel
@@ -13,6 +14,16 @@ class AudioFormat(str, Enum):
     PCM = "pcm"
 
 
+class SpeechSegment(BaseModel):
+    """音声クリップ内の発話区間."""
+
+    start_ms: int
+    """発話の開始位置（クリップ先頭からのミリ秒）."""
+
+    end_ms: int
+    """発話の終了位置（クリップ先頭からのミリ秒）."""
+
+
 class TranscriptionResult(BaseModel):
     """STT結果."""
 
@@ -27,3 +38,75 @@ class TranscriptionResult(BaseModel):
 
     duration_ms: int
     """音声の長さ（ミリ秒）."""
+
+    speech_segments: list[SpeechSegment] | None = None
+    """VADで検出した発話区間（VADを行っていない場合None）."""
+
+
+class StreamingTranscript(BaseModel):
+    """ストリーミング認識の途中結果または確定結果."""
+
+    text: str
+    """認識されたテキスト."""
+
+    is_final: bool
+    """発話の終わりで確定した結果か（False は途中結果）."""
+
+    confidence: float = 0.0
+    """信頼度 (0.0-1.0、確定結果のみ)."""
+
+    stability: float = 0.0
+    """途中結果が今後変わらない見込み (0.0-1.0、途中結果のみ)."""
+
+    end_time_ms: int = 0
+    """ストリーム開始からこの結果の終わりまでの音声の長さ（ミリ秒）."""
+
+
+@dataclass(frozen=True)
+class AudioClip:
+    """解析対象の音声クリップ（STT前の生データ）."""
+
+    data: bytes | memoryview
+    """音声のバイナリデータ."""
+
+    format: AudioFormat
+    """音声フォーマット."""
+
+    sample_rate: int = 16000
+    """サンプリングレート（Hz、PCM の場合に使用。WAV はヘッダーの値を使う）."""
+
+
+@dataclass(frozen=True)
+class AudioInfo:
+    """ヘッダーを解析した音声の情報（app.services.audio_probe で生成）."""
+
+    format: AudioFormat
+    """音声フォーマット."""
+
+    sample_rate: int
+    """サンプリングレート（Hz）."""
+
+    channels: int
+    """チャンネル数."""
+
+    duration_ms: int
+    """音声の長さ（ミリ秒、不明な場合は0）."""
+
+    sample_width: int = 0
+    """1サンプルのバイト数（PCM/WAV のみ。opus・解析できない場合は0）."""
+
+    is_float: bool = False
+    """サンプルが浮動小数点か（IEEE float の WAV）."""
+
+    pcm: memoryview | None = None
+    """サンプル部分（元のバッファへのビュー。opus・解析できない場合はNone）."""
+
+    @property
+    def is_linear16_mono(self) -> bool:
+        """16bit 整数 mono の PCM か."""
+        return (
+            self.pcm is not None
+            and self.sample_width == 2
+            and not self.is_float
+            and self.channels == 1
+        )
@@ -1,6 +1,7 @@
 """統合処理関連のDTO定義."""
 
 from datetime import datetime
+from enum import Enum
 
 from pydantic import BaseModel
 
@@ -30,6 +31,22 @@ class AnalysisRequest(BaseModel):
     audio_format: str | None = None
     """音声フォーマット."""
 
+    sample_rate: int = 16000
+    """音声のサンプリングレート（Hz）."""
+
+    request_id: str | None = None
+    """リクエストID（省略時はサーバーで採番）."""
+
+
+class ResponseMode(str, Enum):
+    """解析結果の配信方式（接続時に選択）."""
+
+    SINGLE = "single"
+    """全処理完了後に ANALYSIS_RESPONSE を1通送る（従来方式）."""
+
+    PROGRESSIVE = "progressive"
+    """ANALYSIS_EMOTION → ANALYSIS_TRANSCRIPT → ANALYSIS_SUGGESTIONS の順に段階配信."""
+
 
 class AnalysisResponse(BaseModel):
     """解析結果レスポンス（WebSocket）."""
@@ -54,3 +71,117 @@ class AnalysisResponse(BaseModel):
 
     processing_time_ms: int
     """処理時間."""
+
+    request_id: str | None = None
+    """リクエストID."""
+
+    is_fallback: bool = False
+    """LLMが利用できず、感情解釈から作った応答候補か."""
+
+
+class AnalysisEmotionMessage(BaseModel):
+    """段階配信: 感情解釈（STT/LLMを待たずに送信）."""
+
+    type: str = "ANALYSIS_EMOTION"
+    """メッセージタイプ."""
+
+    request_id: str
+    """リクエストID."""
+
+    timestamp: datetime
+    """サーバータイムスタンプ."""
+
+    emotion: EmotionInterpretation
+    """感情解釈."""
+
+
+class AnalysisTranscriptMessage(BaseModel):
+    """段階配信: STT結果（音声があった場合のみ送信）."""
+
+    type: str = "ANALYSIS_TRANSCRIPT"
+    """メッセージタイプ."""
+
+    request_id: str
+    """リクエストID."""
+
+    timestamp: datetime
+    """サーバータイムスタンプ."""
+
+    transcription: TranscriptionResult | None = None
+    """STT結果（認識に失敗した場合はNone）."""
+
+
+class AnalysisSuggestionMessage(BaseModel):
+    """段階配信: LLMのストリーミング生成中に完成した応答候補1件."""
+
+    type: str = "ANALYSIS_SUGGESTION"
+    """メッセージタイプ."""
+
+    request_id: str
+    """リクエストID."""
+
+    timestamp: datetime
+    """サーバータイムスタンプ."""
+
+    index: int
+    """応答候補のインデックス（0始まり）."""
+
+    suggestion: ResponseSuggestion
+    """応答候補."""
+
+
+class AnalysisSuggestionsMessage(BaseModel):
+    """段階配信: 応答候補と状況分析（最終メッセージ）."""
+
+    type: str = "ANALYSIS_SUGGESTIONS"
+    """メッセージタイプ."""
+
+    request_id: str
+    """リクエストID."""
+
+    timestamp: datetime
+    """サーバータイムスタンプ."""
+
+    suggestions: list[ResponseSuggestion]
+    """応答候補2パターン."""
+
+    situation_analysis: str
+    """状況分析."""
+
+    processing_time_ms: int
+    """処理時間."""
+
+    is_fallback: bool = False
+    """LLMが利用できず、感情解釈から作った応答候補か."""
+
+
+class TranscriptPartialMessage(BaseModel):
+    """ストリーミング認識: 発話途中の認識結果（確定するまで繰り返し更新される）."""
+
+    type: str = "TRANSCRIPT_PARTIAL"
+    """メッセージタイプ."""
+
+    timestamp: datetime
+    """サーバータイムスタンプ."""
+
+    text: str
+    """認識途中のテキスト."""
+
+    stability: float
+    """途中結果が今後変わらない見込み (0.0-1.0)."""
+
+
+class TranscriptFinalMessage(BaseModel):
+    """ストリーミング認識: 発話の終わりで確定した認識結果."""
+
+    type: str = "TRANSCRIPT_FINAL"
+    """メッセージタイプ."""
+
+    request_id: str
+    """この発話で開始した解析のリクエストID."""
+
+    timestamp: datetime
+    """サーバータイムスタンプ."""
+
+    transcription: TranscriptionResult
+    """確定した認識結果."""
@@ -0,0 +1,32 @@
+"""インスタンス間メッセージ配信（バックプレーン）の実装."""
+
+from __future__ import annotations
+
+from app.core.interfaces.backplane import Backplane
+from app.infra.backplane.in_memory_backplane import InMemoryBackplane, InMemoryBroker
+from app.infra.backplane.redis_backplane import RedisBackplane
+
+__all__ = [
+    "InMemoryBackplane",
+    "InMemoryBroker",
+    "RedisBackplane",
+    "create_backplane",
+]
+
+
+def create_backplane(url: str, channel: str) -> Backplane | None:
+    """設定のURLからバックプレーンを生成する.
+
+    Args:
+        url: 空文字の場合はバックプレーンなし（プロセス内の配信のみ）、
+            "memory://" はプロセス内、"redis://" / "rediss://" は Redis
+        channel: 使用するチャンネル名
+
+    Returns:
+        バックプレーン（使用しない場合None）
+    """
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        return InMemoryBackplane()
+    return RedisBackplane(url, channel)
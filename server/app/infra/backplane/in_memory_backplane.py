@@ -0,0 +1,56 @@
+"""プロセス内バックプレーン（単一インスタンス・テスト用）."""
+
+from __future__ import annotations
+
+import logging
+
+from app.core.interfaces.backplane import Backplane, BackplaneHandler
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryBroker:
+    """同一プロセス内の InMemoryBackplane 同士をつなぐブローカー."""
+
+    def __init__(self) -> None:
+        self._handlers: list[BackplaneHandler] = []
+
+    def subscribe(self, handler: BackplaneHandler) -> None:
+        self._handlers.append(handler)
+
+    def unsubscribe(self, handler: BackplaneHandler) -> None:
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+
+    async def publish(self, data: bytes) -> None:
+        for handler in list(self._handlers):
+            try:
+                await handler(data)
+            except Exception:
+                logger.exception("Backplane handler failed")
+
+
+class InMemoryBackplane(Backplane):
+    """InMemoryBroker を介してメッセージを配信するバックプレーン.
+
+    broker を共有した複数のインスタンス（ConnectionManager）を1プロセス内で
+    つなぐ。broker を省略した場合は自分自身にだけ届く。
+    """
+
+    def __init__(self, broker: InMemoryBroker | None = None) -> None:
+        self._broker = broker or InMemoryBroker()
+        self._handler: BackplaneHandler | None = None
+
+    async def start(self, handler: BackplaneHandler) -> None:
+        if self._handler is not None:
+            self._broker.unsubscribe(self._handler)
+        self._handler = handler
+        self._broker.subscribe(handler)
+
+    async def publish(self, data: bytes) -> None:
+        await self._broker.publish(data)
+
+    async def close(self) -> None:
+        if self._handler is not None:
+            self._broker.unsubscribe(self._handler)
+            self._handler = None
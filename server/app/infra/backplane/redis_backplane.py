@@ -0,0 +1,240 @@
+"""Redis pub/sub バックプレーン（複数インスタンス間の配信用）.
+
+外部クライアントライブラリは使わず、asyncio のストリームで RESP（Redis
+シリアライゼーションプロトコル）を直接話す。使うコマンドは AUTH / SUBSCRIBE /
+PUBLISH のみで、Redis 互換のサーバー（Memorystore, Valkey など）で動作する。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from urllib.parse import unquote, urlsplit
+
+from app.core.exceptions import BackplaneError
+from app.core.interfaces.backplane import Backplane, BackplaneHandler
+from app.core.metrics import MetricsRegistry, get_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 6379
+
+_Reply = bytes | int | list["_Reply"] | None
+_Connection = tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+def encode_command(*args: str | bytes) -> bytes:
+    """コマンドを RESP の配列としてエンコードする."""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg.encode() if isinstance(arg, str) else arg
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> _Reply:
+    """RESP の応答を1つ読み取る.
+
+    Raises:
+        BackplaneError: エラー応答、または不正な応答の場合
+        asyncio.IncompleteReadError: 接続が閉じられた場合
+    """
+    try:
+        line = await reader.readuntil(b"\r\n")
+    except asyncio.LimitOverrunError as e:
+        raise BackplaneError("RESP reply line too long") from e
+    prefix, body = line[:1], line[1:-2]
+    if prefix == b"+":
+        return body
+    if prefix == b"-":
+        raise BackplaneError(body.decode(errors="replace"))
+    if prefix == b":":
+        return _parse_int(body)
+    if prefix == b"$":
+        length = _parse_int(body)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        if data[-2:] != b"\r\n":
+            raise BackplaneError(f"Malformed RESP bulk string: {data[-2:]!r}")
+        return data[:-2]
+    if prefix == b"*":
+        count = _parse_int(body)
+        if count < 0:
+            return None
+        return [await read_reply(reader) for _ in range(count)]
+    raise BackplaneError(f"Unexpected RESP reply: {line!r}")
+
+
+def _parse_int(body: bytes) -> int:
+    try:
+        return int(body)
+    except ValueError:
+        raise BackplaneError(f"Malformed RESP integer: {body!r}") from None
+
+
+class RedisBackplane(Backplane):
+    """Redis の1チャンネルを使うバックプレーン.
+
+    購読用と publish 用に1本ずつ接続を持つ。購読用の接続が切れた場合は
+    指数バックオフで再接続し、publish 用の接続は失敗時に1度だけ張り直す。
+    Redis が停止している間もプロセス内の配信は継続できるよう、start() は
+    connect_timeout を過ぎたら購読の完了を待たずに戻る。
+    """
+
+    def __init__(
+        self,
+        url: str,
+        channel: str,
+        connect_timeout: float = 5.0,
+        reconnect_delay: float = 0.5,
+        max_reconnect_delay: float = 10.0,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        """
+        初期化.
+
+        Args:
+            url: 接続先（redis://[[user]:password@]host[:port] / rediss:// はTLS）
+            channel: 使用するチャンネル名
+            connect_timeout: 接続・応答待ちの期限（秒）
+            reconnect_delay: 購読の再接続までの初回待機時間（秒）
+            max_reconnect_delay: 再接続の待機時間の上限（秒）
+            metrics: メトリクスレジストリ（省略時はグローバル）
+        """
+        parsed = urlsplit(url)
+        if parsed.scheme not in ("redis", "rediss"):
+            raise ValueError(f"Unsupported backplane URL scheme: {parsed.scheme}")
+        self._host = parsed.hostname or "localhost"
+        self._port = parsed.port or DEFAULT_PORT
+        self._ssl = parsed.scheme == "rediss"
+        self._username = unquote(parsed.username) if parsed.username else None
+        self._password = unquote(parsed.password) if parsed.password else None
+        self._channel = channel
+        self._connect_timeout = connect_timeout
+        self._reconnect_delay = reconnect_delay
+        self._max_reconnect_delay = max_reconnect_delay
+        self._metrics = metrics or get_metrics()
+        self._handler: BackplaneHandler | None = None
+        self._subscribed = asyncio.Event()
+        self._subscribe_task: asyncio.Task[None] | None = None
+        self._publisher: _Connection | None = None
+        self._publish_lock = asyncio.Lock()
+        self._closed = False
+
+    async def start(self, handler: BackplaneHandler) -> None:
+        self._handler = handler
+        self._closed = False
+        if self._subscribe_task is None:
+            self._subscribe_task = asyncio.create_task(self._subscribe_loop())
+        try:
+            await asyncio.wait_for(self._subscribed.wait(), self._connect_timeout)
+        except TimeoutError:
+            logger.warning(
+                "Backplane subscription to %s:%d not ready, retrying in background",
+                self._host,
+                self._port,
+            )
+
+    async def publish(self, data: bytes) -> None:
+        command = encode_command(b"PUBLISH", self._channel, data)
+        async with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    if self._publisher is None:
+                        self._publisher = await self._open()
+                    reader, writer = self._publisher
+                    writer.write(command)
+                    await writer.drain()
+                    await asyncio.wait_for(read_reply(reader), self._connect_timeout)
+                    return
+                except (OSError, TimeoutError, asyncio.IncompleteReadError) as e:
+                    self._close_publisher()
+                    if attempt:
+                        raise BackplaneError(f"Backplane publish failed: {e}") from e
+                except BackplaneError:
+                    # 応答の途中で失敗した接続は再利用しない
+                    self._close_publisher()
+                    raise
+
+    async def close(self) -> None:
+        self._closed = True
+        self._handler = None
+        if self._subscribe_task is not None:
+            self._subscribe_task.cancel()
+            await asyncio.gather(self._subscribe_task, return_exceptions=True)
+            self._subscribe_task = None
+        self._subscribed.clear()
+        async with self._publish_lock:
+            self._close_publisher()
+
+    async def _open(self) -> _Connection:
+        """接続を開き、必要であれば認証する."""
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self._host, self._port, ssl=self._ssl or None),
+            self._connect_timeout,
+        )
+        try:
+            if self._password is not None:
+                auth = (
+                    (self._username, self._password)
+                    if self._username
+                    else (self._password,)
+                )
+                writer.write(encode_command(b"AUTH", *auth))
+                await writer.drain()
+                await asyncio.wait_for(read_reply(reader), self._connect_timeout)
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    def _close_publisher(self) -> None:
+        if self._publisher is not None:
+            self._publisher[1].close()
+            self._publisher = None
+
+    async def _subscribe_loop(self) -> None:
+        delay = self._reconnect_delay
+        while not self._closed:
+            try:
+                reader, writer = await self._open()
+                try:
+                    writer.write(encode_command(b"SUBSCRIBE", self._channel))
+                    await writer.drain()
+                    while True:
+                        reply = await read_reply(reader)
+                        if not isinstance(reply, list) or len(reply) < 3:
+                            continue
+                        if reply[0] == b"subscribe":
+                            self._subscribed.set()
+                            delay = self._reconnect_delay
+                        elif reply[0] == b"message" and isinstance(reply[2], bytes):
+                            await self._dispatch(reply[2])
+                finally:
+                    writer.close()
+            except asyncio.CancelledError:
+                raise
+            except (
+                OSError,
+                TimeoutError,
+                asyncio.IncompleteReadError,
+                BackplaneError,
+            ) as e:
+                self._subscribed.clear()
+                self._metrics.increment("backplane.reconnects")
+                logger.warning(
+                    "Backplane subscription lost (%s), reconnecting in %.1fs",
+                    e,
+                    delay,
+                )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self._max_reconnect_delay)
+
+    async def _dispatch(self, data: bytes) -> None:
+        if self._handler is None:
+            return
+        try:
+            await self._handler(data)
+        except Exception:
+            logger.exception("Backplane handler failed")
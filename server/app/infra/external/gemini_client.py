@@ -1,3 +1,5 @@
+from typing import ClassVar
+
 from google.oauth2 import service_account
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_google_vertexai import ChatVertexAI
@@ -15,6 +17,9 @@ class LLMClientFactory:
     - Cloud Run: 自動でサービスアカウントから認証情報を取得
     """
 
+    # get_client で生成したプロバイダーごとのクライアント
+    _warm_clients: ClassVar[dict[str, BaseChatModel]] = {}
+
     @staticmethod
     def _resolve_model_id(model_id: str, project: str, location: str) -> str:
         """モデルIDを適切な形式に変換する.
@@ -66,6 +71,61 @@ class LLMClientFactory:
             temperature=settings.LLM_TEMPERATURE,
         )
 
+    @staticmethod
+    def model_name() -> str:
+        """create_client が生成するクライアントのモデル名（"プロバイダー:モデル"）."""
+        settings = get_settings()
+        if settings.LLM_PROVIDER == "groq":
+            return f"groq:{settings.GROQ_MODEL}"
+        if settings.LLM_PROVIDER in ("race", "route"):
+            return (
+                f"{settings.LLM_PROVIDER}:groq:{settings.GROQ_MODEL}"
+                f"+gemini:{settings.FT_MODEL_ID}"
+            )
+        return f"gemini:{settings.FT_MODEL_ID}"
+
+    @staticmethod
+    def get_client(provider: str) -> BaseChatModel:
+        """プロバイダーのクライアントを返す.
+
+        生成したクライアントは保持して再利用する（接続を温めたまま複数の
+        プロバイダーを切り替えられるようにする）。
+
+        Args:
+            provider: "groq" または "gemini"
+
+        Raises:
+            ValueError: 未知のプロバイダーが指定された場合
+        """
+        client = LLMClientFactory._warm_clients.get(provider)
+        if client is not None:
+            return client
+        if provider == "groq":
+            client = LLMClientFactory.create_groq_client()
+        elif provider == "gemini":
+            client = LLMClientFactory.create_ft_client()
+        else:
+            raise ValueError(f"Unknown provider: '{provider}'")
+        LLMClientFactory._warm_clients[provider] = client
+        return client
+
+    @staticmethod
+    def get_clients() -> dict[str, BaseChatModel]:
+        """LLM_PROVIDER="race" / "route" で使う全てのクライアントを返す.
+
+        Returns:
+            プロバイダー名（"groq" / "gemini"）ごとのクライアント
+        """
+        return {
+            provider: LLMClientFactory.get_client(provider)
+            for provider in ("groq", "gemini")
+        }
+
+    @staticmethod
+    def clear_clients() -> None:
+        """保持しているクライアントを破棄する（設定の変更時など）."""
+        LLMClientFactory._warm_clients.clear()
+
     @staticmethod
     def create_client() -> BaseChatModel:
         """設定に基づいてLLMクライアントを生成する.
@@ -73,6 +133,7 @@ class LLMClientFactory:
         LLM_PROVIDER設定に基づいて適切なクライアントを返す:
         - "groq": Groq API (高速)
         - "gemini" or "": Vertex AI Gemini (FTモデル対応)
+        - "race" / "route": Vertex AI Gemini（両方のクライアントは get_clients で取得する）
 
         Raises:
             ValueError: 未知のLLM_PROVIDERが指定された場合
@@ -80,9 +141,9 @@ class LLMClientFactory:
         settings = get_settings()
         if settings.LLM_PROVIDER == "groq":
             return LLMClientFactory.create_groq_client()
-        if settings.LLM_PROVIDER in ("", "gemini"):
+        if settings.LLM_PROVIDER in ("", "gemini", "race", "route"):
             return LLMClientFactory.create_ft_client()
         raise ValueError(
             f"Unknown LLM_PROVIDER: '{settings.LLM_PROVIDER}'. "
-            "Must be 'gemini' or 'groq'."
+            "Must be 'gemini', 'groq', 'race' or 'route'."
         )
@@ -15,6 +15,7 @@ from __future__ import annotations
 import json
 import logging
 import os
+import re
 from typing import Any, cast
 
 import firebase_admin
@@ -26,6 +27,8 @@ logger = logging.getLogger(__name__)
 
 _app: firebase_admin.App | None = None
 
+_MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
 
 def initialize_firebase() -> firebase_admin.App:
     """Firebase Admin SDK を初期化し、App インスタンスを返す。
@@ -70,11 +73,12 @@ def get_firebase_app() -> firebase_admin.App:
     return _app
 
 
-def verify_id_token(id_token: str) -> dict[str, Any]:
+def verify_id_token(id_token: str, check_revoked: bool = False) -> dict[str, Any]:
     """Firebase ID Token を検証し、デコード済みクレームを返す。
 
     Args:
         id_token: クライアントから受け取った Firebase ID Token
+        check_revoked: トークンが失効済みでないかも確認する（Auth API を呼び出す）
 
     Returns:
         デコード済みトークンクレーム (uid, email 等を含む辞書)
@@ -85,9 +89,59 @@ def verify_id_token(id_token: str) -> dict[str, Any]:
         firebase_admin.auth.RevokedIdTokenError: トークンが失効済みの場合
     """
     get_firebase_app()
+    if check_revoked:
+        return cast(dict[str, Any], auth.verify_id_token(id_token, check_revoked=True))
     return cast(dict[str, Any], auth.verify_id_token(id_token))
 
 
+def fetch_public_keys(force_refresh: bool = False) -> float | None:
+    """ID Token の署名検証に使う公開鍵（証明書）を取得する。
+
+    firebase_admin は証明書を HTTP の Cache-Control に従ってキャッシュするため、
+    検証に使うのと同じリクエストオブジェクトで事前に取得しておけば、
+    リクエスト処理中に証明書のダウンロードが発生しない。
+    エミュレータ利用時は証明書を使わないため何もしない。
+
+    リクエストオブジェクトは firebase_admin の非公開の属性から取り出すため、
+    SDK の更新で取り出せなくなった場合は警告を出して何もしない
+    （検証時に verify_id_token が従来どおり証明書を取得する）。
+
+    Args:
+        force_refresh: キャッシュを使わずに取得し直す（期限前の更新用）
+
+    Returns:
+        証明書の有効期間（秒、Cache-Control の max-age）。不明な場合、
+        または事前取得できない場合None
+
+    Raises:
+        RuntimeError: 証明書の取得に失敗した場合
+    """
+    if os.environ.get("FIREBASE_AUTH_EMULATOR_HOST"):
+        return None
+
+    app = get_firebase_app()
+    # 検証時と同じ（HTTPキャッシュ付きの）リクエストオブジェクトを使う
+    try:
+        from firebase_admin import _token_gen
+
+        cert_uri = _token_gen.ID_TOKEN_CERT_URI
+        request = auth._get_client(app)._token_verifier.request
+    except (ImportError, AttributeError) as exc:
+        logger.warning(
+            "公開鍵を事前取得できません（firebase_admin の内部構造が変わった可能性）。"
+            "検証時の取得に任せます: %s",
+            exc,
+        )
+        return None
+    headers = {"Cache-Control": "no-cache"} if force_refresh else None
+    response = request(cert_uri, method="GET", headers=headers)
+    if response.status != 200:
+        raise RuntimeError(f"Failed to fetch public keys: HTTP {response.status}")
+
+    match = _MAX_AGE_PATTERN.search(response.headers.get("Cache-Control", ""))
+    return float(match.group(1)) if match else None
+
+
 def _build_credentials(emulator_host: str) -> credentials.Base | None:
     """環境に応じた認証情報を生成する。
 
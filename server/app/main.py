@@ -1,17 +1,51 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from app.api.dependencies import (
+    aclose_llm_service,
+    aclose_streaming_transcription,
+    get_connection_manager,
+)
 from app.api.routers.health import router as health_router
+from app.api.routers.metrics import router as metrics_router
 from app.api.routers.realtime import router as realtime_router
 from app.api.routers.sessions import router as sessions_router
+from app.core.config import get_settings
+from app.infra.firebase import fetch_public_keys
 from app.middleware.cors import apply_cors
+from app.services.public_key_refresher import PublicKeyRefresher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """起動時にインスタンス間配信と公開鍵の取得を開始し、終了時に停止する."""
+    settings = get_settings()
+    # リクエスト処理中に証明書のダウンロードが発生しないよう、起動時に取得しておく
+    key_refresher = PublicKeyRefresher(
+        fetch_public_keys, refresh_margin=settings.AUTH_CERT_REFRESH_MARGIN_SECONDS
+    )
+    if not settings.DEV_AUTH_BYPASS:
+        await key_refresher.start()
+    connection_manager = get_connection_manager()
+    await connection_manager.start()
+    try:
+        yield
+    finally:
+        await connection_manager.aclose()
+        await aclose_streaming_transcription()
+        await aclose_llm_service()
+        await key_refresher.aclose()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
 
     apply_cors(app)
 
     app.include_router(health_router, prefix="/api")
+    app.include_router(metrics_router, prefix="/api")
     app.include_router(realtime_router, prefix="/api")
     app.include_router(sessions_router, prefix="/api")
 
@@ -0,0 +1,332 @@
+"""セッション単位の解析キュー（Latest-wins 統合）."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass, field
+from typing import TypeVar
+
+from app.core.metrics import MetricsRegistry, get_metrics
+from app.dto.audio import AudioClip, TranscriptionResult
+from app.dto.processing import AnalysisResponse
+from app.services.response_generator import (
+    AnalysisStageMessage,
+    ResponseGeneratorService,
+)
+
+logger = logging.getLogger(__name__)
+
+ResultHandler = Callable[[str, AnalysisResponse], Awaitable[None]]
+StageHandler = Callable[[str, AnalysisStageMessage], Awaitable[None]]
+
+_T = TypeVar("_T")
+
+
+@dataclass
+class _AnalysisJob:
+    """キュー内の解析ジョブ."""
+
+    session_id: str
+    emotion_scores: dict[str, float]
+    audio_clips: list[AudioClip]
+    future: asyncio.Future[AnalysisResponse | None]
+    request_id: str | None = None
+    transcripts: list[TranscriptionResult] = field(default_factory=list)
+
+    @property
+    def has_audio(self) -> bool:
+        """発話（音声クリップまたは認識済みテキスト）を含むか."""
+        return bool(self.audio_clips or self.transcripts)
+
+
+@dataclass
+class _SessionState:
+    """セッションごとの実行状態."""
+
+    running: asyncio.Task[None] | None = None
+    running_job: _AnalysisJob | None = None
+    pending: _AnalysisJob | None = None
+    cancel_reason: str | None = None
+
+
+@dataclass(frozen=True)
+class AnalysisQueueStats:
+    """解析キューの統計."""
+
+    submitted: int
+    processed: int
+    dropped: int
+    merged: int
+    cancelled: int
+
+
+class AnalysisQueue:
+    """ResponseGeneratorService の前段に置くセッション単位の解析キュー.
+
+    1セッションにつき同時に実行する解析は1つだけ。実行中に届いたリクエストは
+    待機スロット（1件）に入り、"latest wins" ポリシーで統合される:
+
+    - 音声なし同士: 新しいリクエストが古いものを置き換える（dropped）
+    - どちらかが音声あり: 音声クリップ（とストリーミング認識で確定済みの発話）を
+      連結し、感情スコアは最新のものを使う（merged）。解析が遅い間に溜まり続けない
+      よう、それぞれ直近 max_merged_clips 件までとし、古いものから破棄する
+      （``analysis_queue.trimmed_clips``）
+
+    統合された側のリクエストは None で完了する。解析結果は on_result で
+    セッションに配信される。on_stage を指定した場合は段階ごとの部分結果も
+    配信される（統合後のジョブは最新リクエストの request_id を引き継ぐ）。
+
+    実行中の解析は以下の場合にキャンセルされる（Futureは None で完了）:
+
+    - RESET / セッションの全接続の切断（cancel_session）
+    - 音声なしの解析の実行中に音声ありのリクエストが届いた場合（superseded）。
+      音声ありの解析は発話を失わないよう、置き換えではキャンセルしない
+    """
+
+    def __init__(
+        self,
+        response_generator: ResponseGeneratorService,
+        on_result: ResultHandler,
+        metrics: MetricsRegistry | None = None,
+        on_stage: StageHandler | None = None,
+        max_merged_clips: int = 8,
+    ) -> None:
+        """
+        初期化.
+
+        Args:
+            response_generator: 応答生成サービス
+            on_result: 解析結果の配信先（session_id, 結果）
+            metrics: メトリクスレジストリ（省略時はグローバル）
+            on_stage: 段階配信メッセージの配信先（session_id, メッセージ）
+            max_merged_clips: 統合する音声クリップ・確定済み発話の上限
+        """
+        if max_merged_clips < 1:
+            raise ValueError("max_merged_clips must be >= 1")
+        self._generator = response_generator
+        self._on_result = on_result
+        self._on_stage = on_stage
+        self._metrics = metrics or get_metrics()
+        self._max_merged_clips = max_merged_clips
+        self._states: dict[str, _SessionState] = {}
+        self._submitted = 0
+        self._processed = 0
+        self._dropped = 0
+        self._merged = 0
+        self._cancelled = 0
+
+    @property
+    def stats(self) -> AnalysisQueueStats:
+        """現在までの統計を返す."""
+        return AnalysisQueueStats(
+            submitted=self._submitted,
+            processed=self._processed,
+            dropped=self._dropped,
+            merged=self._merged,
+            cancelled=self._cancelled,
+        )
+
+    def submit(
+        self,
+        session_id: str,
+        emotion_scores: dict[str, float],
+        audio_clips: Sequence[AudioClip] = (),
+        request_id: str | None = None,
+        transcripts: Sequence[TranscriptionResult] = (),
+    ) -> asyncio.Future[AnalysisResponse | None]:
+        """解析リクエストを投入する.
+
+        Args:
+            session_id: セッションID
+            emotion_scores: 感情スコア
+            audio_clips: 音声クリップ（音声なしの場合は空）
+            request_id: リクエストID
+            transcripts: ストリーミング認識で確定済みの発話（STT不要）
+
+        Returns:
+            解析結果のFuture。後続のリクエストに統合された場合は None で完了する
+        """
+        loop = asyncio.get_running_loop()
+        job = _AnalysisJob(
+            session_id=session_id,
+            emotion_scores=emotion_scores,
+            audio_clips=list(audio_clips),
+            future=loop.create_future(),
+            request_id=request_id,
+            transcripts=list(transcripts),
+        )
+        job.future.add_done_callback(_consume_exception)
+        self._submitted += 1
+        self._metrics.increment("analysis_queue.submitted")
+
+        state = self._states.setdefault(session_id, _SessionState())
+        if state.running is None:
+            self._start(state, job)
+        else:
+            self._coalesce(state, job)
+        return job.future
+
+    async def cancel_session(self, session_id: str, reason: str) -> bool:
+        """セッションの実行中・待機中の解析をキャンセルする.
+
+        キャンセルされたタスクの終了まで待機するため、戻った時点で
+        そのセッションの会話履歴が解析によって更新されることはない。
+
+        Args:
+            session_id: セッションID
+            reason: キャンセル理由（"reset", "disconnect" など。メトリクスに記録）
+
+        Returns:
+            キャンセル対象があった場合True
+        """
+        state = self._states.get(session_id)
+        if state is None:
+            return False
+
+        pending = state.pending
+        state.pending = None
+        if pending is not None:
+            _resolve(pending.future, None)
+            self._record_cancel(reason)
+
+        running = state.running
+        if running is None or running.done():
+            return pending is not None
+
+        state.cancel_reason = reason
+        running.cancel()
+        await asyncio.gather(running, return_exceptions=True)
+        logger.info("Session %s: analysis cancelled (%s)", session_id, reason)
+        return True
+
+    def _coalesce(self, state: _SessionState, job: _AnalysisJob) -> None:
+        """実行中のセッションに届いたジョブを待機スロットに統合する."""
+        running_job = state.running_job
+        if (
+            job.has_audio
+            and running_job is not None
+            and not running_job.has_audio
+            and state.running is not None
+            and state.cancel_reason is None
+        ):
+            # 新しい発話が届いたので、音声なしの解析結果は古くなる
+            state.cancel_reason = "superseded"
+            state.running.cancel()
+
+        previous = state.pending
+        if previous is None:
+            state.pending = job
+            return
+
+        if not previous.has_audio and not job.has_audio:
+            self._dropped += 1
+            self._metrics.increment("analysis_queue.dropped")
+            logger.info("Session %s: superseded emotion-only request", job.session_id)
+        else:
+            job.audio_clips = self._trim(previous.audio_clips + job.audio_clips)
+            job.transcripts = self._trim(previous.transcripts + job.transcripts)
+            self._merged += 1
+            self._metrics.increment("analysis_queue.merged")
+            logger.info(
+                "Session %s: merged request (%d audio clips)",
+                job.session_id,
+                len(job.audio_clips),
+            )
+
+        _resolve(previous.future, None)
+        state.pending = job
+
+    def _trim(self, items: list[_T]) -> list[_T]:
+        """直近 max_merged_clips 件に減らし、破棄した件数を記録する."""
+        overflow = len(items) - self._max_merged_clips
+        if overflow <= 0:
+            return items
+        self._metrics.increment("analysis_queue.trimmed_clips", overflow)
+        return items[overflow:]
+
+    def _start(self, state: _SessionState, job: _AnalysisJob) -> None:
+        task = asyncio.create_task(self._run(job))
+        state.running = task
+        state.running_job = job
+        state.cancel_reason = None
+        # 開始前にキャンセルされた場合も後処理されるよう done callback で進める
+        task.add_done_callback(lambda t: self._on_job_done(job, t))
+
+    async def _run(self, job: _AnalysisJob) -> None:
+        """ジョブを実行し、結果を配信する."""
+        try:
+            result = await self._generator.process(
+                session_id=job.session_id,
+                emotion_scores=job.emotion_scores,
+                audio_clips=job.audio_clips,
+                request_id=job.request_id,
+                on_stage=self._stage_callback(job.session_id),
+                transcripts=job.transcripts,
+            )
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+            else:
+                logger.error("Analysis failed for session %s: %s", job.session_id, e)
+            return
+
+        self._processed += 1
+        self._metrics.increment("analysis_queue.processed")
+        _resolve(job.future, result)
+        try:
+            await self._on_result(job.session_id, result)
+        except Exception:
+            logger.exception("Failed to deliver analysis result")
+
+    def _stage_callback(
+        self, session_id: str
+    ) -> Callable[[AnalysisStageMessage], Awaitable[None]] | None:
+        on_stage = self._on_stage
+        if on_stage is None:
+            return None
+
+        async def emit(message: AnalysisStageMessage) -> None:
+            await on_stage(session_id, message)
+
+        return emit
+
+    def _on_job_done(self, job: _AnalysisJob, task: asyncio.Task[None]) -> None:
+        """ジョブ終了時の後処理。待機中のジョブがあれば開始する."""
+        state = self._states.get(job.session_id)
+        if task.cancelled():
+            reason = (state.cancel_reason if state else None) or "cancelled"
+            self._record_cancel(reason)
+        _resolve(job.future, None)
+
+        if state is None or state.running is not task:
+            return
+        next_job = state.pending
+        state.pending = None
+        state.running = None
+        state.running_job = None
+        state.cancel_reason = None
+        if next_job is not None:
+            self._start(state, next_job)
+        else:
+            self._states.pop(job.session_id, None)
+
+    def _record_cancel(self, reason: str) -> None:
+        self._cancelled += 1
+        self._metrics.increment("analysis_queue.cancelled")
+        self._metrics.increment(f"analysis_queue.cancelled.{reason}")
+
+
+def _resolve(
+    future: asyncio.Future[AnalysisResponse | None],
+    result: AnalysisResponse | None,
+) -> None:
+    if not future.done():
+        future.set_result(result)
+
+
+def _consume_exception(future: asyncio.Future[AnalysisResponse | None]) -> None:
+    """待機者がいなくなったFutureの例外を回収する（未取得警告の抑止）."""
+    if not future.cancelled():
+        future.exception()
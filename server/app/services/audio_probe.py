@@ -0,0 +1,296 @@
+"""音声ヘッダーの解析と LINEAR16 への正規化.
+
+アップロードされた音声のヘッダーを1度だけ解析して AudioInfo にまとめ、
+長さの計算・認識設定・VAD で共有する。
+
+- WAV: RIFF チャンクを走査し、fmt（PCM / IEEE float / WAVE_FORMAT_EXTENSIBLE）と
+  data チャンクを読む
+- PCM: 呼び出し側が指定したサンプリングレートとチャンネル数の 16bit PCM
+- Ogg/Opus: ページヘッダーだけを読み、OpusHead のチャンネル数・入力サンプリング
+  レートと、最後のページのグラニュール位置から長さを求める（デコードはしない）
+"""
+
+from __future__ import annotations
+
+import struct
+from functools import lru_cache
+
+import numpy as np
+import numpy.typing as npt
+
+from app.dto.audio import AudioFormat, AudioInfo
+
+# 認識に送る LINEAR16 のサンプリングレート上限（音声認識にはこれで十分）
+TARGET_SAMPLE_RATE = 16000
+
+# ダウンサンプリング前のローパスの通過域の上限（変換後のナイキスト周波数に対する比）
+_LOWPASS_PASSBAND = 0.9
+# ローパスの阻止域の減衰量（dB）
+_LOWPASS_ATTENUATION_DB = 80.0
+
+# Opus のグラニュール位置は常に 48kHz のサンプル数
+_OPUS_GRANULE_RATE = 48000
+# Speech-to-Text が OGG_OPUS で受け付けるサンプリングレート
+_OPUS_SAMPLE_RATES = frozenset({8000, 12000, 16000, 24000, 48000})
+
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+_OGG_PAGE_HEADER = struct.Struct("<4sBBqIIIB")
+
+
+def probe_audio(
+    data: bytes | memoryview,
+    format: AudioFormat,
+    sample_rate: int = 16000,
+    channels: int = 1,
+) -> AudioInfo:
+    """
+    音声のヘッダーを解析する.
+
+    ヘッダーを解析できない場合も例外にはせず、指定値と長さ0の AudioInfo を返す
+    （pcm は None。認識は元のデータのまま行う）。
+
+    Args:
+        data: 音声データ
+        format: 音声フォーマット
+        sample_rate: PCM のサンプリングレート（WAV/Opus はヘッダーの値を使う）
+        channels: PCM のチャンネル数
+
+    Returns:
+        AudioInfo: 解析結果
+    """
+    view = memoryview(data).cast("B")
+    info: AudioInfo | None
+    try:
+        if format == AudioFormat.WAV:
+            info = _probe_wav(view)
+        elif format == AudioFormat.OPUS:
+            info = _probe_ogg_opus(view, sample_rate)
+        else:
+            info = _pcm_info(
+                AudioFormat.PCM, view, sample_rate, channels, 2, is_float=False
+            )
+    except struct.error:
+        # ヘッダーが途中で切れている
+        info = None
+    return info or AudioInfo(
+        format=format, sample_rate=sample_rate, channels=channels, duration_ms=0
+    )
+
+
+def to_linear16(
+    info: AudioInfo, max_sample_rate: int = TARGET_SAMPLE_RATE
+) -> AudioInfo:
+    """
+    PCM/WAV の音声を 16bit mono、max_sample_rate 以下の PCM に変換する.
+
+    ステレオはチャンネルの平均で mono にし、max_sample_rate を超える場合は
+    ダウンサンプリングする（ローパスで変換後のナイキスト周波数を超える成分を
+    落としてから、整数比は間引き、それ以外は線形補間）。
+    変換が不要な場合と、サンプルを持たない場合（opus など）は info をそのまま返す。
+
+    Args:
+        info: probe_audio の結果
+        max_sample_rate: サンプリングレートの上限
+
+    Returns:
+        AudioInfo: 変換後の音声（format は PCM）
+    """
+    if info.pcm is None:
+        return info
+    if info.is_linear16_mono and info.sample_rate <= max_sample_rate:
+        return info
+
+    samples = _decode_samples(info)
+    mono = samples.mean(axis=1) if info.channels > 1 else samples[:, 0]
+    rate = info.sample_rate
+    if rate > max_sample_rate:
+        mono = _resample(mono, rate, max_sample_rate)
+        rate = max_sample_rate
+
+    pcm = np.clip(np.rint(mono * 32768.0), -32768, 32767).astype("<i2").tobytes()
+    return AudioInfo(
+        format=AudioFormat.PCM,
+        sample_rate=rate,
+        channels=1,
+        duration_ms=info.duration_ms,
+        sample_width=2,
+        pcm=memoryview(pcm),
+    )
+
+
+def _pcm_info(
+    format: AudioFormat,
+    pcm: memoryview,
+    sample_rate: int,
+    channels: int,
+    sample_width: int,
+    is_float: bool,
+) -> AudioInfo | None:
+    if sample_rate <= 0 or channels <= 0 or sample_width <= 0:
+        return None
+    frame_size = sample_width * channels
+    frames = len(pcm) // frame_size
+    return AudioInfo(
+        format=format,
+        sample_rate=sample_rate,
+        channels=channels,
+        duration_ms=frames * 1000 // sample_rate,
+        sample_width=sample_width,
+        is_float=is_float,
+        pcm=pcm[: frames * frame_size],
+    )
+
+
+def _probe_wav(view: memoryview) -> AudioInfo | None:
+    """RIFF/WAVE のチャンクを走査して fmt と data を読む."""
+    if len(view) < 12 or view[0:4] != b"RIFF" or view[8:12] != b"WAVE":
+        return None
+
+    fmt: tuple[int, int, int, int] | None = None
+    offset = 12
+    while offset + 8 <= len(view):
+        chunk_id = bytes(view[offset : offset + 4])
+        (size,) = struct.unpack_from("<I", view, offset + 4)
+        body = offset + 8
+        if chunk_id == b"fmt " and size >= 16:
+            tag, channels, rate, _, _, bits = struct.unpack_from("<HHIIHH", view, body)
+            if tag == _WAVE_FORMAT_EXTENSIBLE and size >= 26:
+                # SubFormat GUID の先頭2バイトが実際のフォーマット
+                (tag,) = struct.unpack_from("<H", view, body + 24)
+            fmt = (tag, channels, rate, bits)
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            tag, channels, rate, bits = fmt
+            if tag not in (_WAVE_FORMAT_PCM, _WAVE_FORMAT_IEEE_FLOAT) or bits % 8:
+                return None
+            is_float = tag == _WAVE_FORMAT_IEEE_FLOAT
+            if is_float and bits != 32:
+                return None
+            # 録音中に書き出された WAV はサイズが不正なことがあるため、実データで切る
+            data = view[body : min(body + size, len(view))]
+            return _pcm_info(AudioFormat.WAV, data, rate, channels, bits // 8, is_float)
+        # チャンクは2バイト境界に揃えられる
+        offset = body + size + (size & 1)
+    return None
+
+
+def _probe_ogg_opus(view: memoryview, default_rate: int) -> AudioInfo | None:
+    """Ogg のページヘッダーを走査して OpusHead と最後のグラニュール位置を読む."""
+    channels = 0
+    pre_skip = 0
+    input_rate = 0
+    last_granule = -1
+    offset = 0
+    while offset + _OGG_PAGE_HEADER.size <= len(view):
+        capture, _, _, granule, _, _, _, segments = _OGG_PAGE_HEADER.unpack_from(
+            view, offset
+        )
+        if capture != b"OggS":
+            break
+        table = offset + _OGG_PAGE_HEADER.size
+        if table + segments > len(view):
+            break
+        body = table + segments
+        body_size = sum(view[table:body])
+        if channels == 0 and view[body : body + 8] == b"OpusHead":
+            if body + 16 > len(view):
+                return None
+            channels = view[body + 9]
+            (pre_skip,) = struct.unpack_from("<H", view, body + 10)
+            (input_rate,) = struct.unpack_from("<I", view, body + 12)
+        if granule >= 0:
+            last_granule = granule
+        offset = body + body_size
+
+    if channels == 0:
+        return None
+    samples = max(last_granule - pre_skip, 0)
+    return AudioInfo(
+        format=AudioFormat.OPUS,
+        sample_rate=input_rate if input_rate in _OPUS_SAMPLE_RATES else default_rate,
+        channels=channels,
+        duration_ms=samples * 1000 // _OPUS_GRANULE_RATE,
+    )
+
+
+def _decode_samples(info: AudioInfo) -> npt.NDArray[np.float32]:
+    """サンプルを -1.0〜1.0 の float32 の (フレーム数, チャンネル数) 配列にする."""
+    assert info.pcm is not None
+    width = info.sample_width
+    if info.is_float:
+        values = np.frombuffer(info.pcm, dtype="<f4")
+    elif width == 1:
+        # 8bit WAV は符号なし
+        values = (
+            np.frombuffer(info.pcm, dtype=np.uint8).astype(np.float32) - 128
+        ) / 128
+    elif width == 2:
+        values = np.frombuffer(info.pcm, dtype="<i2") / np.float32(32768)
+    elif width == 3:
+        raw = np.frombuffer(info.pcm, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+        values = ints / np.float32(1 << 23)
+    elif width == 4:
+        values = np.frombuffer(info.pcm, dtype="<i4") / np.float32(1 << 31)
+    else:
+        raise ValueError(f"Unsupported sample width: {width}")
+    return values.astype(np.float32, copy=False).reshape(-1, info.channels)
+
+
+def _resample(
+    samples: npt.NDArray[np.float32], rate: int, target_rate: int
+) -> npt.NDArray[np.float32]:
+    """サンプリングレートを target_rate に下げる.
+
+    target_rate / 2 を超える成分は間引くと音声帯域に折り返すため、先にローパスで落とす。
+    """
+    filtered = _lowpass(samples, rate, target_rate)
+    if rate % target_rate == 0:
+        factor = rate // target_rate
+        decimated: npt.NDArray[np.float32] = filtered[
+            : len(filtered) - len(filtered) % factor : factor
+        ]
+        return decimated
+    n_out = len(samples) * target_rate // rate
+    positions = np.arange(n_out) * (rate / target_rate)
+    resampled: npt.NDArray[np.float32] = np.interp(
+        positions, np.arange(len(filtered)), filtered
+    ).astype(np.float32)
+    return resampled
+
+
+def _lowpass(
+    samples: npt.NDArray[np.float32], rate: int, target_rate: int
+) -> npt.NDArray[np.float32]:
+    """target_rate / 2 を超える成分を落とす（位相は遅らせない）."""
+    taps = _lowpass_taps(rate, target_rate)
+    half = len(taps) // 2
+    if len(samples) <= half:
+        return samples
+    # 端の落ち込みを避けるため、両端を点対称に折り返して延ばしてから畳み込む
+    padded = np.pad(samples, half, mode="reflect", reflect_type="odd")
+    filtered: npt.NDArray[np.float32] = np.convolve(padded, taps, mode="valid").astype(
+        np.float32
+    )
+    return filtered
+
+
+@lru_cache
+def _lowpass_taps(rate: int, target_rate: int) -> npt.NDArray[np.float64]:
+    """Kaiser 窓の FIR ローパスの係数（阻止域は target_rate / 2 から）."""
+    stop = 0.5 * target_rate / rate
+    transition = stop * (1.0 - _LOWPASS_PASSBAND)
+    cutoff = stop - transition / 2
+    attenuation = _LOWPASS_ATTENUATION_DB
+    # Kaiser の設計式（次数と beta）
+    order = int(np.ceil((attenuation - 7.95) / (14.36 * transition)))
+    beta = 0.1102 * (attenuation - 8.7)
+    n = np.arange(order + order % 2 + 1) - (order + order % 2) / 2
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(len(n), beta)
+    result: npt.NDArray[np.float64] = taps / taps.sum()
+    return result
@@ -0,0 +1,206 @@
+"""ConnectionManager のメッセージを他インスタンスへ中継する."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from app.core.interfaces.backplane import Backplane
+from app.core.metrics import MetricsRegistry, get_metrics
+from app.dto.processing import ResponseMode
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_WINDOW = 0.005
+DEFAULT_MAX_BATCH = 64
+DEFAULT_MAX_PENDING = 1024
+# バッチサイズヒストグラムのバケット
+BATCH_SIZE_BUCKETS: tuple[float, ...] = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+@dataclass(frozen=True)
+class RelayedMessage:
+    """インスタンス間で中継する送信メッセージ（エンコード済み）."""
+
+    session_id: str | None
+    """配信先セッションID（None の場合は全接続へのブロードキャスト）."""
+
+    response_mode: ResponseMode | None
+    """配信先の配信方式（None の場合は全ての接続）."""
+
+    message_type: str | None
+    """メッセージタイプ（conflate の判定に使う）."""
+
+    text: str
+    """エンコード済みのメッセージ."""
+
+
+RelayHandler = Callable[[RelayedMessage], None]
+
+
+class BackplaneRelay:
+    """送信メッセージをバッチにまとめてバックプレーンに publish し、
+    他インスタンスから届いたメッセージを受け取る.
+
+    1回の send_to_session / broadcast につき、接続数によらず1メッセージだけを
+    中継する。publish は batch_window の間に積まれたメッセージを1つの封筒
+    （envelope）にまとめて行い、max_batch 件に達した場合は待たずに送る。
+    自インスタンスが publish した封筒は受信時に読み飛ばす（ローカル接続には
+    ConnectionManager が直接配信済みのため）。
+
+    配信は pub/sub と同じく at-most-once で、publish に失敗したバッチは破棄する。
+    バックプレーンが詰まった場合は未送信のメッセージを max_pending 件で打ち切り、
+    古いものから破棄する。
+    """
+
+    def __init__(
+        self,
+        backplane: Backplane,
+        instance_id: str | None = None,
+        batch_window: float = DEFAULT_BATCH_WINDOW,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        """
+        初期化.
+
+        Args:
+            backplane: 使用するバックプレーン
+            instance_id: このインスタンスのID（省略時は自動生成）
+            batch_window: 最初のメッセージから publish までの待機時間（秒）
+            max_batch: 1回の publish にまとめる最大件数
+            max_pending: 未送信メッセージの最大件数（超過分は古いものから破棄）
+            metrics: メトリクスレジストリ（省略時はグローバル）
+        """
+        if batch_window < 0:
+            raise ValueError("batch_window must be >= 0")
+        if max_batch < 1:
+            raise ValueError("max_batch must be >= 1")
+        if max_pending < max_batch:
+            raise ValueError("max_pending must be >= max_batch")
+        self._backplane = backplane
+        self._instance_id = instance_id or uuid.uuid4().hex
+        self._batch_window = batch_window
+        self._max_batch = max_batch
+        self._metrics = metrics or get_metrics()
+        self._pending: deque[RelayedMessage] = deque(maxlen=max_pending)
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._on_message: RelayHandler | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def instance_id(self) -> str:
+        """このインスタンスのID."""
+        return self._instance_id
+
+    async def start(self, on_message: RelayHandler) -> None:
+        """購読と publish 用タスクを開始する.
+
+        Args:
+            on_message: 他インスタンスから届いたメッセージの配信先
+        """
+        if self._task is not None:
+            return
+        self._on_message = on_message
+        await self._backplane.start(self._on_data)
+        self._task = asyncio.create_task(self._run())
+
+    def publish(self, message: RelayedMessage) -> None:
+        """メッセージを中継キューに積む（待機しない）.
+
+        start() 前は中継先がないため破棄する。
+        """
+        if self._task is None:
+            return
+        if len(self._pending) == self._pending.maxlen:
+            self._metrics.increment("backplane.dropped_messages")
+        self._pending.append(message)
+        self._wakeup.set()
+
+    async def flush(self) -> None:
+        """未送信のメッセージを直ちに publish する."""
+        async with self._flush_lock:
+            self._wakeup.clear()
+            while self._pending:
+                count = min(len(self._pending), self._max_batch)
+                batch = [self._pending.popleft() for _ in range(count)]
+                await self._publish_batch(batch)
+
+    async def aclose(self) -> None:
+        """未送信のメッセージを publish してから停止する."""
+        if self._task is None:
+            return
+        try:
+            await self.flush()
+        finally:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self._on_message = None
+            await self._backplane.close()
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            if len(self._pending) < self._max_batch and self._batch_window > 0:
+                await asyncio.sleep(self._batch_window)
+            await self.flush()
+
+    async def _publish_batch(self, batch: list[RelayedMessage]) -> None:
+        envelope = {
+            "origin": self._instance_id,
+            "messages": [
+                [
+                    message.session_id,
+                    message.response_mode.value if message.response_mode else None,
+                    message.message_type,
+                    message.text,
+                ]
+                for message in batch
+            ],
+        }
+        data = json.dumps(envelope, ensure_ascii=False, separators=(",", ":"))
+        try:
+            await self._backplane.publish(data.encode())
+        except Exception:
+            logger.exception("Failed to publish %d messages to backplane", len(batch))
+            self._metrics.increment("backplane.publish_errors")
+            return
+        self._metrics.increment("backplane.published_batches")
+        self._metrics.observe(
+            "backplane.batch_size", len(batch), buckets=BATCH_SIZE_BUCKETS
+        )
+
+    async def _on_data(self, data: bytes) -> None:
+        """バックプレーンから届いた封筒を展開して配信する."""
+        try:
+            envelope = json.loads(data)
+            if envelope["origin"] == self._instance_id:
+                return
+            messages = [
+                RelayedMessage(
+                    session_id=session_id,
+                    response_mode=ResponseMode(mode) if mode else None,
+                    message_type=message_type,
+                    text=text,
+                )
+                for session_id, mode, message_type, text in envelope["messages"]
+            ]
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Discarding malformed backplane envelope")
+            self._metrics.increment("backplane.malformed_envelopes")
+            return
+
+        on_message = self._on_message
+        if on_message is None:
+            return
+        self._metrics.increment("backplane.received_messages", len(messages))
+        for message in messages:
+            on_message(message)
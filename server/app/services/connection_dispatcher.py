@@ -0,0 +1,83 @@
+"""WebSocket接続ごとのタスクディスパッチャ."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Coroutine
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionDispatcher:
+    """1つのWebSocket接続で実行中のバックグラウンドタスクを管理する.
+
+    受信ループは重い処理（STT/LLM）を待たずに次のフレームを読めるよう、
+    解析リクエストをここに投入してタスクとして実行する。
+    同時実行数は接続ごとに上限を設ける。
+    """
+
+    def __init__(self, max_concurrent: int) -> None:
+        """
+        初期化.
+
+        Args:
+            max_concurrent: 接続あたりの最大同時実行タスク数
+        """
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be >= 1")
+        self._max_concurrent = max_concurrent
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._closed = False
+
+    @property
+    def active_count(self) -> int:
+        """実行中のタスク数."""
+        return len(self._tasks)
+
+    @property
+    def max_concurrent(self) -> int:
+        """最大同時実行タスク数."""
+        return self._max_concurrent
+
+    def try_submit(self, coro: Coroutine[Any, Any, None]) -> bool:
+        """タスクを投入する.
+
+        上限に達している場合、またはクローズ済みの場合はコルーチンを破棄して
+        Falseを返す。
+
+        Args:
+            coro: 実行するコルーチン
+
+        Returns:
+            投入できた場合True
+        """
+        if self._closed or len(self._tasks) >= self._max_concurrent:
+            coro.close()
+            return False
+
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+        return True
+
+    async def aclose(self) -> None:
+        """実行中のタスクを全てキャンセルし、終了を待機する."""
+        self._closed = True
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _on_task_done(self, task: asyncio.Task[None]) -> None:
+        """完了したタスクを管理対象から外す."""
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is not None:
+            logger.error(
+                "Connection task failed", exc_info=(type(exc), exc, exc.__traceback__)
+            )
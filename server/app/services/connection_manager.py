@@ -1,64 +1,294 @@
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import dataclass
 from typing import Any
 
 from fastapi import WebSocket
+from pydantic import BaseModel
+
+from app.core.metrics import MetricsRegistry, get_metrics
+from app.dto.processing import ResponseMode
+from app.services.backplane_relay import BackplaneRelay, RelayedMessage
+from app.services.outbound_queue import OutboundQueue
 
 logger = logging.getLogger(__name__)
 
+SessionClosedListener = Callable[[str], Awaitable[Any]]
+
+DEFAULT_SEND_TIMEOUT = 1.0
+DEFAULT_MAX_MISSED_SENDS = 3
+DEFAULT_OUTBOUND_QUEUE_SIZE = 32
+OutboundMessage = BaseModel | Mapping[str, Any]
+MessageEncoder = Callable[[OutboundMessage], str]
+
+
+def encode_json_message(payload: OutboundMessage) -> str:
+    """送信メッセージをJSON文字列にエンコードする.
+
+    pydanticモデルは model_dump_json で直接シリアライズする。
+    dictは Starlette の send_json と同じ形式（区切り文字なし、非ASCIIそのまま）にする。
+    """
+    if isinstance(payload, BaseModel):
+        return payload.model_dump_json()
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+@dataclass(frozen=True)
+class _ConnectionEntry:
+    """登録済み接続の情報."""
+
+    session_id: str
+    response_mode: ResponseMode
+    queue: OutboundQueue
+
 
 class ConnectionManager:
-    def __init__(self) -> None:
+    """セッション単位でWebSocket接続を管理し、メッセージを配信する.
+
+    登録した接続ごとに送信キュー（OutboundQueue）と writer タスクを持つ。
+    send_to_session / broadcast はメッセージを1度だけエンコードして各接続の
+    キューに積むだけで、ネットワークI/Oを待たない。低速な接続は他の接続の
+    配信を遅らせず、キューの上限超過や送信期限切れの連続で切断される。
+
+    接続レジストリは1つのロックで更新する（区画分割版との比較は
+    scripts/bench_connection_manager.py。分割による改善は計測されなかった）。
+
+    backplane_relay を指定した場合、同じメッセージを他インスタンスにも中継し、
+    他インスタンスから届いたメッセージをローカルの接続に配信する。同じセッションの
+    接続が別々のインスタンスにあっても届く（解析キューや会話履歴はインスタンスごとの
+    ため、ロードバランサーのセッションアフィニティは引き続き必要）。
+    """
+
+    def __init__(
+        self,
+        encoder: MessageEncoder = encode_json_message,
+        send_timeout: float = DEFAULT_SEND_TIMEOUT,
+        max_missed_sends: int = DEFAULT_MAX_MISSED_SENDS,
+        outbound_queue_size: int = DEFAULT_OUTBOUND_QUEUE_SIZE,
+        metrics: MetricsRegistry | None = None,
+        backplane_relay: BackplaneRelay | None = None,
+    ) -> None:
+        """
+        初期化.
+
+        Args:
+            encoder: 送信メッセージのエンコーダー。1メッセージにつき1回だけ呼ばれ、
+                結果の文字列をセッション内の全接続で使い回す
+            send_timeout: 1接続あたりの送信期限（秒）
+            max_missed_sends: 切断するまでに許容する連続期限切れ回数
+            outbound_queue_size: 接続ごとの送信キューの最大件数
+            metrics: メトリクスレジストリ（省略時はグローバル）
+            backplane_relay: 他インスタンスへの中継（省略時はプロセス内のみ）
+        """
+        if send_timeout <= 0:
+            raise ValueError("send_timeout must be > 0")
+        if max_missed_sends < 1:
+            raise ValueError("max_missed_sends must be >= 1")
+        if outbound_queue_size < 1:
+            raise ValueError("outbound_queue_size must be >= 1")
+        self._encoder = encoder
+        self._send_timeout = send_timeout
+        self._max_missed_sends = max_missed_sends
+        self._outbound_queue_size = outbound_queue_size
+        self._metrics = metrics or get_metrics()
         self._session_connections: dict[str, set[WebSocket]] = {}
-        self._connection_sessions: dict[WebSocket, str] = {}
+        self._connections: dict[WebSocket, _ConnectionEntry] = {}
         self._lock = asyncio.Lock()
+        self._session_closed_listeners: list[SessionClosedListener] = []
+        self._relay = backplane_relay
+
+    @property
+    def connection_count(self) -> int:
+        """登録中の接続数."""
+        return len(self._connections)
+
+    async def start(self) -> None:
+        """他インスタンスとの中継を開始する（backplane_relay 指定時）."""
+        if self._relay is not None:
+            await self._relay.start(self._deliver_relayed)
+
+    async def aclose(self) -> None:
+        """他インスタンスとの中継を停止する."""
+        if self._relay is not None:
+            await self._relay.aclose()
 
-    async def connect(self, websocket: WebSocket, session_id: str) -> None:
+    def add_session_closed_listener(self, listener: SessionClosedListener) -> None:
+        """セッションの全接続が切断されたときに呼ばれるリスナーを登録する."""
+        self._session_closed_listeners.append(listener)
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        session_id: str,
+        response_mode: ResponseMode = ResponseMode.SINGLE,
+        conflate: bool = False,
+    ) -> None:
         """WebSocket接続を受け入れて登録する."""
         await websocket.accept()
-        await self.register(websocket, session_id)
+        await self.register(websocket, session_id, response_mode, conflate)
+
+    async def register(
+        self,
+        websocket: WebSocket,
+        session_id: str,
+        response_mode: ResponseMode = ResponseMode.SINGLE,
+        conflate: bool = False,
+    ) -> None:
+        """既にacceptされたWebSocket接続を登録する.
 
-    async def register(self, websocket: WebSocket, session_id: str) -> None:
-        """既にacceptされたWebSocket接続を登録する."""
+        response_mode は接続時にクライアントが選択した解析結果の配信方式。
+        conflate を有効にした接続（最新状態だけを表示するHUDなど）では、
+        未送信の ANALYSIS_RESPONSE / ANALYSIS_EMOTION を最新のもので上書きする。
+        """
+        queue = OutboundQueue(
+            websocket,
+            on_evict=self.disconnect,
+            metrics=self._metrics,
+            max_size=self._outbound_queue_size,
+            send_timeout=self._send_timeout,
+            max_missed_sends=self._max_missed_sends,
+            conflate=conflate,
+        )
         async with self._lock:
-            self._connection_sessions[websocket] = session_id
+            # 登録済みの接続は元のセッションから移す（切断ではないため、
+            # 元のセッションが空になってもセッション終了のリスナーは呼ばない）
+            self._remove(websocket)
+            self._connections[websocket] = _ConnectionEntry(
+                session_id=session_id, response_mode=response_mode, queue=queue
+            )
             self._session_connections.setdefault(session_id, set()).add(websocket)
 
     async def disconnect(self, websocket: WebSocket) -> None:
         async with self._lock:
-            session_id = self._connection_sessions.pop(websocket, None)
-            if session_id is None:
+            entry = self._remove(websocket)
+            if entry is None:
                 return
-            connections = self._session_connections.get(session_id)
-            if connections is None:
-                return
-            connections.discard(websocket)
-            if not connections:
-                self._session_connections.pop(session_id, None)
+            session_id = entry.session_id
+            session_closed = session_id not in self._session_connections
 
-    async def send_to_session(self, session_id: str, payload: dict[str, Any]) -> None:
-        async with self._lock:
-            connections = list(self._session_connections.get(session_id, set()))
-        await self._send_to_connections(connections, payload)
+        if session_closed:
+            await self._notify_session_closed(session_id)
 
-    async def broadcast(self, payload: dict[str, Any]) -> None:
-        async with self._lock:
-            connections = list(self._connection_sessions.keys())
-        await self._send_to_connections(connections, payload)
+    def _remove(self, websocket: WebSocket) -> _ConnectionEntry | None:
+        """接続をレジストリから外し、送信キューを閉じる（ロック内で呼ぶ）."""
+        entry = self._connections.pop(websocket, None)
+        if entry is None:
+            return None
+        entry.queue.close()
+        connections = self._session_connections.get(entry.session_id, set())
+        connections.discard(websocket)
+        if not connections:
+            self._session_connections.pop(entry.session_id, None)
+        return entry
 
-    async def _send_to_connections(
-        self,
-        connections: list[WebSocket],
-        payload: dict[str, Any],
-    ) -> None:
-        failed: list[WebSocket] = []
-        for websocket in connections:
+    async def _notify_session_closed(self, session_id: str) -> None:
+        for listener in list(self._session_closed_listeners):
             try:
-                await websocket.send_json(payload)
+                await listener(session_id)
             except Exception:
-                logger.exception("Failed to send WebSocket payload")
-                failed.append(websocket)
-        for websocket in failed:
-            await self.disconnect(websocket)
+                logger.exception("Session closed listener failed")
+
+    async def send_to_session(
+        self,
+        session_id: str,
+        payload: OutboundMessage,
+        response_mode: ResponseMode | None = None,
+    ) -> None:
+        """セッションの全接続の送信キューに積む.
+
+        payload は1度だけエンコードし、同じテキストを各接続に送る。
+        response_mode を指定した場合、その配信方式を選択した接続にのみ送る。
+        backplane_relay 指定時は、他インスタンスの接続向けに1件だけ中継する。
+        """
+        queues = self._session_queues(session_id, response_mode)
+        self._dispatch(session_id, response_mode, queues, payload)
+
+    async def send_to_connection(
+        self, websocket: WebSocket, payload: OutboundMessage
+    ) -> None:
+        """1接続の送信キューに積む（PONG・ACK・ERRORなど、その接続への応答用）.
+
+        送信は writer タスクに任せるため、受信ループはネットワークI/Oを待たない。
+        他インスタンスには中継しない。未登録（切断済み）の接続には何もしない。
+        """
+        entry = self._connections.get(websocket)
+        if entry is None:
+            return
+        self._offer([entry.queue], _message_type(payload), self._encoder(payload))
+
+    async def broadcast(self, payload: OutboundMessage) -> None:
+        """全接続の送信キューに積む."""
+        self._dispatch(None, None, self._all_queues(), payload)
+
+    async def drain(self) -> None:
+        """中継待ちのメッセージを送り、全接続の送信キューが空になるまで待機する."""
+        if self._relay is not None:
+            await self._relay.flush()
+        await asyncio.gather(*(queue.join() for queue in self._all_queues()))
+
+    def _session_queues(
+        self, session_id: str, response_mode: ResponseMode | None
+    ) -> list[OutboundQueue]:
+        entries = (
+            self._connections[websocket]
+            for websocket in self._session_connections.get(session_id, ())
+        )
+        return [
+            entry.queue
+            for entry in entries
+            if response_mode is None or entry.response_mode == response_mode
+        ]
+
+    def _all_queues(self) -> list[OutboundQueue]:
+        return [entry.queue for entry in self._connections.values()]
+
+    def _dispatch(
+        self,
+        session_id: str | None,
+        response_mode: ResponseMode | None,
+        queues: list[OutboundQueue],
+        payload: OutboundMessage,
+    ) -> None:
+        if not queues and self._relay is None:
+            return
+        text = self._encoder(payload)
+        message_type = _message_type(payload)
+        self._offer(queues, message_type, text)
+        if self._relay is not None:
+            self._relay.publish(
+                RelayedMessage(
+                    session_id=session_id,
+                    response_mode=response_mode,
+                    message_type=message_type,
+                    text=text,
+                )
+            )
+
+    def _deliver_relayed(self, message: RelayedMessage) -> None:
+        """他インスタンスから中継されたメッセージをローカルの接続に配信する."""
+        if message.session_id is None:
+            queues = self._all_queues()
+        else:
+            queues = self._session_queues(message.session_id, message.response_mode)
+        self._offer(queues, message.message_type, message.text)
+
+    @staticmethod
+    def _offer(
+        queues: list[OutboundQueue], message_type: str | None, text: str
+    ) -> None:
+        for queue in queues:
+            # 満杯のキューは writer タスクが切断処理を行う
+            queue.offer(message_type, text)
+
+
+def _message_type(payload: OutboundMessage) -> str | None:
+    """メッセージの type フィールドを取得する."""
+    if isinstance(payload, BaseModel):
+        message_type = getattr(payload, "type", None)
+    else:
+        message_type = payload.get("type")
+    return message_type if isinstance(message_type, str) else None
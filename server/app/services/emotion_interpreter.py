@@ -1,6 +1,7 @@
 """感情解釈サービスの実装."""
 
 from app.dto.emotion import EmotionChange, EmotionInterpretation
+from app.dto.llm import LLMResponseResult, ResponseSuggestion
 
 # 感情名 → 日本語説明のマッピング
 EMOTION_DESCRIPTIONS: dict[str, dict[str, str]] = {
@@ -58,6 +59,24 @@ EMOTION_SUGGESTIONS: dict[str, str | None] = {
     "disgusted": "話題を変えることを検討してください",
 }
 
+# LLMが利用できない場合の応答候補（応答文, 意図）
+FALLBACK_RESPONSES: dict[str, tuple[tuple[str, str], tuple[str, str]]] = {
+    "happy": (("それはいいね！", "共感を示す"), ("もっと聞かせて", "話題を深める")),
+    "sad": (("そうだったんだね", "共感を示す"), ("話を聞かせてくれる？", "寄り添う")),
+    "angry": (
+        ("そう感じたんだね", "受け止める"),
+        ("詳しく教えてくれる？", "意見を聞く"),
+    ),
+    "surprised": (("驚いたよね", "共感を示す"), ("少し説明するね", "補足する")),
+    "confused": (
+        ("分かりにくかったかな", "確認する"),
+        ("言い方を変えてみるね", "補足する"),
+    ),
+    "neutral": (("うんうん", "相づち"), ("それでどうなったの？", "質問する")),
+    "fearful": (("大丈夫だよ", "安心させる"), ("何か心配なことがある？", "寄り添う")),
+    "disgusted": (("ごめんね", "気遣う"), ("話を変えようか", "話題を変える")),
+}
+
 # 感情変化の説明マッピング
 EMOTION_CHANGE_DESCRIPTIONS: dict[str, dict[str, str]] = {
     "happy": {
@@ -168,6 +187,35 @@ class EmotionInterpreterService:
             suggestion=suggestion,
         )
 
+    def fallback_responses(
+        self,
+        interpretation: EmotionInterpretation,
+    ) -> LLMResponseResult:
+        """LLMが利用できない場合に、感情解釈から応答候補を作る.
+
+        状況分析には感情の説明と行動提案を、応答候補には感情ごとの定型文を使う。
+
+        Args:
+            interpretation: 感情解釈
+
+        Returns:
+            LLMResponseResult: 2パターンの応答候補と状況分析
+        """
+        responses = FALLBACK_RESPONSES.get(
+            interpretation.primary_emotion, FALLBACK_RESPONSES["neutral"]
+        )
+        analysis = interpretation.description
+        if interpretation.suggestion:
+            analysis += f"。{interpretation.suggestion}"
+
+        return LLMResponseResult(
+            situation_analysis=analysis,
+            responses=[
+                ResponseSuggestion(text=text, intent=intent)
+                for text, intent in responses
+            ],
+        )
+
     def detect_change(
         self,
         previous: dict[str, float],
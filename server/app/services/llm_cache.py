@@ -0,0 +1,175 @@
+"""LLM応答のキャッシュ（プロンプトの完全一致）."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from app.core.metrics import MetricsRegistry, get_metrics
+from app.dto.llm import LLMResponseResult, ResponseSuggestion
+from app.utils.cache import SingleFlight, TTLCache
+
+SuggestionCallback = Callable[[int, ResponseSuggestion], Awaitable[None]]
+Generator = Callable[[SuggestionCallback | None], Awaitable[LLMResponseResult]]
+
+_WHITESPACE = re.compile(r"[ \t　]+")
+
+
+@dataclass(frozen=True)
+class _CachedResponse:
+    """キャッシュした応答と、生成にかかった時間."""
+
+    result: LLMResponseResult
+    latency_ms: float
+
+
+class LLMResponseCache:
+    """プロンプトが完全に一致する LLM 応答をキャッシュする.
+
+    会話履歴が変わらない間の感情のみのリクエスト（「(発話なし)」）や、
+    Android と Unity の両方からの解析で、同じプロンプトを何度も送らないようにする。
+
+    - キーは正規化したプロンプト（行ごとの前後の空白と連続する空白を除く）と
+      システムプロンプト・モデル名・温度の SHA-256 ハッシュ
+    - パース済みの LLMResponseResult を ttl_seconds の間保持する
+      （容量は max_entries 件、超過時は LRU で追い出す）
+    - 同じプロンプトの生成が実行中の場合は、その結果を待つ（シングルフライト）
+    - 生成に失敗した結果はキャッシュしない
+
+    ヒット時は応答候補を逐次通知先にまとめて通知するため、段階配信でも使える。
+    メトリクス: ``llm.cache.hits`` / ``llm.cache.misses`` / ``llm.cache.coalesced`` /
+    ``llm.cache.hit_ratio`` / ``llm.cache.saved_ms``（ヒットで省いた生成時間の合計）
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        """
+        初期化.
+
+        Args:
+            max_entries: 最大エントリ数
+            ttl_seconds: エントリの有効期間（秒）
+            clock: 有効期限の判定に使う時計
+            metrics: メトリクスレジストリ（省略時はグローバル）
+        """
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be > 0")
+        self._cache: TTLCache[str, _CachedResponse] = TTLCache(max_entries, clock=clock)
+        self._ttl = ttl_seconds
+        self._clock = clock
+        self._metrics = metrics or get_metrics()
+        self._in_flight: SingleFlight[str, _CachedResponse] = SingleFlight()
+        self._lookups = 0
+        self._hits = 0
+
+    @staticmethod
+    def key(prompt: str, system_prompt: str, model: str, temperature: float) -> str:
+        """プロンプトとモデルの設定からキャッシュキーを作る."""
+        normalized = "\n".join(
+            _WHITESPACE.sub(" ", line).strip() for line in prompt.strip().splitlines()
+        )
+        digest = hashlib.sha256()
+        for part in (system_prompt, model, f"{temperature:g}", normalized):
+            digest.update(part.encode())
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    async def get_or_generate(
+        self,
+        key: str,
+        generate: Generator,
+        on_suggestion: SuggestionCallback | None = None,
+    ) -> LLMResponseResult:
+        """キャッシュされた応答を返す。ない場合は generate で生成する.
+
+        Args:
+            key: key() で作ったキャッシュキー
+            generate: キャッシュにない場合の生成処理（逐次通知先を受け取る）
+            on_suggestion: 応答候補の逐次通知先
+
+        Returns:
+            応答候補と状況分析
+
+        Raises:
+            generate が送出した例外
+        """
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._record_lookup(hit=True)
+            self._metrics.increment("llm.cache.saved_ms", cached.latency_ms)
+            await replay_suggestions(cached.result, on_suggestion)
+            return cached.result
+
+        self._record_lookup(hit=False)
+        if key in self._in_flight:
+            # 実行中の生成に相乗りする（応答候補は完成後にまとめて通知する）
+            self._metrics.increment("llm.cache.coalesced")
+            shared = await self._in_flight.run(
+                key, lambda: self._generate(key, generate, None)
+            )
+            await replay_suggestions(shared.result, on_suggestion)
+            return shared.result
+
+        self._metrics.increment("llm.cache.misses")
+        # 呼び出し元がキャンセルされても、相乗りした呼び出しのために生成を続ける
+        # 場合があるため、逐次通知は呼び出し元がキャンセルされるまでに限る
+        active = True
+
+        async def notify(index: int, suggestion: ResponseSuggestion) -> None:
+            if active and on_suggestion is not None:
+                await on_suggestion(index, suggestion)
+
+        try:
+            entry = await self._in_flight.run(
+                key,
+                lambda: self._generate(
+                    key, generate, notify if on_suggestion else None
+                ),
+            )
+        except asyncio.CancelledError:
+            active = False
+            raise
+        return entry.result
+
+    def clear(self) -> None:
+        """全てのエントリを削除する（実行中の生成はそのまま）."""
+        self._cache.clear()
+
+    async def _generate(
+        self,
+        key: str,
+        generate: Generator,
+        on_suggestion: SuggestionCallback | None,
+    ) -> _CachedResponse:
+        started_at = time.perf_counter()
+        result = await generate(on_suggestion)
+        entry = _CachedResponse(result, (time.perf_counter() - started_at) * 1000)
+        self._cache.set(key, entry, self._clock() + self._ttl)
+        self._metrics.set_gauge("llm.cache.size", len(self._cache))
+        return entry
+
+    def _record_lookup(self, hit: bool) -> None:
+        self._lookups += 1
+        if hit:
+            self._hits += 1
+            self._metrics.increment("llm.cache.hits")
+        self._metrics.set_gauge("llm.cache.hit_ratio", self._hits / self._lookups)
+
+
+async def replay_suggestions(
+    result: LLMResponseResult, on_suggestion: SuggestionCallback | None
+) -> None:
+    """生成済みの応答候補を逐次通知先に順に通知する."""
+    if on_suggestion is None:
+        return
+    for index, suggestion in enumerate(result.responses):
+        await on_suggestion(index, suggestion)
@@ -0,0 +1,240 @@
+"""リクエストごとに LLM プロバイダーを選ぶルーター."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Collection
+from dataclasses import asdict, dataclass
+from typing import Any, TypeVar
+
+from app.core.metrics import MetricsRegistry, get_metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class _ProviderStats:
+    """プロバイダーごとの直近の所要時間とエラー率."""
+
+    latency_ms: float | None = None
+    error_rate: float = 0.0
+    updated_at: float = 0.0
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    """ルーティングの判断.
+
+    reason は "short_prompt" / "long_prompt"（プロンプト長による既定の選択）、
+    "unavailable"（既定のプロバイダーが障害中）、"errors"（既定のプロバイダーの
+    エラー率が高い）、"budget"（既定のプロバイダーでは待ち時間の目安を超えそう）の
+    いずれか。
+    """
+
+    provider: str
+    reason: str
+    prompt_chars: int
+    budget_ms: float | None
+    expected_ms: float | None
+
+
+class LLMRouter:
+    """プロンプト長・直近の所要時間・エラー率・待ち時間の目安からプロバイダーを選ぶ.
+
+    - short_prompt_chars 以下の短いプロンプト（感情のみのターンなど）は fast
+      （Groq）、長い複数ターンの会話履歴は quality（FT モデル）を既定とする
+    - 既定のプロバイダーが障害中（サーキットブレーカーが開いている）なら、もう一方に送る
+    - 既定のプロバイダーのエラー率が max_error_rate 以上なら、もう一方に送る
+    - 既定のプロバイダーの所要時間（EWMA）が待ち時間の目安を超え、もう一方の方が
+      速ければ、もう一方に送る
+    - 所要時間は指数移動平均（alpha）、エラー率は呼び出しごとの指数移動平均を
+      error_half_life 秒の半減期で減衰させる（避けたプロバイダーも時間が経てば戻る）
+
+    判断と結果は直近 history 件を保持し（history()）、ログにも出力する。
+    メトリクス: ``llm.router.{provider}.routed`` / ``llm.router.{provider}.latency_ms`` /
+    ``llm.router.{provider}.latency_ewma_ms`` / ``llm.router.{provider}.error_rate`` /
+    ``llm.router.reason.{reason}``
+    """
+
+    def __init__(
+        self,
+        fast: str,
+        quality: str,
+        short_prompt_chars: int,
+        max_error_rate: float = 0.2,
+        alpha: float = 0.2,
+        error_half_life: float = 30.0,
+        history: int = 1000,
+        clock: Callable[[], float] = time.monotonic,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        """
+        初期化.
+
+        Args:
+            fast: 短いプロンプトを送るプロバイダー
+            quality: 長いプロンプトを送るプロバイダー
+            short_prompt_chars: fast に送るプロンプトの最大文字数
+            max_error_rate: 避けるプロバイダーのエラー率（0.0-1.0）
+            alpha: 指数移動平均の重み（0.0-1.0）
+            error_half_life: エラー率が半減するまでの時間（秒）
+            history: 保持する判断と結果の件数
+            clock: エラー率の減衰に使う時計
+            metrics: メトリクスレジストリ（省略時はグローバル）
+        """
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError("alpha must be in (0, 1]")
+        if error_half_life <= 0:
+            raise ValueError("error_half_life must be > 0")
+        self._fast = fast
+        self._quality = quality
+        self._short_prompt_chars = short_prompt_chars
+        self._max_error_rate = max_error_rate
+        self._alpha = alpha
+        self._error_half_life = error_half_life
+        self._clock = clock
+        self._metrics = metrics or get_metrics()
+        self._stats = {fast: _ProviderStats(), quality: _ProviderStats()}
+        self._history: deque[dict[str, Any]] = deque(maxlen=history)
+
+    def choose(
+        self,
+        prompt_chars: int,
+        budget_ms: float | None = None,
+        unavailable: Collection[str] = (),
+    ) -> RouteDecision:
+        """
+        プロバイダーを選ぶ.
+
+        Args:
+            prompt_chars: プロンプトの文字数
+            budget_ms: 待ち時間の目安（ミリ秒, Noneで考慮しない）
+            unavailable: 障害中のプロバイダー（両方とも障害中なら既定のまま）
+
+        Returns:
+            ルーティングの判断
+        """
+        if prompt_chars <= self._short_prompt_chars:
+            provider, other, reason = self._fast, self._quality, "short_prompt"
+        else:
+            provider, other, reason = self._quality, self._fast, "long_prompt"
+
+        expected = self._stats[provider].latency_ms
+        alternative = self._stats[other].latency_ms
+        if other in unavailable:
+            # もう一方が障害中なら既定のプロバイダーに送る
+            pass
+        elif provider in unavailable:
+            provider, other, reason = other, provider, "unavailable"
+        elif (
+            self._error_rate(provider) >= self._max_error_rate
+            and self._error_rate(other) < self._max_error_rate
+        ):
+            provider, other, reason = other, provider, "errors"
+        elif (
+            budget_ms is not None
+            and expected is not None
+            and expected > budget_ms
+            and alternative is not None
+            and alternative < expected
+            and self._error_rate(other) < self._max_error_rate
+        ):
+            provider, other, reason = other, provider, "budget"
+
+        self._metrics.increment(f"llm.router.{provider}.routed")
+        self._metrics.increment(f"llm.router.reason.{reason}")
+        return RouteDecision(
+            provider=provider,
+            reason=reason,
+            prompt_chars=prompt_chars,
+            budget_ms=budget_ms,
+            expected_ms=self._stats[provider].latency_ms,
+        )
+
+    def record(self, decision: RouteDecision, latency_ms: float, ok: bool) -> None:
+        """
+        呼び出しの結果を記録する.
+
+        Args:
+            decision: choose() の判断
+            latency_ms: 所要時間（ミリ秒）
+            ok: 成功したか
+        """
+        provider = decision.provider
+        stats = self._stats[provider]
+        stats.error_rate = self._error_rate(provider) * (1 - self._alpha) + (
+            0.0 if ok else self._alpha
+        )
+        stats.updated_at = self._clock()
+        if ok:
+            stats.latency_ms = (
+                latency_ms
+                if stats.latency_ms is None
+                else stats.latency_ms * (1 - self._alpha) + latency_ms * self._alpha
+            )
+            self._metrics.observe(f"llm.router.{provider}.latency_ms", latency_ms)
+            self._metrics.set_gauge(
+                f"llm.router.{provider}.latency_ewma_ms", stats.latency_ms
+            )
+        self._metrics.set_gauge(f"llm.router.{provider}.error_rate", stats.error_rate)
+
+        record = {**asdict(decision), "latency_ms": round(latency_ms, 1), "ok": ok}
+        self._history.append(record)
+        logger.info("LLM route", extra={"route": record})
+
+    def history(self) -> list[dict[str, Any]]:
+        """直近の判断と結果（古い順）."""
+        return list(self._history)
+
+    async def run(
+        self,
+        prompt_chars: int,
+        budget_ms: float | None,
+        call: Callable[[str], Awaitable[T]],
+        unavailable: Collection[str] = (),
+        unrecorded: tuple[type[Exception], ...] = (),
+    ) -> T:
+        """
+        プロバイダーを選んで call を実行し、結果を記録する.
+
+        Args:
+            prompt_chars: プロンプトの文字数
+            budget_ms: 待ち時間の目安（ミリ秒, Noneで考慮しない）
+            call: 選んだプロバイダー名を受け取る呼び出し
+            unavailable: 障害中のプロバイダー
+            unrecorded: 失敗として記録しない例外（プロバイダーを呼び出さずに
+                失敗した場合など）
+
+        Returns:
+            call の結果
+
+        Raises:
+            call が送出した例外
+        """
+        decision = self.choose(prompt_chars, budget_ms, unavailable)
+        started_at = time.perf_counter()
+        try:
+            result = await call(decision.provider)
+        except asyncio.CancelledError:
+            # キャンセルはプロバイダーの失敗ではないため記録しない
+            raise
+        except unrecorded:
+            raise
+        except Exception:
+            self.record(decision, (time.perf_counter() - started_at) * 1000, ok=False)
+            raise
+        self.record(decision, (time.perf_counter() - started_at) * 1000, ok=True)
+        return result
+
+    def _error_rate(self, provider: str) -> float:
+        """半減期で減衰させた現在のエラー率."""
+        stats = self._stats[provider]
+        if not stats.error_rate:
+            return 0.0
+        elapsed = self._clock() - stats.updated_at
+        return float(stats.error_rate * 0.5 ** (elapsed / self._error_half_life))
@@ -5,18 +5,38 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
-from typing import Any
+import time
+from collections.abc import Awaitable, Callable, Container
+from typing import Any, TypeVar
 
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import HumanMessage, SystemMessage
 
-from app.core.exceptions import LLMError, LLMRateLimitError, LLMResponseParseError
-from app.infra.external.gemini_client import LLMClientFactory
+from app.core.config import get_settings
+from app.core.exceptions import (
+    LLMError,
+    LLMRateLimitError,
+    LLMResponseParseError,
+    LLMUnavailableError,
+)
+from app.core.metrics import get_metrics
 from app.dto.conversation import Utterance
 from app.dto.emotion import EmotionInterpretation
 from app.dto.llm import LLMResponseResult, ResponseSuggestion
+from app.infra.external.gemini_client import LLMClientFactory
+from app.services.llm_cache import LLMResponseCache, replay_suggestions
+from app.services.llm_router import LLMRouter
+from app.services.semantic_cache import SemanticSuggestionCache
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+from app.utils.json_stream import IncrementalJsonParser
+from app.utils.racing import ProviderRace
 
 logger = logging.getLogger(__name__)
 
+SuggestionCallback = Callable[[int, ResponseSuggestion], Awaitable[None]]
+
+T = TypeVar("T")
+
 SYSTEM_PROMPT = """あなたは対面コミュニケーションを支援するアシスタントです。
 ユーザー（XRデバイス装着者）が会話相手と円滑にコミュニケーションできるよう、
 適切な応答候補を提案してください。
@@ -54,6 +74,14 @@ MAX_RETRIES = 3
 INITIAL_DELAY = 1.0
 EXPONENTIAL_BASE = 2.0
 MAX_DELAY = 10.0
+# サーキットブレーカーの回復確認の期限（秒）
+PROBE_TIMEOUT_SECONDS = 5.0
+
+# 応答候補配列のキー（優先順位順）: 標準形式 / FT形式A / FT形式B
+SUGGESTION_KEYS = ("responses", "options", "advices")
+
+# 相手の発話がない場合の partner_last_utterance
+NO_UTTERANCE = "(発話なし)"
 
 
 class LLMService:
@@ -62,27 +90,106 @@ class LLMService:
     LLM_PROVIDER設定に基づいてAPIを切り替える:
     - "groq": Groq API (高速、100-300ms)
     - "gemini": Vertex AI Gemini (FTモデル対応)
+    - "race": 両方に同じプロンプトを送り、先にパースできた応答を使う
+      （LLM_RACE_QUALITY_WAIT_MS 以内なら FT モデルの応答を優先する）
+    - "route": リクエストごとにプロンプト長・直近の所要時間とエラー率・
+      待ち時間の目安からどちらか一方を選ぶ（LLMRouter）
+
+    LLM_CACHE_SIZE が0でなければ、プロンプト・モデル・温度が完全に一致する
+    応答を LLM_CACHE_TTL_SECONDS の間キャッシュし、同時の同じ生成は1回にまとめる。
+
+    LLM_SEMANTIC_CACHE_ENABLED の場合、感情（主要な感情・強度）が同じで最後の発話が
+    似ているリクエストには、セッションをまたいで過去の応答候補を返す。
+
+    LLM_BREAKER_FAILURE_THRESHOLD が0でなければ、プロバイダーごとのサーキット
+    ブレーカーを通して呼び出す（リトライを含む呼び出し1回ごとに成否を記録し、
+    応答のパースの失敗は数えない）。連続して失敗したプロバイダーは呼び出さずに
+    LLMUnavailableError を即座に送出し、裏で回復を確認する。route では障害中の
+    プロバイダーを避けて選ぶ。
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        cache: LLMResponseCache | None = None,
+        semantic_cache: SemanticSuggestionCache | None = None,
+    ) -> None:
         """初期化.
 
         設定は config.py から LLMClientFactory 経由で取得する。
+
+        Args:
+            cache: 応答キャッシュ（省略時は LLM_CACHE_SIZE が0でなければ使用）
+            semantic_cache: 類似発話のキャッシュ（省略時は
+                LLM_SEMANTIC_CACHE_ENABLED の場合のみ使用）
         """
-        self._model = LLMClientFactory.create_client()
+        settings = get_settings()
+        self._clients: dict[str, BaseChatModel] = {}
+        self._race: ProviderRace | None = None
+        self._router: LLMRouter | None = None
+        if settings.LLM_PROVIDER in ("race", "route"):
+            self._clients = LLMClientFactory.get_clients()
+            self._model = self._clients["gemini"]
+            if settings.LLM_PROVIDER == "race":
+                self._race = ProviderRace(
+                    "llm.race",
+                    preferred="gemini",
+                    quality_wait=settings.LLM_RACE_QUALITY_WAIT_MS / 1000,
+                )
+            else:
+                self._router = LLMRouter(
+                    fast="groq",
+                    quality="gemini",
+                    short_prompt_chars=settings.LLM_ROUTER_SHORT_PROMPT_CHARS,
+                    max_error_rate=settings.LLM_ROUTER_MAX_ERROR_RATE,
+                )
+        else:
+            self._model = LLMClientFactory.create_client()
+        self._provider = "groq" if settings.LLM_PROVIDER == "groq" else "gemini"
+        self._breakers: dict[str, CircuitBreaker] = {}
+        if settings.LLM_BREAKER_FAILURE_THRESHOLD:
+            for provider in self._clients or (self._provider,):
+                self._breakers[provider] = CircuitBreaker(
+                    f"llm.breaker.{provider}",
+                    probe=self._prober(provider),
+                    failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+                    reset_timeout=settings.LLM_BREAKER_RESET_SECONDS,
+                )
+        self._model_name = LLMClientFactory.model_name()
+        self._cache = cache or (
+            LLMResponseCache(settings.LLM_CACHE_SIZE, settings.LLM_CACHE_TTL_SECONDS)
+            if settings.LLM_CACHE_SIZE
+            else None
+        )
+        if semantic_cache is None and settings.LLM_SEMANTIC_CACHE_ENABLED:
+            semantic_cache = SemanticSuggestionCache(
+                settings.LLM_SEMANTIC_CACHE_SIZE,
+                settings.LLM_SEMANTIC_CACHE_TTL_SECONDS,
+                threshold=settings.LLM_SEMANTIC_CACHE_THRESHOLD,
+                max_chars=settings.LLM_SEMANTIC_CACHE_MAX_CHARS,
+                refresh_seconds=settings.LLM_SEMANTIC_CACHE_REFRESH_SECONDS,
+            )
+        self._semantic_cache = semantic_cache
 
     async def generate_responses(
         self,
         conversation_context: list[Utterance],
         emotion_interpretation: EmotionInterpretation,
         partner_last_utterance: str,
+        on_suggestion: SuggestionCallback | None = None,
+        latency_budget_ms: float | None = None,
     ) -> LLMResponseResult:
         """会話コンテキストと感情から応答候補を生成.
 
+        on_suggestion を指定し、LLM_STREAMING_ENABLED が有効な場合は
+        ストリーミングで生成し、応答候補が1件完成するごとに通知する。
+
         Args:
             conversation_context: 直近の会話履歴
             emotion_interpretation: 相手の感情解釈
             partner_last_utterance: 相手の最後の発話
+            on_suggestion: 応答候補の逐次通知先（インデックス, 応答候補）
+            latency_budget_ms: このリクエストの残りの待ち時間の目安（ミリ秒,
+                LLM_PROVIDER=route でのみ使用。省略時は LLM_ROUTER_LATENCY_BUDGET_MS）
 
         Returns:
             LLMResponseResult: 2パターンの応答候補と状況分析
@@ -91,6 +198,7 @@ class LLMService:
             LLMError: LLM推論エラー
             LLMRateLimitError: レートリミットエラー
             LLMResponseParseError: レスポンスパースエラー
+            LLMUnavailableError: プロバイダーが障害中（呼び出さずに即座に送出）
         """
         prompt = self._build_prompt(
             conversation_context,
@@ -98,9 +206,147 @@ class LLMService:
             partner_last_utterance,
         )
 
-        raw_response = await self._call_api_with_retry(prompt)
+        settings = get_settings()
+        notify = on_suggestion if settings.LLM_STREAMING_ENABLED else None
+        budget_ms = (
+            settings.LLM_ROUTER_LATENCY_BUDGET_MS
+            if latency_budget_ms is None
+            else latency_budget_ms
+        )
+
+        # 発話がない場合は類似発話のキャッシュの対象外
+        utterance = (
+            "" if partner_last_utterance == NO_UTTERANCE else partner_last_utterance
+        )
+
+        async def generate(callback: SuggestionCallback | None) -> LLMResponseResult:
+            if self._semantic_cache is None:
+                return await self._generate(prompt, callback, budget_ms)
+            return await self._semantic_cache.get_or_generate(
+                emotion_interpretation.primary_emotion,
+                emotion_interpretation.intensity,
+                utterance,
+                lambda semantic_callback: self._generate(
+                    prompt, semantic_callback, budget_ms
+                ),
+                callback,
+            )
+
+        if self._cache is None:
+            return await generate(notify)
+        key = self._cache.key(
+            prompt, SYSTEM_PROMPT, self._model_name, settings.LLM_TEMPERATURE
+        )
+        return await self._cache.get_or_generate(key, generate, notify)
+
+    async def aclose(self) -> None:
+        """裏で実行中の処理（類似発話のキャッシュの更新・回復の確認）をキャンセルする."""
+        if self._semantic_cache is not None:
+            await self._semantic_cache.aclose()
+        for breaker in self._breakers.values():
+            await breaker.aclose()
+
+    async def _generate(
+        self,
+        prompt: str,
+        on_suggestion: SuggestionCallback | None,
+        budget_ms: float | None = None,
+    ) -> LLMResponseResult:
+        """キャッシュを使わずにプロンプトから応答候補を生成する."""
+        if self._race is not None:
+            result = await self._race_providers(prompt)
+            await replay_suggestions(result, on_suggestion)
+            return result
+        if self._router is not None:
+            return await self._router.run(
+                len(prompt),
+                budget_ms,
+                lambda provider: self._generate_with(prompt, on_suggestion, provider),
+                unavailable=self._unavailable_providers(),
+                # 呼び出さずに失敗した場合はプロバイダーのエラー率に含めない
+                unrecorded=(LLMUnavailableError,),
+            )
+        return await self._generate_with(prompt, on_suggestion, self._provider)
+
+    async def _guarded(self, provider: str, call: Callable[[], Awaitable[T]]) -> T:
+        """プロバイダーのサーキットブレーカーを通して call を実行する.
+
+        Raises:
+            LLMUnavailableError: ブレーカーが開いている場合（call は実行しない）
+        """
+        breaker = self._breakers.get(provider)
+        if breaker is None:
+            return await call()
+        try:
+            return await breaker.call(call)
+        except CircuitOpenError as e:
+            raise self._unavailable_error(provider) from e
+
+    def _unavailable_providers(self) -> list[str]:
+        """サーキットブレーカーが開いているプロバイダー.
+
+        reset_timeout が経過したブレーカーは、ここで裏での回復の確認を始める。
+        """
+        return [name for name, b in self._breakers.items() if not b.allow()]
+
+    @staticmethod
+    def _unavailable_error(provider: str) -> LLMUnavailableError:
+        get_metrics().increment("llm.unavailable")
+        return LLMUnavailableError(f"{provider} は一時的に利用できません")
+
+    def _prober(self, provider: str) -> Callable[[], Awaitable[None]]:
+        """サーキットブレーカーが回復を確認する呼び出し（短いプロンプトを送る）."""
+
+        async def probe() -> None:
+            model = self._clients.get(provider, self._model)
+            await asyncio.wait_for(
+                model.ainvoke([HumanMessage(content="ping")]),
+                timeout=PROBE_TIMEOUT_SECONDS,
+            )
+
+        return probe
+
+    async def _generate_with(
+        self,
+        prompt: str,
+        on_suggestion: SuggestionCallback | None,
+        provider: str,
+    ) -> LLMResponseResult:
+        """プロバイダーを指定して応答候補を生成する."""
+        raw_response = await self._call_api_with_retry(prompt, on_suggestion, provider)
+        # パースの失敗は応答内容の問題のため、サーキットブレーカーの失敗に数えない
         return self._parse_response(raw_response)
 
+    async def _race_providers(self, prompt: str) -> LLMResponseResult:
+        """全てのプロバイダーに同じプロンプトを送り、先にパースできた応答を返す.
+
+        パースに失敗した応答は負けとして他のプロバイダーを待つ。リトライはしない
+        （他のプロバイダーの応答がリトライの代わりになる）。
+
+        Raises:
+            LLMResponseParseError: 全ての応答のパースに失敗した場合
+            LLMError: 全てのプロバイダーの呼び出しに失敗した場合
+        """
+        assert self._race is not None
+
+        def call(name: str) -> Callable[[], Awaitable[LLMResponseResult]]:
+            async def invoke() -> LLMResponseResult:
+                # ブレーカーが開いているプロバイダーは即座に負ける
+                raw_response = await self._guarded(
+                    name, lambda: self._invoke(self._clients[name], prompt)
+                )
+                return self._parse_response(raw_response)
+
+            return invoke
+
+        try:
+            return await self._race.run({name: call(name) for name in self._clients})
+        except (asyncio.CancelledError, LLMError):
+            raise
+        except Exception as e:
+            logger.error(f"API error: {e}")
+            raise LLMError(f"API呼び出しエラー: {e}") from e
+
     def _build_prompt(
         self,
         context: list[Utterance],
@@ -156,34 +402,42 @@ class LLMService:
             KeyError: 必要なキーが見つからない場合
         """
         # 1. suggestions配列のキーを検出（優先順位順）
-        suggestions = None
-        for key in ["responses", "options", "advices"]:
-            if key in data:
-                suggestions = data[key]
-                break
-
-        if suggestions is None:
+        key = _suggestion_key(data)
+        if key is None:
             raise KeyError("responses/options/advices")
+        suggestions = data[key]
 
         # 2. situation_analysisのキーを検出
         analysis = data.get("situation_analysis") or data.get("advice") or ""
 
         # 3. 配列要素を正規化（文字列→オブジェクト変換）
-        normalized_responses = []
-        for item in suggestions:
-            if isinstance(item, str):
-                text = item.strip("「」")
-                normalized_responses.append({"text": text, "intent": ""})
-            else:
-                text = item.get("text", str(item)).strip("「」")
-                intent = item.get("intent", "")
-                normalized_responses.append({"text": text, "intent": intent})
+        normalized_responses = [
+            self._normalize_suggestion_item(item) for item in suggestions
+        ]
 
         return {
             "situation_analysis": analysis,
             "responses": normalized_responses,
         }
 
+    @staticmethod
+    def _normalize_suggestion_item(item: Any) -> dict[str, str]:
+        """応答候補の配列要素を {"text", "intent"} 形式に正規化.
+
+        FT形式では要素が文字列（「」付き）の場合がある。
+
+        Args:
+            item: 配列要素（文字列またはオブジェクト）
+
+        Returns:
+            正規化された応答候補
+        """
+        if isinstance(item, str):
+            return {"text": item.strip("「」"), "intent": ""}
+        text = item.get("text", str(item)).strip("「」")
+        intent = item.get("intent", "")
+        return {"text": text, "intent": intent}
+
     def _parse_response(self, raw_response: str) -> LLMResponseResult:
         """LLMのレスポンスをパース.
 
@@ -229,35 +483,75 @@ class LLMService:
             logger.error(f"Validation error: {e}")
             raise LLMResponseParseError(f"バリデーションエラー: {e}") from e
 
-    async def _call_api_with_retry(self, prompt: str) -> str:
+    async def _call_api_with_retry(
+        self,
+        prompt: str,
+        on_suggestion: SuggestionCallback | None = None,
+        provider: str | None = None,
+    ) -> str:
         """リトライ付きでAPIを呼び出す.
 
+        on_suggestion を指定した場合はストリーミングで呼び出す。リトライ時に
+        同じインデックスの応答候補を重複して通知することはない。
+
+        サーキットブレーカーには呼び出し1回ごとに成否を記録し、ブレーカーが
+        開いたら残りのリトライを待たずに LLMUnavailableError を送出する。
+
         Args:
             prompt: ユーザープロンプト
+            on_suggestion: 応答候補の逐次通知先
+            provider: 呼び出すプロバイダー（省略時は既定のプロバイダー）
 
         Returns:
             LLMからのレスポンス
 
         Raises:
             LLMRateLimitError: リトライ上限に達した場合
+            LLMUnavailableError: プロバイダーが障害中の場合
             LLMError: その他のAPIエラー
+            asyncio.CancelledError: 呼び出し元がキャンセルした場合（バックオフ待機中も即時）
         """
+        provider = provider or self._provider
+        model = self._clients.get(provider)
+        breaker = self._breakers.get(provider)
         delay = INITIAL_DELAY
         last_exception: Exception | None = None
 
+        async def call() -> str:
+            if on_suggestion is not None:
+                # 試行ごとに通知済みの候補を忘れる（リトライで変わった候補は通知し直す）
+                notify = _deduplicate_suggestions(on_suggestion)
+                return await self._stream_api(prompt, notify, model)
+            return await self._call_api(prompt, model)
+
         for attempt in range(MAX_RETRIES):
             try:
-                return await self._call_api(prompt)
+                return await self._guarded(provider, call)
+            except asyncio.CancelledError:
+                # 呼び出し元のキャンセル（RESET/切断など）。リトライ待機も含めて即中断する
+                get_metrics().increment("llm.cancelled")
+                logger.info(f"LLM call cancelled at attempt {attempt + 1}")
+                raise
+            except LLMUnavailableError:
+                raise
             except Exception as e:
                 last_exception = e
                 error_str = str(e).lower()
 
                 if "rate" in error_str or "429" in error_str or "quota" in error_str:
+                    if breaker is not None and breaker.state is not CircuitState.CLOSED:
+                        # 障害中と判断したら残りのリトライを待たない
+                        raise self._unavailable_error(provider) from e
                     logger.warning(
                         f"Rate limit hit, attempt {attempt + 1}/"
                         f"{MAX_RETRIES}, waiting {delay}s"
                     )
-                    await asyncio.sleep(delay)
+                    try:
+                        await asyncio.sleep(delay)
+                    except asyncio.CancelledError:
+                        get_metrics().increment("llm.cancelled")
+                        logger.info("LLM retry backoff cancelled")
+                        raise
                     delay = min(delay * EXPONENTIAL_BASE, MAX_DELAY)
                 else:
                     logger.error(f"API error: {e}")
@@ -267,19 +561,105 @@ class LLMService:
             f"リトライ上限に達しました: {last_exception}"
         ) from last_exception
 
-    async def _call_api(self, prompt: str) -> str:
+    async def _call_api(self, prompt: str, model: BaseChatModel | None = None) -> str:
         """APIを呼び出す.
 
         Args:
             prompt: ユーザープロンプト
+            model: 呼び出すクライアント（省略時は既定のクライアント）
 
         Returns:
             LLMからのレスポンス
         """
+        return await self._invoke(model or self._model, prompt)
+
+    @staticmethod
+    async def _invoke(model: BaseChatModel, prompt: str) -> str:
+        """指定したクライアントでAPIを呼び出す."""
         messages = [
             SystemMessage(content=SYSTEM_PROMPT),
             HumanMessage(content=prompt),
         ]
 
-        response = await self._model.ainvoke(messages)
+        response = await model.ainvoke(messages)
         return str(response.content)
+
+    async def _stream_api(
+        self,
+        prompt: str,
+        on_suggestion: SuggestionCallback,
+        model: BaseChatModel | None = None,
+    ) -> str:
+        """ストリーミングでAPIを呼び出し、完成した応答候補から順に通知する.
+
+        FT形式の応答候補も _normalize_suggestion_item で正規化してから通知する。
+        最終的な結果は戻り値の全文を _parse_response でパースして得る。
+        応答候補配列が複数ある場合は、_normalize_response_data と同じく
+        SUGGESTION_KEYS の優先順位が最も高いものを通知する（後から優先順位の
+        高い配列が現れたら、以降はそちらを通知する）。
+
+        Args:
+            prompt: ユーザープロンプト
+            on_suggestion: 応答候補の逐次通知先
+            model: 呼び出すクライアント（省略時は既定のクライアント）
+
+        Returns:
+            LLMからのレスポンス（全文）
+        """
+        messages = [
+            SystemMessage(content=SYSTEM_PROMPT),
+            HumanMessage(content=prompt),
+        ]
+
+        start_time = time.perf_counter()
+        parser = IncrementalJsonParser()
+        chunks: list[str] = []
+        seen_keys: set[str] = set()
+
+        async for chunk in (model or self._model).astream(messages):
+            text = str(chunk.content)
+            if not text:
+                continue
+            chunks.append(text)
+            for event in parser.feed(text):
+                if event.index is None or event.key not in SUGGESTION_KEYS:
+                    continue
+                seen_keys.add(event.key)
+                if event.key != _suggestion_key(seen_keys):
+                    continue
+                try:
+                    suggestion = ResponseSuggestion(
+                        **self._normalize_suggestion_item(event.value)
+                    )
+                except (AttributeError, ValueError) as e:
+                    logger.warning(f"Skipping malformed streamed suggestion: {e}")
+                    continue
+                if event.index == 0:
+                    get_metrics().observe(
+                        "llm.first_suggestion_ms",
+                        (time.perf_counter() - start_time) * 1000,
+                    )
+                await on_suggestion(event.index, suggestion)
+
+        return "".join(chunks)
+
+
+def _suggestion_key(keys: Container[str]) -> str | None:
+    """応答候補配列のキーのうち、SUGGESTION_KEYS の優先順位が最も高いものを返す."""
+    return next((key for key in SUGGESTION_KEYS if key in keys), None)
+
+
+def _deduplicate_suggestions(on_suggestion: SuggestionCallback) -> SuggestionCallback:
+    """同じインデックスに同じ応答候補を2度通知しないラッパー（1回の試行用）.
+
+    内容が変わった場合（優先順位の高い配列に切り替わった場合など）は通知し直す。
+    """
+    notified: dict[int, ResponseSuggestion] = {}
+
+    async def notify(index: int, suggestion: ResponseSuggestion) -> None:
+        if notified.get(index) == suggestion:
+            return
+        notified[index] = suggestion
+        await on_suggestion(index, suggestion)
+
+    return notify
@@ -0,0 +1,218 @@
+"""WebSocket接続ごとの送信キュー."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from fastapi import WebSocket
+
+from app.core.metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+EvictHandler = Callable[[WebSocket], Awaitable[None]]
+
+# 最新の状態だけが意味を持つメッセージタイプ（conflate 有効時に上書きする）
+CONFLATED_MESSAGE_TYPES = frozenset(
+    {"ANALYSIS_RESPONSE", "ANALYSIS_EMOTION", "TRANSCRIPT_PARTIAL"}
+)
+# 低速クライアントを切断するときのクローズコード（Try Again Later）
+SLOW_CONSUMER_CLOSE_CODE = 1013
+# キュー長ヒストグラムのバケット
+QUEUE_DEPTH_BUCKETS: tuple[float, ...] = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+@dataclass
+class _OutboundMessage:
+    """送信待ちメッセージ（conflate 時は text を上書きする）."""
+
+    message_type: str | None
+    text: str
+
+
+class OutboundQueue:
+    """1つのWebSocket接続の送信キューと、それを送信する writer タスク.
+
+    送信側（send_to_session など）は offer() でキューに積むだけで、
+    ネットワークI/Oは待たない。バックプレッシャーは以下の通り:
+
+    - キューは max_size 件で上限。上限に達した接続は低速クライアントとして切断する
+    - conflate 有効時、CONFLATED_MESSAGE_TYPES のメッセージは未送信の同タイプを
+      最新の内容で上書きする（キュー内の位置は変えない）
+    - 1件の送信には send_timeout の期限を設け、期限切れのメッセージは破棄する。
+      期限切れが max_missed_sends 回連続した場合、または送信エラーの場合は切断する
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        on_evict: EvictHandler,
+        metrics: MetricsRegistry,
+        max_size: int,
+        send_timeout: float,
+        max_missed_sends: int,
+        conflate: bool = False,
+    ) -> None:
+        """
+        初期化（writer タスクを開始する）.
+
+        Args:
+            websocket: 送信先の接続
+            on_evict: 切断時に呼ばれるハンドラ（接続の登録解除）
+            metrics: メトリクスレジストリ
+            max_size: キューの最大件数
+            send_timeout: 1件あたりの送信期限（秒）
+            max_missed_sends: 切断するまでに許容する連続期限切れ回数
+            conflate: 最新状態のみ必要なメッセージを上書きするか
+        """
+        self._websocket = websocket
+        self._on_evict = on_evict
+        self._metrics = metrics
+        self._max_size = max_size
+        self._send_timeout = send_timeout
+        self._max_missed_sends = max_missed_sends
+        self._conflate = conflate
+        self._entries: deque[_OutboundMessage] = deque()
+        self._pending_by_type: dict[str, _OutboundMessage] = {}
+        self._missed_sends = 0
+        self._evict_requested = False
+        self._closed = False
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task = asyncio.create_task(self._run())
+
+    @property
+    def depth(self) -> int:
+        """送信待ちの件数."""
+        return len(self._entries)
+
+    def offer(self, message_type: str | None, text: str) -> bool:
+        """メッセージを送信キューに積む（待機しない）.
+
+        Args:
+            message_type: メッセージタイプ（conflate の判定に使う）
+            text: エンコード済みのメッセージ
+
+        Returns:
+            受け付けた場合True。クローズ済み、またはキューが満杯の場合False
+        """
+        if self._closed or self._evict_requested:
+            return False
+
+        conflatable = self._conflate and message_type in CONFLATED_MESSAGE_TYPES
+        if conflatable:
+            pending = self._pending_by_type.get(message_type)  # type: ignore[arg-type]
+            if pending is not None:
+                pending.text = text
+                self._metrics.increment("ws.outbound.conflated")
+                return True
+
+        if len(self._entries) >= self._max_size:
+            self._metrics.increment("ws.outbound.overflows")
+            logger.warning(
+                "Outbound queue full (%d messages), evicting slow consumer",
+                self._max_size,
+            )
+            self._evict_requested = True
+            self._wakeup.set()
+            return False
+
+        entry = _OutboundMessage(message_type=message_type, text=text)
+        self._entries.append(entry)
+        if conflatable:
+            self._pending_by_type[message_type] = entry  # type: ignore[index]
+        self._metrics.observe(
+            "ws.outbound.queue_depth", len(self._entries), buckets=QUEUE_DEPTH_BUCKETS
+        )
+        self._idle.clear()
+        self._wakeup.set()
+        return True
+
+    async def join(self) -> None:
+        """キューが空になり、送信中のメッセージがなくなるまで待機する."""
+        await self._idle.wait()
+
+    def close(self) -> None:
+        """未送信のメッセージを破棄し、writer タスクを止める."""
+        self._closed = True
+        self._entries.clear()
+        self._pending_by_type.clear()
+        self._idle.set()
+        self._wakeup.set()
+        # 切断処理が writer タスク自身から呼ばれた場合はキャンセルしない
+        if self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    async def _run(self) -> None:
+        try:
+            while not self._closed:
+                if self._evict_requested:
+                    await self._evict()
+                    return
+                if not self._entries:
+                    self._idle.set()
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                entry = self._entries.popleft()
+                if entry.message_type is not None:
+                    if self._pending_by_type.get(entry.message_type) is entry:
+                        del self._pending_by_type[entry.message_type]
+                if not await self._send(entry.text):
+                    await self._evict()
+                    return
+        finally:
+            self._idle.set()
+
+    async def _send(self, text: str) -> bool:
+        """期限付きで送信する.
+
+        Returns:
+            接続を維持する場合True、切断すべき場合False
+        """
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._websocket.send_text(text), self._send_timeout)
+        except TimeoutError:
+            self._metrics.increment("ws.send_timeouts")
+            self._missed_sends += 1
+            logger.warning(
+                "WebSocket send timed out (%d/%d)",
+                self._missed_sends,
+                self._max_missed_sends,
+            )
+            return self._missed_sends < self._max_missed_sends
+        except Exception:
+            logger.exception("Failed to send WebSocket payload")
+            self._metrics.increment("ws.send_errors")
+            return False
+
+        self._metrics.observe(
+            "ws.send_latency_ms", (time.perf_counter() - start) * 1000
+        )
+        self._missed_sends = 0
+        return True
+
+    async def _evict(self) -> None:
+        """低速・異常な接続を登録解除し、クローズする."""
+        self._metrics.increment("ws.evictions")
+        self.close()
+        try:
+            await self._on_evict(self._websocket)
+        except Exception:
+            logger.exception("Failed to unregister evicted WebSocket")
+        try:
+            await asyncio.wait_for(
+                self._websocket.close(code=SLOW_CONSUMER_CLOSE_CODE),
+                self._send_timeout,
+            )
+        except Exception:
+            # 既に切断済み・応答しないクライアントは登録解除のみで十分
+            pass
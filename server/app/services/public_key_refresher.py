@@ -0,0 +1,86 @@
+"""IDトークン検証用の公開鍵をバックグラウンドで更新する."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable
+
+from app.core.metrics import MetricsRegistry, get_metrics
+
+logger = logging.getLogger(__name__)
+
+PublicKeyFetcher = Callable[[bool], float | None]
+
+DEFAULT_REFRESH_MARGIN = 300.0
+DEFAULT_REFRESH_INTERVAL = 3600.0
+DEFAULT_RETRY_INTERVAL = 30.0
+
+
+class PublicKeyRefresher:
+    """公開鍵を起動時に取得し、期限切れ前に取得し直す.
+
+    証明書の取得（同期のHTTP通信）はワーカースレッドで行う。
+    取得に失敗しても起動は止めず、retry_interval ごとに再試行する
+    （その間の検証では SDK が必要に応じて取得する）。
+    """
+
+    def __init__(
+        self,
+        fetch: PublicKeyFetcher,
+        refresh_margin: float = DEFAULT_REFRESH_MARGIN,
+        default_interval: float = DEFAULT_REFRESH_INTERVAL,
+        retry_interval: float = DEFAULT_RETRY_INTERVAL,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        """
+        初期化.
+
+        Args:
+            fetch: 公開鍵を取得し、有効期間（秒）を返す関数。引数はキャッシュを
+                無視して取得し直すかどうか
+            refresh_margin: 有効期限の何秒前に取得し直すか
+            default_interval: 有効期間が不明な場合の更新間隔（秒）
+            retry_interval: 取得に失敗した場合の再試行間隔（秒）
+            metrics: メトリクスレジストリ（省略時はグローバル）
+        """
+        self._fetch = fetch
+        self._refresh_margin = refresh_margin
+        self._default_interval = default_interval
+        self._retry_interval = retry_interval
+        self._metrics = metrics or get_metrics()
+        self._task: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        """公開鍵を取得し、以降の定期更新を開始する."""
+        if self._task is not None:
+            return
+        delay = await self._refresh(force_refresh=False)
+        self._task = asyncio.create_task(self._run(delay))
+
+    async def aclose(self) -> None:
+        """定期更新を停止する."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self, delay: float) -> None:
+        while True:
+            await asyncio.sleep(delay)
+            delay = await self._refresh(force_refresh=True)
+
+    async def _refresh(self, force_refresh: bool) -> float:
+        """公開鍵を取得し、次に取得するまでの待機時間を返す."""
+        try:
+            max_age = await asyncio.to_thread(self._fetch, force_refresh)
+        except Exception:
+            logger.exception("Failed to fetch token verification public keys")
+            self._metrics.increment("auth.public_key_refresh_errors")
+            return self._retry_interval
+
+        self._metrics.increment("auth.public_key_refreshes")
+        if max_age is None:
+            return self._default_interval
+        return max(max_age - self._refresh_margin, self._retry_interval)
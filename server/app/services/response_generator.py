@@ -5,19 +5,38 @@ from __future__ import annotations
 import asyncio
 import logging
 import time
+from collections.abc import Awaitable, Callable, Sequence
 from datetime import datetime, timezone
 
-from app.dto.audio import AudioFormat, TranscriptionResult
+from app.core.config import get_settings
+from app.core.exceptions import LLMUnavailableError
+from app.core.metrics import get_metrics
+from app.dto.audio import AudioClip, AudioFormat, TranscriptionResult
 from app.dto.conversation import EmotionContext, Speaker
 from app.dto.emotion import EmotionInterpretation
-from app.dto.processing import AnalysisResponse
+from app.dto.llm import ResponseSuggestion
+from app.dto.processing import (
+    AnalysisEmotionMessage,
+    AnalysisResponse,
+    AnalysisSuggestionMessage,
+    AnalysisSuggestionsMessage,
+    AnalysisTranscriptMessage,
+)
 from app.services.conversation_service import ConversationService
 from app.services.emotion_interpreter import EmotionInterpreterService
-from app.services.llm_service import LLMService
-from app.services.stt_service import STTService
+from app.services.llm_service import NO_UTTERANCE, LLMService
+from app.services.stt_service import STTService, join_transcripts
 
 logger = logging.getLogger(__name__)
 
+AnalysisStageMessage = (
+    AnalysisEmotionMessage
+    | AnalysisTranscriptMessage
+    | AnalysisSuggestionMessage
+    | AnalysisSuggestionsMessage
+)
+StageCallback = Callable[[AnalysisStageMessage], Awaitable[None]]
+
 
 class ResponseGeneratorService:
     """各サービスを統合して応答を生成."""
@@ -47,8 +66,13 @@ class ResponseGeneratorService:
         self,
         session_id: str,
         emotion_scores: dict[str, float],
-        audio_data: bytes | None = None,
+        audio_data: bytes | memoryview | None = None,
         audio_format: AudioFormat | None = None,
+        audio_clips: Sequence[AudioClip] | None = None,
+        sample_rate: int = 16000,
+        request_id: str | None = None,
+        on_stage: StageCallback | None = None,
+        transcripts: Sequence[TranscriptionResult] | None = None,
     ) -> AnalysisResponse:
         """
         メイン処理パイプライン.
@@ -60,11 +84,24 @@ class ResponseGeneratorService:
         4. LLM推論
         5. 結果統合
 
+        LLMが障害中（LLMUnavailableError）の場合は待たずに、感情解釈から作った
+        応答候補を is_fallback=True で返す。
+
+        on_stage を指定した場合、各段階の完了時点で部分結果を通知する
+        （感情解釈 → STT結果（音声がある場合）→ 応答候補（1件ずつ）→ 応答候補一式）。
+
         Args:
             session_id: セッションID
             emotion_scores: 感情スコア（Kotlin側で算出）
-            audio_data: 音声データ（オプション）
+            audio_data: 音声データ（オプション、バイナリフレームの場合は memoryview）
             audio_format: 音声フォーマット（オプション）
+            audio_clips: 統合されたリクエストの音声クリップ（古い順）。
+                audio_data より前に発話されたものとして扱う
+            sample_rate: audio_data のサンプリングレート
+            request_id: リクエストID（段階配信メッセージと結果に付与）
+            on_stage: 段階ごとの部分結果の通知先（オプション）
+            transcripts: ストリーミング認識で確定済みの発話（古い順）。
+                STTを行わず、音声クリップより前に発話されたものとして扱う
 
         Returns:
             AnalysisResponse: 統合された解析結果
@@ -72,13 +109,19 @@ class ResponseGeneratorService:
         start_time = time.perf_counter()
         logger.info(f"Processing request for session {session_id}")
 
-        # 1. STTタスクを非同期で開始（待機しない）
-        stt_task: asyncio.Task[TranscriptionResult | None] | None = None
+        clips = list(audio_clips or [])
         if audio_data and audio_format:
-            stt_task = asyncio.create_task(
-                self._transcribe_audio(audio_data, audio_format)
+            clips.append(
+                AudioClip(data=audio_data, format=audio_format, sample_rate=sample_rate)
             )
 
+        recognized = list(transcripts or [])
+
+        # 1. STTタスクを非同期で開始（待機しない）
+        stt_task: asyncio.Task[list[TranscriptionResult | None]] | None = None
+        if clips:
+            stt_task = asyncio.create_task(self._transcribe_clips(clips))
+
         # 2. STTと並列で実行（即座に完了）
         try:
             emotion_interpretation = self._interpret_emotion(emotion_scores)
@@ -90,42 +133,192 @@ class ResponseGeneratorService:
                 stt_task.cancel()
             raise
 
-        # 3. STT完了を待機
-        transcription: TranscriptionResult | None = None
-        partner_utterance: str = ""
-        if stt_task:
-            transcription = await stt_task
-            if transcription:
-                partner_utterance = transcription.text
-                logger.debug(f"STT result: {transcription.text[:50]}...")
-                self._update_conversation(session_id, partner_utterance, emotion_scores)
-
-        logger.info(f"Calling LLM with {len(conversation_context)} context turns")
-
-        llm_result = await self._llm.generate_responses(
-            conversation_context=conversation_context,
-            emotion_interpretation=emotion_interpretation,
-            partner_last_utterance=partner_utterance or "(発話なし)",
-        )
+        # 3. STT完了を待機 → 4. LLM推論
+        # キャンセル時（RESET/切断/後続リクエストによる置き換え）はSTTタスクも止める。
+        # 会話履歴の更新は同期処理のため、途中でキャンセルされても中途半端な状態は残らない。
+        try:
+            if on_stage and request_id:
+                await self._emit_stage(
+                    on_stage,
+                    AnalysisEmotionMessage(
+                        request_id=request_id,
+                        timestamp=datetime.now(timezone.utc),
+                        emotion=emotion_interpretation,
+                    ),
+                )
+
+            transcription: TranscriptionResult | None = None
+            partner_utterance: str = ""
+            if stt_task or recognized:
+                results: list[TranscriptionResult | None] = list(recognized)
+                if stt_task:
+                    results += await stt_task
+                for result in results:
+                    if result:
+                        logger.debug(f"STT result: {result.text[:50]}...")
+                        self._update_conversation(
+                            session_id, result.text, emotion_scores
+                        )
+                transcription = self._merge_transcriptions(results)
+                if transcription:
+                    partner_utterance = transcription.text
+
+                if on_stage and request_id:
+                    await self._emit_stage(
+                        on_stage,
+                        AnalysisTranscriptMessage(
+                            request_id=request_id,
+                            timestamp=datetime.now(timezone.utc),
+                            transcription=transcription,
+                        ),
+                    )
+
+            logger.info(f"Calling LLM with {len(conversation_context)} context turns")
+
+            # 待ち時間の目安のうち STT などで使った分を除いた残り
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            latency_budget_ms = max(
+                get_settings().LLM_ROUTER_LATENCY_BUDGET_MS - elapsed_ms, 0.0
+            )
+
+            is_fallback = False
+            try:
+                llm_result = await self._llm.generate_responses(
+                    conversation_context=conversation_context,
+                    emotion_interpretation=emotion_interpretation,
+                    partner_last_utterance=partner_utterance or NO_UTTERANCE,
+                    on_suggestion=(
+                        self._suggestion_notifier(on_stage, request_id)
+                        if on_stage and request_id
+                        else None
+                    ),
+                    latency_budget_ms=latency_budget_ms,
+                )
+            except LLMUnavailableError as e:
+                logger.warning(f"LLM unavailable, using fallback responses: {e}")
+                get_metrics().increment("llm.fallback")
+                llm_result = self._emotion.fallback_responses(emotion_interpretation)
+                is_fallback = True
+        except asyncio.CancelledError:
+            if stt_task and not stt_task.done():
+                stt_task.cancel()
+            logger.info(f"Processing cancelled for session {session_id}")
+            raise
 
         processing_time_ms = int((time.perf_counter() - start_time) * 1000)
 
         logger.info(f"Processing completed in {processing_time_ms}ms")
 
+        timestamp = datetime.now(timezone.utc)
+        if on_stage and request_id:
+            await self._emit_stage(
+                on_stage,
+                AnalysisSuggestionsMessage(
+                    request_id=request_id,
+                    timestamp=timestamp,
+                    suggestions=llm_result.responses,
+                    situation_analysis=llm_result.situation_analysis,
+                    processing_time_ms=processing_time_ms,
+                    is_fallback=is_fallback,
+                ),
+            )
+
         return AnalysisResponse(
             type="ANALYSIS_RESPONSE",
-            timestamp=datetime.now(timezone.utc),
+            timestamp=timestamp,
             emotion=emotion_interpretation,
             transcription=transcription,
             suggestions=llm_result.responses,
             situation_analysis=llm_result.situation_analysis,
             processing_time_ms=processing_time_ms,
+            request_id=request_id,
+            is_fallback=is_fallback,
+        )
+
+    def _suggestion_notifier(
+        self,
+        on_stage: StageCallback,
+        request_id: str,
+    ) -> Callable[[int, ResponseSuggestion], Awaitable[None]]:
+        """LLMのストリーミング生成中に完成した応答候補を段階配信する通知先."""
+
+        async def notify(index: int, suggestion: ResponseSuggestion) -> None:
+            await self._emit_stage(
+                on_stage,
+                AnalysisSuggestionMessage(
+                    request_id=request_id,
+                    timestamp=datetime.now(timezone.utc),
+                    index=index,
+                    suggestion=suggestion,
+                ),
+            )
+
+        return notify
+
+    @staticmethod
+    async def _emit_stage(
+        on_stage: StageCallback,
+        message: AnalysisStageMessage,
+    ) -> None:
+        """
+        段階配信メッセージを通知.
+
+        通知の失敗は解析処理に影響させない。
+        """
+        try:
+            await on_stage(message)
+        except Exception as e:
+            logger.error(f"Failed to emit {message.type}: {e}")
+
+    async def _transcribe_clips(
+        self,
+        clips: list[AudioClip],
+    ) -> list[TranscriptionResult | None]:
+        """複数の音声クリップを並列にテキスト化（結果は入力順）."""
+        return list(
+            await asyncio.gather(
+                *(
+                    self._transcribe_audio(clip.data, clip.format, clip.sample_rate)
+                    for clip in clips
+                )
+            )
+        )
+
+    @staticmethod
+    def _merge_transcriptions(
+        results: list[TranscriptionResult | None],
+    ) -> TranscriptionResult | None:
+        """
+        複数クリップのSTT結果を1つに統合.
+
+        テキストは発話順に言語に応じて連結し、信頼度は音声長で重み付けした平均とする。
+        """
+        valid = [r for r in results if r is not None]
+        if not valid:
+            return None
+        if len(valid) == 1:
+            return valid[0]
+
+        total_duration = sum(r.duration_ms for r in valid)
+        if total_duration > 0:
+            confidence = (
+                sum(r.confidence * r.duration_ms for r in valid) / total_duration
+            )
+        else:
+            confidence = sum(r.confidence for r in valid) / len(valid)
+
+        return TranscriptionResult(
+            text=join_transcripts((r.text for r in valid), valid[0].language),
+            confidence=confidence,
+            language=valid[0].language,
+            duration_ms=total_duration,
         )
 
     async def _transcribe_audio(
         self,
-        audio_data: bytes,
+        audio_data: bytes | memoryview,
         audio_format: AudioFormat,
+        sample_rate: int = 16000,
     ) -> TranscriptionResult | None:
         """
         音声をテキストに変換.
@@ -136,6 +329,7 @@ class ResponseGeneratorService:
             return await self._stt.transcribe(
                 audio_data=audio_data,
                 format=audio_format,
+                sample_rate=sample_rate,
                 language="ja",
             )
         except Exception as e:
@@ -0,0 +1,300 @@
+"""セッションをまたいだ応答候補のキャッシュ（類似発話の検索）."""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import math
+import re
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from app.core.metrics import MetricsRegistry, get_metrics
+from app.dto.llm import LLMResponseResult
+from app.services.llm_cache import SuggestionCallback, replay_suggestions
+
+logger = logging.getLogger(__name__)
+
+Generator = Callable[[SuggestionCallback | None], Awaitable[LLMResponseResult]]
+
+# 類似度の計算で無視する記号・空白
+_IGNORED = re.compile(r"[\s、。，．,.!！?？…・〜~「」『』（）()\"']+")
+# 類似度のヒストグラムのバケット
+SIMILARITY_BUCKETS: tuple[float, ...] = (0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.0)
+
+
+def normalize_utterance(text: str) -> str:
+    """発話を比較用に正規化する（NFKC・小文字化・記号と空白の除去）."""
+    return _IGNORED.sub("", unicodedata.normalize("NFKC", text).lower())
+
+
+def _ngrams(text: str) -> Counter[str]:
+    """文字の1-gram と、前後の境界を含む2-gram の出現数."""
+    padded = f"^{text}$"
+    return Counter(text) + Counter(padded[i : i + 2] for i in range(len(padded) - 1))
+
+
+def _bigrams(vector: Counter[str]) -> list[str]:
+    return [gram for gram in vector if len(gram) == 2]
+
+
+def _cosine(a: Counter[str], b: Counter[str], norm_a: float, norm_b: float) -> float:
+    if not norm_a or not norm_b:
+        return 0.0
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(count * b[gram] for gram, count in a.items()) / (norm_a * norm_b)
+
+
+def _norm(vector: Counter[str]) -> float:
+    return math.sqrt(sum(count * count for count in vector.values()))
+
+
+@dataclass
+class _Entry:
+    """キャッシュした応答と、検索用の発話の n-gram."""
+
+    bucket: tuple[str, str]
+    text: str
+    vector: Counter[str]
+    norm: float
+    result: LLMResponseResult
+    created_at: float
+
+
+class SemanticSuggestionCache:
+    """感情と似た発話に対する応答候補を、セッションをまたいで再利用する.
+
+    「そうなんだ」「へえ、すごいね」のような相づちへの応答は、相手の感情が同じなら
+    ユーザーによらずほぼ同じになるため、LLM を呼ばずに過去の応答候補を返す。
+
+    - キーは（主要な感情, 強度, 正規化した最後の発話）。同じ感情・強度の中で、
+      文字 n-gram（1-gram と 2-gram）のコサイン類似度が threshold 以上の発話を
+      ヒットとする。候補は n-gram の転置インデックスで絞り込む（ネットワーク不要）
+    - 発話がない場合と、max_chars より長い発話（内容に依存する）は対象外
+    - エントリは ttl_seconds で失効し、容量は max_entries 件（超過時は LRU で追い出す）
+    - ヒットした場合はすぐに応答候補を返し、以下の場合は裏で LLM を呼んで更新する:
+      類似（完全一致でない）発話でヒットした場合（その発話のエントリを追加する）と、
+      エントリが refresh_seconds より古い場合
+    - 更新した応答候補が返した応答候補と似ていない（類似度が threshold 未満）場合は
+      誤ヒットとして数える
+
+    メトリクス: ``llm.semantic_cache.hits`` / ``misses`` / ``skipped`` /
+    ``similarity``（ヒット時の類似度）/ ``refreshes`` / ``refresh_errors`` /
+    ``false_hits`` / ``size``
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        threshold: float = 0.8,
+        max_chars: int = 30,
+        refresh_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        """
+        初期化.
+
+        Args:
+            max_entries: 最大エントリ数
+            ttl_seconds: エントリの有効期間（秒）
+            threshold: ヒットとみなす類似度（0.0-1.0）
+            max_chars: 対象とする発話の最大文字数（正規化後）
+            refresh_seconds: ヒット時に裏で更新するエントリの古さ（秒）
+            clock: 有効期限の判定に使う時計
+            metrics: メトリクスレジストリ（省略時はグローバル）
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._threshold = threshold
+        self._max_chars = max_chars
+        self._refresh_seconds = refresh_seconds
+        self._clock = clock
+        self._metrics = metrics or get_metrics()
+        self._ids = itertools.count()
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._exact: dict[tuple[tuple[str, str], str], int] = {}
+        self._index: dict[tuple[str, str], dict[str, set[int]]] = {}
+        self._refreshing: set[tuple[tuple[str, str], str]] = set()
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_generate(
+        self,
+        primary_emotion: str,
+        intensity: str,
+        utterance: str,
+        generate: Generator,
+        on_suggestion: SuggestionCallback | None = None,
+    ) -> LLMResponseResult:
+        """似た発話の応答候補があれば返し、なければ generate で生成して保存する.
+
+        Args:
+            primary_emotion: 相手の主要な感情
+            intensity: 感情の強度
+            utterance: 相手の最後の発話（空の場合は対象外）
+            generate: キャッシュにない場合の生成処理（逐次通知先を受け取る）
+            on_suggestion: 応答候補の逐次通知先
+
+        Returns:
+            応答候補と状況分析
+
+        Raises:
+            generate が送出した例外
+        """
+        text = normalize_utterance(utterance)
+        if not text or len(text) > self._max_chars:
+            self._metrics.increment("llm.semantic_cache.skipped")
+            return await generate(on_suggestion)
+
+        bucket = (primary_emotion, intensity)
+        vector = _ngrams(text)
+        norm = _norm(vector)
+        found = self._lookup(bucket, text, vector, norm)
+        if found is None:
+            self._metrics.increment("llm.semantic_cache.misses")
+            result = await generate(on_suggestion)
+            self._store(bucket, text, vector, norm, result)
+            return result
+
+        entry, similarity = found
+        self._metrics.increment("llm.semantic_cache.hits")
+        self._metrics.observe(
+            "llm.semantic_cache.similarity", similarity, buckets=SIMILARITY_BUCKETS
+        )
+        if entry.text != text or self._clock() - entry.created_at >= (
+            self._refresh_seconds
+        ):
+            self._refresh(bucket, text, vector, norm, entry.result, generate)
+        await replay_suggestions(entry.result, on_suggestion)
+        return entry.result
+
+    async def aclose(self) -> None:
+        """裏で実行中の更新をキャンセルする."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _lookup(
+        self,
+        bucket: tuple[str, str],
+        text: str,
+        vector: Counter[str],
+        norm: float,
+    ) -> tuple[_Entry, float] | None:
+        """最も似た発話のエントリと類似度を返す（threshold 未満の場合None）."""
+        now = self._clock()
+        entry_id = self._exact.get((bucket, text))
+        if entry_id is not None:
+            entry = self._entries[entry_id]
+            if now - entry.created_at < self._ttl:
+                self._entries.move_to_end(entry_id)
+                return entry, 1.0
+            self._remove(entry_id)
+
+        # 候補は2-gram を共有する発話に限る（1-gram は共有する発話が多すぎる）
+        index = self._index.get(bucket, {})
+        candidates = set().union(*(index.get(gram, ()) for gram in _bigrams(vector)))
+        best: tuple[int, float] | None = None
+        for candidate in candidates:
+            entry = self._entries[candidate]
+            if now - entry.created_at >= self._ttl:
+                self._remove(candidate)
+                continue
+            similarity = _cosine(vector, entry.vector, norm, entry.norm)
+            if similarity >= self._threshold and (best is None or similarity > best[1]):
+                best = (candidate, similarity)
+        if best is None:
+            return None
+        self._entries.move_to_end(best[0])
+        return self._entries[best[0]], best[1]
+
+    def _store(
+        self,
+        bucket: tuple[str, str],
+        text: str,
+        vector: Counter[str],
+        norm: float,
+        result: LLMResponseResult,
+    ) -> None:
+        existing = self._exact.get((bucket, text))
+        if existing is not None:
+            self._remove(existing)
+        entry_id = next(self._ids)
+        self._entries[entry_id] = _Entry(
+            bucket, text, vector, norm, result, self._clock()
+        )
+        self._exact[(bucket, text)] = entry_id
+        index = self._index.setdefault(bucket, {})
+        for gram in _bigrams(vector):
+            index.setdefault(gram, set()).add(entry_id)
+        while len(self._entries) > self._max_entries:
+            self._remove(next(iter(self._entries)))
+        self._metrics.set_gauge("llm.semantic_cache.size", len(self._entries))
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        del self._exact[(entry.bucket, entry.text)]
+        index = self._index[entry.bucket]
+        for gram in _bigrams(entry.vector):
+            ids = index[gram]
+            ids.discard(entry_id)
+            if not ids:
+                del index[gram]
+
+    def _refresh(
+        self,
+        bucket: tuple[str, str],
+        text: str,
+        vector: Counter[str],
+        norm: float,
+        served: LLMResponseResult,
+        generate: Generator,
+    ) -> None:
+        """裏で LLM を呼び、この発話のエントリを追加・更新する."""
+        key = (bucket, text)
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        self._metrics.increment("llm.semantic_cache.refreshes")
+
+        async def refresh() -> None:
+            try:
+                result = await generate(None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._metrics.increment("llm.semantic_cache.refresh_errors")
+                logger.warning(f"Semantic cache refresh failed: {e}")
+                return
+            finally:
+                self._refreshing.discard(key)
+            if _suggestion_similarity(served, result) < self._threshold:
+                self._metrics.increment("llm.semantic_cache.false_hits")
+            self._store(bucket, text, vector, norm, result)
+
+        task = asyncio.ensure_future(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+def _suggestion_similarity(a: LLMResponseResult, b: LLMResponseResult) -> float:
+    """2つの応答候補一式の類似度（応答文をつないだ文字 n-gram のコサイン類似度）."""
+    vectors = [
+        _ngrams(normalize_utterance("".join(r.text for r in result.responses)))
+        for result in (a, b)
+    ]
+    return _cosine(vectors[0], vectors[1], _norm(vectors[0]), _norm(vectors[1]))
@@ -0,0 +1,454 @@
+"""セッション単位のストリーミング音声認識."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Awaitable, Callable
+
+from app.core.config import get_settings
+from app.core.exceptions import STTError
+from app.core.metrics import MetricsRegistry, get_metrics
+from app.dto.audio import AudioFormat, StreamingTranscript, TranscriptionResult
+from app.services.stt_service import STTService
+
+logger = logging.getLogger(__name__)
+
+PartialHandler = Callable[[str, StreamingTranscript], Awaitable[None]]
+FinalHandler = Callable[[str, TranscriptionResult, dict[str, float]], Awaitable[None]]
+ErrorHandler = Callable[[str, STTError, bool], Awaitable[None]]
+
+
+class StreamingTranscriptionSession:
+    """1セッション（会話）の音声チャンクを認識ストリームに流し続ける.
+
+    チャンクは feed で受け取り、バックグラウンドのタスクが STTService.stream に渡す。
+    途中結果は on_partial、発話の終わりで確定した結果は on_final に通知する。
+
+    認識ストリームは音声が届いた時点で開き、以下の場合に閉じる
+    （閉じた後に届いた音声で新しいストリームを開く）:
+
+    - 音声が idle_seconds 以上途切れた場合
+    - ストリームが max_stream_seconds に達した場合（API の上限対策）
+    - finish が呼ばれた場合（以降は再開しない）
+
+    認識ストリームが失敗した場合は on_error に通知し、retry_delay から倍々に
+    （max_retry_delay まで）待ってから次のストリームを開く。max_consecutive_errors 回
+    続けて失敗したら認識を諦めて終了する（failed）。認証エラーやクォータ超過のような
+    続く失敗で、認識待ちのチャンクごとに認識を呼び続けないようにするため。
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        stt_service: STTService,
+        on_partial: PartialHandler,
+        on_final: FinalHandler,
+        audio_format: AudioFormat,
+        sample_rate: int = 16000,
+        language: str = "ja",
+        max_stream_seconds: float = 280.0,
+        idle_seconds: float = 3.0,
+        max_buffered_chunks: int = 200,
+        metrics: MetricsRegistry | None = None,
+        on_error: ErrorHandler | None = None,
+        max_consecutive_errors: int = 3,
+        retry_delay: float = 0.5,
+        max_retry_delay: float = 5.0,
+    ) -> None:
+        """
+        初期化.
+
+        Args:
+            session_id: セッションID
+            stt_service: 音声認識サービス
+            on_partial: 途中結果の通知先（session_id, 途中結果）
+            on_final: 確定結果の通知先（session_id, 認識結果, 最新の感情スコア）
+            audio_format: 音声フォーマット（pcm または opus）
+            sample_rate: サンプリングレート
+            language: 言語コード
+            max_stream_seconds: 1ストリームの最長時間（秒）
+            idle_seconds: 音声が途切れてからストリームを閉じるまでの時間（秒）
+            max_buffered_chunks: 認識待ちのチャンク数の上限（超過分は破棄）
+            metrics: メトリクスレジストリ（省略時はグローバル）
+            on_error: 認識の失敗の通知先（session_id, エラー, 諦めたか）
+            max_consecutive_errors: 認識を諦めるまでに許容する連続失敗回数
+            retry_delay: 失敗後に次のストリームを開くまでの初回待機時間（秒）
+            max_retry_delay: 失敗後の待機時間の上限（秒）
+        """
+        if max_consecutive_errors < 1:
+            raise ValueError("max_consecutive_errors must be >= 1")
+        self._session_id = session_id
+        self._stt = stt_service
+        self._on_partial = on_partial
+        self._on_final = on_final
+        self._audio_format = audio_format
+        self._sample_rate = sample_rate
+        self._language = language
+        self._max_stream_seconds = max_stream_seconds
+        self._idle_seconds = idle_seconds
+        self._metrics = metrics or get_metrics()
+        self._on_error = on_error
+        self._max_consecutive_errors = max_consecutive_errors
+        self._retry_delay = retry_delay
+        self._max_retry_delay = max_retry_delay
+        # None は音声の終わり（finish）を表す
+        self._queue: asyncio.Queue[bytes | None] = asyncio.Queue(max_buffered_chunks)
+        self._emotion_scores: dict[str, float] = {}
+        self._ended = False
+        self._finishing = False
+        self._failed = False
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def session_id(self) -> str:
+        """セッションID."""
+        return self._session_id
+
+    @property
+    def closed(self) -> bool:
+        """音声の受け付けを終了したか（以降のチャンクは受け付けない）."""
+        return (
+            self._ended
+            or self._finishing
+            or (self._task is not None and self._task.done())
+        )
+
+    @property
+    def failed(self) -> bool:
+        """認識の連続失敗で終了したか."""
+        return self._failed
+
+    def start(self) -> None:
+        """認識タスクを開始する."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def feed(
+        self,
+        chunk: bytes | memoryview,
+        emotion_scores: dict[str, float] | None = None,
+    ) -> bool:
+        """
+        音声チャンクを認識待ちに積む.
+
+        Args:
+            chunk: 音声チャンク
+            emotion_scores: 最新の感情スコア（確定結果の解析に使う）
+
+        Returns:
+            積めた場合True。終了済み、または認識待ちが上限に達した場合False
+        """
+        if emotion_scores:
+            self._emotion_scores = emotion_scores
+        if self._task is None or self.closed:
+            return False
+        try:
+            self._queue.put_nowait(bytes(chunk))
+        except asyncio.QueueFull:
+            self._metrics.increment("stt.stream.dropped_chunks")
+            return False
+        return True
+
+    async def finish(self) -> None:
+        """音声の終わりを伝える（残りの結果はバックグラウンドで通知する）."""
+        if self._task is None or self.closed:
+            return
+        self._finishing = True
+        # 受信ループを止めないよう待たずに積む。認識待ちが上限に達している場合は
+        # _finishing を見て、残りのチャンクを認識した後に終える
+        try:
+            self._queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+    def add_done_callback(self, callback: Callable[[], None]) -> None:
+        """認識タスクの終了時に呼ぶ関数を登録する."""
+        task = self._task
+        if task is None or task.done():
+            callback()
+            return
+        task.add_done_callback(lambda _: callback())
+
+    async def aclose(self) -> None:
+        """認識を中断する（未通知の結果は破棄する）."""
+        self._ended = True
+        task = self._task
+        if task is None:
+            return
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def _run(self) -> None:
+        errors = 0
+        while not self._ended:
+            chunk = await self._next_chunk()
+            if chunk is None:
+                break
+            try:
+                await self._recognize(chunk)
+            except STTError as e:
+                errors += 1
+                self._metrics.increment("stt.stream.errors")
+                logger.error(
+                    "Session %s: streaming recognition failed (%d/%d): %s",
+                    self._session_id,
+                    errors,
+                    self._max_consecutive_errors,
+                    e,
+                )
+                if errors >= self._max_consecutive_errors:
+                    self._give_up()
+                await self._notify_error(e, gave_up=self._failed)
+                if not self._failed:
+                    delay = self._retry_delay * 2 ** (errors - 1)
+                    await asyncio.sleep(min(delay, self._max_retry_delay))
+                continue
+            errors = 0
+        self._ended = True
+
+    def _give_up(self) -> None:
+        """認識を諦め、認識待ちのチャンクを破棄する."""
+        self._failed = True
+        self._ended = True
+        dropped = 0
+        while not self._queue.empty():
+            if self._queue.get_nowait() is not None:
+                dropped += 1
+        self._metrics.increment("stt.stream.gave_up")
+        if dropped:
+            self._metrics.increment("stt.stream.dropped_chunks", dropped)
+
+    async def _notify_error(self, error: STTError, gave_up: bool) -> None:
+        if self._on_error is not None:
+            await self._notify(self._on_error(self._session_id, error, gave_up))
+
+    async def _recognize(self, first_chunk: bytes) -> None:
+        """1本の認識ストリームを開き、閉じるまで結果を通知する."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._max_stream_seconds
+
+        async def audio_chunks() -> AsyncIterator[bytes]:
+            yield first_chunk
+            while True:
+                timeout = min(self._idle_seconds, deadline - loop.time())
+                if timeout <= 0:
+                    return
+                try:
+                    chunk = await asyncio.wait_for(self._next_chunk(), timeout)
+                except TimeoutError:
+                    return
+                if chunk is None:
+                    self._ended = True
+                    return
+                yield chunk
+
+        self._metrics.increment("stt.stream.started")
+        last_end_ms = 0
+        async for transcript in self._stt.stream(
+            audio_chunks(),
+            format=self._audio_format,
+            sample_rate=self._sample_rate,
+            language=self._language,
+        ):
+            if not transcript.is_final:
+                await self._notify(self._on_partial(self._session_id, transcript))
+                continue
+
+            duration_ms = max(transcript.end_time_ms - last_end_ms, 0)
+            last_end_ms = transcript.end_time_ms
+            if not transcript.text:
+                continue
+            self._metrics.increment("stt.stream.utterances")
+            result = TranscriptionResult(
+                text=transcript.text,
+                confidence=transcript.confidence,
+                language=self._language,
+                duration_ms=duration_ms,
+            )
+            await self._notify(
+                self._on_final(self._session_id, result, self._emotion_scores)
+            )
+
+    async def _next_chunk(self) -> bytes | None:
+        """次のチャンク（音声の終わりの場合None）."""
+        if self._finishing and self._queue.empty():
+            return None
+        return await self._queue.get()
+
+    async def _notify(self, notification: Awaitable[None]) -> None:
+        """通知の失敗は認識に影響させない."""
+        try:
+            await notification
+        except Exception:
+            logger.exception("Session %s: transcript handler failed", self._session_id)
+
+
+class StreamingTranscriptionManager:
+    """セッションごとのストリーミング認識を管理する.
+
+    セッションの最初の音声チャンクで認識を開始し、finish（音声の終わり）または
+    close（RESET・全接続の切断）まで同じ認識を使い続ける。音声フォーマット等は
+    最初のチャンクの指定が使われる。認識が連続失敗で終了したセッションは、
+    finish または close されるまで新しいチャンクを受け付けない。
+    """
+
+    def __init__(
+        self,
+        stt_service: STTService,
+        on_partial: PartialHandler,
+        on_final: FinalHandler,
+        max_stream_seconds: float | None = None,
+        idle_seconds: float | None = None,
+        max_buffered_chunks: int | None = None,
+        metrics: MetricsRegistry | None = None,
+        on_error: ErrorHandler | None = None,
+        max_consecutive_errors: int | None = None,
+        retry_delay: float | None = None,
+    ) -> None:
+        """
+        初期化.
+
+        Args:
+            stt_service: 音声認識サービス
+            on_partial: 途中結果の通知先（session_id, 途中結果）
+            on_final: 確定結果の通知先（session_id, 認識結果, 最新の感情スコア）
+            max_stream_seconds: 1ストリームの最長時間（省略時は STT_STREAM_MAX_SECONDS）
+            idle_seconds: 音声の途切れでストリームを閉じるまでの時間
+                （省略時は STT_STREAM_IDLE_SECONDS）
+            max_buffered_chunks: 認識待ちのチャンク数の上限
+                （省略時は STT_STREAM_MAX_BUFFERED_CHUNKS）
+            metrics: メトリクスレジストリ（省略時はグローバル）
+            on_error: 認識の失敗の通知先（session_id, エラー, 諦めたか）
+            max_consecutive_errors: 認識を諦めるまでの連続失敗回数
+                （省略時は STT_STREAM_MAX_CONSECUTIVE_ERRORS）
+            retry_delay: 失敗後に次のストリームを開くまでの初回待機時間
+                （省略時は STT_STREAM_RETRY_DELAY_SECONDS）
+        """
+        settings = get_settings()
+        self._stt = stt_service
+        self._on_partial = on_partial
+        self._on_final = on_final
+        self._max_stream_seconds = max_stream_seconds or settings.STT_STREAM_MAX_SECONDS
+        self._idle_seconds = idle_seconds or settings.STT_STREAM_IDLE_SECONDS
+        self._max_buffered_chunks = (
+            max_buffered_chunks or settings.STT_STREAM_MAX_BUFFERED_CHUNKS
+        )
+        self._metrics = metrics or get_metrics()
+        self._on_error = on_error
+        self._max_consecutive_errors = (
+            max_consecutive_errors or settings.STT_STREAM_MAX_CONSECUTIVE_ERRORS
+        )
+        self._retry_delay = (
+            settings.STT_STREAM_RETRY_DELAY_SECONDS if retry_delay is None else retry_delay
+        )
+        self._max_retry_delay = settings.STT_STREAM_MAX_RETRY_DELAY_SECONDS
+        self._sessions: dict[str, StreamingTranscriptionSession] = {}
+        # finish 後、残りの結果を通知中のセッション
+        self._finishing: set[StreamingTranscriptionSession] = set()
+
+    def __contains__(self, session_id: object) -> bool:
+        return session_id in self._sessions
+
+    def feed(
+        self,
+        session_id: str,
+        chunk: bytes | memoryview,
+        audio_format: AudioFormat = AudioFormat.PCM,
+        sample_rate: int = 16000,
+        language: str = "ja",
+        emotion_scores: dict[str, float] | None = None,
+    ) -> bool:
+        """
+        音声チャンクをセッションの認識に渡す（未開始なら開始する）.
+
+        Args:
+            session_id: セッションID
+            chunk: 音声チャンク
+            audio_format: 音声フォーマット（開始時のみ使用）
+            sample_rate: サンプリングレート（開始時のみ使用）
+            language: 言語コード（開始時のみ使用）
+            emotion_scores: 最新の感情スコア
+
+        Returns:
+            積めた場合True（認識待ちが上限に達した場合False）
+
+        Raises:
+            STTError: ストリーミング認識できない音声フォーマットの場合、
+                または認識が連続失敗で終了している場合
+        """
+        session = self._sessions.get(session_id)
+        if session is not None and session.failed:
+            raise STTError("Streaming recognition stopped after repeated failures")
+        if session is None or session.closed:
+            if audio_format == AudioFormat.WAV:
+                raise STTError("Streaming recognition does not support wav")
+            session = StreamingTranscriptionSession(
+                session_id,
+                self._stt,
+                on_partial=self._on_partial,
+                on_final=self._on_final,
+                audio_format=audio_format,
+                sample_rate=sample_rate,
+                language=language,
+                max_stream_seconds=self._max_stream_seconds,
+                idle_seconds=self._idle_seconds,
+                max_buffered_chunks=self._max_buffered_chunks,
+                metrics=self._metrics,
+                on_error=self._on_error,
+                max_consecutive_errors=self._max_consecutive_errors,
+                retry_delay=self._retry_delay,
+                max_retry_delay=self._max_retry_delay,
+            )
+            session.start()
+            self._sessions[session_id] = session
+            self._metrics.set_gauge("stt.stream.sessions", len(self._sessions))
+        return session.feed(chunk, emotion_scores)
+
+    async def finish(self, session_id: str) -> bool:
+        """
+        セッションの音声の終わりを伝える.
+
+        最後の発話の確定結果は、認識が終わり次第バックグラウンドで通知される。
+
+        Returns:
+            認識中だった場合True
+        """
+        session = self._pop(session_id)
+        if session is None:
+            return False
+        self._finishing.add(session)
+        session.add_done_callback(lambda: self._finishing.discard(session))
+        await session.finish()
+        return True
+
+    async def close(self, session_id: str) -> bool:
+        """
+        セッションの認識を中断する（finish 後の通知中のものを含む）.
+
+        Returns:
+            認識中だった場合True
+        """
+        sessions = [s for s in self._finishing if s.session_id == session_id]
+        session = self._pop(session_id)
+        if session is not None:
+            sessions.append(session)
+        for target in sessions:
+            self._finishing.discard(target)
+            await target.aclose()
+        return bool(sessions)
+
+    async def aclose(self) -> None:
+        """全セッションの認識を中断する."""
+        sessions = [*self._sessions.values(), *self._finishing]
+        self._sessions.clear()
+        self._finishing.clear()
+        self._metrics.set_gauge("stt.stream.sessions", 0)
+        for session in sessions:
+            await session.aclose()
+
+    def _pop(self, session_id: str) -> StreamingTranscriptionSession | None:
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._metrics.set_gauge("stt.stream.sessions", len(self._sessions))
+        return session
@@ -1,35 +1,130 @@
 """音声認識（STT）サービス - Google Cloud Speech-to-Text."""
 
-import io
+import asyncio
 import logging
-import wave
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Iterable
 
+import numpy as np
 from google.cloud import speech
 
+from app.core.config import get_settings
 from app.core.exceptions import STTError
-from app.dto.audio import AudioFormat, TranscriptionResult
+from app.core.metrics import MetricsRegistry, get_metrics
+from app.dto.audio import AudioFormat, StreamingTranscript, TranscriptionResult
+from app.services.audio_probe import probe_audio, to_linear16
+from app.services.transcription_cache import TranscriptionCache
+from app.services.voice_activity import VoiceActivity, VoiceActivityDetector
+from app.utils.executor import BoundedExecutor
+from app.utils.hedging import HedgePolicy
 
 logger = logging.getLogger(__name__)
 
+# 単語を空白で区切らない言語（認識結果をそのままつなぐ）
+_NO_SPACE_LANGUAGES = frozenset({"ja", "zh"})
+
+
+def join_transcripts(texts: Iterable[str], language: str) -> str:
+    """認識結果のテキストを発話順につなぐ（日本語・中国語は空白を入れない）."""
+    separator = "" if language.split("-")[0].lower() in _NO_SPACE_LANGUAGES else " "
+    return separator.join(text for text in texts if text)
+
 
 class STTService:
-    """音声認識サービス（Google Cloud Speech-to-Text使用）."""
+    """音声認識サービス（Google Cloud Speech-to-Text使用）.
+
+    同期APIの recognize はスレッド数上限付きのワーカースレッドで実行し、
+    イベントループを止めない。インスタンス全体の同時実行数は max_concurrency まで。
+    1回の認識には期限（空きスレッドの待ち時間を含む）を設ける。
+
+    ストリーミング認識（stream）は非同期クライアントで行い、スレッドを占有しない。
 
-    def __init__(self) -> None:
+    VAD を有効にした場合（STT_VAD_ENABLED）、PCM/WAV の前後の無音を除いてから
+    認識し、発話のないクリップは API を呼ばずに空の結果を返す。
+
+    chunk_seconds より長い PCM/WAV は無音の位置でチャンクに分け、並列に認識して
+    順に結合する（同時実行数の上限は共通。信頼度は音声長で重み付けした平均）。
+    認識にかかる時間は最も長いチャンクの認識時間程度になる。
+
+    ヘッジを有効にした場合（STT_HEDGE_ENABLED）、recognize が直近の所要時間の
+    分位（STT_HEDGE_QUANTILE）を過ぎても返らなければ同じリクエストをもう1つ送り、
+    先に返った結果を使う（割合の上限は STT_HEDGE_BUDGET）。
+
+    認識結果は音声の内容のハッシュをキーにキャッシュし（STT_CACHE_SIZE）、
+    再送などで届いた同じ音声は再認識しない。同じ音声の同時の認識は1回にまとめる。
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int | None = None,
+        timeout: float | None = None,
+        metrics: MetricsRegistry | None = None,
+        voice_activity_detector: VoiceActivityDetector | None = None,
+        chunk_seconds: float | None = None,
+        hedge_policy: HedgePolicy | None = None,
+        cache: TranscriptionCache | None = None,
+    ) -> None:
         """
         初期化.
 
         環境変数 GOOGLE_APPLICATION_CREDENTIALS に認証情報のパスを設定するか、
         Google Cloud SDKでログイン済みである必要があります。
+
+        Args:
+            max_concurrency: 同時に実行する認識の最大数（省略時は STT_MAX_CONCURRENCY）
+            timeout: 1回の認識の期限（秒、省略時は STT_TIMEOUT_SECONDS）
+            metrics: メトリクスレジストリ（省略時はグローバル）
+            voice_activity_detector: 認識前のVAD（省略時は STT_VAD_ENABLED の場合のみ使用）
+            chunk_seconds: 分割して認識するチャンクの最大長（秒、省略時は
+                STT_CHUNK_SECONDS。0で分割しない）
+            hedge_policy: recognize のヘッジ方針（省略時は STT_HEDGE_ENABLED の場合のみ使用）
+            cache: 認識結果のキャッシュ（省略時は STT_CACHE_SIZE が0でなければ使用）
         """
+        settings = get_settings()
         try:
             self._client = speech.SpeechClient()
         except Exception as e:
             raise STTError(f"Failed to initialize Speech-to-Text client: {e}") from e
+        # 非同期クライアントはイベントループ上で初回利用時に生成する
+        self._async_client: speech.SpeechAsyncClient | None = None
+        self._timeout = timeout or settings.STT_TIMEOUT_SECONDS
+        self._metrics = metrics or get_metrics()
+        self._vad = voice_activity_detector or (
+            VoiceActivityDetector() if settings.STT_VAD_ENABLED else None
+        )
+        # 分割位置（無音）の検出は VAD の設定に関わらず行う
+        self._splitter = self._vad or VoiceActivityDetector()
+        self._chunk_ms = int(
+            (chunk_seconds if chunk_seconds is not None else settings.STT_CHUNK_SECONDS)
+            * 1000
+        )
+        self._hedge = hedge_policy or (
+            HedgePolicy(
+                "stt.hedge",
+                quantile=settings.STT_HEDGE_QUANTILE,
+                budget=settings.STT_HEDGE_BUDGET,
+                metrics=self._metrics,
+            )
+            if settings.STT_HEDGE_ENABLED
+            else None
+        )
+        self._cache = cache or (
+            TranscriptionCache(
+                settings.STT_CACHE_SIZE,
+                settings.STT_CACHE_TTL_SECONDS,
+                metrics=self._metrics,
+            )
+            if settings.STT_CACHE_SIZE
+            else None
+        )
+        self._executor = BoundedExecutor(
+            "stt",
+            max_workers=max_concurrency or settings.STT_MAX_CONCURRENCY,
+            metrics=self._metrics,
+        )
 
     async def transcribe(
         self,
-        audio_data: bytes,
+        audio_data: bytes | memoryview,
         format: AudioFormat,
         sample_rate: int = 16000,
         language: str = "ja",
@@ -38,7 +133,7 @@ class STTService:
         音声データをテキストに変換.
 
         Args:
-            audio_data: 音声のバイナリデータ
+            audio_data: 音声のバイナリデータ（bytes または memoryview）
             format: 音声フォーマット (wav, opus, pcm)
             sample_rate: サンプリングレート（デフォルト16000Hz）
             language: 言語コード（デフォルト日本語 "ja"）
@@ -47,44 +142,80 @@ class STTService:
             TranscriptionResult: 認識結果
 
         Raises:
-            STTError: 音声認識に失敗した場合
+            STTError: 音声認識に失敗した場合（期限切れを含む）
         """
+        if self._cache is None:
+            return await self._transcribe(audio_data, format, sample_rate, language)
+        key = self._cache.key(audio_data, format, sample_rate, language)
+        return await self._cache.get_or_transcribe(
+            key,
+            lambda: self._transcribe(audio_data, format, sample_rate, language),
+        )
+
+    async def _transcribe(
+        self,
+        audio_data: bytes | memoryview,
+        format: AudioFormat,
+        sample_rate: int,
+        language: str,
+    ) -> TranscriptionResult:
+        """キャッシュを使わずに音声を認識する（引数・例外は transcribe と同じ）."""
         try:
-            # エンコーディングとサンプルレートを決定
-            encoding, actual_sample_rate = self._get_encoding_config(
-                audio_data, format, sample_rate
-            )
+            # ヘッダーは1度だけ解析し、長さ・認識設定・VADで共有する
+            info = probe_audio(audio_data, format, sample_rate)
+            duration_ms = info.duration_ms
+            send_format, send_rate, content = info.format, info.sample_rate, audio_data
 
-            # 音声の長さを取得
-            duration_ms = self._get_audio_duration_ms(audio_data, format, sample_rate)
+            # ステレオ・16kHz超・16bit以外の PCM/WAV は 16kHz mono LINEAR16 に変換する
+            normalized = to_linear16(info)
+            if normalized is not info and normalized.pcm is not None:
+                self._metrics.increment("stt.audio.converted")
+                send_format, send_rate = AudioFormat.PCM, normalized.sample_rate
+                content = normalized.pcm
 
-            # Google Cloud Speech-to-Text APIを呼び出し
-            audio = speech.RecognitionAudio(content=audio_data)
-            config = speech.RecognitionConfig(
-                encoding=encoding,
-                sample_rate_hertz=actual_sample_rate,
-                language_code=self._to_language_code(language),
-                enable_automatic_punctuation=True,
+            # 分割して認識できる 16bit mono PCM（VAD で切り出した場合はその PCM）
+            samples: bytes | memoryview | None = (
+                normalized.pcm if normalized.is_linear16_mono else None
             )
 
-            response = self._client.recognize(config=config, audio=audio)
-
-            # 結果を集約
-            text = ""
-            confidence = 0.0
-            result_count = 0
-
-            for result in response.results:
-                if result.alternatives:
-                    best = result.alternatives[0]
-                    text += best.transcript
-                    confidence += best.confidence
-                    result_count += 1
+            speech_segments = None
+            activity = self._vad.detect_audio(normalized) if self._vad else None
+            if activity is not None:
+                speech_segments = activity.segments
+                if not activity.has_speech:
+                    self._metrics.increment("stt.vad.skipped")
+                    logger.info(f"STT skipped: no speech in {duration_ms}ms audio")
+                    return TranscriptionResult(
+                        text="",
+                        confidence=0.0,
+                        language=language,
+                        duration_ms=duration_ms,
+                        speech_segments=speech_segments,
+                    )
+                # 発話の前後の無音を除いた PCM を認識する
+                self._metrics.increment(
+                    "stt.vad.trimmed_ms",
+                    max(duration_ms - self._pcm_duration_ms(activity), 0),
+                )
+                send_format, send_rate = AudioFormat.PCM, activity.sample_rate
+                content = samples = activity.speech_audio
 
-            if result_count > 0:
-                confidence /= result_count
+            split_points = (
+                self._splitter.split_points(
+                    np.frombuffer(samples, dtype="<i2"), send_rate, self._chunk_ms
+                )
+                if samples is not None and self._chunk_ms > 0
+                else []
+            )
+            if split_points:
+                assert samples is not None
+                text, confidence = await self._recognize_chunks(
+                    memoryview(samples).cast("B"), split_points, send_rate, language
+                )
             else:
-                confidence = 0.0
+                text, confidence = await self._recognize(
+                    content, send_format, send_rate, language
+                )
 
             logger.info(f"STT completed: {len(text)} chars, {duration_ms}ms audio")
 
@@ -93,83 +224,206 @@ class STTService:
                 confidence=confidence,
                 language=language,
                 duration_ms=duration_ms,
+                speech_segments=speech_segments,
             )
 
+        except TimeoutError as e:
+            self._metrics.increment("stt.timeouts")
+            logger.error(f"STT timed out after {self._timeout}s")
+            raise STTError(f"Transcription timed out after {self._timeout}s") from e
         except Exception as e:
             logger.error(f"STT error: {e}")
             raise STTError(f"Transcription failed: {e}") from e
 
-    def _get_encoding_config(
+    async def _recognize(
         self,
-        audio_data: bytes,
+        content: bytes | memoryview,
         format: AudioFormat,
         sample_rate: int,
-    ) -> tuple[int, int]:
+        language: str,
+    ) -> tuple[str, float]:
         """
-        音声フォーマットに応じたエンコーディング設定を取得.
+        音声を1回の recognize で認識する.
 
-        Args:
-            audio_data: 音声データ
-            format: 音声フォーマット
-            sample_rate: サンプリングレート
+        Returns:
+            認識したテキストと、結果ごとの信頼度の平均
+        """
+        # memoryviewはAPI呼び出し直前に一度だけbytes化する
+        audio = speech.RecognitionAudio(
+            content=content.tobytes() if isinstance(content, memoryview) else content
+        )
+        config = speech.RecognitionConfig(
+            encoding=self._get_encoding(format),
+            sample_rate_hertz=sample_rate,
+            language_code=self._to_language_code(language),
+            enable_automatic_punctuation=True,
+        )
+
+        def call() -> Awaitable[speech.RecognizeResponse]:
+            return self._executor.run(
+                self._client.recognize,
+                config=config,
+                audio=audio,
+                timeout=self._timeout,
+            )
+
+        # 期限は空きスレッドの待ち時間とヘッジを含む。実行中の呼び出しも同じ期限で打ち切る
+        # （ヘッジで負けた呼び出しはスレッド上では最後まで実行され、結果は捨てられる）
+        response = await asyncio.wait_for(
+            self._hedge.run(call) if self._hedge else call(), self._timeout
+        )
+
+        # 結果を集約
+        text = ""
+        confidence = 0.0
+        result_count = 0
+
+        for result in response.results:
+            if result.alternatives:
+                best = result.alternatives[0]
+                text += best.transcript
+                confidence += best.confidence
+                result_count += 1
+
+        if result_count > 0:
+            confidence /= result_count
+        return text.strip(), confidence
+
+    async def _recognize_chunks(
+        self,
+        pcm: memoryview,
+        split_points: list[int],
+        sample_rate: int,
+        language: str,
+    ) -> tuple[str, float]:
+        """
+        16bit mono PCM を split_points で分け、並列に認識して順に結合する.
 
         Returns:
-            (エンコーディング, サンプルレート) のタプル
+            結合したテキストと、テキストを得たチャンクの音声長で重み付けした信頼度
         """
-        if format == AudioFormat.WAV:
-            # WAVファイルからサンプルレートを読み取る
-            actual_sample_rate = self._get_wav_sample_rate(audio_data) or sample_rate
-            return speech.RecognitionConfig.AudioEncoding.LINEAR16, actual_sample_rate
-        elif format == AudioFormat.PCM:
-            return speech.RecognitionConfig.AudioEncoding.LINEAR16, sample_rate
-        elif format == AudioFormat.OPUS:
-            return speech.RecognitionConfig.AudioEncoding.OGG_OPUS, sample_rate
-        else:
-            raise STTError(f"Unsupported audio format: {format}")
+        bounds = [0, *(point * 2 for point in split_points), len(pcm)]
+        chunks = [pcm[start:end] for start, end in zip(bounds, bounds[1:])]
+        self._metrics.increment("stt.chunked")
+        self._metrics.increment("stt.chunks", len(chunks))
 
-    def _get_wav_sample_rate(self, wav_data: bytes) -> int | None:
-        """WAVデータからサンプルレートを取得."""
+        tasks = [
+            asyncio.ensure_future(
+                self._recognize(chunk, AudioFormat.PCM, sample_rate, language)
+            )
+            for chunk in chunks
+        ]
         try:
-            buffer = io.BytesIO(wav_data)
-            with wave.open(buffer, "rb") as wav_file:
-                return wav_file.getframerate()
-        except Exception:
-            return None
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # 1つでも失敗したら残りのチャンクの認識は不要
+            for task in tasks:
+                task.cancel()
+            raise
+
+        texts: list[str] = []
+        weighted = 0.0
+        weight = 0
+        for chunk, (text, confidence) in zip(chunks, results):
+            if not text:
+                continue
+            texts.append(text)
+            weighted += confidence * len(chunk)
+            weight += len(chunk)
+        return join_transcripts(texts, language), weighted / weight if weight else 0.0
 
-    def _get_audio_duration_ms(
+    async def stream(
         self,
-        audio_data: bytes,
+        audio_chunks: AsyncIterable[bytes],
         format: AudioFormat,
-        sample_rate: int,
-    ) -> int:
+        sample_rate: int = 16000,
+        language: str = "ja",
+    ) -> AsyncIterator[StreamingTranscript]:
+        """
+        音声チャンクを逐次認識し、途中結果と確定結果を順に返す.
+
+        音声チャンクの送信が終わる（audio_chunks が終了する）と、残りの結果を
+        返してから終了する。確定結果（is_final=True）は発話の終わりを表す。
+
+        Args:
+            audio_chunks: 音声チャンク（pcm または opus）
+            format: 音声フォーマット（wav は不可）
+            sample_rate: サンプリングレート（デフォルト16000Hz）
+            language: 言語コード（デフォルト日本語 "ja"）
+
+        Yields:
+            StreamingTranscript: 途中結果または確定結果
+
+        Raises:
+            STTError: 音声認識に失敗した場合
         """
-        音声データから長さを取得.
+        if format == AudioFormat.WAV:
+            raise STTError("Streaming recognition does not support wav")
+        streaming_config = speech.StreamingRecognitionConfig(
+            config=speech.RecognitionConfig(
+                encoding=self._get_encoding(format),
+                sample_rate_hertz=sample_rate,
+                language_code=self._to_language_code(language),
+                enable_automatic_punctuation=True,
+            ),
+            interim_results=True,
+        )
+
+        async def requests() -> AsyncIterator[speech.StreamingRecognizeRequest]:
+            # 最初のリクエストは設定のみ、以降は音声のみを送る
+            yield speech.StreamingRecognizeRequest(streaming_config=streaming_config)
+            async for chunk in audio_chunks:
+                yield speech.StreamingRecognizeRequest(audio_content=chunk)
+
+        try:
+            if self._async_client is None:
+                self._async_client = speech.SpeechAsyncClient()
+            responses = await self._async_client.streaming_recognize(
+                requests=requests()
+            )
+            async for response in responses:
+                for result in response.results:
+                    if not result.alternatives:
+                        continue
+                    best = result.alternatives[0]
+                    end_time = result.result_end_time
+                    yield StreamingTranscript(
+                        text=best.transcript.strip(),
+                        is_final=result.is_final,
+                        confidence=best.confidence if result.is_final else 0.0,
+                        stability=0.0 if result.is_final else result.stability,
+                        end_time_ms=(
+                            int(end_time.total_seconds() * 1000) if end_time else 0
+                        ),
+                    )
+        except STTError:
+            raise
+        except Exception as e:
+            logger.error(f"Streaming STT error: {e}")
+            raise STTError(f"Streaming transcription failed: {e}") from e
+
+    @staticmethod
+    def _get_encoding(format: AudioFormat) -> int:
+        """
+        音声フォーマットに応じたエンコーディングを取得.
 
         Args:
-            audio_data: 音声データ
             format: 音声フォーマット
-            sample_rate: サンプリングレート
 
         Returns:
-            音声の長さ（ミリ秒）
+            Speech-to-Text のエンコーディング
         """
-        try:
-            if format == AudioFormat.WAV:
-                buffer = io.BytesIO(audio_data)
-                with wave.open(buffer, "rb") as wav_file:
-                    frames = wav_file.getnframes()
-                    rate = wav_file.getframerate()
-                    duration_sec = frames / float(rate)
-                    return int(duration_sec * 1000)
-            elif format == AudioFormat.PCM:
-                # 16bit mono PCMと仮定
-                num_samples = len(audio_data) // 2
-                duration_sec = num_samples / sample_rate
-                return int(duration_sec * 1000)
-            else:
-                return 0
-        except Exception:
-            return 0
+        if format in (AudioFormat.WAV, AudioFormat.PCM):
+            return speech.RecognitionConfig.AudioEncoding.LINEAR16
+        elif format == AudioFormat.OPUS:
+            return speech.RecognitionConfig.AudioEncoding.OGG_OPUS
+        else:
+            raise STTError(f"Unsupported audio format: {format}")
+
+    @staticmethod
+    def _pcm_duration_ms(activity: VoiceActivity) -> int:
+        """VADで切り出した PCM の長さ（ミリ秒）."""
+        return len(activity.speech_audio) // 2 * 1000 // activity.sample_rate
 
     def _to_language_code(self, language: str) -> str:
         """
@@ -0,0 +1,124 @@
+"""検証済みIDトークンのキャッシュ."""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from app.core.metrics import MetricsRegistry, get_metrics
+from app.utils.cache import TTLCache
+
+TokenVerifier = Callable[..., Awaitable[dict[str, Any]]]
+
+
+@dataclass
+class _VerifiedToken:
+    """検証済みのクレームと、最後に失効を確認した時刻."""
+
+    claims: dict[str, Any]
+    checked_at: float
+
+
+class TokenVerificationCache:
+    """IDトークンの検証結果（デコード済みクレーム）をキャッシュする.
+
+    同じトークンは有効期限（約1時間）の間、REST と WebSocket で何度も使われるため、
+    署名検証とクレームのデコードを毎回行わずに済むようにする。
+
+    - キーはトークンの SHA-256 ハッシュ（トークン自体は保持しない）
+    - エントリはトークンの exp で失効する（exp のないクレームはキャッシュしない）
+    - 容量は max_entries 件で、超過時は LRU で追い出す
+    - revocation_check_interval を指定した場合、その間隔ごとに失効（revoke）を
+      確認して再検証する。失効していればエントリを削除して例外を送出する
+    - 検証に失敗した結果はキャッシュしない
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        revocation_check_interval: float = 0,
+        clock: Callable[[], float] = time.time,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        """
+        初期化.
+
+        Args:
+            max_entries: 最大エントリ数（0 の場合はキャッシュしない）
+            revocation_check_interval: 失効確認の間隔（秒、0 の場合は確認しない）
+            clock: 現在時刻（UNIX時間）を返す関数
+            metrics: メトリクスレジストリ（省略時はグローバル）
+        """
+        if max_entries < 0:
+            raise ValueError("max_entries must be >= 0")
+        if revocation_check_interval < 0:
+            raise ValueError("revocation_check_interval must be >= 0")
+        self._cache: TTLCache[str, _VerifiedToken] | None = (
+            TTLCache(max_entries, clock=clock) if max_entries else None
+        )
+        self._revocation_check_interval = revocation_check_interval
+        self._clock = clock
+        self._metrics = metrics or get_metrics()
+
+    async def verify(self, token: str, verifier: TokenVerifier) -> dict[str, Any]:
+        """トークンを検証し、デコード済みクレームを返す.
+
+        Args:
+            token: IDトークン
+            verifier: キャッシュにない場合の非同期の検証関数
+                （verify_id_token 互換。check_revoked を受け取る）
+
+        Returns:
+            デコード済みクレーム
+
+        Raises:
+            verifier が送出した例外（無効・期限切れ・失効済み）
+        """
+        if self._cache is None:
+            return await self._verify(token, verifier)
+
+        key = hashlib.sha256(token.encode()).hexdigest()
+        cached = self._cache.get(key)
+        if cached is None:
+            self._metrics.increment("auth.token_cache.misses")
+            claims = await self._verify(token, verifier)
+            self._store(key, claims)
+            return claims
+
+        self._metrics.increment("auth.token_cache.hits")
+        if (
+            self._revocation_check_interval
+            and self._clock() - cached.checked_at >= self._revocation_check_interval
+        ):
+            self._metrics.increment("auth.token_cache.revocation_checks")
+            try:
+                await verifier(token, check_revoked=True)
+            except Exception:
+                self._cache.pop(key)
+                raise
+            cached.checked_at = self._clock()
+        return cached.claims
+
+    def clear(self) -> None:
+        """全てのエントリを削除する."""
+        if self._cache is not None:
+            self._cache.clear()
+
+    async def _verify(self, token: str, verifier: TokenVerifier) -> dict[str, Any]:
+        if self._revocation_check_interval:
+            return await verifier(token, check_revoked=True)
+        return await verifier(token)
+
+    def _store(self, key: str, claims: dict[str, Any]) -> None:
+        assert self._cache is not None
+        exp = claims.get("exp")
+        if not isinstance(exp, int | float) or isinstance(exp, bool):
+            return
+        now = self._clock()
+        if exp <= now:
+            return
+        self._cache.set(key, _VerifiedToken(claims=claims, checked_at=now), exp)
+        self._metrics.set_gauge("auth.token_cache.size", len(self._cache))
@@ -0,0 +1,104 @@
+"""音声認識結果のキャッシュ."""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from collections.abc import Awaitable, Callable
+
+from app.core.metrics import MetricsRegistry, get_metrics
+from app.dto.audio import AudioFormat, TranscriptionResult
+from app.utils.cache import SingleFlight, TTLCache
+
+
+class TranscriptionCache:
+    """音声の内容をキーに認識結果をキャッシュする.
+
+    ネットワーク断後の ANALYSIS_REQUEST の再送や、Android と Unity からの
+    同じ音声の送信で、同じ音声を何度も認識しないようにする。
+
+    - キーは音声データの BLAKE2b ハッシュとフォーマット・サンプリングレート・言語
+      （音声自体は保持しない。保持するのはハッシュと認識結果のみ）
+    - エントリは ttl_seconds で失効し、容量は max_entries 件（超過時は LRU で追い出す）
+    - 同じキーの認識が実行中の場合は、その結果を待つ（シングルフライト）。
+      待っている呼び出しが全てキャンセルされた場合のみ認識をキャンセルする
+    - 認識に失敗した結果はキャッシュしない
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        """
+        初期化.
+
+        Args:
+            max_entries: 最大エントリ数
+            ttl_seconds: エントリの有効期間（秒）
+            clock: 有効期限の判定に使う時計
+            metrics: メトリクスレジストリ（省略時はグローバル）
+        """
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be > 0")
+        self._cache: TTLCache[str, TranscriptionResult] = TTLCache(
+            max_entries, clock=clock
+        )
+        self._ttl = ttl_seconds
+        self._clock = clock
+        self._metrics = metrics or get_metrics()
+        self._in_flight: SingleFlight[str, TranscriptionResult] = SingleFlight()
+
+    @staticmethod
+    def key(
+        audio_data: bytes | memoryview,
+        format: AudioFormat,
+        sample_rate: int,
+        language: str,
+    ) -> str:
+        """音声データとパラメータからキャッシュキーを作る."""
+        digest = hashlib.blake2b(audio_data, digest_size=16).hexdigest()
+        return f"{digest}:{format.value}:{sample_rate}:{language}"
+
+    async def get_or_transcribe(
+        self,
+        key: str,
+        transcribe: Callable[[], Awaitable[TranscriptionResult]],
+    ) -> TranscriptionResult:
+        """キャッシュされた認識結果を返す。ない場合は transcribe で認識する.
+
+        Args:
+            key: key() で作ったキャッシュキー
+            transcribe: キャッシュにない場合の認識処理
+
+        Returns:
+            認識結果
+
+        Raises:
+            transcribe が送出した例外
+        """
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._metrics.increment("stt.cache.hits")
+            return cached
+
+        self._metrics.increment(
+            "stt.cache.coalesced" if key in self._in_flight else "stt.cache.misses"
+        )
+        return await self._in_flight.run(key, lambda: self._transcribe(key, transcribe))
+
+    def clear(self) -> None:
+        """全てのエントリを削除する（実行中の認識はそのまま）."""
+        self._cache.clear()
+
+    async def _transcribe(
+        self,
+        key: str,
+        transcribe: Callable[[], Awaitable[TranscriptionResult]],
+    ) -> TranscriptionResult:
+        result = await transcribe()
+        self._cache.set(key, result, self._clock() + self._ttl)
+        self._metrics.set_gauge("stt.cache.size", len(self._cache))
+        return result
@@ -0,0 +1,255 @@
+"""音声区間検出（VAD）と無音のトリミング."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+from app.dto.audio import AudioFormat, AudioInfo, SpeechSegment
+from app.services.audio_probe import probe_audio, to_linear16
+
+# 無音フレームのエネルギー（log10(0) を避けるための下限）
+_ENERGY_EPSILON = 1e-10
+
+
+@dataclass(frozen=True)
+class VoiceActivity:
+    """VADの結果."""
+
+    sample_rate: int
+    """サンプリングレート."""
+
+    duration_ms: int
+    """元の音声の長さ（ミリ秒）."""
+
+    segments: list[SpeechSegment]
+    """発話区間（古い順）."""
+
+    speech_audio: bytes
+    """最初の発話の開始から最後の発話の終了までの 16bit mono PCM（発話なしは空）."""
+
+    @property
+    def has_speech(self) -> bool:
+        """発話を含むか."""
+        return bool(self.segments)
+
+
+class VoiceActivityDetector:
+    """フレームごとのエネルギーとゼロ交差率で発話区間を検出する.
+
+    16bit mono PCM（app.services.audio_probe で変換したもの）を frame_ms ごとに区切り、
+    NumPy でフレーム単位にまとめて計算する:
+
+    - エネルギー（dBFS）が閾値を超え、ゼロ交差率が max_zero_crossing_rate 以下の
+      フレームを発話とする（ゼロ交差率が高いフレームは白色雑音とみなす）
+    - 閾値はクリップ内の下位10%のエネルギー（背景雑音）+ energy_margin_db。
+      ただし min_energy_db 未満にはせず、ピークから energy_margin_db 以上は下げない
+    - min_silence_ms 未満の途切れは同じ発話としてつなぎ、min_speech_ms 未満の
+      発話は除く。語頭・語尾を切らないよう前後に padding_ms の余白を付ける
+
+    長い音声を分割して認識する場合は split_points で無音の位置を求める。
+    """
+
+    def __init__(
+        self,
+        frame_ms: int = 20,
+        energy_margin_db: float = 12.0,
+        min_energy_db: float = -50.0,
+        max_zero_crossing_rate: float = 0.45,
+        min_speech_ms: int = 120,
+        min_silence_ms: int = 300,
+        padding_ms: int = 200,
+    ) -> None:
+        """
+        初期化.
+
+        Args:
+            frame_ms: フレーム長（ミリ秒）
+            energy_margin_db: 背景雑音からの閾値の高さ（dB）
+            min_energy_db: 閾値の下限（dBFS）
+            max_zero_crossing_rate: 発話とみなすゼロ交差率の上限（0.0-1.0）
+            min_speech_ms: 発話とみなす最短の長さ（ミリ秒）
+            min_silence_ms: 発話の区切りとみなす最短の無音（ミリ秒）
+            padding_ms: 発話区間の前後に付ける余白（ミリ秒）
+        """
+        if frame_ms < 1:
+            raise ValueError("frame_ms must be >= 1")
+        self._frame_ms = frame_ms
+        self._energy_margin_db = energy_margin_db
+        self._min_energy_db = min_energy_db
+        self._max_zero_crossing_rate = max_zero_crossing_rate
+        self._min_speech_frames = -(-min_speech_ms // frame_ms)
+        self._min_silence_frames = -(-min_silence_ms // frame_ms)
+        self._padding_frames = padding_ms // frame_ms
+
+    def detect(
+        self,
+        audio_data: bytes | memoryview,
+        format: AudioFormat,
+        sample_rate: int = 16000,
+    ) -> VoiceActivity | None:
+        """
+        音声から発話区間を検出する.
+
+        Args:
+            audio_data: 音声データ（wav または 16bit PCM）
+            format: 音声フォーマット
+            sample_rate: PCM のサンプリングレート（wav はヘッダーの値を使う）
+
+        Returns:
+            VADの結果。サンプルを解析できない音声（opus、壊れた wav など）の場合None
+        """
+        info = to_linear16(probe_audio(audio_data, format, sample_rate))
+        return self.detect_audio(info)
+
+    def detect_audio(self, info: AudioInfo) -> VoiceActivity | None:
+        """
+        解析済みの音声から発話区間を検出する.
+
+        Args:
+            info: to_linear16 で 16bit mono に変換した音声
+
+        Returns:
+            VADの結果。16bit mono の PCM でない場合None
+        """
+        if not info.is_linear16_mono:
+            return None
+        assert info.pcm is not None
+        return self.detect_samples(
+            np.frombuffer(info.pcm, dtype="<i2"), info.sample_rate
+        )
+
+    def detect_samples(
+        self, samples: npt.NDArray[np.int16], sample_rate: int
+    ) -> VoiceActivity:
+        """
+        16bit mono PCM のサンプル列から発話区間を検出する.
+
+        Args:
+            samples: サンプル列
+            sample_rate: サンプリングレート
+
+        Returns:
+            VADの結果
+        """
+        duration_ms = len(samples) * 1000 // sample_rate
+        frame_len = max(sample_rate * self._frame_ms // 1000, 2)
+        n_frames = len(samples) // frame_len
+        if n_frames == 0:
+            return VoiceActivity(sample_rate, duration_ms, [], b"")
+
+        frames = samples[: n_frames * frame_len].reshape(n_frames, frame_len)
+        is_speech = self._classify(frames.astype(np.float32) / 32768.0)
+
+        starts, ends = _runs(is_speech)
+        starts, ends = _merge(starts, ends, self._min_silence_frames)
+        long_enough = ends - starts >= self._min_speech_frames
+        starts, ends = starts[long_enough], ends[long_enough]
+        if len(starts) == 0:
+            return VoiceActivity(sample_rate, duration_ms, [], b"")
+
+        starts = np.maximum(starts - self._padding_frames, 0)
+        ends = np.minimum(ends + self._padding_frames, n_frames)
+        starts, ends = _merge(starts, ends, 1)
+
+        # サンプル位置に変換（最後のフレームに届く区間は端数のサンプルも含める）
+        start_samples = starts * frame_len
+        end_samples = np.where(ends == n_frames, len(samples), ends * frame_len)
+        segments = [
+            SpeechSegment(
+                start_ms=int(start) * 1000 // sample_rate,
+                end_ms=int(end) * 1000 // sample_rate,
+            )
+            for start, end in zip(start_samples, end_samples)
+        ]
+        speech = samples[start_samples[0] : end_samples[-1]]
+        return VoiceActivity(
+            sample_rate, duration_ms, segments, speech.astype("<i2").tobytes()
+        )
+
+    def split_points(
+        self, samples: npt.NDArray[np.int16], sample_rate: int, max_chunk_ms: int
+    ) -> list[int]:
+        """
+        長い音声を max_chunk_ms 以下のチャンクに分ける位置を求める.
+
+        各チャンクの後半（max_chunk_ms の半分から max_chunk_ms まで）のうち、
+        min_silence_ms の区間の平均エネルギーが最も小さい位置（発話の切れ目）で切る。
+
+        Args:
+            samples: 16bit mono PCM のサンプル列
+            sample_rate: サンプリングレート
+            max_chunk_ms: チャンクの最大長（ミリ秒）
+
+        Returns:
+            分割位置のサンプル番号（昇順。先頭と末尾は含まない）。分割不要なら空
+        """
+        frame_len = max(sample_rate * self._frame_ms // 1000, 2)
+        max_frames = max_chunk_ms // self._frame_ms
+        max_samples = max_frames * frame_len
+        if max_frames < 2 or len(samples) <= max_samples:
+            return []
+
+        n_frames = len(samples) // frame_len
+        frames = samples[: n_frames * frame_len].reshape(n_frames, frame_len)
+        power = np.mean((frames.astype(np.float32) / 32768.0) ** 2, axis=1)
+        # 単発の静かなフレームではなく、無音の続く区間の中央で切る
+        window = max(min(self._min_silence_frames, max_frames // 2), 1)
+        smoothed = np.convolve(power, np.ones(window) / window, mode="same")
+
+        points: list[int] = []
+        start = 0
+        while len(samples) - start * frame_len > max_samples:
+            lo = start + max_frames // 2
+            hi = min(start + max_frames, n_frames)
+            cut = lo + int(np.argmin(smoothed[lo:hi]))
+            points.append(cut * frame_len)
+            start = cut
+        return points
+
+    def _classify(self, frames: npt.NDArray[np.float32]) -> npt.NDArray[np.bool_]:
+        """フレームごとに発話かどうかを判定する."""
+        energy_db = 10 * np.log10(np.mean(frames**2, axis=1) + _ENERGY_EPSILON)
+        signs = np.signbit(frames)
+        zero_crossing_rate = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (
+            frames.shape[1] - 1
+        )
+
+        noise_floor = float(np.percentile(energy_db, 10))
+        peak = float(energy_db.max())
+        threshold = max(
+            min(
+                noise_floor + self._energy_margin_db,
+                peak - self._energy_margin_db,
+            ),
+            self._min_energy_db,
+        )
+        voiced: npt.NDArray[np.bool_] = (energy_db > threshold) & (
+            zero_crossing_rate <= self._max_zero_crossing_rate
+        )
+        return voiced
+
+
+def _runs(
+    mask: npt.NDArray[np.bool_],
+) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.intp]]:
+    """True が連続する区間の開始・終了（終了は含まない）のインデックスを返す."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def _merge(
+    starts: npt.NDArray[np.intp],
+    ends: npt.NDArray[np.intp],
+    min_gap: int,
+) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.intp]]:
+    """間隔が min_gap 未満の区間を1つにつなぐ."""
+    if len(starts) < 2:
+        return starts, ends
+    separate = starts[1:] - ends[:-1] >= min_gap
+    return (
+        np.concatenate((starts[:1], starts[1:][separate])),
+        np.concatenate((ends[:-1][separate], ends[-1:])),
+    )
@@ -0,0 +1,146 @@
+"""容量上限と有効期限付きのインメモリキャッシュ."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from threading import Lock
+from typing import Generic, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """LRU で容量を制限し、エントリごとに有効期限を持つキャッシュ.
+
+    期限切れのエントリは参照時に取り除く。容量を超えた場合は最も長く
+    参照されていないエントリから追い出す。スレッドセーフ。
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        初期化.
+
+        Args:
+            max_entries: 最大エントリ数
+            clock: 有効期限の判定に使う時計（expires_at と同じ基準の値を返す）
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[K, tuple[V, float]] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key: K) -> V | None:
+        """値を取得する（存在しない、または期限切れの場合None）."""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: K, value: V, expires_at: float) -> None:
+        """値を保存する.
+
+        Args:
+            key: キー
+            value: 値
+            expires_at: 有効期限（clock と同じ基準の時刻）
+        """
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: K) -> V | None:
+        """値を取り除いて返す."""
+        with self._lock:
+            item = self._entries.pop(key, None)
+            return item[0] if item is not None else None
+
+    def clear(self) -> None:
+        """全てのエントリを削除する."""
+        with self._lock:
+            self._entries.clear()
+
+
+class SingleFlight(Generic[K, V]):
+    """同じキーの同時の非同期呼び出しを1回にまとめる（シングルフライト）.
+
+    キーの呼び出しが実行中の場合は新たに呼び出さず、その結果（例外を含む）を待つ。
+    待っている呼び出しが全てキャンセルされた場合のみ、実行中の呼び出しをキャンセルする。
+    イベントループ上でのみ使用する（スレッドセーフではない）。
+    """
+
+    def __init__(self) -> None:
+        # 実行中の呼び出しと、その結果を待っている呼び出しの数
+        self._calls: dict[K, tuple[asyncio.Task[V], int]] = {}
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._calls
+
+    async def run(self, key: K, call: Callable[[], Awaitable[V]]) -> V:
+        """
+        key の呼び出しが実行中ならその結果を、なければ call を実行して結果を返す.
+
+        Args:
+            key: キー
+            call: 実行中の呼び出しがない場合に実行する処理
+
+        Returns:
+            呼び出しの結果
+
+        Raises:
+            call が送出した例外
+        """
+        entry = self._calls.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(self._call(key, call))
+            self._calls[key] = (task, 1)
+        else:
+            task, waiters = entry
+            self._calls[key] = (task, waiters + 1)
+
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            self._release(key, task)
+            raise
+
+    async def _call(self, key: K, call: Callable[[], Awaitable[V]]) -> V:
+        try:
+            return await call()
+        finally:
+            entry = self._calls.get(key)
+            if entry is not None and entry[0] is asyncio.current_task():
+                del self._calls[key]
+
+    def _release(self, key: K, task: asyncio.Task[V]) -> None:
+        """キャンセルされた呼び出しの分を減らし、誰も待っていなければ呼び出しを止める."""
+        entry = self._calls.get(key)
+        if entry is None or entry[0] is not task:
+            return
+        waiters = entry[1] - 1
+        if waiters > 0:
+            self._calls[key] = (task, waiters)
+            return
+        del self._calls[key]
+        task.cancel()
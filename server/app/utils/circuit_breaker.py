@@ -0,0 +1,176 @@
+"""障害中の呼び出しを即座に失敗させるサーキットブレーカー."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from enum import Enum
+from typing import TypeVar
+
+from app.core.metrics import MetricsRegistry, get_metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitState(str, Enum):
+    """サーキットブレーカーの状態."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """サーキットブレーカーが開いているため呼び出さなかった."""
+
+
+# メトリクスのゲージに出力する状態の値
+_STATE_VALUES = {
+    CircuitState.CLOSED: 0,
+    CircuitState.HALF_OPEN: 1,
+    CircuitState.OPEN: 2,
+}
+
+
+class CircuitBreaker:
+    """連続した失敗で呼び出しを止め、裏で回復を確認する.
+
+    - closed: 通常どおり呼び出す。failure_threshold 回連続で失敗したら open にする
+    - open: 呼び出さずに即座に CircuitOpenError を送出する。reset_timeout 秒
+      経過後の最初の呼び出しで、裏で probe を実行して half_open にする
+      （呼び出し自体は probe を待たずに失敗させる）
+    - half_open: probe の実行中。呼び出しは open と同様に即座に失敗させる。
+      probe が成功したら closed、失敗したら open に戻す
+
+    メトリクス（name を接頭辞とする）: ``{name}.state``（0: closed / 1: half_open /
+    2: open）、``{name}.opened``、``{name}.rejected``、``{name}.probes``、
+    ``{name}.probe_failures``
+    """
+
+    def __init__(
+        self,
+        name: str,
+        probe: Callable[[], Awaitable[object]],
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        """
+        初期化.
+
+        Args:
+            name: メトリクス名の接頭辞
+            probe: 回復を確認する呼び出し（例外を送出しなければ回復とみなす）
+            failure_threshold: open にする連続失敗回数
+            reset_timeout: open にしてから回復を確認するまでの時間（秒）
+            clock: 経過時間の計測に使う時計
+            metrics: メトリクスレジストリ（省略時はグローバル）
+        """
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be >= 1")
+        self._name = name
+        self._probe = probe
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._metrics = metrics or get_metrics()
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_task: asyncio.Task[None] | None = None
+
+    @property
+    def state(self) -> CircuitState:
+        """現在の状態."""
+        return self._state
+
+    def allow(self) -> bool:
+        """呼び出してよいか（open の場合は必要に応じて回復の確認を始める）."""
+        if self._state is CircuitState.CLOSED:
+            return True
+        if (
+            self._state is CircuitState.OPEN
+            and self._clock() - self._opened_at >= self._reset_timeout
+        ):
+            self._start_probe()
+        return False
+
+    async def call(self, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        ブレーカーを通して call を実行する.
+
+        Args:
+            call: 呼び出し
+
+        Returns:
+            call の結果
+
+        Raises:
+            CircuitOpenError: ブレーカーが開いている場合（call は実行しない）
+            call が送出した例外
+        """
+        if not self.allow():
+            self._metrics.increment(f"{self._name}.rejected")
+            raise CircuitOpenError(f"{self._name} is {self._state.value}")
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            # キャンセルは呼び出し先の失敗ではない
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def record_success(self) -> None:
+        """呼び出しの成功を記録する."""
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        """呼び出しの失敗を記録する."""
+        self._failures += 1
+        if (
+            self._state is CircuitState.CLOSED
+            and self._failures >= self._failure_threshold
+        ):
+            logger.warning(f"{self._name}: opened after {self._failures} failures")
+            self._metrics.increment(f"{self._name}.opened")
+            self._set_state(CircuitState.OPEN)
+
+    async def aclose(self) -> None:
+        """実行中の回復の確認をキャンセルする."""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            await asyncio.gather(self._probe_task, return_exceptions=True)
+
+    def _start_probe(self) -> None:
+        self._set_state(CircuitState.HALF_OPEN)
+        self._metrics.increment(f"{self._name}.probes")
+        self._probe_task = asyncio.ensure_future(self._run_probe())
+
+    async def _run_probe(self) -> None:
+        try:
+            await self._probe()
+        except asyncio.CancelledError:
+            self._set_state(CircuitState.OPEN)
+            raise
+        except Exception as e:
+            logger.info(f"{self._name}: probe failed: {e}")
+            self._metrics.increment(f"{self._name}.probe_failures")
+            self._set_state(CircuitState.OPEN)
+            return
+        logger.info(f"{self._name}: closed after successful probe")
+        self._failures = 0
+        self._set_state(CircuitState.CLOSED)
+
+    def _set_state(self, state: CircuitState) -> None:
+        if state is CircuitState.OPEN:
+            self._opened_at = self._clock()
+        self._state = state
+        self._metrics.set_gauge(f"{self._name}.state", _STATE_VALUES[state])
@@ -0,0 +1,76 @@
+"""ブロッキング処理をイベントループ外で実行するエグゼキューター."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import ParamSpec, TypeVar
+
+from app.core.metrics import MetricsRegistry, get_metrics
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+# 待ち時間ヒストグラムのバケット（ミリ秒）
+QUEUE_WAIT_BUCKETS: tuple[float, ...] = (0.1, 0.5, 1, 5, 10, 25, 50, 100, 250, 1000)
+
+
+class BoundedExecutor:
+    """スレッド数に上限のあるエグゼキューター.
+
+    同期APIの呼び出し（署名検証など）をワーカースレッドで実行し、
+    イベントループを止めないようにする。同時実行数は max_workers までで、
+    超過分はスレッドの空き待ちになる。待ち時間は
+    ``{name}.queue_wait_ms``、待機中・実行中の件数は ``{name}.in_flight`` で確認できる。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        """
+        初期化.
+
+        Args:
+            name: メトリクス名とスレッド名の接頭辞
+            max_workers: 最大ワーカースレッド数
+            metrics: メトリクスレジストリ（省略時はグローバル）
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        self._name = name
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+        self._metrics = metrics or get_metrics()
+        self._in_flight = 0
+
+    async def run(self, func: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+        """func をワーカースレッドで実行し、結果を返す."""
+        submitted_at = time.perf_counter()
+
+        def call() -> T:
+            self._metrics.observe(
+                f"{self._name}.queue_wait_ms",
+                (time.perf_counter() - submitted_at) * 1000,
+                buckets=QUEUE_WAIT_BUCKETS,
+            )
+            return func(*args, **kwargs)
+
+        self._in_flight += 1
+        self._metrics.set_gauge(f"{self._name}.in_flight", self._in_flight)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, call
+            )
+        finally:
+            self._in_flight -= 1
+            self._metrics.set_gauge(f"{self._name}.in_flight", self._in_flight)
+
+    def shutdown(self) -> None:
+        """ワーカースレッドを停止する（実行中の処理は待たない）."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,142 @@
+"""テールレイテンシを抑えるためのヘッジ（重複）リクエスト."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from app.core.metrics import MetricsRegistry, get_metrics
+
+T = TypeVar("T")
+
+
+class HedgePolicy:
+    """遅い呼び出しに同じ呼び出しを重ねて送り、先に返った結果を使う.
+
+    最初の呼び出しが直近の所要時間の quantile（例: p90）を過ぎても返らない場合、
+    同じ呼び出しをもう1つ送る。先に成功した方の結果を返し、もう一方は
+    キャンセルする。片方が失敗した場合はもう一方の結果を待つ。
+
+    - 所要時間が min_samples 件集まるまではヘッジしない
+    - 直近 window 件の呼び出しのうちヘッジした割合が budget 以上の間はヘッジしない
+      （障害などで全体が遅い時に負荷を倍にしない）
+
+    メトリクス（name を接頭辞とする）:
+    ``{name}.sent``（ヘッジした回数）、``{name}.won``（ヘッジが先に返り、
+    待ち時間を短縮した回数）、``{name}.budget_exhausted``（予算切れで
+    ヘッジしなかった回数）、``{name}.threshold_ms``（現在の閾値）
+    """
+
+    def __init__(
+        self,
+        name: str,
+        quantile: float = 0.9,
+        budget: float = 0.05,
+        min_samples: int = 20,
+        window: int = 200,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        """
+        初期化.
+
+        Args:
+            name: メトリクス名の接頭辞
+            quantile: ヘッジを送るまでの待ち時間にする所要時間の分位（0.0-1.0）
+            budget: ヘッジする呼び出しの割合の上限（0.0-1.0）
+            min_samples: ヘッジを始めるのに必要な所要時間の件数
+            window: 所要時間と予算を計算する直近の呼び出し数
+            metrics: メトリクスレジストリ（省略時はグローバル）
+        """
+        if not 0.0 < quantile < 1.0:
+            raise ValueError("quantile must be between 0 and 1")
+        if window < 1 or min_samples < 1:
+            raise ValueError("window and min_samples must be >= 1")
+        self._name = name
+        self._quantile = quantile
+        self._budget = budget
+        self._min_samples = min_samples
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._hedged: deque[bool] = deque(maxlen=window)
+        self._hedged_count = 0
+        self._metrics = metrics or get_metrics()
+
+    def threshold(self) -> float | None:
+        """ヘッジを送るまでの待ち時間（秒）。所要時間が足りない場合None."""
+        if len(self._latencies) < self._min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(int(len(ordered) * self._quantile), len(ordered) - 1)]
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        call を実行し、遅い場合はヘッジする.
+
+        Args:
+            call: 呼び出し（ヘッジ時はもう1度呼ばれる。同じ結果を返すこと）
+
+        Returns:
+            先に成功した呼び出しの結果
+        """
+        delay = self.threshold()
+        primary = asyncio.ensure_future(self._timed(call))
+        if delay is None:
+            self._record_hedged(False)
+            return await primary
+
+        self._metrics.set_gauge(f"{self._name}.threshold_ms", delay * 1000)
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                self._record_hedged(False)
+                return primary.result()
+            if not self._within_budget():
+                self._metrics.increment(f"{self._name}.budget_exhausted")
+                self._record_hedged(False)
+                return await primary
+        except BaseException:
+            primary.cancel()
+            raise
+
+        self._record_hedged(True)
+        self._metrics.increment(f"{self._name}.sent")
+        hedge = asyncio.ensure_future(self._timed(call))
+        pending = {primary, hedge}
+        error: BaseException | None = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._metrics.increment(f"{self._name}.won")
+                        return task.result()
+                    error = error or task.exception()
+            assert error is not None
+            raise error
+        finally:
+            for task in (primary, hedge):
+                task.cancel()
+
+    async def _timed(self, call: Callable[[], Awaitable[T]]) -> T:
+        """call を実行し、成功した場合は所要時間を記録する."""
+        started_at = time.perf_counter()
+        # キャンセルされた（負けた）呼び出しの経過時間は所要時間の下限でしかなく、
+        # 閾値を下げてヘッジを増やすため記録しない
+        result = await call()
+        self._latencies.append(time.perf_counter() - started_at)
+        return result
+
+    def _within_budget(self) -> bool:
+        """ヘッジしても直近のヘッジ率が budget を超えないか."""
+        return self._hedged_count + 1 <= self._budget * (len(self._hedged) + 1)
+
+    def _record_hedged(self, hedged: bool) -> None:
+        if len(self._hedged) == self._hedged.maxlen and self._hedged[0]:
+            self._hedged_count -= 1
+        self._hedged.append(hedged)
+        self._hedged_count += hedged
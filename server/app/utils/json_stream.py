@@ -0,0 +1,205 @@
+"""ストリーミング受信中のJSONを逐次解析するパーサー.
+
+LLMのトークンストリームのように、JSONオブジェクトが断片的に届く場合に
+完成した部分から順に取り出すために使う。対象はトップレベルのオブジェクトで、
+以下の単位でイベントを返す:
+
+- トップレベルの値（配列以外）が完成したとき: ``JsonStreamEvent(key, None, value)``
+- トップレベルの配列の要素が完成したとき: ``JsonStreamEvent(key, index, item)``
+
+最初の ``{`` より前の文字列（Markdownのコードブロック記号など）は読み飛ばす。
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any
+
+_WHITESPACE = frozenset(" \t\r\n")
+
+
+@dataclass(frozen=True)
+class JsonStreamEvent:
+    """完成した値."""
+
+    key: str
+    """トップレベルのキー."""
+
+    index: int | None
+    """配列要素の場合はインデックス、それ以外はNone."""
+
+    value: Any
+    """パース済みの値."""
+
+
+class IncrementalJsonParser:
+    """断片的に届くJSONオブジェクトを逐次解析する.
+
+    受信済みの文字列は1度だけ走査する。完成した値のパースに失敗した場合は
+    イベントを返さない（最終的な検証は全文のパースで行う想定）。
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._started = False
+        self._done = False
+        self._in_string = False
+        self._escape = False
+        self._expect_key = True
+        self._key: str | None = None
+        self._key_start: int | None = None
+        self._value_start: int | None = None
+        self._in_array = False
+        self._item_start: int | None = None
+        self._item_index = 0
+
+    @property
+    def done(self) -> bool:
+        """トップレベルのオブジェクトが閉じたか."""
+        return self._done
+
+    def feed(self, chunk: str) -> list[JsonStreamEvent]:
+        """断片を追加し、新たに完成した値を返す.
+
+        Args:
+            chunk: 受信した文字列の断片
+
+        Returns:
+            この断片で完成した値（出現順）
+        """
+        self._buffer += chunk
+        events: list[JsonStreamEvent] = []
+        buffer = self._buffer
+        for i in range(self._pos, len(buffer)):
+            if self._done:
+                break
+            self._scan(buffer, i, buffer[i], events)
+        self._pos = len(buffer)
+        return events
+
+    def _scan(self, buffer: str, i: int, c: str, events: list[JsonStreamEvent]) -> None:
+        if not self._started:
+            if c == "{":
+                self._started = True
+                self._depth = 1
+            return
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif c == "\\":
+                self._escape = True
+            elif c == '"':
+                self._in_string = False
+                self._on_string_end(buffer, i, events)
+            return
+
+        if c in _WHITESPACE:
+            return
+
+        if c == '"':
+            self._in_string = True
+            self._on_value_start(i)
+            if self._depth == 1 and self._expect_key:
+                self._key_start = i
+            return
+
+        if c in "{[":
+            if self._depth == 1 and not self._expect_key and c == "[":
+                self._in_array = True
+                self._item_index = 0
+            else:
+                self._on_value_start(i)
+            self._depth += 1
+            return
+
+        if c in "}]":
+            if self._depth == 2 and self._in_array:
+                # 配列の終端（直前の要素がスカラーなら確定させる）
+                self._flush_item(buffer, i, events)
+                self._in_array = False
+                self._depth = 1
+                return
+            if self._depth == 1:
+                self._flush_value(buffer, i, events)
+                self._depth = 0
+                self._done = True
+                return
+            self._depth -= 1
+            if self._depth == 2 and self._in_array and self._item_start is not None:
+                self._emit_item(buffer[self._item_start : i + 1], events)
+            elif self._depth == 1 and self._value_start is not None:
+                self._emit_value(buffer[self._value_start : i + 1], events)
+            return
+
+        if c == ",":
+            if self._depth == 2 and self._in_array:
+                self._flush_item(buffer, i, events)
+            elif self._depth == 1:
+                self._flush_value(buffer, i, events)
+                self._expect_key = True
+            return
+
+        if c == ":" and self._depth == 1:
+            self._expect_key = False
+            return
+
+        # 数値・true/false/null などのスカラー
+        self._on_value_start(i)
+
+    def _on_value_start(self, i: int) -> None:
+        if self._depth == 1 and not self._expect_key and self._value_start is None:
+            self._value_start = i
+        elif self._depth == 2 and self._in_array and self._item_start is None:
+            self._item_start = i
+
+    def _on_string_end(
+        self, buffer: str, i: int, events: list[JsonStreamEvent]
+    ) -> None:
+        if self._depth == 1:
+            if self._key_start is not None:
+                key = _loads(buffer[self._key_start : i + 1])
+                self._key = key if isinstance(key, str) else None
+                self._key_start = None
+            elif self._value_start is not None:
+                self._emit_value(buffer[self._value_start : i + 1], events)
+        elif self._depth == 2 and self._in_array and self._item_start is not None:
+            if buffer[self._item_start] == '"':
+                self._emit_item(buffer[self._item_start : i + 1], events)
+
+    def _flush_value(
+        self, buffer: str, end: int, events: list[JsonStreamEvent]
+    ) -> None:
+        if self._value_start is not None:
+            self._emit_value(buffer[self._value_start : end], events)
+
+    def _flush_item(self, buffer: str, end: int, events: list[JsonStreamEvent]) -> None:
+        if self._item_start is not None:
+            self._emit_item(buffer[self._item_start : end], events)
+
+    def _emit_value(self, text: str, events: list[JsonStreamEvent]) -> None:
+        self._value_start = None
+        value = _loads(text)
+        if self._key is not None and value is not _INVALID:
+            events.append(JsonStreamEvent(key=self._key, index=None, value=value))
+
+    def _emit_item(self, text: str, events: list[JsonStreamEvent]) -> None:
+        self._item_start = None
+        index = self._item_index
+        self._item_index += 1
+        value = _loads(text)
+        if self._key is not None and value is not _INVALID:
+            events.append(JsonStreamEvent(key=self._key, index=index, value=value))
+
+
+_INVALID = object()
+
+
+def _loads(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except ValueError:
+        return _INVALID
@@ -0,0 +1,140 @@
+"""複数のプロバイダーに同じ呼び出しを送り、先に成功した結果を使う."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Mapping
+from typing import TypeVar
+
+from app.core.metrics import MetricsRegistry, get_metrics
+
+T = TypeVar("T")
+
+
+class ProviderRace:
+    """同じ呼び出しを全てのプロバイダーに送り、最初に成功した結果を返す.
+
+    残りの呼び出しはキャンセルする。失敗した（例外を送出した）呼び出しは負けとし、
+    他のプロバイダーの結果を待つ。全て失敗した場合は最初の例外を送出する。
+
+    preferred と quality_wait を指定した場合、他のプロバイダーが先に成功しても
+    quality_wait 秒以内に preferred が成功すれば preferred の結果を使う
+    （速度より品質を優先したいプロバイダー用）。
+
+    メトリクス（name を接頭辞とする）:
+    ``{name}.{provider}.latency_ms``（成功した呼び出しの所要時間）、
+    ``{name}.{provider}.wins`` / ``{name}.{provider}.win_rate``（結果を使った回数と割合）、
+    ``{name}.{provider}.errors``、``{name}.quality_waits``（preferred を待った回数）、
+    ``{name}.quality_wins``（待った結果 preferred を使った回数）
+    """
+
+    def __init__(
+        self,
+        name: str,
+        preferred: str | None = None,
+        quality_wait: float = 0.0,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        """
+        初期化.
+
+        Args:
+            name: メトリクス名の接頭辞
+            preferred: 品質を優先するプロバイダー
+            quality_wait: 他が先に成功した場合に preferred を待つ時間（秒, 0で待たない）
+            metrics: メトリクスレジストリ（省略時はグローバル）
+        """
+        if quality_wait < 0:
+            raise ValueError("quality_wait must be >= 0")
+        self._name = name
+        self._preferred = preferred
+        self._quality_wait = quality_wait
+        self._metrics = metrics or get_metrics()
+        self._races = 0
+        self._wins: dict[str, int] = {}
+
+    async def run(self, calls: Mapping[str, Callable[[], Awaitable[T]]]) -> T:
+        """
+        全てのプロバイダーの呼び出しを同時に実行し、勝った結果を返す.
+
+        Args:
+            calls: プロバイダー名ごとの呼び出し
+
+        Returns:
+            勝ったプロバイダーの結果
+
+        Raises:
+            全ての呼び出しが失敗した場合は最初の例外
+        """
+        if not calls:
+            raise ValueError("calls must not be empty")
+        for provider in calls:
+            self._wins.setdefault(provider, 0)
+        tasks = {
+            asyncio.ensure_future(self._timed(provider, call)): provider
+            for provider, call in calls.items()
+        }
+        pending = set(tasks)
+        errors: list[BaseException] = []
+        first: tuple[str, T] | None = None
+        deadline = 0.0
+        try:
+            while pending:
+                timeout = None
+                if first is not None:
+                    timeout = deadline - time.perf_counter()
+                    if timeout <= 0:
+                        break
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                # 同時に終わった場合も preferred を優先する
+                for task in sorted(done, key=lambda t: tasks[t] != self._preferred):
+                    provider = tasks[task]
+                    error = task.exception()
+                    if error is not None:
+                        self._metrics.increment(f"{self._name}.{provider}.errors")
+                        errors.append(error)
+                        continue
+                    if provider == self._preferred:
+                        if first is not None:
+                            self._metrics.increment(f"{self._name}.quality_wins")
+                        return self._win(provider, task.result())
+                    if first is not None:
+                        continue
+                    first = (provider, task.result())
+                    if (
+                        not self._quality_wait
+                        or self._preferred is None
+                        or self._preferred not in (tasks[t] for t in pending)
+                    ):
+                        return self._win(*first)
+                    self._metrics.increment(f"{self._name}.quality_waits")
+                    deadline = time.perf_counter() + self._quality_wait
+            if first is not None:
+                return self._win(*first)
+            raise errors[0]
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _timed(self, provider: str, call: Callable[[], Awaitable[T]]) -> T:
+        """call を実行し、成功した場合は所要時間を記録する."""
+        started_at = time.perf_counter()
+        result = await call()
+        self._metrics.observe(
+            f"{self._name}.{provider}.latency_ms",
+            (time.perf_counter() - started_at) * 1000,
+        )
+        return result
+
+    def _win(self, provider: str, result: T) -> T:
+        self._races += 1
+        self._wins[provider] += 1
+        self._metrics.increment(f"{self._name}.{provider}.wins")
+        for name, wins in self._wins.items():
+            self._metrics.set_gauge(f"{self._name}.{name}.win_rate", wins / self._races)
+        return result
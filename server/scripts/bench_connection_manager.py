@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+"""ConnectionManager のベンチマーク.
+
+10k のシミュレーション接続で register / send_to_session / broadcast / disconnect の
+スループットを、ConnectionManager（単一ロック）と、セッションIDのハッシュで
+レジストリを区画に分割した版（区画ごとのロック + copy-on-write の接続集合）で比較する。
+送信は送信キューに積むまでを計測する（ネットワークI/Oはモック）。
+接続ごとの writer タスクの生成・実行も計測に含まれる。
+
+分割版は ConnectionManager を継承してレジストリだけを差し替えるため、エンコードや
+送信キューへの投入は同じコードを通る。計測では分割版はどの操作でも誤差の範囲か
+それ以下（0.8〜1.1倍、broadcast は 0.8〜0.9倍）で、分割が有利になる負荷は
+見つからなかったため、ConnectionManager は単一ロックのままにしている。asyncio では
+ロックを await をまたいで保持しないため競合がほとんどなく、コストは接続ごとの
+writer タスクのスケジューリングが支配的になる。
+
+Usage:
+    uv run python scripts/bench_connection_manager.py
+    uv run python scripts/bench_connection_manager.py --connections 20000 --per-session 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import os
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any, Protocol
+
+# appモジュールをインポートするためにパスを追加
+server_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(server_dir))
+# 設定の必須項目（ベンチマークでは使用しない）
+os.environ.setdefault("GCP_PROJECT_ID", "bench")
+os.environ.setdefault("FT_MODEL_ID", "bench")
+
+from app.core.metrics import MetricsRegistry  # noqa: E402
+from app.dto.processing import ResponseMode  # noqa: E402
+from app.services.connection_manager import (  # noqa: E402
+    DEFAULT_MAX_MISSED_SENDS,
+    DEFAULT_OUTBOUND_QUEUE_SIZE,
+    DEFAULT_SEND_TIMEOUT,
+    ConnectionManager,
+    OutboundMessage,
+    _ConnectionEntry,
+)
+from app.services.outbound_queue import OutboundQueue  # noqa: E402
+
+
+class _FakeWebSocket:
+    """送信を即座に完了するWebSocket."""
+
+    __slots__ = ("sent",)
+
+    def __init__(self) -> None:
+        self.sent = 0
+
+    async def send_text(self, text: str) -> None:
+        self.sent += 1
+
+    async def close(self, code: int = 1000) -> None:
+        return None
+
+
+class _Manager(Protocol):
+    async def register(
+        self, websocket: Any, session_id: str, response_mode: ResponseMode = ...
+    ) -> None: ...
+
+    async def disconnect(self, websocket: Any) -> None: ...
+
+    async def send_to_session(
+        self,
+        session_id: str,
+        payload: OutboundMessage,
+        response_mode: ResponseMode | None = None,
+    ) -> None: ...
+
+    async def broadcast(self, payload: OutboundMessage) -> None: ...
+
+    async def drain(self) -> None: ...
+
+
+class _Shard:
+    """セッションIDのハッシュで分割したレジストリの1区画."""
+
+    __slots__ = ("lock", "sessions", "connections")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.sessions: dict[str, frozenset[Any]] = {}
+        self.connections: dict[Any, _ConnectionEntry] = {}
+
+
+class ShardedConnectionManager(ConnectionManager):
+    """比較用: レジストリを shard_count 個の区画に分割した ConnectionManager.
+
+    登録・切断は区画ごとのロックで行い、セッションの接続集合は frozenset を
+    差し替える（copy-on-write）ため、送信側はロックなしでスナップショットを読む。
+    エンコード・送信キューへの投入はそのまま使い、レジストリだけを差し替える。
+    """
+
+    def __init__(self, shard_count: int, metrics: MetricsRegistry) -> None:
+        super().__init__(metrics=metrics)
+        self._shards = tuple(_Shard() for _ in range(shard_count))
+        self._connection_shards: dict[Any, _Shard] = {}
+
+    async def register(
+        self,
+        websocket: Any,
+        session_id: str,
+        response_mode: ResponseMode = ResponseMode.SINGLE,
+        conflate: bool = False,
+    ) -> None:
+        queue = OutboundQueue(
+            websocket,
+            on_evict=self.disconnect,
+            metrics=self._metrics,
+            max_size=DEFAULT_OUTBOUND_QUEUE_SIZE,
+            send_timeout=DEFAULT_SEND_TIMEOUT,
+            max_missed_sends=DEFAULT_MAX_MISSED_SENDS,
+            conflate=conflate,
+        )
+        shard = self._shard_for(session_id)
+        async with shard.lock:
+            shard.connections[websocket] = _ConnectionEntry(
+                session_id=session_id, response_mode=response_mode, queue=queue
+            )
+            shard.sessions[session_id] = shard.sessions.get(session_id, frozenset()) | {
+                websocket
+            }
+            self._connection_shards[websocket] = shard
+
+    async def disconnect(self, websocket: Any) -> None:
+        shard = self._connection_shards.get(websocket)
+        if shard is None:
+            return
+        async with shard.lock:
+            entry = shard.connections.pop(websocket, None)
+            if entry is None:
+                return
+            self._connection_shards.pop(websocket, None)
+            entry.queue.close()
+            session_id = entry.session_id
+            remaining = shard.sessions.get(session_id, frozenset()) - {websocket}
+            if remaining:
+                shard.sessions[session_id] = remaining
+            else:
+                shard.sessions.pop(session_id, None)
+
+    def _session_queues(
+        self, session_id: str, response_mode: ResponseMode | None
+    ) -> list[OutboundQueue]:
+        shard = self._shard_for(session_id)
+        queues: list[OutboundQueue] = []
+        for websocket in shard.sessions.get(session_id, frozenset()):
+            entry = shard.connections.get(websocket)
+            if entry is None:
+                continue
+            if response_mode is None or entry.response_mode == response_mode:
+                queues.append(entry.queue)
+        return queues
+
+    def _all_queues(self) -> list[OutboundQueue]:
+        return [
+            entry.queue
+            for shard in self._shards
+            for entry in list(shard.connections.values())
+        ]
+
+    def _shard_for(self, session_id: str) -> _Shard:
+        return self._shards[hash(session_id) % len(self._shards)]
+
+
+async def _timed(fn: Callable[[], Awaitable[None]]) -> float:
+    start = time.perf_counter()
+    await fn()
+    return time.perf_counter() - start
+
+
+async def _run(
+    manager: _Manager, connections: int, per_session: int
+) -> dict[str, tuple[int, float]]:
+    """1回分の計測. 操作名 → (操作数, 経過秒) を返す."""
+    sockets = [_FakeWebSocket() for _ in range(connections)]
+    sessions = [f"session-{i // per_session}" for i in range(connections)]
+    session_ids = sorted(set(sessions))
+    payload = {"type": "ANALYSIS_RESPONSE", "situation_analysis": "bench"}
+
+    async def register_all() -> None:
+        await asyncio.gather(
+            *(manager.register(ws, sid) for ws, sid in zip(sockets, sessions))
+        )
+
+    async def send_all() -> None:
+        await asyncio.gather(
+            *(manager.send_to_session(sid, payload) for sid in session_ids)
+        )
+
+    async def mixed() -> None:
+        # 送信と、半数の接続の出入り（再接続）を同時に行う
+        churn = sockets[: len(sockets) // 2]
+        await asyncio.gather(
+            *(manager.send_to_session(sid, payload) for sid in session_ids),
+            *(manager.disconnect(ws) for ws in churn),
+            *(
+                manager.register(ws, sid)
+                for ws, sid in zip(churn, sessions[: len(churn)])
+            ),
+        )
+
+    async def broadcast() -> None:
+        for _ in range(10):
+            await manager.broadcast(payload)
+
+    async def disconnect_all() -> None:
+        await asyncio.gather(*(manager.disconnect(ws) for ws in sockets))
+
+    results: dict[str, tuple[int, float]] = {}
+    results["register"] = (connections, await _timed(register_all))
+    results["send_to_session"] = (len(session_ids), await _timed(send_all))
+    await manager.drain()
+    churn_ops = len(session_ids) + len(sockets)
+    results["send + churn (mixed)"] = (churn_ops, await _timed(mixed))
+    await manager.drain()
+    results["broadcast (x10)"] = (10 * connections, await _timed(broadcast))
+    await manager.drain()
+    results["disconnect"] = (connections, await _timed(disconnect_all))
+    return results
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, default=10_000)
+    parser.add_argument("--per-session", type=int, default=2)
+    parser.add_argument("--shards", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    factories: dict[str, Callable[[], _Manager]] = {
+        "single": lambda: ConnectionManager(metrics=MetricsRegistry()),
+        "sharded": lambda: ShardedConnectionManager(args.shards, MetricsRegistry()),
+    }
+    samples: dict[str, dict[str, list[float]]] = {name: {} for name in factories}
+    ops: dict[str, int] = {}
+
+    # 実行順の影響を避けるため、交互に実行して中央値を取る
+    for _ in range(args.rounds):
+        for name, factory in factories.items():
+            gc.collect()
+            for op, (count, elapsed) in (
+                await _run(factory(), args.connections, args.per_session)
+            ).items():
+                ops[op] = count
+                samples[name].setdefault(op, []).append(elapsed)
+
+    print(
+        f"connections={args.connections:,} per_session={args.per_session} "
+        f"shards={args.shards} rounds={args.rounds} (median ops/s)\n"
+    )
+    print(f"  {'operation':<22} {'single':>12} {'sharded':>12} {'ratio':>7}")
+    for op, count in ops.items():
+        single = count / statistics.median(samples["single"][op])
+        sharded = count / statistics.median(samples["sharded"][op])
+        print(
+            f"  {op:<22} {single:>12,.0f} {sharded:>12,.0f} {sharded / single:>6.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
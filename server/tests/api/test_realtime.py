@@ -1,17 +1,59 @@
 """WebSocket realtime endpoint tests."""
 
+import asyncio
 import base64
+import threading
+import time
 from datetime import datetime, timezone
-from typing import Generator
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import Any, Generator
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
 from starlette.websockets import WebSocketDisconnect
 
+from app.api.binary_frame import decode_binary_frame, encode_binary_frame
+from app.core.config import get_settings
+from app.core.exceptions import STTError
+from app.dto.audio import AudioFormat, StreamingTranscript, TranscriptionResult
+from app.dto.emotion import EmotionInterpretation
+from app.dto.llm import LLMResponseResult, ResponseSuggestion
+from app.dto.processing import AnalysisResponse
+from app.api.dependencies import create_analysis_queue
+from app.services.response_generator import ResponseGeneratorService
+from app.services.streaming_transcription import StreamingTranscriptionManager
 from main import app
 
 
+def _patch_response_generator(mock_service: MagicMock) -> Any:
+    """ResponseGeneratorServiceをモックに差し替えた解析キューを使わせる."""
+    return patch(
+        "app.api.dependencies._analysis_queue",
+        create_analysis_queue(mock_service),
+    )
+
+
+def _analysis_response() -> AnalysisResponse:
+    """ResponseGeneratorService.process の戻り値."""
+    return AnalysisResponse(
+        type="ANALYSIS_RESPONSE",
+        timestamp=datetime.now(timezone.utc),
+        emotion=EmotionInterpretation(
+            primary_emotion="neutral",
+            intensity="medium",
+            description="相手は平静です",
+        ),
+        transcription=None,
+        suggestions=[
+            ResponseSuggestion(text="応答1", intent="テスト1"),
+            ResponseSuggestion(text="応答2", intent="テスト2"),
+        ],
+        situation_analysis="テスト分析",
+        processing_time_ms=100,
+    )
+
+
 @pytest.fixture
 def client() -> TestClient:
     return TestClient(app)
@@ -103,6 +145,39 @@ class TestWebSocketAuthentication:
                     ws.receive_json()
                 assert exc_info.value.code == 4003
 
+    def test_session_lookup_runs_off_event_loop(self, client: TestClient) -> None:
+        """セッションの取得（Firestore ではネットワークI/O）はイベントループ外で行う."""
+        mock_claims = {"uid": "test-user-123", "email": "test@example.com"}
+        mock_session = MagicMock()
+        mock_session.owner_id = "test-user-123"
+        on_loop: list[bool] = []
+
+        def get_session(session_id: str) -> MagicMock:
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            return mock_session
+
+        with (
+            patch(
+                "app.api.routers.realtime.verify_websocket_token",
+                return_value=mock_claims,
+            ),
+            patch(
+                "app.api.routers.realtime.get_session_service",
+            ) as mock_get_service,
+        ):
+            mock_get_service.return_value.get_session.side_effect = get_session
+            with client.websocket_connect(
+                "/api/realtime?session_id=test&token=valid"
+            ) as ws:
+                ws.send_json({"type": "PING"})
+                assert ws.receive_json()["type"] == "PONG"
+
+        assert on_loop == [False]
+
 
 class TestWebSocketPing:
     """PING/PONGテスト."""
@@ -187,24 +262,7 @@ class TestWebSocketAnalysisRequest:
     def mock_response_generator(self) -> MagicMock:
         """ResponseGeneratorServiceのモック."""
         mock_service = MagicMock()
-        mock_response = MagicMock()
-        mock_response.model_dump.return_value = {
-            "type": "ANALYSIS_RESPONSE",
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "emotion": {
-                "primary_emotion": "neutral",
-                "intensity": "medium",
-                "description": "相手は平静です",
-            },
-            "transcription": None,
-            "suggestions": [
-                {"text": "応答1", "intent": "テスト1"},
-                {"text": "応答2", "intent": "テスト2"},
-            ],
-            "situation_analysis": "テスト分析",
-            "processing_time_ms": 100,
-        }
-        mock_service.process = AsyncMock(return_value=mock_response)
+        mock_service.process = AsyncMock(return_value=_analysis_response())
         return mock_service
 
     def test_analysis_request_returns_response(
@@ -214,10 +272,7 @@ class TestWebSocketAnalysisRequest:
         mock_auth_and_session: None,
     ) -> None:
         """ANALYSIS_REQUESTにANALYSIS_RESPONSEで応答する."""
-        with patch(
-            "app.api.routers.realtime.get_response_generator",
-            return_value=mock_response_generator,
-        ):
+        with _patch_response_generator(mock_response_generator):
             with client.websocket_connect(
                 "/api/realtime?session_id=test&token=valid"
             ) as ws:
@@ -241,10 +296,7 @@ class TestWebSocketAnalysisRequest:
         """音声付きANALYSIS_REQUESTが正しく処理される."""
         fake_audio = base64.b64encode(b"fake-audio-data").decode()
 
-        with patch(
-            "app.api.routers.realtime.get_response_generator",
-            return_value=mock_response_generator,
-        ):
+        with _patch_response_generator(mock_response_generator):
             with client.websocket_connect(
                 "/api/realtime?session_id=test&token=valid"
             ) as ws:
@@ -304,10 +356,7 @@ class TestWebSocketAnalysisRequest:
         mock_auth_and_session: None,
     ) -> None:
         """無効なaudio_dataでも処理を継続する."""
-        with patch(
-            "app.api.routers.realtime.get_response_generator",
-            return_value=mock_response_generator,
-        ):
+        with _patch_response_generator(mock_response_generator):
             with client.websocket_connect(
                 "/api/realtime?session_id=test&token=valid"
             ) as ws:
@@ -323,3 +372,560 @@ class TestWebSocketAnalysisRequest:
                 )
                 response = ws.receive_json()
                 assert response["type"] == "ANALYSIS_RESPONSE"
+
+
+class TestBinaryFrameCodec:
+    """バイナリフレームのエンコード/デコードテスト."""
+
+    def test_roundtrip(self) -> None:
+        """エンコードしたフレームを元に戻せる."""
+        header = {"type": "ANALYSIS_REQUEST", "session_id": "test"}
+        frame = decode_binary_frame(encode_binary_frame(header, b"\x00\x01raw"))
+
+        assert frame.header == header
+        assert isinstance(frame.payload, memoryview)
+        assert frame.payload.tobytes() == b"\x00\x01raw"
+
+    def test_too_short_frame_raises(self) -> None:
+        """ヘッダー長に満たないフレームはエラー."""
+        with pytest.raises(ValueError, match="too short"):
+            decode_binary_frame(b"\x00\x00")
+
+    def test_header_length_exceeds_frame_raises(self) -> None:
+        """ヘッダー長がフレーム長を超える場合はエラー."""
+        with pytest.raises(ValueError, match="exceeds"):
+            decode_binary_frame(b"\x00\x00\x00\x10{}")
+
+    def test_non_object_header_raises(self) -> None:
+        """ヘッダーがJSONオブジェクトでない場合はエラー."""
+        with pytest.raises(ValueError, match="JSON object"):
+            decode_binary_frame(b"\x00\x00\x00\x02[]")
+
+
+class TestWebSocketBinaryAnalysisRequest:
+    """バイナリフレームのANALYSIS_REQUESTテスト."""
+
+    @pytest.fixture
+    def mock_response_generator(self) -> MagicMock:
+        """ResponseGeneratorServiceのモック."""
+        mock_service = MagicMock()
+        mock_service.process = AsyncMock(return_value=_analysis_response())
+        return mock_service
+
+    def test_binary_audio_is_passed_without_base64(
+        self,
+        client: TestClient,
+        mock_response_generator: MagicMock,
+        mock_auth_and_session: None,
+    ) -> None:
+        """バイナリフレームの音声がデコードされずそのまま渡される."""
+        raw_audio = b"RIFF-raw-audio-bytes"
+        frame = encode_binary_frame(
+            {
+                "type": "ANALYSIS_REQUEST",
+                "session_id": "test",
+                "timestamp": "2024-01-15T10:00:00Z",
+                "emotion_scores": {"confused": 0.7},
+                "audio_format": "pcm",
+            },
+            raw_audio,
+        )
+
+        with _patch_response_generator(mock_response_generator):
+            with client.websocket_connect(
+                "/api/realtime?session_id=test&token=valid"
+            ) as ws:
+                ws.send_bytes(frame)
+                response = ws.receive_json()
+                assert response["type"] == "ANALYSIS_RESPONSE"
+
+        call_kwargs = mock_response_generator.process.call_args.kwargs
+        [clip] = call_kwargs["audio_clips"]
+        assert isinstance(clip.data, memoryview)
+        assert bytes(clip.data) == raw_audio
+        assert clip.format == AudioFormat.PCM
+        assert clip.sample_rate == 16000
+
+    def test_binary_header_sample_rate_is_passed(
+        self,
+        client: TestClient,
+        mock_response_generator: MagicMock,
+        mock_auth_and_session: None,
+    ) -> None:
+        """ヘッダーの sample_rate が音声クリップに引き継がれる."""
+        frame = encode_binary_frame(
+            {
+                "type": "ANALYSIS_REQUEST",
+                "session_id": "test",
+                "emotion_scores": {"confused": 0.7},
+                "audio_format": "pcm",
+                "sample_rate": 48000,
+            },
+            b"\x00\x01" * 480,
+        )
+
+        with _patch_response_generator(mock_response_generator):
+            with client.websocket_connect(
+                "/api/realtime?session_id=test&token=valid"
+            ) as ws:
+                ws.send_bytes(frame)
+                response = ws.receive_json()
+                assert response["type"] == "ANALYSIS_RESPONSE"
+
+        [clip] = mock_response_generator.process.call_args.kwargs["audio_clips"]
+        assert clip.sample_rate == 48000
+
+    def test_binary_frame_without_payload_is_emotion_only(
+        self,
+        client: TestClient,
+        mock_response_generator: MagicMock,
+        mock_auth_and_session: None,
+    ) -> None:
+        """ペイロードが空のバイナリフレームは音声なしとして扱う."""
+        frame = encode_binary_frame(
+            {
+                "type": "ANALYSIS_REQUEST",
+                "session_id": "test",
+                "emotion_scores": {"neutral": 0.8},
+            }
+        )
+
+        with _patch_response_generator(mock_response_generator):
+            with client.websocket_connect(
+                "/api/realtime?session_id=test&token=valid"
+            ) as ws:
+                ws.send_bytes(frame)
+                response = ws.receive_json()
+                assert response["type"] == "ANALYSIS_RESPONSE"
+
+        call_kwargs = mock_response_generator.process.call_args.kwargs
+        assert call_kwargs["audio_clips"] == []
+
+    def test_binary_ping_returns_pong(
+        self, client: TestClient, mock_auth_and_session: None
+    ) -> None:
+        """バイナリフレームの制御メッセージも処理される."""
+        with client.websocket_connect(
+            "/api/realtime?session_id=test&token=valid"
+        ) as ws:
+            ws.send_bytes(encode_binary_frame({"type": "PING"}))
+            response = ws.receive_json()
+            assert response["type"] == "PONG"
+
+    def test_invalid_binary_frame_returns_error(
+        self, client: TestClient, mock_auth_and_session: None
+    ) -> None:
+        """不正なバイナリフレームにERRORで応答する."""
+        with client.websocket_connect(
+            "/api/realtime?session_id=test&token=valid"
+        ) as ws:
+            ws.send_bytes(b"\xff")
+            response = ws.receive_json()
+            assert response["type"] == "ERROR"
+            assert "Invalid binary frame" in response["message"]
+
+
+class TestWebSocketConcurrentDispatch:
+    """解析実行中も制御メッセージに即応答することのテスト."""
+
+    @pytest.fixture
+    def slow_response_generator(
+        self,
+    ) -> Generator[tuple[MagicMock, threading.Event], None, None]:
+        """releaseされるまで完了しないResponseGeneratorServiceのモック."""
+        release = threading.Event()
+        mock_response = _analysis_response()
+
+        async def slow_process(**kwargs: object) -> AnalysisResponse:
+            while not release.is_set():
+                await asyncio.sleep(0.005)
+            return mock_response
+
+        mock_service = MagicMock()
+        mock_service.process = AsyncMock(side_effect=slow_process)
+        yield mock_service, release
+        release.set()
+
+    @staticmethod
+    def _analysis_request() -> dict[str, object]:
+        return {
+            "type": "ANALYSIS_REQUEST",
+            "session_id": "test",
+            "timestamp": "2024-01-15T10:00:00Z",
+            "emotion_scores": {"neutral": 0.8},
+        }
+
+    def test_ping_is_not_blocked_by_running_analysis(
+        self,
+        client: TestClient,
+        slow_response_generator: tuple[MagicMock, threading.Event],
+        mock_auth_and_session: None,
+    ) -> None:
+        """解析実行中でもPINGに即座にPONGが返る（Head-of-line blockingなし）."""
+        mock_service, release = slow_response_generator
+
+        with _patch_response_generator(mock_service):
+            with client.websocket_connect(
+                "/api/realtime?session_id=test&token=valid"
+            ) as ws:
+                ws.send_json(self._analysis_request())
+
+                started = time.perf_counter()
+                ws.send_json({"type": "PING"})
+                pong = ws.receive_json()
+                heartbeat_latency = time.perf_counter() - started
+
+                assert pong["type"] == "PONG"
+                assert not release.is_set()
+                assert heartbeat_latency < 1.0
+
+                release.set()
+                response = ws.receive_json()
+                assert response["type"] == "ANALYSIS_RESPONSE"
+
+    def test_reset_cancels_running_analysis(
+        self,
+        client: TestClient,
+        slow_response_generator: tuple[MagicMock, threading.Event],
+        mock_auth_and_session: None,
+    ) -> None:
+        """RESETで実行中の解析がキャンセルされ、結果は配信されない."""
+        mock_service, release = slow_response_generator
+
+        with _patch_response_generator(mock_service):
+            with client.websocket_connect(
+                "/api/realtime?session_id=test&token=valid"
+            ) as ws:
+                ws.send_json(self._analysis_request())
+                ws.send_json({"type": "PING"})
+                assert ws.receive_json()["type"] == "PONG"
+
+                ws.send_json({"type": "RESET"})
+                assert ws.receive_json()["type"] == "RESET_ACK"
+
+                release.set()
+                ws.send_json({"type": "PING"})
+                assert ws.receive_json()["type"] == "PONG"
+
+        assert mock_service.process.await_count == 1
+
+    def test_requests_over_limit_coalesce_to_latest(
+        self,
+        client: TestClient,
+        slow_response_generator: tuple[MagicMock, threading.Event],
+        mock_auth_and_session: None,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """同時実行数を超えて届いたリクエストもERRORにならず、最新の1件に統合される."""
+        mock_service, release = slow_response_generator
+        monkeypatch.setattr(get_settings(), "REALTIME_MAX_CONCURRENT_ANALYSES", 1)
+
+        with _patch_response_generator(mock_service):
+            with client.websocket_connect(
+                "/api/realtime?session_id=test&token=valid"
+            ) as ws:
+                for n in range(4):
+                    request = self._analysis_request()
+                    request["emotion_scores"] = {"neutral": n / 10}
+                    ws.send_json(request)
+                ws.send_json({"type": "PING"})
+                assert ws.receive_json()["type"] == "PONG"
+
+                release.set()
+                assert ws.receive_json()["type"] == "ANALYSIS_RESPONSE"
+                assert ws.receive_json()["type"] == "ANALYSIS_RESPONSE"
+                ws.send_json({"type": "PING"})
+                assert ws.receive_json()["type"] == "PONG"
+
+        scores = [
+            call.kwargs["emotion_scores"]
+            for call in mock_service.process.await_args_list
+        ]
+        assert scores == [{"neutral": 0.0}, {"neutral": 0.3}]
+
+    def test_analysis_failure_is_reported_to_requester(
+        self,
+        client: TestClient,
+        mock_auth_and_session: None,
+    ) -> None:
+        """キューで実行した解析が失敗した場合、リクエスト元にERRORが返る."""
+        mock_service = MagicMock()
+        mock_service.process = AsyncMock(side_effect=RuntimeError("LLM down"))
+
+        with _patch_response_generator(mock_service):
+            with client.websocket_connect(
+                "/api/realtime?session_id=test&token=valid"
+            ) as ws:
+                ws.send_json(self._analysis_request())
+                error = ws.receive_json()
+
+        assert error["type"] == "ERROR"
+        assert error["message"] == "Analysis failed: LLM down"
+
+
+class TestWebSocketProgressiveResponse:
+    """段階配信（response_mode=progressive）テスト."""
+
+    @pytest.fixture
+    def response_generator(self) -> ResponseGeneratorService:
+        """サブサービスをモックした実際のResponseGeneratorService."""
+        stt = MagicMock()
+        stt.transcribe = AsyncMock(
+            return_value=TranscriptionResult(
+                text="こんにちは", confidence=0.9, language="ja", duration_ms=1000
+            )
+        )
+        conversation = MagicMock()
+        conversation.get_recent_context.return_value = []
+        emotion = MagicMock()
+        emotion.interpret.return_value = EmotionInterpretation(
+            primary_emotion="neutral",
+            intensity="medium",
+            description="相手は平静です",
+        )
+        llm = MagicMock()
+        llm.generate_responses = AsyncMock(
+            return_value=LLMResponseResult(
+                responses=[
+                    ResponseSuggestion(text="応答1", intent="テスト1"),
+                    ResponseSuggestion(text="応答2", intent="テスト2"),
+                ],
+                situation_analysis="テスト分析",
+            )
+        )
+        return ResponseGeneratorService(stt, conversation, emotion, llm)
+
+    def _request(self) -> dict[str, Any]:
+        return {
+            "type": "ANALYSIS_REQUEST",
+            "session_id": "test",
+            "request_id": "req-1",
+            "emotion_scores": {"neutral": 0.8},
+            "audio_data": base64.b64encode(b"fake-audio").decode(),
+            "audio_format": "wav",
+        }
+
+    def test_progressive_connection_receives_stages(
+        self,
+        client: TestClient,
+        response_generator: ResponseGeneratorService,
+        mock_auth_and_session: None,
+    ) -> None:
+        """感情→文字起こし→応答候補の順に、同じrequest_idで届く."""
+        with _patch_response_generator(response_generator):
+            with client.websocket_connect(
+                "/api/realtime?session_id=test&token=valid&response_mode=progressive"
+            ) as ws:
+                ws.send_json(self._request())
+                messages = [ws.receive_json() for _ in range(3)]
+
+        assert [m["type"] for m in messages] == [
+            "ANALYSIS_EMOTION",
+            "ANALYSIS_TRANSCRIPT",
+            "ANALYSIS_SUGGESTIONS",
+        ]
+        assert {m["request_id"] for m in messages} == {"req-1"}
+        assert messages[0]["emotion"]["primary_emotion"] == "neutral"
+        assert messages[1]["transcription"]["text"] == "こんにちは"
+        assert len(messages[2]["suggestions"]) == 2
+
+    def test_single_mode_connection_receives_one_response(
+        self,
+        client: TestClient,
+        response_generator: ResponseGeneratorService,
+        mock_auth_and_session: None,
+    ) -> None:
+        """従来方式の接続には段階配信メッセージを送らず ANALYSIS_RESPONSE だけ届く."""
+        with _patch_response_generator(response_generator):
+            with client.websocket_connect(
+                "/api/realtime?session_id=test&token=valid&response_mode=single"
+            ) as ws:
+                ws.send_json(self._request())
+                response = ws.receive_json()
+
+        assert response["type"] == "ANALYSIS_RESPONSE"
+        assert response["request_id"] == "req-1"
+        assert response["transcription"]["text"] == "こんにちは"
+
+
+class TestStreamingTranscription:
+    """AUDIO_CHUNK / AUDIO_END（ストリーミング認識）のテスト."""
+
+    class _EchoStreamingSTT:
+        """チャンクを連結した文字列を途中結果として返し、終わりで確定するSTT."""
+
+        async def stream(
+            self, audio_chunks: AsyncIterable[bytes], **kwargs: Any
+        ) -> AsyncIterator[StreamingTranscript]:
+            text = ""
+            async for chunk in audio_chunks:
+                text += chunk.decode()
+                yield StreamingTranscript(text=text, is_final=False, stability=0.5)
+            yield StreamingTranscript(
+                text=text, is_final=True, confidence=0.9, end_time_ms=800
+            )
+
+    @pytest.fixture
+    def streaming(self) -> Generator[StreamingTranscriptionManager, None, None]:
+        from app.api import dependencies
+
+        manager = StreamingTranscriptionManager(
+            self._EchoStreamingSTT(),  # type: ignore[arg-type]
+            on_partial=dependencies._deliver_transcript_partial,
+            on_final=dependencies._analyze_final_transcript,
+            idle_seconds=5.0,
+        )
+        with patch("app.api.dependencies._streaming_transcription", manager):
+            yield manager
+
+    def _chunk(self, data: bytes, **header: Any) -> bytes:
+        return encode_binary_frame({"type": "AUDIO_CHUNK", **header}, data)
+
+    def test_final_transcript_triggers_analysis(
+        self,
+        client: TestClient,
+        streaming: StreamingTranscriptionManager,
+        mock_auth_and_session: None,
+    ) -> None:
+        """途中結果が届き、AUDIO_END で確定した発話が解析に渡される."""
+        mock_service = MagicMock()
+        mock_service.process = AsyncMock(return_value=_analysis_response())
+
+        with _patch_response_generator(mock_service):
+            with client.websocket_connect(
+                "/api/realtime?session_id=test&token=valid"
+            ) as ws:
+                ws.send_bytes(self._chunk(b"ab", emotion_scores={"happy": 0.9}))
+                partial = ws.receive_json()
+                ws.send_json({"type": "AUDIO_END"})
+                final = ws.receive_json()
+                response = ws.receive_json()
+
+        assert partial["type"] == "TRANSCRIPT_PARTIAL"
+        assert partial["text"] == "ab"
+        assert final["type"] == "TRANSCRIPT_FINAL"
+        assert response["type"] == "ANALYSIS_RESPONSE"
+        assert final["transcription"]["text"] == "ab"
+        call_kwargs = mock_service.process.call_args.kwargs
+        assert [t.text for t in call_kwargs["transcripts"]] == ["ab"]
+        assert call_kwargs["emotion_scores"] == {"happy": 0.9}
+        assert call_kwargs["request_id"] == final["request_id"]
+
+    def test_wav_chunk_returns_error(
+        self,
+        client: TestClient,
+        streaming: StreamingTranscriptionManager,
+        mock_auth_and_session: None,
+    ) -> None:
+        """ストリーミング認識できないフォーマットはエラーを返す."""
+        with client.websocket_connect(
+            "/api/realtime?session_id=test&token=valid"
+        ) as ws:
+            ws.send_bytes(self._chunk(b"RIFF", audio_format="wav"))
+            response = ws.receive_json()
+
+        assert response["type"] == "ERROR"
+        assert response["message"] == "Streaming not available"
+
+    def test_chunk_without_audio_returns_error(
+        self,
+        client: TestClient,
+        streaming: StreamingTranscriptionManager,
+        mock_auth_and_session: None,
+    ) -> None:
+        """音声のない AUDIO_CHUNK はエラーを返す."""
+        with client.websocket_connect(
+            "/api/realtime?session_id=test&token=valid"
+        ) as ws:
+            ws.send_json({"type": "AUDIO_CHUNK"})
+            response = ws.receive_json()
+
+        assert response["type"] == "ERROR"
+        assert response["message"] == "Missing audio chunk"
+
+    def test_recognition_failures_are_reported_until_given_up(
+        self,
+        client: TestClient,
+        mock_auth_and_session: None,
+    ) -> None:
+        """認識の失敗は ERROR で通知され、上限回数で認識を止める."""
+        from app.api import dependencies
+
+        class _BrokenStreamingSTT:
+            async def stream(
+                self, audio_chunks: AsyncIterable[bytes], **kwargs: Any
+            ) -> AsyncIterator[StreamingTranscript]:
+                async for _ in audio_chunks:
+                    raise STTError("quota exceeded")
+                yield StreamingTranscript(text="", is_final=False)
+
+        manager = StreamingTranscriptionManager(
+            _BrokenStreamingSTT(),  # type: ignore[arg-type]
+            on_partial=dependencies._deliver_transcript_partial,
+            on_final=dependencies._analyze_final_transcript,
+            on_error=dependencies._report_transcription_error,
+            idle_seconds=5.0,
+            max_consecutive_errors=2,
+            retry_delay=0.01,
+        )
+        with patch("app.api.dependencies._streaming_transcription", manager):
+            with client.websocket_connect(
+                "/api/realtime?session_id=test&token=valid"
+            ) as ws:
+                ws.send_bytes(self._chunk(b"a"))
+                ws.send_bytes(self._chunk(b"b"))
+                retrying = ws.receive_json()
+                stopped = ws.receive_json()
+                ws.send_bytes(self._chunk(b"c"))
+                rejected = ws.receive_json()
+
+        assert retrying["type"] == "ERROR"
+        assert retrying["message"] == "Streaming recognition failed"
+        assert retrying["detail"] == {"error": "quota exceeded", "retrying": True}
+        assert stopped["message"] == "Streaming recognition stopped"
+        assert stopped["detail"]["retrying"] is False
+        assert rejected["message"] == "Streaming not available"
+
+
+class TestSessionRepositorySelection:
+    """SESSION_REPOSITORY に応じたセッション保存先の選択."""
+
+    def test_memory_is_default_even_with_redis_backplane(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """配信経路（バックプレーン）の設定では保存先は変わらない."""
+        from app.api import dependencies
+
+        monkeypatch.setattr(
+            get_settings(), "REALTIME_BACKPLANE_URL", "redis://localhost:6379"
+        )
+        with patch(
+            "app.api.dependencies.FirestoreSessionRepository"
+        ) as firestore_repository:
+            repository = dependencies._create_session_repository()
+
+        firestore_repository.assert_not_called()
+        assert isinstance(repository, dependencies.InMemorySessionRepository)
+
+    def test_firestore_repository_is_shared(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """ "firestore" を指定すると全インスタンスで共有する Firestore に保存する."""
+        from app.api import dependencies
+
+        monkeypatch.setattr(get_settings(), "SESSION_REPOSITORY", "firestore")
+        with patch(
+            "app.api.dependencies.FirestoreSessionRepository"
+        ) as firestore_repository:
+            repository = dependencies._create_session_repository()
+
+        assert repository is firestore_repository.return_value
+
+    def test_unknown_repository_is_rejected(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        from app.api import dependencies
+
+        monkeypatch.setattr(get_settings(), "SESSION_REPOSITORY", "redis")
+        with pytest.raises(ValueError, match="SESSION_REPOSITORY"):
+            dependencies._create_session_repository()
@@ -4,6 +4,7 @@ import pytest
 from fastapi.testclient import TestClient
 
 from main import app
+from tests.fakes import FakeClock
 
 
 @pytest.fixture
@@ -23,3 +24,9 @@ def mock_check_model_reachable():
         return_value=True,
     ) as mock:
         yield mock
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """テスト用の時計（now を書き換えて時刻を進める）."""
+    return FakeClock()
@@ -0,0 +1,51 @@
+"""複数のテストで共有するテスト用の代役（fixture は conftest.py で提供する）."""
+
+import asyncio
+
+from app.dto.llm import LLMResponseResult, ResponseSuggestion
+from app.services.llm_cache import SuggestionCallback
+
+
+class FakeClock:
+    """now を書き換えて時刻を進める時計."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeGenerator:
+    """LLM の応答生成の代役.
+
+    呼び出しごとに texts の応答文を順に返す（使い切ったら最後のものを繰り返す）。
+    situation_analysis は "分析{呼び出し回数}" になる。
+    gated=True の場合、1件目の応答候補を通知した後、release されるまで生成を終えない。
+    """
+
+    def __init__(self, *texts: str, gated: bool = False) -> None:
+        self.calls = 0
+        self.release = asyncio.Event()
+        if not gated:
+            self.release.set()
+        self._texts = texts or ("そうなんだ",)
+
+    async def __call__(
+        self, on_suggestion: SuggestionCallback | None
+    ) -> LLMResponseResult:
+        text = self._texts[min(self.calls, len(self._texts) - 1)]
+        self.calls += 1
+        result = LLMResponseResult(
+            situation_analysis=f"分析{self.calls}",
+            responses=[
+                ResponseSuggestion(text=text, intent="共感"),
+                ResponseSuggestion(text=f"{text}、それで？", intent="質問"),
+            ],
+        )
+        if on_suggestion is not None:
+            await on_suggestion(0, result.responses[0])
+        await self.release.wait()
+        if on_suggestion is not None:
+            await on_suggestion(1, result.responses[1])
+        return result
@@ -0,0 +1,40 @@
+"""LLMClientFactory のテスト."""
+
+from collections.abc import Iterator
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.infra.external.gemini_client import LLMClientFactory
+
+
+@pytest.fixture(autouse=True)
+def clear_clients() -> Iterator[None]:
+    LLMClientFactory.clear_clients()
+    yield
+    LLMClientFactory.clear_clients()
+
+
+def test_get_client_reuses_warm_clients() -> None:
+    """プロバイダーごとのクライアントは1度だけ生成して再利用する."""
+    with (
+        patch.object(
+            LLMClientFactory, "create_groq_client", return_value=MagicMock()
+        ) as groq,
+        patch.object(
+            LLMClientFactory, "create_ft_client", return_value=MagicMock()
+        ) as ft,
+    ):
+        first = LLMClientFactory.get_clients()
+        second = LLMClientFactory.get_clients()
+
+    assert first == second
+    assert set(first) == {"groq", "gemini"}
+    groq.assert_called_once()
+    ft.assert_called_once()
+
+
+def test_get_client_rejects_unknown_provider() -> None:
+    """未知のプロバイダーは ValueError."""
+    with pytest.raises(ValueError, match="Unknown provider"):
+        LLMClientFactory.get_client("openai")
@@ -0,0 +1,234 @@
+"""RedisBackplane のテスト（テスト内の RESP サーバーを使用）."""
+
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+
+from app.core.exceptions import BackplaneError
+from app.core.metrics import MetricsRegistry
+from app.infra.backplane import RedisBackplane, create_backplane
+from app.infra.backplane.redis_backplane import encode_command, read_reply
+
+
+class _FakeRedisServer:
+    """AUTH / SUBSCRIBE / PUBLISH だけを実装した Redis の代役."""
+
+    def __init__(self, password: str | None = None) -> None:
+        self._password = password
+        self._subscribers: dict[bytes, list[asyncio.StreamWriter]] = {}
+        self._writers: list[asyncio.StreamWriter] = []
+        self._server: asyncio.Server | None = None
+        self.port = 0
+        # SUBSCRIBE に不正な応答を返す回数
+        self.malformed_subscribes = 0
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.drop_connections()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def drop_connections(self) -> None:
+        for writer in self._writers:
+            writer.close()
+        self._writers.clear()
+        self._subscribers.clear()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._writers.append(writer)
+        authenticated = self._password is None
+        try:
+            while True:
+                reply = await read_reply(reader)
+                assert isinstance(reply, list)
+                command = [arg for arg in reply if isinstance(arg, bytes)]
+                name = command[0].upper()
+                if name == b"AUTH":
+                    authenticated = command[-1].decode() == self._password
+                    writer.write(b"+OK\r\n" if authenticated else b"-WRONGPASS\r\n")
+                elif not authenticated:
+                    writer.write(b"-NOAUTH Authentication required.\r\n")
+                elif name == b"SUBSCRIBE" and self.malformed_subscribes:
+                    self.malformed_subscribes -= 1
+                    writer.write(b"*3\r\n$9\r\nsubscribe\r\n$x\r\n")
+                elif name == b"SUBSCRIBE":
+                    channel = command[1]
+                    self._subscribers.setdefault(channel, []).append(writer)
+                    writer.write(
+                        b"*3\r\n$9\r\nsubscribe\r\n$%d\r\n%s\r\n:1\r\n"
+                        % (len(channel), channel)
+                    )
+                elif name == b"PUBLISH":
+                    channel, data = command[1], command[2]
+                    subscribers = self._subscribers.get(channel, [])
+                    for subscriber in subscribers:
+                        subscriber.write(encode_command(b"message", channel, data))
+                    writer.write(b":%d\r\n" % len(subscribers))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+@pytest.fixture
+async def redis_server() -> AsyncIterator[_FakeRedisServer]:
+    server = _FakeRedisServer()
+    await server.start()
+    yield server
+    await server.stop()
+
+
+def _backplane(port: int, metrics: MetricsRegistry | None = None) -> RedisBackplane:
+    return RedisBackplane(
+        f"redis://127.0.0.1:{port}",
+        "era:test",
+        connect_timeout=1.0,
+        reconnect_delay=0.01,
+        metrics=metrics or MetricsRegistry(),
+    )
+
+
+def test_encode_command() -> None:
+    assert encode_command(b"PUBLISH", "ch", b"hi") == (
+        b"*3\r\n$7\r\nPUBLISH\r\n$2\r\nch\r\n$2\r\nhi\r\n"
+    )
+
+
+@pytest.mark.asyncio
+async def test_publish_reaches_all_subscribers(
+    redis_server: _FakeRedisServer,
+) -> None:
+    """publish したメッセージが全インスタンス（自分を含む）に届く."""
+    received_a: list[bytes] = []
+    received_b: list[bytes] = []
+    instance_a = _backplane(redis_server.port)
+    instance_b = _backplane(redis_server.port)
+
+    async def on_a(data: bytes) -> None:
+        received_a.append(data)
+
+    async def on_b(data: bytes) -> None:
+        received_b.append(data)
+
+    await instance_a.start(on_a)
+    await instance_b.start(on_b)
+
+    await instance_a.publish("こんにちは\r\n".encode())
+    await asyncio.sleep(0.05)
+
+    assert received_a == received_b == ["こんにちは\r\n".encode()]
+    await instance_a.close()
+    await instance_b.close()
+
+
+@pytest.mark.asyncio
+async def test_password_is_sent_with_auth() -> None:
+    server = _FakeRedisServer(password="secret")
+    await server.start()
+    received: list[bytes] = []
+
+    async def on_message(data: bytes) -> None:
+        received.append(data)
+
+    backplane = RedisBackplane(
+        f"redis://:secret@127.0.0.1:{server.port}", "era:test", connect_timeout=1.0
+    )
+    await backplane.start(on_message)
+    await backplane.publish(b"hello")
+    await asyncio.sleep(0.05)
+
+    assert received == [b"hello"]
+    await backplane.close()
+    await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_reconnects_after_connection_loss(
+    redis_server: _FakeRedisServer,
+) -> None:
+    """サーバー側で切断されても、購読と publish は再接続して継続する."""
+    received: list[bytes] = []
+
+    async def on_message(data: bytes) -> None:
+        received.append(data)
+
+    metrics = MetricsRegistry()
+    backplane = _backplane(redis_server.port, metrics)
+    await backplane.start(on_message)
+    await backplane.publish(b"before")
+    await asyncio.sleep(0.05)
+
+    redis_server.drop_connections()
+    for _ in range(100):
+        await asyncio.sleep(0.01)
+        if redis_server._subscribers:
+            break
+    await backplane.publish(b"after")
+    await asyncio.sleep(0.05)
+
+    assert received == [b"before", b"after"]
+    assert metrics.get_counter("backplane.reconnects") >= 1
+    await backplane.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "data",
+    [b":abc\r\n", b"$x\r\n", b"*1.5\r\n", b"$2\r\nhello\r\n"],
+)
+async def test_malformed_reply_raises_backplane_error(data: bytes) -> None:
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+
+    with pytest.raises(BackplaneError, match="Malformed"):
+        await read_reply(reader)
+
+
+@pytest.mark.asyncio
+async def test_resubscribes_after_malformed_reply(
+    redis_server: _FakeRedisServer,
+) -> None:
+    """不正な応答を受けても購読タスクは終了せず、再接続して購読を続ける."""
+    received: list[bytes] = []
+
+    async def on_message(data: bytes) -> None:
+        received.append(data)
+
+    redis_server.malformed_subscribes = 1
+    metrics = MetricsRegistry()
+    backplane = _backplane(redis_server.port, metrics)
+    await backplane.start(on_message)
+    await backplane.publish(b"hello")
+    await asyncio.sleep(0.05)
+
+    assert received == [b"hello"]
+    assert metrics.get_counter("backplane.reconnects") == 1
+    await backplane.close()
+
+
+@pytest.mark.asyncio
+async def test_publish_raises_when_server_is_down() -> None:
+    server = _FakeRedisServer()
+    await server.start()
+    port = server.port
+    await server.stop()
+
+    backplane = _backplane(port)
+    with pytest.raises(BackplaneError):
+        await backplane.publish(b"lost")
+    await backplane.close()
+
+
+def test_create_backplane_from_url() -> None:
+    assert create_backplane("", "ch") is None
+    assert isinstance(create_backplane("redis://localhost:6379", "ch"), RedisBackplane)
+    with pytest.raises(ValueError):
+        RedisBackplane("http://localhost", "ch")
@@ -0,0 +1,293 @@
+"""セッション単位の解析キューのテスト."""
+
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.metrics import MetricsRegistry
+from app.dto.audio import AudioClip, AudioFormat, TranscriptionResult
+from app.dto.emotion import EmotionInterpretation
+from app.dto.processing import AnalysisResponse
+from app.services.analysis_queue import AnalysisQueue
+
+
+def _response() -> AnalysisResponse:
+    return AnalysisResponse(
+        timestamp=datetime.now(timezone.utc),
+        emotion=EmotionInterpretation(
+            primary_emotion="neutral", intensity="medium", description="平静"
+        ),
+        suggestions=[],
+        situation_analysis="テスト",
+        processing_time_ms=1,
+    )
+
+
+@pytest.fixture
+def gate() -> asyncio.Event:
+    """セットされるまで解析を完了させないイベント."""
+    return asyncio.Event()
+
+
+@pytest.fixture
+def generator(gate: asyncio.Event) -> MagicMock:
+    """gateで完了を制御できるResponseGeneratorServiceのモック."""
+
+    async def process(**kwargs: object) -> AnalysisResponse:
+        await gate.wait()
+        return _response()
+
+    mock = MagicMock()
+    mock.process = AsyncMock(side_effect=process)
+    return mock
+
+
+@pytest.fixture
+def delivered() -> list[tuple[str, AnalysisResponse]]:
+    return []
+
+
+@pytest.fixture
+def queue(
+    generator: MagicMock, delivered: list[tuple[str, AnalysisResponse]]
+) -> AnalysisQueue:
+    async def on_result(session_id: str, result: AnalysisResponse) -> None:
+        delivered.append((session_id, result))
+
+    return AnalysisQueue(generator, on_result=on_result, metrics=MetricsRegistry())
+
+
+def _clip(data: bytes) -> AudioClip:
+    return AudioClip(data=data, format=AudioFormat.PCM)
+
+
+def _transcript(text: str) -> TranscriptionResult:
+    return TranscriptionResult(
+        text=text, confidence=0.9, language="ja", duration_ms=500
+    )
+
+
+@pytest.mark.asyncio
+async def test_single_request_is_processed_and_delivered(
+    queue: AnalysisQueue,
+    gate: asyncio.Event,
+    delivered: list[tuple[str, AnalysisResponse]],
+) -> None:
+    """単独のリクエストはそのまま処理・配信される."""
+    gate.set()
+    result = await queue.submit("s1", {"happy": 0.9})
+
+    assert result is not None
+    assert delivered == [("s1", result)]
+    assert queue.stats.processed == 1
+
+
+@pytest.mark.asyncio
+async def test_emotion_only_requests_latest_wins(
+    queue: AnalysisQueue, generator: MagicMock, gate: asyncio.Event
+) -> None:
+    """実行中に届いた感情のみのリクエストは最新のものだけが処理される."""
+    first = queue.submit("s1", {"happy": 0.9})
+    second = queue.submit("s1", {"sad": 0.9})
+    third = queue.submit("s1", {"angry": 0.9})
+
+    assert await second is None
+    gate.set()
+    assert await first is not None
+    assert await third is not None
+
+    assert generator.process.call_count == 2
+    last_call = generator.process.call_args_list[-1].kwargs
+    assert last_call["emotion_scores"] == {"angry": 0.9}
+    assert queue.stats.dropped == 1
+    assert queue.stats.merged == 0
+
+
+@pytest.mark.asyncio
+async def test_audio_requests_are_merged(
+    queue: AnalysisQueue, generator: MagicMock, gate: asyncio.Event
+) -> None:
+    """音声ありのリクエストは破棄されずクリップが統合される."""
+    first = queue.submit("s1", {"happy": 0.9})
+    second = queue.submit("s1", {"sad": 0.9}, [_clip(b"a")])
+    third = queue.submit("s1", {"angry": 0.9})
+    fourth = queue.submit("s1", {"neutral": 0.9}, [_clip(b"b")])
+
+    gate.set()
+    results = await asyncio.gather(first, second, third, fourth)
+
+    # 実行中だった音声なしの解析は音声ありリクエストの到着で中断される
+    assert results[0] is None
+    assert results[1] is None
+    assert results[2] is None
+    assert results[3] is not None
+    last_call = generator.process.call_args_list[-1].kwargs
+    assert [c.data for c in last_call["audio_clips"]] == [b"a", b"b"]
+    assert last_call["emotion_scores"] == {"neutral": 0.9}
+    assert queue.stats.merged == 2
+    assert queue.stats.dropped == 0
+
+
+@pytest.mark.asyncio
+async def test_merged_clips_are_capped(
+    generator: MagicMock, gate: asyncio.Event
+) -> None:
+    """統合するクリップは直近 max_merged_clips 件までとし、破棄した件数を記録する."""
+    metrics = MetricsRegistry()
+    queue = AnalysisQueue(
+        generator, on_result=AsyncMock(), metrics=metrics, max_merged_clips=2
+    )
+    queue.submit("s1", {"happy": 0.9}, [_clip(b"running")])
+    futures = [queue.submit("s1", {"sad": 0.9}, [_clip(d)]) for d in (b"a", b"b", b"c")]
+
+    gate.set()
+    await asyncio.gather(*futures)
+
+    last_call = generator.process.call_args_list[-1].kwargs
+    assert [c.data for c in last_call["audio_clips"]] == [b"b", b"c"]
+    assert metrics.get_counter("analysis_queue.trimmed_clips") == 1
+
+
+@pytest.mark.asyncio
+async def test_streamed_transcripts_are_merged_not_dropped(
+    queue: AnalysisQueue, generator: MagicMock, gate: asyncio.Event
+) -> None:
+    """ストリーミング認識の発話は音声ありとして扱われ、統合されても失われない."""
+    first = queue.submit("s1", {"happy": 0.9})
+    second = queue.submit("s1", {"sad": 0.9}, transcripts=[_transcript("おはよう")])
+    third = queue.submit("s1", {"angry": 0.9}, transcripts=[_transcript("元気？")])
+
+    gate.set()
+    results = await asyncio.gather(first, second, third)
+
+    assert results[0] is None
+    assert results[1] is None
+    assert results[2] is not None
+    last_call = generator.process.call_args_list[-1].kwargs
+    assert [t.text for t in last_call["transcripts"]] == ["おはよう", "元気？"]
+    assert queue.stats.merged == 1
+    assert queue.stats.dropped == 0
+
+
+@pytest.mark.asyncio
+async def test_sessions_are_independent(
+    queue: AnalysisQueue, generator: MagicMock, gate: asyncio.Event
+) -> None:
+    """異なるセッションのリクエストは統合されない."""
+    a = queue.submit("s1", {"happy": 0.9})
+    b = queue.submit("s2", {"happy": 0.9})
+    gate.set()
+
+    assert await a is not None
+    assert await b is not None
+    assert generator.process.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_failure_propagates_and_next_job_runs(
+    delivered: list[tuple[str, AnalysisResponse]],
+) -> None:
+    """解析失敗は投入者に伝播し、待機中のジョブは続けて実行される."""
+    generator = MagicMock()
+    generator.process = AsyncMock(side_effect=[RuntimeError("LLM down"), _response()])
+
+    async def on_result(session_id: str, result: AnalysisResponse) -> None:
+        delivered.append((session_id, result))
+
+    queue = AnalysisQueue(generator, on_result=on_result, metrics=MetricsRegistry())
+    first = queue.submit("s1", {"happy": 0.9})
+    second = queue.submit("s1", {"sad": 0.9})
+
+    with pytest.raises(RuntimeError, match="LLM down"):
+        await first
+    assert await second is not None
+    assert len(delivered) == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_are_reported(generator: MagicMock, gate: asyncio.Event) -> None:
+    """統合・破棄件数がメトリクスに記録される."""
+    metrics = MetricsRegistry()
+
+    async def on_result(session_id: str, result: AnalysisResponse) -> None:
+        return None
+
+    queue = AnalysisQueue(generator, on_result=on_result, metrics=metrics)
+    futures = [
+        queue.submit("s1", {"happy": 0.9}),
+        queue.submit("s1", {"happy": 0.8}),
+        queue.submit("s1", {"happy": 0.7}),
+        queue.submit("s1", {"happy": 0.6}, [_clip(b"a")]),
+    ]
+    gate.set()
+    await asyncio.gather(*futures)
+
+    assert metrics.get_counter("analysis_queue.submitted") == 4
+    assert metrics.get_counter("analysis_queue.dropped") == 1
+    assert metrics.get_counter("analysis_queue.merged") == 1
+    assert metrics.get_counter("analysis_queue.cancelled.superseded") == 1
+    assert metrics.get_counter("analysis_queue.processed") == 1
+
+
+@pytest.mark.asyncio
+async def test_cancel_session_cancels_running_and_pending(
+    queue: AnalysisQueue,
+    generator: MagicMock,
+    delivered: list[tuple[str, AnalysisResponse]],
+) -> None:
+    """cancel_session で実行中・待機中の解析がキャンセルされ、配信されない."""
+    running = queue.submit("s1", {"happy": 0.9}, [_clip(b"a")])
+    pending = queue.submit("s1", {"sad": 0.9}, [_clip(b"b")])
+    await asyncio.sleep(0)
+
+    assert await queue.cancel_session("s1", reason="reset") is True
+
+    assert await running is None
+    assert await pending is None
+    assert delivered == []
+    assert generator.process.call_count == 1
+    assert queue.stats.cancelled == 2
+    assert await queue.cancel_session("s1", reason="reset") is False
+
+
+@pytest.mark.asyncio
+async def test_cancel_session_before_start(queue: AnalysisQueue) -> None:
+    """開始前にキャンセルされても Future は完了する."""
+    future = queue.submit("s1", {"happy": 0.9})
+
+    assert await queue.cancel_session("s1", reason="disconnect") is True
+    assert await future is None
+
+
+@pytest.mark.asyncio
+async def test_audio_request_supersedes_running_emotion_only(
+    queue: AnalysisQueue, generator: MagicMock, gate: asyncio.Event
+) -> None:
+    """音声なしの解析の実行中に音声ありのリクエストが届くと、古い解析は中断される."""
+    metrics = MetricsRegistry()
+    queue._metrics = metrics
+    emotion_only = queue.submit("s1", {"happy": 0.9})
+    await asyncio.sleep(0)
+    with_audio = queue.submit("s1", {"sad": 0.9}, [_clip(b"a")])
+
+    assert await emotion_only is None
+    gate.set()
+    assert await with_audio is not None
+    assert metrics.get_counter("analysis_queue.cancelled.superseded") == 1
+
+
+@pytest.mark.asyncio
+async def test_running_audio_analysis_is_not_superseded(
+    queue: AnalysisQueue, gate: asyncio.Event
+) -> None:
+    """音声ありの解析は後続リクエストで中断されない（発話を失わない）."""
+    first = queue.submit("s1", {"happy": 0.9}, [_clip(b"a")])
+    await asyncio.sleep(0)
+    second = queue.submit("s1", {"sad": 0.9}, [_clip(b"b")])
+    gate.set()
+
+    assert await first is not None
+    assert await second is not None
+    assert queue.stats.cancelled == 0
@@ -0,0 +1,245 @@
+"""音声ヘッダー解析と LINEAR16 への正規化のテスト."""
+
+import io
+import struct
+import wave
+
+import numpy as np
+import pytest
+
+from app.dto.audio import AudioFormat
+from app.services.audio_probe import probe_audio, to_linear16
+
+
+def _wav(
+    samples: np.ndarray, rate: int = 16000, channels: int = 1, width: int = 2
+) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(width)
+        wav_file.setframerate(rate)
+        wav_file.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def _float_wav(samples: np.ndarray, rate: int) -> bytes:
+    """IEEE float（フォーマットタグ3）の WAV を作る（wave モジュールは非対応）."""
+    data = samples.astype("<f4").tobytes()
+    fmt = struct.pack("<HHIIHH", 3, 1, rate, rate * 4, 4, 32)
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+    body += b"data" + struct.pack("<I", len(data)) + data
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def _ogg_page(payload: bytes, granule: int, header_type: int = 0) -> bytes:
+    segments = [255] * (len(payload) // 255) + [len(payload) % 255]
+    header = struct.pack(
+        "<4sBBqIIIB", b"OggS", 0, header_type, granule, 1, 0, 0, len(segments)
+    )
+    return header + bytes(segments) + payload
+
+
+def _ogg_opus(channels: int, input_rate: int, pre_skip: int, granule: int) -> bytes:
+    head = b"OpusHead" + struct.pack("<BBHIhB", 1, channels, pre_skip, input_rate, 0, 0)
+    return (
+        _ogg_page(head, 0, header_type=2)
+        + _ogg_page(b"OpusTags" + b"\x00" * 8, 0)
+        + _ogg_page(b"\x00" * 300, granule // 2)
+        + _ogg_page(b"\x00" * 40, granule, header_type=4)
+    )
+
+
+class TestProbeAudio:
+    """probe_audio のテスト."""
+
+    def test_wav_header(self) -> None:
+        """WAV のサンプリングレート・チャンネル数・長さを読む."""
+        wav = _wav(np.zeros(16000 * 2, dtype="<i2"))
+
+        info = probe_audio(wav, AudioFormat.WAV)
+
+        assert info.sample_rate == 16000
+        assert info.channels == 1
+        assert info.sample_width == 2
+        assert info.duration_ms == 2000
+        assert info.pcm is not None and len(info.pcm) == 16000 * 2 * 2
+        assert info.is_linear16_mono
+
+    def test_wav_stereo_48khz(self) -> None:
+        """ステレオ・48kHz の長さはフレーム数から求める."""
+        wav = _wav(np.zeros(48000 * 2, dtype="<i2"), rate=48000, channels=2)
+
+        info = probe_audio(wav, AudioFormat.WAV)
+
+        assert (info.sample_rate, info.channels, info.duration_ms) == (48000, 2, 1000)
+        assert not info.is_linear16_mono
+
+    def test_wav_pcm_is_a_view(self) -> None:
+        """サンプル部分は元のバッファへのビューで、コピーしない."""
+        wav = bytearray(_wav(np.arange(100, dtype="<i2")))
+
+        info = probe_audio(memoryview(wav), AudioFormat.WAV)
+        wav[-2:] = b"\x00\x00"
+
+        assert info.pcm is not None
+        assert bytes(info.pcm[-2:]) == b"\x00\x00"
+
+    def test_wav_with_truncated_data_size(self) -> None:
+        """data チャンクのサイズが実データより大きい WAV は実データで切る."""
+        wav = bytearray(_wav(np.zeros(1600, dtype="<i2")))
+        data_at = wav.index(b"data")
+        wav[data_at + 4 : data_at + 8] = struct.pack("<I", 0xFFFFFFFF)
+
+        info = probe_audio(bytes(wav), AudioFormat.WAV)
+
+        assert info.duration_ms == 100
+
+    def test_pcm_uses_given_parameters(self) -> None:
+        """PCM は指定されたサンプリングレートとチャンネル数で長さを求める."""
+        pcm = b"\x00\x00" * 16000
+
+        assert probe_audio(pcm, AudioFormat.PCM).duration_ms == 1000
+        assert probe_audio(pcm, AudioFormat.PCM, sample_rate=8000).duration_ms == 2000
+        assert probe_audio(pcm, AudioFormat.PCM, channels=2).duration_ms == 500
+
+    def test_ogg_opus_header_and_duration(self) -> None:
+        """OpusHead からチャンネル数と入力レート、グラニュール位置から長さを読む."""
+        opus = _ogg_opus(channels=2, input_rate=16000, pre_skip=312, granule=96312)
+
+        info = probe_audio(opus, AudioFormat.OPUS)
+
+        assert info.channels == 2
+        assert info.sample_rate == 16000
+        assert info.duration_ms == 2000
+        assert info.pcm is None
+
+    def test_ogg_opus_unsupported_input_rate_falls_back(self) -> None:
+        """Speech-to-Text が受け付けない入力レートは指定値を使う."""
+        opus = _ogg_opus(channels=1, input_rate=44100, pre_skip=0, granule=48000)
+
+        info = probe_audio(opus, AudioFormat.OPUS, sample_rate=48000)
+
+        assert info.sample_rate == 48000
+        assert info.duration_ms == 1000
+
+    @pytest.mark.parametrize(
+        ("data", "format"),
+        [
+            (b"fake-opus-data", AudioFormat.OPUS),
+            (b"OggS\x00", AudioFormat.OPUS),
+            (b"not a wav", AudioFormat.WAV),
+            (b"RIFF\x00\x00\x00\x00WAVEfmt \x10\x00\x00\x00\x01", AudioFormat.WAV),
+        ],
+    )
+    def test_unparsable_audio_falls_back(
+        self, data: bytes, format: AudioFormat
+    ) -> None:
+        """解析できない音声は例外にせず、長さ0・サンプルなしとして返す."""
+        info = probe_audio(data, format, sample_rate=16000)
+
+        assert info.format == format
+        assert info.sample_rate == 16000
+        assert info.duration_ms == 0
+        assert info.pcm is None
+
+
+class TestToLinear16:
+    """to_linear16 のテスト."""
+
+    def test_linear16_mono_is_unchanged(self) -> None:
+        """16kHz 以下の 16bit mono は変換しない."""
+        info = probe_audio(_wav(np.zeros(800, dtype="<i2"), rate=8000), AudioFormat.WAV)
+
+        assert to_linear16(info) is info
+
+    def test_opus_is_unchanged(self) -> None:
+        """サンプルを持たない音声は変換しない."""
+        info = probe_audio(_ogg_opus(1, 48000, 0, 48000), AudioFormat.OPUS)
+
+        assert to_linear16(info) is info
+
+    def test_stereo_is_downmixed(self) -> None:
+        """ステレオはチャンネルの平均で mono にする."""
+        frames = np.array([[1000, 3000], [-2000, 0]] * 800, dtype="<i2")
+        info = probe_audio(_wav(frames, channels=2), AudioFormat.WAV)
+
+        converted = to_linear16(info)
+
+        assert converted.channels == 1
+        assert converted.sample_rate == 16000
+        assert converted.format == AudioFormat.PCM
+        assert converted.pcm is not None
+        mono = np.frombuffer(converted.pcm, dtype="<i2")
+        assert mono[:2].tolist() == [2000, -1000]
+        assert converted.duration_ms == info.duration_ms
+
+    def test_48khz_is_decimated(self) -> None:
+        """48kHz は 16kHz に間引き、8kHz を超える成分は落とす."""
+        samples = np.tile(np.array([300, 600, 900], dtype="<i2"), 4800)
+        info = probe_audio(_wav(samples, rate=48000), AudioFormat.WAV)
+
+        converted = to_linear16(info)
+
+        assert converted.sample_rate == 16000
+        assert converted.pcm is not None
+        mono = np.frombuffer(converted.pcm, dtype="<i2")
+        assert len(mono) == 4800
+        # 16kHz の成分が消えて直流だけが残る（両端はローパスの長さ分だけ乱れる）
+        assert set(mono[60:-60].tolist()) == {600}
+
+    @pytest.mark.parametrize("rate", [48000, 44100, 22050])
+    def test_tone_above_8khz_is_not_aliased(self, rate: int) -> None:
+        """8kHz を超える音は折り返さずに減衰する（10kHz が 6kHz などに化けない）."""
+        t = np.arange(rate) / rate
+        samples = (0.5 * np.sin(2 * np.pi * 10000 * t) * 32767).astype("<i2")
+        info = probe_audio(_wav(samples, rate=rate), AudioFormat.WAV)
+
+        converted = to_linear16(info)
+
+        assert converted.sample_rate == 16000
+        assert converted.pcm is not None
+        mono = np.frombuffer(converted.pcm, dtype="<i2").astype(np.float64)
+        # 入力の振幅（約16000）に対して -60dB 未満
+        assert np.max(np.abs(mono[100:-100])) < 16
+
+    def test_44khz_is_interpolated(self) -> None:
+        """整数比でないサンプリングレートは補間して 16kHz にする."""
+        t = np.arange(44100) / 44100
+        samples = (0.5 * np.sin(2 * np.pi * 100 * t) * 32767).astype("<i2")
+        info = probe_audio(_wav(samples, rate=44100), AudioFormat.WAV)
+
+        converted = to_linear16(info)
+
+        assert converted.pcm is not None
+        mono = np.frombuffer(converted.pcm, dtype="<i2")
+        assert len(mono) == 16000
+        expected = 0.5 * np.sin(2 * np.pi * 100 * np.arange(16000) / 16000) * 32767
+        assert np.max(np.abs(mono - expected)) < 50
+
+    def test_8bit_and_24bit_are_widened(self) -> None:
+        """8bit（符号なし）と 24bit は 16bit に変換する."""
+        eight = probe_audio(
+            _wav(np.array([0, 128, 255], dtype=np.uint8), width=1), AudioFormat.WAV
+        )
+        raw24 = b"".join(v.to_bytes(3, "little", signed=True) for v in (-(1 << 23), 0))
+        twenty_four = probe_audio(
+            _wav(np.frombuffer(raw24, dtype=np.uint8), width=3), AudioFormat.WAV
+        )
+
+        for info, expected in ((eight, [-32768, 0, 32512]), (twenty_four, [-32768, 0])):
+            converted = to_linear16(info)
+            assert converted.pcm is not None
+            assert np.frombuffer(converted.pcm, dtype="<i2").tolist() == expected
+
+    def test_float_wav_is_converted(self) -> None:
+        """IEEE float の WAV は 16bit 整数に変換する."""
+        info = probe_audio(
+            _float_wav(np.array([-1.0, 0.0, 0.5]), rate=16000), AudioFormat.WAV
+        )
+
+        converted = to_linear16(info)
+
+        assert info.is_float
+        assert converted.pcm is not None
+        assert np.frombuffer(converted.pcm, dtype="<i2").tolist() == [-32768, 0, 16384]
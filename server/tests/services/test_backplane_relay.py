@@ -0,0 +1,160 @@
+"""BackplaneRelay（インスタンス間の中継）のテスト."""
+
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.metrics import MetricsRegistry
+from app.dto.processing import ResponseMode
+from app.infra.backplane import InMemoryBackplane, InMemoryBroker
+from app.services.backplane_relay import BackplaneRelay
+from app.services.connection_manager import ConnectionManager
+
+
+def _websocket() -> MagicMock:
+    websocket = MagicMock()
+    websocket.send_text = AsyncMock()
+    return websocket
+
+
+class _RecordingBackplane(InMemoryBackplane):
+    """publish された封筒を記録するバックプレーン."""
+
+    def __init__(self, broker: InMemoryBroker) -> None:
+        super().__init__(broker)
+        self.published: list[bytes] = []
+
+    async def publish(self, data: bytes) -> None:
+        self.published.append(data)
+        await super().publish(data)
+
+
+async def _instance(
+    broker: InMemoryBroker, metrics: MetricsRegistry, batch_window: float = 0.005
+) -> tuple[ConnectionManager, _RecordingBackplane]:
+    backplane = _RecordingBackplane(broker)
+    relay = BackplaneRelay(backplane, batch_window=batch_window, metrics=metrics)
+    manager = ConnectionManager(metrics=metrics, backplane_relay=relay)
+    await manager.start()
+    return manager, backplane
+
+
+@pytest.mark.asyncio
+async def test_send_reaches_session_connections_on_other_instances() -> None:
+    """別インスタンスに接続した同じセッションの接続にも1度だけ届く."""
+    broker, metrics = InMemoryBroker(), MetricsRegistry()
+    instance_a, _ = await _instance(broker, metrics)
+    instance_b, _ = await _instance(broker, metrics)
+    android, unity, other = _websocket(), _websocket(), _websocket()
+    await instance_a.register(android, "s1")
+    await instance_b.register(unity, "s1")
+    await instance_b.register(other, "s2")
+
+    await instance_a.send_to_session("s1", {"type": "TEST"})
+    await instance_a.drain()
+    await instance_b.drain()
+
+    android.send_text.assert_awaited_once_with('{"type":"TEST"}')
+    unity.send_text.assert_awaited_once_with('{"type":"TEST"}')
+    other.send_text.assert_not_awaited()
+    await instance_a.aclose()
+    await instance_b.aclose()
+
+
+@pytest.mark.asyncio
+async def test_relayed_message_keeps_response_mode_filter() -> None:
+    """中継先でも配信方式で絞り込む."""
+    broker, metrics = InMemoryBroker(), MetricsRegistry()
+    instance_a, _ = await _instance(broker, metrics)
+    instance_b, _ = await _instance(broker, metrics)
+    single, progressive = _websocket(), _websocket()
+    await instance_b.register(single, "s1", ResponseMode.SINGLE)
+    await instance_b.register(progressive, "s1", ResponseMode.PROGRESSIVE)
+
+    await instance_a.send_to_session(
+        "s1", {"type": "ANALYSIS_EMOTION"}, response_mode=ResponseMode.PROGRESSIVE
+    )
+    await instance_a.broadcast({"type": "ALL"})
+    await instance_a.drain()
+    await instance_b.drain()
+
+    assert [c.args[0] for c in progressive.send_text.await_args_list] == [
+        '{"type":"ANALYSIS_EMOTION"}',
+        '{"type":"ALL"}',
+    ]
+    single.send_text.assert_awaited_once_with('{"type":"ALL"}')
+    await instance_a.aclose()
+    await instance_b.aclose()
+
+
+@pytest.mark.asyncio
+async def test_messages_are_published_once_per_instance_in_batches() -> None:
+    """接続数によらず1メッセージ1件で中継し、まとめて publish する."""
+    broker, metrics = InMemoryBroker(), MetricsRegistry()
+    instance_a, backplane = await _instance(broker, metrics, batch_window=60)
+    for _ in range(5):
+        await instance_a.register(_websocket(), "s1")
+
+    for n in range(10):
+        await instance_a.send_to_session("s1", {"type": "TEST", "n": n})
+    await instance_a.drain()
+
+    assert len(backplane.published) == 1
+    envelope = json.loads(backplane.published[0])
+    assert [json.loads(m[3])["n"] for m in envelope["messages"]] == list(range(10))
+    assert metrics.get_counter("backplane.published_batches") == 1
+    await instance_a.aclose()
+
+
+@pytest.mark.asyncio
+async def test_batches_are_split_at_max_batch() -> None:
+    broker, metrics = InMemoryBroker(), MetricsRegistry()
+    backplane = _RecordingBackplane(broker)
+    relay = BackplaneRelay(backplane, batch_window=60, max_batch=4, metrics=metrics)
+    manager = ConnectionManager(metrics=metrics, backplane_relay=relay)
+    await manager.start()
+
+    for n in range(10):
+        await manager.send_to_session("s1", {"type": "TEST", "n": n})
+    await manager.drain()
+
+    assert [len(json.loads(b)["messages"]) for b in backplane.published] == [4, 4, 2]
+    await manager.aclose()
+
+
+@pytest.mark.asyncio
+async def test_malformed_envelope_is_ignored() -> None:
+    broker, metrics = InMemoryBroker(), MetricsRegistry()
+    instance_a, _ = await _instance(broker, metrics)
+    websocket = _websocket()
+    await instance_a.register(websocket, "s1")
+
+    await broker.publish(b"not json")
+    await broker.publish(b'{"origin":"x","messages":[["s1"]]}')
+    await instance_a.drain()
+
+    websocket.send_text.assert_not_awaited()
+    assert metrics.get_counter("backplane.malformed_envelopes") == 2
+    await instance_a.aclose()
+
+
+@pytest.mark.asyncio
+async def test_publish_failure_does_not_break_local_delivery() -> None:
+    """バックプレーンの障害時もローカルの接続には配信する."""
+    metrics = MetricsRegistry()
+    backplane = InMemoryBackplane()
+    backplane.publish = AsyncMock(side_effect=ConnectionError("down"))  # type: ignore[method-assign]
+    manager = ConnectionManager(
+        metrics=metrics, backplane_relay=BackplaneRelay(backplane, metrics=metrics)
+    )
+    await manager.start()
+    websocket = _websocket()
+    await manager.register(websocket, "s1")
+
+    await manager.send_to_session("s1", {"type": "TEST"})
+    await manager.drain()
+
+    websocket.send_text.assert_awaited_once_with('{"type":"TEST"}')
+    assert metrics.get_counter("backplane.publish_errors") == 1
+    await manager.aclose()
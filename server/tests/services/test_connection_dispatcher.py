@@ -0,0 +1,70 @@
+"""接続ごとのタスクディスパッチャのテスト."""
+
+import asyncio
+
+import pytest
+
+from app.services.connection_dispatcher import ConnectionDispatcher
+
+
+@pytest.mark.asyncio
+async def test_submit_runs_task() -> None:
+    """投入したタスクが実行される."""
+    dispatcher = ConnectionDispatcher(max_concurrent=2)
+    done = asyncio.Event()
+
+    async def work() -> None:
+        done.set()
+
+    assert dispatcher.try_submit(work()) is True
+    await asyncio.wait_for(done.wait(), timeout=1.0)
+    await asyncio.sleep(0)
+    assert dispatcher.active_count == 0
+
+
+@pytest.mark.asyncio
+async def test_submit_rejects_over_limit() -> None:
+    """上限を超えた投入は拒否される."""
+    dispatcher = ConnectionDispatcher(max_concurrent=1)
+    release = asyncio.Event()
+
+    async def work() -> None:
+        await release.wait()
+
+    assert dispatcher.try_submit(work()) is True
+    assert dispatcher.try_submit(work()) is False
+    assert dispatcher.active_count == 1
+
+    release.set()
+    await asyncio.sleep(0.01)
+    assert dispatcher.active_count == 0
+    assert dispatcher.try_submit(work()) is True
+    await dispatcher.aclose()
+
+
+@pytest.mark.asyncio
+async def test_aclose_cancels_running_tasks() -> None:
+    """aclose()で実行中のタスクがキャンセルされる."""
+    dispatcher = ConnectionDispatcher(max_concurrent=2)
+    cancelled = asyncio.Event()
+
+    async def work() -> None:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    dispatcher.try_submit(work())
+    await asyncio.sleep(0)
+    await dispatcher.aclose()
+
+    assert cancelled.is_set()
+    assert dispatcher.active_count == 0
+    assert dispatcher.try_submit(work()) is False
+
+
+def test_invalid_limit_raises() -> None:
+    """同時実行数は1以上."""
+    with pytest.raises(ValueError):
+        ConnectionDispatcher(max_concurrent=0)
@@ -0,0 +1,341 @@
+"""ConnectionManagerのテスト."""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.metrics import MetricsRegistry
+from app.dto.llm import ResponseSuggestion
+from app.dto.processing import ResponseMode
+from app.services.connection_manager import ConnectionManager, encode_json_message
+from app.services.outbound_queue import SLOW_CONSUMER_CLOSE_CODE
+
+
+def _websocket() -> MagicMock:
+    websocket = MagicMock()
+    websocket.send_text = AsyncMock()
+    return websocket
+
+
+@pytest.mark.asyncio
+async def test_send_to_session_reaches_only_session_connections() -> None:
+    """send_to_session は同じセッションの接続にだけ送信する."""
+    manager = ConnectionManager()
+    android, unity, other = _websocket(), _websocket(), _websocket()
+    await manager.register(android, "s1")
+    await manager.register(unity, "s1")
+    await manager.register(other, "s2")
+
+    await manager.send_to_session("s1", {"type": "TEST"})
+    await manager.drain()
+
+    android.send_text.assert_awaited_once_with('{"type":"TEST"}')
+    unity.send_text.assert_awaited_once_with('{"type":"TEST"}')
+    other.send_text.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_session_closed_listener_called_when_last_connection_leaves() -> None:
+    """セッションの最後の接続が切断されたときだけリスナーが呼ばれる."""
+    manager = ConnectionManager()
+    listener = AsyncMock()
+    manager.add_session_closed_listener(listener)
+    android, unity = _websocket(), _websocket()
+    await manager.register(android, "s1")
+    await manager.register(unity, "s1")
+
+    await manager.disconnect(android)
+    listener.assert_not_awaited()
+
+    await manager.disconnect(unity)
+    listener.assert_awaited_once_with("s1")
+
+
+@pytest.mark.asyncio
+async def test_failing_listener_does_not_break_disconnect() -> None:
+    """リスナーの例外は切断処理に影響しない."""
+    manager = ConnectionManager()
+    manager.add_session_closed_listener(AsyncMock(side_effect=RuntimeError("boom")))
+    websocket = _websocket()
+    await manager.register(websocket, "s1")
+
+    await manager.disconnect(websocket)
+    await manager.send_to_session("s1", {"type": "TEST"})
+
+    websocket.send_text.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_send_to_session_filters_by_response_mode() -> None:
+    """response_mode 指定時はその配信方式を選択した接続にだけ送信する."""
+    manager = ConnectionManager()
+    single, progressive = _websocket(), _websocket()
+    await manager.register(single, "s1")
+    await manager.register(progressive, "s1", ResponseMode.PROGRESSIVE)
+
+    await manager.send_to_session(
+        "s1", {"type": "ANALYSIS_EMOTION"}, response_mode=ResponseMode.PROGRESSIVE
+    )
+    await manager.send_to_session(
+        "s1", {"type": "ANALYSIS_RESPONSE"}, response_mode=ResponseMode.SINGLE
+    )
+    await manager.drain()
+
+    single.send_text.assert_awaited_once_with('{"type":"ANALYSIS_RESPONSE"}')
+    progressive.send_text.assert_awaited_once_with('{"type":"ANALYSIS_EMOTION"}')
+
+
+@pytest.mark.asyncio
+async def test_payload_is_encoded_once_per_fan_out() -> None:
+    """セッション内・全体送信ともにエンコードは1回で、同じテキストを使い回す."""
+    encoder = MagicMock(side_effect=encode_json_message)
+    manager = ConnectionManager(encoder=encoder)
+    android, unity, other = _websocket(), _websocket(), _websocket()
+    await manager.register(android, "s1")
+    await manager.register(unity, "s1")
+    await manager.register(other, "s2")
+    message = ResponseSuggestion(text="こんにちは", intent="挨拶")
+
+    await manager.send_to_session("s1", message)
+    await manager.drain()
+    assert encoder.call_count == 1
+    expected = message.model_dump_json()
+    android.send_text.assert_awaited_once_with(expected)
+    unity.send_text.assert_awaited_once_with(expected)
+
+    await manager.broadcast({"type": "NOTICE"})
+    await manager.drain()
+    assert encoder.call_count == 2
+    other.send_text.assert_awaited_with('{"type":"NOTICE"}')
+
+    await manager.send_to_session("no-such-session", message)
+    assert encoder.call_count == 2
+
+
+def _stalled_websocket() -> MagicMock:
+    """send_text が完了しない（低速クライアント）接続."""
+
+    async def stall(text: str) -> None:
+        await asyncio.sleep(10)
+
+    websocket = MagicMock()
+    websocket.send_text = AsyncMock(side_effect=stall)
+    websocket.close = AsyncMock()
+    return websocket
+
+
+@pytest.mark.asyncio
+async def test_stalled_socket_does_not_delay_others_and_is_evicted() -> None:
+    """低速な接続は送信側も他の接続も待たせず、連続で期限切れになると切断される."""
+    metrics = MetricsRegistry()
+    manager = ConnectionManager(send_timeout=0.05, max_missed_sends=2, metrics=metrics)
+    fast, stalled = _websocket(), _stalled_websocket()
+    await manager.register(fast, "s1")
+    await manager.register(stalled, "s1")
+
+    start = time.perf_counter()
+    await manager.send_to_session("s1", {"type": "TEST"})
+    # 送信側はネットワークI/Oを待たない
+    assert time.perf_counter() - start < 0.05
+    await asyncio.sleep(0.01)
+    fast.send_text.assert_awaited_once()
+    await manager.drain()
+    stalled.close.assert_not_awaited()
+
+    await manager.send_to_session("s1", {"type": "TEST"})
+    await manager.drain()
+    stalled.close.assert_awaited_once_with(code=SLOW_CONSUMER_CLOSE_CODE)
+    assert metrics.get_counter("ws.send_timeouts") == 2
+    assert metrics.get_counter("ws.evictions") == 1
+    histogram = metrics.get_histogram("ws.send_latency_ms")
+    assert histogram is not None and histogram["count"] == 2
+
+    await manager.send_to_session("s1", {"type": "TEST"})
+    await manager.drain()
+    assert stalled.send_text.await_count == 2
+    assert fast.send_text.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_successful_send_resets_missed_count() -> None:
+    """期限切れは連続した場合だけ数え、送信に成功したらリセットされる."""
+    manager = ConnectionManager(
+        send_timeout=0.05, max_missed_sends=2, metrics=MetricsRegistry()
+    )
+    flaky = _websocket()
+    flaky.close = AsyncMock()
+    outcomes = iter([True, False, True])
+
+    async def send_text(text: str) -> None:
+        if next(outcomes):
+            await asyncio.sleep(10)
+
+    flaky.send_text = AsyncMock(side_effect=send_text)
+    await manager.register(flaky, "s1")
+
+    for _ in range(3):
+        await manager.send_to_session("s1", {"type": "TEST"})
+    await manager.drain()
+
+    assert flaky.send_text.await_count == 3
+    flaky.close.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_send_error_evicts_immediately() -> None:
+    """送信エラーの接続は即座に切断される."""
+    metrics = MetricsRegistry()
+    manager = ConnectionManager(metrics=metrics)
+    listener = AsyncMock()
+    manager.add_session_closed_listener(listener)
+    broken = _websocket()
+    broken.send_text = AsyncMock(side_effect=RuntimeError("closed"))
+    broken.close = AsyncMock()
+    await manager.register(broken, "s1")
+
+    await manager.broadcast({"type": "NOTICE"})
+    await manager.drain()
+
+    listener.assert_awaited_once_with("s1")
+    assert metrics.get_counter("ws.send_errors") == 1
+    assert metrics.get_counter("ws.evictions") == 1
+
+
+def _gated_websocket() -> tuple[MagicMock, asyncio.Event, list[str]]:
+    """gate が開くまで送信が完了しない接続（送信内容を記録する）."""
+    gate = asyncio.Event()
+    sent: list[str] = []
+
+    async def send_text(text: str) -> None:
+        await gate.wait()
+        sent.append(text)
+
+    websocket = MagicMock()
+    websocket.send_text = AsyncMock(side_effect=send_text)
+    websocket.close = AsyncMock()
+    return websocket, gate, sent
+
+
+@pytest.mark.asyncio
+async def test_conflating_connection_keeps_only_latest_state() -> None:
+    """conflate 有効な接続では未送信の同タイプ状態メッセージが最新で上書きされる."""
+    metrics = MetricsRegistry()
+    manager = ConnectionManager(send_timeout=5, metrics=metrics)
+    hud, gate, sent = _gated_websocket()
+    phone = _websocket()
+    await manager.register(hud, "s1", conflate=True)
+    await manager.register(phone, "s1")
+
+    # 1通目は送信中、以降はキューで待機する
+    for n in range(4):
+        await manager.send_to_session("s1", {"type": "ANALYSIS_RESPONSE", "n": n})
+        await asyncio.sleep(0)
+    await manager.send_to_session("s1", {"type": "PONG"})
+    gate.set()
+    await manager.drain()
+
+    assert sent == [
+        '{"type":"ANALYSIS_RESPONSE","n":0}',
+        '{"type":"ANALYSIS_RESPONSE","n":3}',
+        '{"type":"PONG"}',
+    ]
+    assert phone.send_text.await_count == 5
+    assert metrics.get_counter("ws.outbound.conflated") == 2
+
+
+@pytest.mark.asyncio
+async def test_full_outbound_queue_evicts_connection() -> None:
+    """送信キューが上限に達した接続は切断され、メモリは増え続けない."""
+    metrics = MetricsRegistry()
+    manager = ConnectionManager(send_timeout=5, outbound_queue_size=2, metrics=metrics)
+    listener = AsyncMock()
+    manager.add_session_closed_listener(listener)
+    slow, gate, sent = _gated_websocket()
+    await manager.register(slow, "s1")
+
+    for n in range(4):
+        await manager.send_to_session("s1", {"type": "TEST", "n": n})
+        await asyncio.sleep(0)
+    gate.set()
+    await manager.drain()
+    await asyncio.sleep(0.01)
+
+    assert metrics.get_counter("ws.outbound.overflows") == 1
+    assert metrics.get_counter("ws.evictions") == 1
+    listener.assert_awaited_once_with("s1")
+    slow.close.assert_awaited_once_with(code=SLOW_CONSUMER_CLOSE_CODE)
+    depth = metrics.get_histogram("ws.outbound.queue_depth")
+    assert depth is not None and depth["max"] == 2
+
+
+@pytest.mark.asyncio
+async def test_send_to_session_reaches_only_that_session() -> None:
+    """各セッションの接続にだけ配信され、broadcast は全接続に届く."""
+    manager = ConnectionManager()
+    sockets = {f"s{n}": [_websocket(), _websocket()] for n in range(8)}
+    for session_id, pair in sockets.items():
+        for websocket in pair:
+            await manager.register(websocket, session_id)
+    assert manager.connection_count == 16
+
+    await manager.send_to_session("s3", {"type": "TEST"})
+    await manager.broadcast({"type": "ALL"})
+    await manager.drain()
+
+    for session_id, pair in sockets.items():
+        expected = 2 if session_id == "s3" else 1
+        for websocket in pair:
+            assert websocket.send_text.await_count == expected
+
+
+@pytest.mark.asyncio
+async def test_reregistering_moves_connection_to_new_session() -> None:
+    """登録し直すと元のセッションから外れる（切断ではないためリスナーは呼ばない）."""
+    manager = ConnectionManager()
+    listener = AsyncMock()
+    manager.add_session_closed_listener(listener)
+    websocket = _websocket()
+    await manager.register(websocket, "s1")
+
+    await manager.register(websocket, "s2")
+    listener.assert_not_awaited()
+    assert manager.connection_count == 1
+
+    await manager.send_to_session("s1", {"type": "OLD"})
+    await manager.send_to_session("s2", {"type": "NEW"})
+    await manager.drain()
+    websocket.send_text.assert_awaited_once_with('{"type":"NEW"}')
+
+    await manager.disconnect(websocket)
+    listener.assert_awaited_once_with("s2")
+
+
+@pytest.mark.asyncio
+async def test_send_to_connection_shares_the_outbound_queue() -> None:
+    """send_to_connection はその接続のキューに積み、送信を待たず配信順も保つ."""
+    manager = ConnectionManager()
+    websocket, gate, sent = _gated_websocket()
+    other = _websocket()
+    await manager.register(websocket, "s1")
+    await manager.register(other, "s1")
+
+    await manager.send_to_session("s1", {"type": "ANALYSIS_RESPONSE"})
+    await asyncio.wait_for(manager.send_to_connection(websocket, {"type": "PONG"}), 0.1)
+    gate.set()
+    await manager.drain()
+
+    assert sent == ['{"type":"ANALYSIS_RESPONSE"}', '{"type":"PONG"}']
+    other.send_text.assert_awaited_once_with('{"type":"ANALYSIS_RESPONSE"}')
+
+
+@pytest.mark.asyncio
+async def test_send_to_unregistered_connection_is_ignored() -> None:
+    """切断済みの接続への send_to_connection は何もしない."""
+    manager = ConnectionManager()
+    websocket = _websocket()
+
+    await manager.send_to_connection(websocket, {"type": "PONG"})
+
+    websocket.send_text.assert_not_awaited()
@@ -285,3 +285,32 @@ class TestUnknownEmotion:
 
         assert result.primary_emotion == "unknown_emotion"
         assert "unknown_emotion" in result.description
+
+
+class TestFallbackResponses:
+    """fallback_responses メソッドのテスト."""
+
+    def test_fallback_uses_description_and_suggestion(self) -> None:
+        """状況分析は感情の説明と行動提案、応答候補は感情ごとの定型文."""
+        service = EmotionInterpreterService()
+        interpretation = service.interpret({"sad": 0.8, "neutral": 0.2})
+
+        result = service.fallback_responses(interpretation)
+
+        assert interpretation.description in result.situation_analysis
+        assert interpretation.suggestion is not None
+        assert interpretation.suggestion in result.situation_analysis
+        assert [r.text for r in result.responses] == [
+            "そうだったんだね",
+            "話を聞かせてくれる？",
+        ]
+
+    def test_fallback_for_unknown_emotion(self) -> None:
+        """未知の感情には neutral の定型文を使う."""
+        service = EmotionInterpreterService()
+        interpretation = service.interpret({"unknown_emotion": 0.9})
+
+        result = service.fallback_responses(interpretation)
+
+        assert result.situation_analysis == interpretation.description
+        assert len(result.responses) == 2
@@ -0,0 +1,44 @@
+"""PublicKeyRefresherのテスト."""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.core.metrics import MetricsRegistry
+from app.services.public_key_refresher import PublicKeyRefresher
+
+
+@pytest.mark.asyncio
+async def test_keys_are_fetched_at_start_and_refreshed_before_expiry() -> None:
+    """起動時に取得し、有効期限の refresh_margin 前に取得し直す."""
+    metrics = MetricsRegistry()
+    fetch = MagicMock(return_value=0.35)
+    refresher = PublicKeyRefresher(
+        fetch, refresh_margin=0.3, retry_interval=0.01, metrics=metrics
+    )
+
+    await refresher.start()
+    fetch.assert_called_once_with(False)
+
+    await asyncio.sleep(0.12)
+    await refresher.aclose()
+
+    assert fetch.call_count >= 3
+    assert all(call.args == (True,) for call in fetch.call_args_list[1:])
+    assert metrics.get_counter("auth.public_key_refreshes") == fetch.call_count
+
+
+@pytest.mark.asyncio
+async def test_fetch_failure_does_not_block_start_and_is_retried() -> None:
+    metrics = MetricsRegistry()
+    fetch = MagicMock(side_effect=[RuntimeError("HTTP 503"), 3600.0])
+    refresher = PublicKeyRefresher(fetch, retry_interval=0.01, metrics=metrics)
+
+    await refresher.start()
+    await asyncio.sleep(0.05)
+    await refresher.aclose()
+
+    assert fetch.call_count == 2
+    assert metrics.get_counter("auth.public_key_refresh_errors") == 1
+    assert metrics.get_counter("auth.public_key_refreshes") == 1
@@ -1,14 +1,18 @@
 """応答生成サービス（統合）のテスト."""
 
+import asyncio
 from datetime import datetime, timezone
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
-from app.dto.audio import AudioFormat, TranscriptionResult
+from app.core.config import get_settings
+from app.core.exceptions import LLMUnavailableError
+from app.dto.audio import AudioClip, AudioFormat, TranscriptionResult
 from app.dto.conversation import Speaker, Utterance
 from app.dto.emotion import EmotionInterpretation
 from app.dto.llm import LLMResponseResult, ResponseSuggestion
+from app.services.emotion_interpreter import EmotionInterpreterService
 from app.services.response_generator import ResponseGeneratorService
 
 
@@ -185,3 +189,291 @@ async def test_process_llm_failure(
             session_id="test-session",
             emotion_scores={"neutral": 0.8},
         )
+
+
+@pytest.mark.asyncio
+async def test_process_returns_fallback_when_llm_unavailable(
+    mock_services: tuple[MagicMock, MagicMock, MagicMock, MagicMock],
+) -> None:
+    """LLMが障害中の場合は感情解釈から作った応答候補を is_fallback で返す."""
+    stt, conversation, _, llm = mock_services
+    llm.generate_responses = AsyncMock(side_effect=LLMUnavailableError("open"))
+    on_stage = AsyncMock()
+    service = ResponseGeneratorService(
+        stt, conversation, EmotionInterpreterService(), llm
+    )
+
+    result = await service.process(
+        session_id="test-session",
+        emotion_scores={"happy": 0.9, "neutral": 0.1},
+        request_id="req-1",
+        on_stage=on_stage,
+    )
+
+    assert result.is_fallback
+    assert result.situation_analysis.startswith("相手はとても喜んでいます")
+    assert [s.text for s in result.suggestions] == ["それはいいね！", "もっと聞かせて"]
+    final = on_stage.await_args_list[-1].args[0]
+    assert final.type == "ANALYSIS_SUGGESTIONS"
+    assert final.is_fallback
+
+
+@pytest.mark.asyncio
+async def test_process_passes_remaining_latency_budget(
+    mock_services: tuple[MagicMock, MagicMock, MagicMock, MagicMock],
+) -> None:
+    """LLMには待ち時間の目安からSTTにかかった時間を引いた残りを渡す."""
+    stt, conversation, emotion, llm = mock_services
+    transcription = stt.transcribe.return_value
+
+    async def slow_transcribe(**kwargs: object) -> TranscriptionResult:
+        await asyncio.sleep(0.05)
+        return transcription
+
+    stt.transcribe = AsyncMock(side_effect=slow_transcribe)
+    service = ResponseGeneratorService(stt, conversation, emotion, llm)
+    budget_ms = get_settings().LLM_ROUTER_LATENCY_BUDGET_MS
+
+    await service.process(session_id="test-session", emotion_scores={"happy": 0.6})
+    emotion_only = llm.generate_responses.call_args.kwargs["latency_budget_ms"]
+    await service.process(
+        session_id="test-session",
+        emotion_scores={"happy": 0.6},
+        audio_data=b"fake-audio",
+        audio_format=AudioFormat.WAV,
+    )
+    with_speech = llm.generate_responses.call_args.kwargs["latency_budget_ms"]
+
+    assert budget_ms - 50 < emotion_only <= budget_ms
+    assert 0 <= with_speech <= budget_ms - 50
+
+
+@pytest.mark.asyncio
+async def test_process_merged_audio_clips(
+    mock_services: tuple[MagicMock, MagicMock, MagicMock, MagicMock],
+) -> None:
+    """統合された複数クリップは発話順に連結され、信頼度は音声長で重み付けされる."""
+    stt, conversation, emotion, llm = mock_services
+    stt.transcribe = AsyncMock(
+        side_effect=[
+            TranscriptionResult(
+                text="おはよう", confidence=1.0, language="ja", duration_ms=3000
+            ),
+            TranscriptionResult(
+                text="元気？", confidence=0.5, language="ja", duration_ms=1000
+            ),
+        ]
+    )
+
+    service = ResponseGeneratorService(stt, conversation, emotion, llm)
+
+    result = await service.process(
+        session_id="test-session",
+        emotion_scores={"happy": 0.8},
+        audio_clips=[
+            AudioClip(data=b"first", format=AudioFormat.PCM),
+            AudioClip(data=b"second", format=AudioFormat.PCM),
+        ],
+    )
+
+    assert result.transcription is not None
+    assert result.transcription.text == "おはよう元気？"
+    assert result.transcription.duration_ms == 4000
+    assert result.transcription.confidence == pytest.approx(0.875)
+    assert conversation.add_utterance.call_count == 2
+    assert (
+        llm.generate_responses.call_args.kwargs["partner_last_utterance"]
+        == "おはよう元気？"
+    )
+
+
+@pytest.mark.asyncio
+async def test_clip_sample_rate_is_passed_to_stt(
+    mock_services: tuple[MagicMock, MagicMock, MagicMock, MagicMock],
+) -> None:
+    """音声クリップと audio_data のサンプリングレートが STT に渡される."""
+    stt, conversation, emotion, llm = mock_services
+    service = ResponseGeneratorService(stt, conversation, emotion, llm)
+
+    await service.process(
+        session_id="test-session",
+        emotion_scores={"happy": 0.8},
+        audio_clips=[
+            AudioClip(data=b"first", format=AudioFormat.PCM, sample_rate=8000)
+        ],
+        audio_data=b"second",
+        audio_format=AudioFormat.PCM,
+        sample_rate=48000,
+    )
+
+    rates = [c.kwargs["sample_rate"] for c in stt.transcribe.await_args_list]
+    assert rates == [8000, 48000]
+
+
+@pytest.mark.asyncio
+async def test_process_with_streamed_transcripts(
+    mock_services: tuple[MagicMock, MagicMock, MagicMock, MagicMock],
+) -> None:
+    """ストリーミング認識で確定済みの発話はSTTを行わずに会話履歴とLLMに渡される."""
+    stt, conversation, emotion, llm = mock_services
+    service = ResponseGeneratorService(stt, conversation, emotion, llm)
+
+    result = await service.process(
+        session_id="test-session",
+        emotion_scores={"happy": 0.8},
+        audio_clips=[AudioClip(data=b"audio", format=AudioFormat.PCM)],
+        transcripts=[
+            TranscriptionResult(
+                text="おはよう", confidence=0.9, language="ja", duration_ms=1000
+            )
+        ],
+    )
+
+    assert stt.transcribe.await_count == 1
+    assert result.transcription is not None
+    assert result.transcription.text == "おはようこんにちは"
+    texts = [c.kwargs["text"] for c in conversation.add_utterance.call_args_list]
+    assert texts == ["おはよう", "こんにちは"]
+    assert (
+        llm.generate_responses.call_args.kwargs["partner_last_utterance"]
+        == "おはようこんにちは"
+    )
+
+
+@pytest.mark.asyncio
+async def test_process_cancel_during_stt(
+    mock_services: tuple[MagicMock, MagicMock, MagicMock, MagicMock],
+) -> None:
+    """STT中にキャンセルされるとSTTも止まり、会話履歴・LLMは更新されない."""
+    stt, conversation, emotion, llm = mock_services
+    stt_cancelled = asyncio.Event()
+
+    async def slow_transcribe(**kwargs: object) -> TranscriptionResult:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            stt_cancelled.set()
+            raise
+        raise AssertionError("unreachable")
+
+    stt.transcribe = AsyncMock(side_effect=slow_transcribe)
+    service = ResponseGeneratorService(stt, conversation, emotion, llm)
+
+    task = asyncio.create_task(
+        service.process(
+            session_id="test-session",
+            emotion_scores={"neutral": 0.8},
+            audio_data=b"fake-audio",
+            audio_format=AudioFormat.WAV,
+        )
+    )
+    await asyncio.sleep(0.01)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert stt_cancelled.is_set()
+    conversation.add_utterance.assert_not_called()
+    llm.generate_responses.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_process_emits_stages_in_order(
+    mock_services: tuple[MagicMock, MagicMock, MagicMock, MagicMock],
+) -> None:
+    """段階配信: 感情解釈はSTT完了前に、応答候補は最後に通知される."""
+    stt, conversation, emotion, llm = mock_services
+    stt_release = asyncio.Event()
+    stages: list[str] = []
+
+    async def slow_transcribe(**kwargs: object) -> TranscriptionResult:
+        await stt_release.wait()
+        return TranscriptionResult(
+            text="こんにちは", confidence=0.9, language="ja", duration_ms=1000
+        )
+
+    stt.transcribe = AsyncMock(side_effect=slow_transcribe)
+
+    async def on_stage(message: object) -> None:
+        stages.append(message.type)  # type: ignore[attr-defined]
+        assert message.request_id == "req-1"  # type: ignore[attr-defined]
+        if message.type == "ANALYSIS_EMOTION":  # type: ignore[attr-defined]
+            # STTを待たずに届いていること
+            assert not stt_release.is_set()
+            stt_release.set()
+
+    service = ResponseGeneratorService(stt, conversation, emotion, llm)
+    result = await service.process(
+        session_id="test-session",
+        emotion_scores={"neutral": 0.8},
+        audio_data=b"fake-audio",
+        audio_format=AudioFormat.WAV,
+        request_id="req-1",
+        on_stage=on_stage,
+    )
+
+    assert stages == [
+        "ANALYSIS_EMOTION",
+        "ANALYSIS_TRANSCRIPT",
+        "ANALYSIS_SUGGESTIONS",
+    ]
+    assert result.request_id == "req-1"
+
+
+@pytest.mark.asyncio
+async def test_process_stage_without_audio_skips_transcript(
+    mock_services: tuple[MagicMock, MagicMock, MagicMock, MagicMock],
+) -> None:
+    """音声なしの場合は ANALYSIS_TRANSCRIPT を送らず、通知失敗も処理を止めない."""
+    stt, conversation, emotion, llm = mock_services
+    on_stage = AsyncMock(side_effect=RuntimeError("send failed"))
+
+    service = ResponseGeneratorService(stt, conversation, emotion, llm)
+    result = await service.process(
+        session_id="test-session",
+        emotion_scores={"neutral": 0.8},
+        request_id="req-2",
+        on_stage=on_stage,
+    )
+
+    assert [c.args[0].type for c in on_stage.await_args_list] == [
+        "ANALYSIS_EMOTION",
+        "ANALYSIS_SUGGESTIONS",
+    ]
+    assert len(result.suggestions) == 2
+
+
+@pytest.mark.asyncio
+async def test_process_emits_streamed_suggestions(
+    mock_services: tuple[MagicMock, MagicMock, MagicMock, MagicMock],
+) -> None:
+    """LLMが逐次通知した応答候補は ANALYSIS_SUGGESTION として段階配信される."""
+    stt, conversation, emotion, llm = mock_services
+    final = llm.generate_responses.return_value
+
+    async def generate(**kwargs: object) -> LLMResponseResult:
+        on_suggestion = kwargs["on_suggestion"]
+        for index, suggestion in enumerate(final.responses):
+            await on_suggestion(index, suggestion)  # type: ignore[operator]
+        return final
+
+    llm.generate_responses = AsyncMock(side_effect=generate)
+    on_stage = AsyncMock()
+
+    service = ResponseGeneratorService(stt, conversation, emotion, llm)
+    await service.process(
+        session_id="test-session",
+        emotion_scores={"neutral": 0.8},
+        request_id="req-3",
+        on_stage=on_stage,
+    )
+
+    messages = [c.args[0] for c in on_stage.await_args_list]
+    assert [m.type for m in messages] == [
+        "ANALYSIS_EMOTION",
+        "ANALYSIS_SUGGESTION",
+        "ANALYSIS_SUGGESTION",
+        "ANALYSIS_SUGGESTIONS",
+    ]
+    assert [m.index for m in messages[1:3]] == [0, 1]
+    assert messages[1].suggestion.text == "応答1"
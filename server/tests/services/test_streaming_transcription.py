@@ -0,0 +1,375 @@
+"""ストリーミング音声認識のテスト."""
+
+import asyncio
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import Any
+
+import pytest
+
+from app.core.exceptions import STTError
+from app.core.metrics import MetricsRegistry
+from app.dto.audio import AudioFormat, StreamingTranscript, TranscriptionResult
+from app.services.streaming_transcription import StreamingTranscriptionManager
+
+
+class FakeStreamingSTT:
+    """チャンクごとに途中結果を返し、ストリームの終わりで確定結果を返すSTT.
+
+    チャンク b"." は発話の区切りとして、それまでの音声の確定結果を返す。
+    """
+
+    def __init__(self, fail_first: bool = False) -> None:
+        self.streams: list[list[bytes]] = []
+        self._fail_first = fail_first
+
+    async def stream(
+        self,
+        audio_chunks: AsyncIterable[bytes],
+        format: AudioFormat,
+        sample_rate: int = 16000,
+        language: str = "ja",
+    ) -> AsyncIterator[StreamingTranscript]:
+        received: list[bytes] = []
+        self.streams.append(received)
+        utterance = ""
+        async for chunk in audio_chunks:
+            received.append(chunk)
+            if self._fail_first:
+                self._fail_first = False
+                raise STTError("stream broken")
+            if chunk == b".":
+                yield _final(utterance, len(received) * 100)
+                utterance = ""
+                continue
+            utterance += chunk.decode()
+            yield StreamingTranscript(text=utterance, is_final=False, stability=0.5)
+        if utterance:
+            yield _final(utterance, len(received) * 100)
+
+
+def _final(text: str, end_time_ms: int) -> StreamingTranscript:
+    return StreamingTranscript(
+        text=text, is_final=True, confidence=0.9, end_time_ms=end_time_ms
+    )
+
+
+class Recorder:
+    """途中結果と確定結果の通知を記録する."""
+
+    def __init__(self) -> None:
+        self.partials: list[str] = []
+        self.finals: list[tuple[TranscriptionResult, dict[str, float]]] = []
+        self.final_received = asyncio.Event()
+
+    async def on_partial(
+        self, session_id: str, transcript: StreamingTranscript
+    ) -> None:
+        self.partials.append(transcript.text)
+
+    async def on_final(
+        self,
+        session_id: str,
+        transcription: TranscriptionResult,
+        emotion_scores: dict[str, float],
+    ) -> None:
+        self.finals.append((transcription, emotion_scores))
+        self.final_received.set()
+
+
+def _manager(
+    stt: Any, recorder: Recorder, **kwargs: Any
+) -> StreamingTranscriptionManager:
+    kwargs.setdefault("idle_seconds", 5.0)
+    kwargs.setdefault("max_stream_seconds", 60.0)
+    kwargs.setdefault("max_buffered_chunks", 16)
+    return StreamingTranscriptionManager(
+        stt,
+        on_partial=recorder.on_partial,
+        on_final=recorder.on_final,
+        metrics=MetricsRegistry(),
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_partials_and_final_are_notified() -> None:
+    """途中結果が順に通知され、発話の終わりで確定結果が通知される."""
+    stt = FakeStreamingSTT()
+    recorder = Recorder()
+    manager = _manager(stt, recorder)
+
+    for chunk in (b"a", b"b", b"c"):
+        assert manager.feed("s1", chunk, emotion_scores={"happy": 0.9})
+    assert manager.feed("s1", b".")
+    await asyncio.wait_for(recorder.final_received.wait(), 1.0)
+
+    assert recorder.partials == ["a", "ab", "abc"]
+    [(transcription, emotion_scores)] = recorder.finals
+    assert transcription.text == "abc"
+    assert transcription.confidence == 0.9
+    assert transcription.duration_ms == 400
+    assert emotion_scores == {"happy": 0.9}
+    await manager.aclose()
+
+
+@pytest.mark.asyncio
+async def test_utterances_share_one_stream() -> None:
+    """同じストリームの発話ごとに確定結果が通知され、音声長は発話ごとに計算される."""
+    stt = FakeStreamingSTT()
+    recorder = Recorder()
+    manager = _manager(stt, recorder)
+
+    for chunk in (b"a", b".", b"bc", b"."):
+        manager.feed("s1", chunk)
+    await manager.finish("s1")
+    for _ in range(100):
+        if len(recorder.finals) == 2:
+            break
+        await asyncio.sleep(0.01)
+
+    assert [t.text for t, _ in recorder.finals] == ["a", "bc"]
+    assert [t.duration_ms for t, _ in recorder.finals] == [200, 200]
+    assert len(stt.streams) == 1
+
+
+@pytest.mark.asyncio
+async def test_finish_flushes_last_utterance() -> None:
+    """finish で音声の終わりを伝えると、未確定の発話が確定される."""
+    stt = FakeStreamingSTT()
+    recorder = Recorder()
+    manager = _manager(stt, recorder)
+
+    manager.feed("s1", b"hello")
+    assert await manager.finish("s1")
+    await asyncio.wait_for(recorder.final_received.wait(), 1.0)
+
+    assert recorder.finals[0][0].text == "hello"
+    assert "s1" not in manager
+    assert not await manager.finish("s1")
+
+
+class StalledStreamingSTT(FakeStreamingSTT):
+    """release されるまで音声を読み始めないSTT."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.release = asyncio.Event()
+
+    async def stream(
+        self,
+        audio_chunks: AsyncIterable[bytes],
+        format: AudioFormat,
+        sample_rate: int = 16000,
+        language: str = "ja",
+    ) -> AsyncIterator[StreamingTranscript]:
+        await self.release.wait()
+        async for transcript in super().stream(
+            audio_chunks, format, sample_rate, language
+        ):
+            yield transcript
+
+
+@pytest.mark.asyncio
+async def test_finish_does_not_block_when_buffer_is_full() -> None:
+    """認識待ちが上限でも finish は待たず、残りのチャンクを認識してから終える."""
+    stt = StalledStreamingSTT()
+    recorder = Recorder()
+    manager = _manager(stt, recorder, max_buffered_chunks=2)
+
+    manager.feed("s1", b"a")
+    await asyncio.sleep(0)
+    assert manager.feed("s1", b"b")
+    assert manager.feed("s1", b"c")
+    assert await asyncio.wait_for(manager.finish("s1"), 0.1)
+
+    stt.release.set()
+    await asyncio.wait_for(recorder.final_received.wait(), 1.0)
+
+    assert recorder.finals[0][0].text == "abc"
+    assert stt.streams == [[b"a", b"b", b"c"]]
+
+
+@pytest.mark.asyncio
+async def test_idle_audio_closes_stream_and_reopens() -> None:
+    """音声が途切れるとストリームを閉じ、次の音声で新しいストリームを開く."""
+    stt = FakeStreamingSTT()
+    recorder = Recorder()
+    manager = _manager(stt, recorder, idle_seconds=0.05)
+
+    manager.feed("s1", b"first")
+    await asyncio.wait_for(recorder.final_received.wait(), 1.0)
+    recorder.final_received.clear()
+
+    manager.feed("s1", b"second")
+    await asyncio.wait_for(recorder.final_received.wait(), 1.0)
+
+    assert [t.text for t, _ in recorder.finals] == ["first", "second"]
+    assert stt.streams == [[b"first"], [b"second"]]
+    await manager.aclose()
+
+
+@pytest.mark.asyncio
+async def test_stream_error_recovers_with_next_stream() -> None:
+    """認識ストリームが失敗しても、次の音声で認識を再開する."""
+    stt = FakeStreamingSTT(fail_first=True)
+    recorder = Recorder()
+    metrics = MetricsRegistry()
+    manager = StreamingTranscriptionManager(
+        stt,  # type: ignore[arg-type]
+        on_partial=recorder.on_partial,
+        on_final=recorder.on_final,
+        idle_seconds=5.0,
+        metrics=metrics,
+        retry_delay=0.01,
+    )
+
+    manager.feed("s1", b"lost")
+    for _ in range(100):
+        if metrics.get_counter("stt.stream.errors"):
+            break
+        await asyncio.sleep(0.01)
+    manager.feed("s1", b"ok")
+    manager.feed("s1", b".")
+    await asyncio.wait_for(recorder.final_received.wait(), 1.0)
+
+    assert metrics.get_counter("stt.stream.errors") == 1
+    assert recorder.finals[0][0].text == "ok"
+    await manager.aclose()
+
+
+class BrokenStreamingSTT:
+    """ストリームを開くたびに最初のチャンクで失敗するSTT."""
+
+    def __init__(self) -> None:
+        self.opened_at: list[float] = []
+
+    async def stream(
+        self,
+        audio_chunks: AsyncIterable[bytes],
+        format: AudioFormat,
+        sample_rate: int = 16000,
+        language: str = "ja",
+    ) -> AsyncIterator[StreamingTranscript]:
+        self.opened_at.append(asyncio.get_running_loop().time())
+        async for _ in audio_chunks:
+            raise STTError("quota exceeded")
+        yield StreamingTranscript(text="", is_final=False)
+
+
+@pytest.mark.asyncio
+async def test_repeated_stream_errors_back_off_and_give_up() -> None:
+    """連続失敗では待機を延ばしながら再試行し、上限回数で認識を諦めて通知する."""
+    stt = BrokenStreamingSTT()
+    recorder = Recorder()
+    errors: list[tuple[str, str, bool]] = []
+    gave_up = asyncio.Event()
+
+    async def on_error(session_id: str, error: STTError, stopped: bool) -> None:
+        errors.append((session_id, str(error), stopped))
+        if stopped:
+            gave_up.set()
+
+    metrics = MetricsRegistry()
+    manager = StreamingTranscriptionManager(
+        stt,  # type: ignore[arg-type]
+        on_partial=recorder.on_partial,
+        on_final=recorder.on_final,
+        idle_seconds=5.0,
+        metrics=metrics,
+        on_error=on_error,
+        max_consecutive_errors=3,
+        retry_delay=0.05,
+    )
+
+    for i in range(10):
+        manager.feed("s1", f"{i}".encode())
+    await asyncio.wait_for(gave_up.wait(), 1.0)
+
+    # 失敗ごとに通知され、最後の通知だけが「諦めた」になる
+    assert errors == [
+        ("s1", "quota exceeded", False),
+        ("s1", "quota exceeded", False),
+        ("s1", "quota exceeded", True),
+    ]
+    # 認識待ちのチャンクが残っていても、上限回数を超えてストリームを開かない
+    assert len(stt.opened_at) == 3
+    assert metrics.get_counter("stt.stream.gave_up") == 1
+    # 2回目の待機は1回目の倍になる
+    first_wait = stt.opened_at[1] - stt.opened_at[0]
+    second_wait = stt.opened_at[2] - stt.opened_at[1]
+    assert first_wait >= 0.05
+    assert second_wait >= 0.1
+
+    # 諦めたセッションは close されるまで新しい音声を受け付けない
+    with pytest.raises(STTError):
+        manager.feed("s1", b"more")
+    assert len(stt.opened_at) == 3
+
+    await manager.close("s1")
+    assert manager.feed("s1", b"again")
+    await manager.aclose()
+
+
+@pytest.mark.asyncio
+async def test_close_discards_pending_results() -> None:
+    """close で認識を中断すると、以降の結果は通知されない."""
+    stt = FakeStreamingSTT()
+    recorder = Recorder()
+    manager = _manager(stt, recorder)
+
+    manager.feed("s1", b"abc")
+    assert await manager.close("s1")
+    await asyncio.sleep(0.01)
+
+    assert recorder.finals == []
+    assert "s1" not in manager
+    assert not await manager.close("s1")
+
+
+@pytest.mark.asyncio
+async def test_buffer_overflow_drops_chunks() -> None:
+    """認識待ちが上限に達したチャンクは破棄される."""
+    stt = FakeStreamingSTT()
+    recorder = Recorder()
+    metrics = MetricsRegistry()
+    manager = StreamingTranscriptionManager(
+        stt,  # type: ignore[arg-type]
+        on_partial=recorder.on_partial,
+        on_final=recorder.on_final,
+        max_buffered_chunks=2,
+        metrics=metrics,
+    )
+
+    # 認識タスクが動く前に積むため、上限を超えた分は破棄される
+    results = [manager.feed("s1", b"x") for _ in range(3)]
+
+    assert results == [True, True, False]
+    assert metrics.get_counter("stt.stream.dropped_chunks") == 1
+    await manager.aclose()
+
+
+@pytest.mark.asyncio
+async def test_wav_is_rejected() -> None:
+    """wav はストリーミング認識できない."""
+    manager = _manager(FakeStreamingSTT(), Recorder())
+
+    with pytest.raises(STTError, match="does not support wav"):
+        manager.feed("s1", b"RIFF", audio_format=AudioFormat.WAV)
+    assert "s1" not in manager
+
+
+@pytest.mark.asyncio
+async def test_sessions_are_independent() -> None:
+    """セッションごとに別の認識を持つ."""
+    stt = FakeStreamingSTT()
+    recorder = Recorder()
+    manager = _manager(stt, recorder)
+
+    manager.feed("s1", b"a", audio_format=AudioFormat.OPUS)
+    manager.feed("s2", b"b")
+    await manager.close("s1")
+
+    assert "s1" not in manager
+    assert "s2" in manager
+    await manager.aclose()
+    assert "s2" not in manager
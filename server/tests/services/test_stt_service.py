@@ -1,13 +1,23 @@
 """STTサービスのテスト."""
 
+import asyncio
 import io
+import threading
+import time
 import wave
-from unittest.mock import MagicMock, patch
+from collections.abc import AsyncIterator
+from datetime import timedelta
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import numpy as np
 import pytest
+from google.cloud import speech
 
 from app.core.exceptions import STTError
+from app.core.metrics import MetricsRegistry
 from app.dto.audio import AudioFormat
+from app.services.stt_service import join_transcripts
 
 
 def create_test_wav(duration_sec: float = 1.0, sample_rate: int = 16000) -> bytes:
@@ -158,6 +168,32 @@ class TestSTTService:
 
                 assert result.text == "オーパス"
 
+    @pytest.mark.asyncio
+    async def test_transcribe_accepts_memoryview(self) -> None:
+        """バイナリフレーム由来のmemoryviewをそのまま受け付ける."""
+        with patch("app.services.stt_service.speech.SpeechClient") as mock_client_cls:
+            mock_client = MagicMock()
+            mock_client_cls.return_value = mock_client
+
+            mock_response = MagicMock()
+            mock_response.results = []
+            mock_client.recognize.return_value = mock_response
+
+            from app.services.stt_service import STTService
+
+            service = STTService()
+            wav_data = create_test_wav(duration_sec=1.0)
+
+            result = await service.transcribe(
+                audio_data=memoryview(wav_data),
+                format=AudioFormat.WAV,
+                language="ja",
+            )
+
+            assert result.duration_ms == 1000
+            audio = mock_client.recognize.call_args.kwargs["audio"]
+            assert audio.content == wav_data
+
     @pytest.mark.asyncio
     async def test_transcribe_empty_result(self) -> None:
         """空の認識結果テスト."""
@@ -216,32 +252,592 @@ class TestSTTService:
             assert service._to_language_code("ko") == "ko-KR"
             assert service._to_language_code("xx") == "xx-XX"
 
-    def test_get_audio_duration_wav(self) -> None:
-        """WAV音声長取得テスト."""
+
+class TestSTTServiceAudioNormalization:
+    """認識前の音声の正規化のテスト."""
+
+    @pytest.mark.asyncio
+    async def test_stereo_48khz_wav_is_sent_as_16khz_mono(self) -> None:
+        """ステレオ・48kHz の WAV は 16kHz mono の PCM に変換して送る."""
+        rate = 48000
+        samples = np.zeros(rate * 2, dtype="<i2")  # 1秒・2チャンネル
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            wav_file.setnchannels(2)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(rate)
+            wav_file.writeframes(samples.tobytes())
+
+        metrics = MetricsRegistry()
+        with patch("app.services.stt_service.speech.SpeechClient") as mock_client_cls:
+            mock_client = mock_client_cls.return_value
+            mock_client.recognize.return_value = MagicMock(results=[])
+            from app.services.stt_service import STTService
+
+            service = STTService(metrics=metrics)
+            result = await service.transcribe(buffer.getvalue(), AudioFormat.WAV)
+
+        call_kwargs = mock_client.recognize.call_args.kwargs
+        assert len(call_kwargs["audio"].content) == 16000 * 2
+        assert call_kwargs["config"].sample_rate_hertz == 16000
+        assert result.duration_ms == 1000
+        assert metrics.get_counter("stt.audio.converted") == 1
+
+    @pytest.mark.asyncio
+    async def test_16khz_mono_wav_is_sent_unchanged(self) -> None:
+        """変換不要な WAV はそのまま送る."""
+        wav_data = create_test_wav(duration_sec=1.0)
+        metrics = MetricsRegistry()
+        with patch("app.services.stt_service.speech.SpeechClient") as mock_client_cls:
+            mock_client = mock_client_cls.return_value
+            mock_client.recognize.return_value = MagicMock(results=[])
+            from app.services.stt_service import STTService
+
+            service = STTService(metrics=metrics)
+            await service.transcribe(wav_data, AudioFormat.WAV)
+
+        assert mock_client.recognize.call_args.kwargs["audio"].content == wav_data
+        assert metrics.get_counter("stt.audio.converted") == 0
+
+
+class TestSTTServiceConcurrency:
+    """STTServiceの実行方式（ワーカースレッド・同時実行数・期限）のテスト."""
+
+    @staticmethod
+    def _slow_recognize(delay: float, state: dict[str, int]) -> MagicMock:
+        lock = threading.Lock()
+
+        def recognize(**kwargs: object) -> MagicMock:
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(delay)
+            with lock:
+                state["running"] -= 1
+            response = MagicMock()
+            response.results = []
+            return response
+
+        return MagicMock(side_effect=recognize)
+
+    @pytest.mark.asyncio
+    async def test_recognize_does_not_block_event_loop(self) -> None:
+        """認識中もイベントループは他のセッションの処理を進められる."""
+        state = {"running": 0, "peak": 0}
+        with patch("app.services.stt_service.speech.SpeechClient") as mock_client_cls:
+            mock_client_cls.return_value.recognize = self._slow_recognize(0.1, state)
+            from app.services.stt_service import STTService
+
+            service = STTService(max_concurrency=2, metrics=MetricsRegistry())
+            ticks = 0
+
+            async def ticker() -> None:
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            await service.transcribe(create_test_wav(), AudioFormat.WAV)
+            task.cancel()
+
+            assert ticks >= 5
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_limited(self) -> None:
+        """同時実行数は max_concurrency までで、超過分は待ち時間として記録される."""
+        state = {"running": 0, "peak": 0}
+        metrics = MetricsRegistry()
+        with patch("app.services.stt_service.speech.SpeechClient") as mock_client_cls:
+            mock_client_cls.return_value.recognize = self._slow_recognize(0.03, state)
+            from app.services.stt_service import STTService
+
+            service = STTService(max_concurrency=2, metrics=metrics)
+            # 同じ音声はキャッシュでまとめられるため、長さの違う音声を使う
+            await asyncio.gather(
+                *(
+                    service.transcribe(
+                        create_test_wav(duration_sec=1.0 + i / 10), AudioFormat.WAV
+                    )
+                    for i in range(6)
+                )
+            )
+
+        assert state["peak"] == 2
+        wait = metrics.get_histogram("stt.queue_wait_ms")
+        assert wait is not None and wait["count"] == 6 and wait["max"] >= 20
+
+    @pytest.mark.asyncio
+    async def test_deadline_raises_stt_error(self) -> None:
+        """期限を過ぎた認識は STTError になり、API呼び出しにも期限が渡される."""
+        state = {"running": 0, "peak": 0}
+        metrics = MetricsRegistry()
+        with patch("app.services.stt_service.speech.SpeechClient") as mock_client_cls:
+            recognize = self._slow_recognize(0.2, state)
+            mock_client_cls.return_value.recognize = recognize
+            from app.services.stt_service import STTService
+
+            service = STTService(timeout=0.05, metrics=metrics)
+            with pytest.raises(STTError, match="timed out"):
+                await service.transcribe(create_test_wav(), AudioFormat.WAV)
+
+        assert recognize.call_args.kwargs["timeout"] == 0.05
+        assert metrics.get_counter("stt.timeouts") == 1
+
+
+class TestSTTServiceStreaming:
+    """STTService.stream（ストリーミング認識）のテスト."""
+
+    @staticmethod
+    def _result(
+        text: str,
+        is_final: bool,
+        stability: float = 0.0,
+        confidence: float = 0.0,
+        end_seconds: float = 0.0,
+    ) -> MagicMock:
+        alternative = MagicMock()
+        alternative.transcript = text
+        alternative.confidence = confidence
+        result = MagicMock()
+        result.alternatives = [alternative]
+        result.is_final = is_final
+        result.stability = stability
+        result.result_end_time = timedelta(seconds=end_seconds)
+        return result
+
+    @staticmethod
+    async def _chunks(*chunks: bytes) -> AsyncIterator[bytes]:
+        for chunk in chunks:
+            yield chunk
+
+    @pytest.mark.asyncio
+    async def test_stream_sends_config_then_audio(self) -> None:
+        """最初に設定を送り、以降は音声チャンクを送る。結果は順に返される."""
+        sent: list[Any] = []
+        results = [
+            self._result("こん", is_final=False, stability=0.4),
+            self._result("こんにちは", is_final=True, confidence=0.9, end_seconds=1.5),
+        ]
+
+        async def streaming_recognize(requests: Any) -> AsyncIterator[Any]:
+            async for request in requests:
+                sent.append(request)
+
+            async def responses() -> AsyncIterator[Any]:
+                for result in results:
+                    response = MagicMock()
+                    response.results = [result]
+                    yield response
+
+            return responses()
+
+        with (
+            patch("app.services.stt_service.speech.SpeechClient"),
+            patch(
+                "app.services.stt_service.speech.SpeechAsyncClient"
+            ) as mock_async_cls,
+        ):
+            mock_async_cls.return_value.streaming_recognize = streaming_recognize
+            from app.services.stt_service import STTService
+
+            service = STTService()
+            transcripts = [
+                t
+                async for t in service.stream(
+                    self._chunks(b"one", b"two"), AudioFormat.OPUS
+                )
+            ]
+
+        config = sent[0].streaming_config
+        assert config.interim_results is True
+        assert config.config.language_code == "ja-JP"
+        assert [r.audio_content for r in sent[1:]] == [b"one", b"two"]
+
+        assert [(t.text, t.is_final) for t in transcripts] == [
+            ("こん", False),
+            ("こんにちは", True),
+        ]
+        assert transcripts[0].stability == 0.4
+        assert transcripts[1].confidence == 0.9
+        assert transcripts[1].end_time_ms == 1500
+
+    @pytest.mark.asyncio
+    async def test_stream_rejects_wav(self) -> None:
+        """wav はストリーミング認識できない."""
         with patch("app.services.stt_service.speech.SpeechClient"):
             from app.services.stt_service import STTService
 
             service = STTService()
+            with pytest.raises(STTError, match="does not support wav"):
+                async for _ in service.stream(self._chunks(b"x"), AudioFormat.WAV):
+                    pass
+
+    @pytest.mark.asyncio
+    async def test_stream_api_error(self) -> None:
+        """API呼び出しの失敗は STTError になる."""
+        with (
+            patch("app.services.stt_service.speech.SpeechClient"),
+            patch(
+                "app.services.stt_service.speech.SpeechAsyncClient"
+            ) as mock_async_cls,
+        ):
+            mock_async_cls.return_value.streaming_recognize = AsyncMock(
+                side_effect=Exception("unavailable")
+            )
+            from app.services.stt_service import STTService
+
+            service = STTService()
+            with pytest.raises(STTError, match="Streaming transcription failed"):
+                async for _ in service.stream(self._chunks(b"x"), AudioFormat.PCM):
+                    pass
+
+
+class TestSTTServiceVoiceActivity:
+    """認識前のVADのテスト."""
+
+    @staticmethod
+    def _speech_wav() -> bytes:
+        """1秒の無音 + 0.5秒のトーン + 1秒の無音."""
+        rate = 16000
+        t = np.arange(rate // 2) / rate
+        tone = (0.3 * np.sin(2 * np.pi * 220 * t) * 32767).astype("<i2")
+        silence = np.zeros(rate, dtype="<i2")
+        pcm = np.concatenate([silence, tone, silence]).tobytes()
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(rate)
+            wav_file.writeframes(pcm)
+        return buffer.getvalue()
+
+    @pytest.mark.asyncio
+    async def test_silent_clip_skips_recognition(self) -> None:
+        """発話のないクリップは API を呼ばずに空の結果を返す."""
+        metrics = MetricsRegistry()
+        with patch("app.services.stt_service.speech.SpeechClient") as mock_client_cls:
+            from app.services.stt_service import STTService
+            from app.services.voice_activity import VoiceActivityDetector
+
+            service = STTService(
+                metrics=metrics, voice_activity_detector=VoiceActivityDetector()
+            )
+            result = await service.transcribe(
+                create_test_wav(duration_sec=2.0), AudioFormat.WAV
+            )
 
-            # 2秒のWAVデータ
-            wav_data = create_test_wav(duration_sec=2.0)
-            duration_ms = service._get_audio_duration_ms(
-                wav_data, AudioFormat.WAV, 16000
+        mock_client_cls.return_value.recognize.assert_not_called()
+        assert result.text == ""
+        assert result.duration_ms == 2000
+        assert result.speech_segments == []
+        assert metrics.get_counter("stt.vad.skipped") == 1
+
+    @pytest.mark.asyncio
+    async def test_silence_is_trimmed_before_recognition(self) -> None:
+        """前後の無音を除いた PCM を認識し、発話区間を結果に含める."""
+        metrics = MetricsRegistry()
+        with patch("app.services.stt_service.speech.SpeechClient") as mock_client_cls:
+            mock_client = mock_client_cls.return_value
+            mock_client.recognize.return_value = MagicMock(results=[])
+            from app.services.stt_service import STTService
+            from app.services.voice_activity import VoiceActivityDetector
+
+            service = STTService(
+                metrics=metrics,
+                voice_activity_detector=VoiceActivityDetector(padding_ms=100),
             )
+            result = await service.transcribe(self._speech_wav(), AudioFormat.WAV)
+
+        call_kwargs = mock_client.recognize.call_args.kwargs
+        sent = call_kwargs["audio"].content
+        assert len(sent) == 700 * 16000 // 1000 * 2
+        assert (
+            call_kwargs["config"].encoding
+            == speech.RecognitionConfig.AudioEncoding.LINEAR16
+        )
+        assert call_kwargs["config"].sample_rate_hertz == 16000
+        assert result.duration_ms == 2500
+        assert [(s.start_ms, s.end_ms) for s in result.speech_segments or []] == [
+            (900, 1600)
+        ]
+        assert metrics.get_counter("stt.vad.trimmed_ms") == 1800
+
+    @pytest.mark.asyncio
+    async def test_opus_is_not_analyzed(self) -> None:
+        """opus はVADを行わずにそのまま認識する."""
+        with patch("app.services.stt_service.speech.SpeechClient") as mock_client_cls:
+            mock_client = mock_client_cls.return_value
+            mock_client.recognize.return_value = MagicMock(results=[])
+            from app.services.stt_service import STTService
+            from app.services.voice_activity import VoiceActivityDetector
+
+            service = STTService(voice_activity_detector=VoiceActivityDetector())
+            result = await service.transcribe(b"OggS-opus", AudioFormat.OPUS)
+
+        assert mock_client.recognize.call_args.kwargs["audio"].content == b"OggS-opus"
+        assert result.speech_segments is None
+
+
+def test_join_transcripts_by_language() -> None:
+    """日本語・中国語は空白を入れずに、その他の言語は空白でつなぐ."""
+    assert join_transcripts(["おはよう", "", "元気？"], "ja") == "おはよう元気？"
+    assert join_transcripts(["你好", "世界"], "zh-CN") == "你好世界"
+    assert join_transcripts(["good", "morning"], "en-US") == "good morning"
+
+
+class TestSTTServiceChunking:
+    """長い音声の分割認識のテスト."""
+
+    RATE = 16000
+
+    @classmethod
+    def _pcm(cls, *parts: tuple[str, float]) -> bytes:
+        """("tone" | "silence", 秒) の並びから 16bit mono PCM を作る."""
+        signal = []
+        for kind, seconds in parts:
+            n = int(cls.RATE * seconds)
+            if kind == "tone":
+                t = np.arange(n) / cls.RATE
+                signal.append(0.3 * np.sin(2 * np.pi * 220 * t))
+            else:
+                signal.append(np.zeros(n))
+        return (np.concatenate(signal) * 32767).astype("<i2").tobytes()
+
+    @staticmethod
+    def _result(text: str, confidence: float) -> MagicMock:
+        alternative = MagicMock(transcript=text, confidence=confidence)
+        return MagicMock(results=[MagicMock(alternatives=[alternative])])
+
+    @pytest.mark.asyncio
+    async def test_long_clip_is_split_at_silence_and_joined_in_order(self) -> None:
+        """長い音声は無音で分けて並列に認識し、順に結合する."""
+        pcm = self._pcm(("tone", 2.0), ("silence", 1.0), ("tone", 4.0))
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def recognize(**kwargs: Any) -> MagicMock:
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.05)
+            with lock:
+                state["running"] -= 1
+            # 先頭のチャンクの方が短い
+            if len(kwargs["audio"].content) < 3 * self.RATE * 2:
+                return self._result("前半。", 0.9)
+            return self._result("後半。", 0.6)
+
+        metrics = MetricsRegistry()
+        with patch("app.services.stt_service.speech.SpeechClient") as mock_client_cls:
+            mock_client = mock_client_cls.return_value
+            mock_client.recognize = MagicMock(side_effect=recognize)
+            from app.services.stt_service import STTService
+
+            service = STTService(chunk_seconds=5.0, metrics=metrics)
+            result = await service.transcribe(pcm, AudioFormat.PCM)
+
+        sent = [
+            call.kwargs["audio"].content
+            for call in mock_client.recognize.call_args_list
+        ]
+        assert sorted(len(s) for s in sent)[0] >= 2 * self.RATE * 2
+        assert b"".join(sorted(sent, key=len)) == pcm
+        first = min(len(s) for s in sent) // 2
+        # 分割位置は無音（2〜3秒）の中
+        assert 2 * self.RATE <= first <= 3 * self.RATE
+        assert all(
+            c.kwargs["config"].encoding
+            == speech.RecognitionConfig.AudioEncoding.LINEAR16
+            for c in mock_client.recognize.call_args_list
+        )
+        assert state["peak"] == 2
+        assert result.text == "前半。後半。"
+        assert result.duration_ms == 7000
+        expected = (0.9 * first + 0.6 * (len(pcm) // 2 - first)) / (len(pcm) // 2)
+        assert result.confidence == pytest.approx(expected)
+        assert metrics.get_counter("stt.chunked") == 1
+        assert metrics.get_counter("stt.chunks") == 2
+
+    @pytest.mark.asyncio
+    async def test_chunks_are_joined_with_spaces_for_english(self) -> None:
+        """空白で単語を区切る言語はチャンクの結果を空白でつなぐ."""
+        pcm = self._pcm(
+            ("tone", 1.0), ("silence", 0.5), ("tone", 1.0), ("silence", 0.5)
+        )
+        with patch("app.services.stt_service.speech.SpeechClient") as mock_client_cls:
+            mock_client = mock_client_cls.return_value
+            mock_client.recognize.side_effect = [
+                self._result("hello", 0.8),
+                self._result("world", 0.8),
+            ]
+            from app.services.stt_service import STTService
+
+            service = STTService(chunk_seconds=2.0, metrics=MetricsRegistry())
+            result = await service.transcribe(pcm, AudioFormat.PCM, language="en")
+
+        assert mock_client.recognize.call_count == 2
+        assert result.text == "hello world"
+        assert result.confidence == pytest.approx(0.8)
+
+    @pytest.mark.asyncio
+    async def test_short_clip_is_not_split(self) -> None:
+        """chunk_seconds 以下の音声は1回で認識する."""
+        with patch("app.services.stt_service.speech.SpeechClient") as mock_client_cls:
+            mock_client = mock_client_cls.return_value
+            mock_client.recognize.return_value = self._result("短い", 0.9)
+            from app.services.stt_service import STTService
+
+            metrics = MetricsRegistry()
+            service = STTService(chunk_seconds=5.0, metrics=metrics)
+            wav = create_test_wav(duration_sec=5.0)
+            result = await service.transcribe(wav, AudioFormat.WAV)
+
+        assert mock_client.recognize.call_count == 1
+        assert mock_client.recognize.call_args.kwargs["audio"].content == wav
+        assert result.text == "短い"
+        assert metrics.get_counter("stt.chunked") == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_fails_transcription(self) -> None:
+        """チャンクの認識が1つでも失敗したら STTError になる."""
+        pcm = self._pcm(("tone", 2.0), ("silence", 1.0), ("tone", 4.0))
+        with patch("app.services.stt_service.speech.SpeechClient") as mock_client_cls:
+            mock_client = mock_client_cls.return_value
+            mock_client.recognize.side_effect = [
+                self._result("前半", 0.9),
+                Exception("API Error"),
+            ]
+            from app.services.stt_service import STTService
 
-            assert duration_ms == 2000
+            service = STTService(chunk_seconds=5.0, metrics=MetricsRegistry())
+            with pytest.raises(STTError, match="API Error"):
+                await service.transcribe(pcm, AudioFormat.PCM)
 
-    def test_get_audio_duration_pcm(self) -> None:
-        """PCM音声長取得テスト."""
+
+class TestSTTServiceHedging:
+    """recognize のヘッジのテスト."""
+
+    @staticmethod
+    def _backend(latencies: list[float]) -> MagicMock:
+        """呼び出しごとに指定した遅延で応答する Speech API の代わり."""
+        calls = iter(range(len(latencies)))
+
+        def recognize(**kwargs: object) -> MagicMock:
+            index = next(calls)
+            time.sleep(latencies[index])
+            alternative = MagicMock(transcript=f"call-{index}", confidence=0.9)
+            return MagicMock(results=[MagicMock(alternatives=[alternative])])
+
+        return MagicMock(side_effect=recognize)
+
+    @pytest.mark.asyncio
+    async def test_slow_recognize_is_hedged(self) -> None:
+        """閾値を過ぎても返らない認識は同じリクエストを重ねて送り、先の結果を使う."""
+        metrics = MetricsRegistry()
+        with patch("app.services.stt_service.speech.SpeechClient") as mock_client_cls:
+            recognize = self._backend([0.01] * 5 + [0.5, 0.01])
+            mock_client_cls.return_value.recognize = recognize
+            from app.services.stt_service import STTService
+            from app.utils.hedging import HedgePolicy
+
+            policy = HedgePolicy(
+                "stt.hedge", min_samples=5, budget=0.5, metrics=metrics
+            )
+            service = STTService(
+                max_concurrency=2, metrics=metrics, hedge_policy=policy
+            )
+            # 同じ音声はキャッシュから返るため、長さの違う音声を使う
+            for i in range(5):
+                await service.transcribe(
+                    create_test_wav(duration_sec=1.0 + i / 10), AudioFormat.WAV
+                )
+
+            started = time.perf_counter()
+            result = await service.transcribe(
+                create_test_wav(duration_sec=2.0), AudioFormat.WAV
+            )
+            elapsed = time.perf_counter() - started
+
+        assert result.text == "call-6"
+        assert elapsed < 0.4
+        assert recognize.call_count == 7
+        first, second = recognize.call_args_list[-2:]
+        assert first.kwargs["audio"].content == second.kwargs["audio"].content
+        assert metrics.get_counter("stt.hedge.sent") == 1
+        assert metrics.get_counter("stt.hedge.won") == 1
+
+    @pytest.mark.asyncio
+    async def test_hedging_is_disabled_by_default(self) -> None:
+        """ヘッジは明示的に有効にした場合のみ行う."""
         with patch("app.services.stt_service.speech.SpeechClient"):
             from app.services.stt_service import STTService
 
-            service = STTService()
+            assert STTService()._hedge is None
 
-            # 1秒分のPCMデータ（16kHz, 16bit mono = 32000 bytes）
-            pcm_data = b"\x00\x00" * 16000
-            duration_ms = service._get_audio_duration_ms(
-                pcm_data, AudioFormat.PCM, 16000
+
+class TestSTTServiceCache:
+    """認識結果のキャッシュのテスト."""
+
+    @pytest.mark.asyncio
+    async def test_resent_audio_is_not_recognized_again(self) -> None:
+        """同じ音声の再送はキャッシュから返し、API を呼ばない."""
+        metrics = MetricsRegistry()
+        with patch("app.services.stt_service.speech.SpeechClient") as mock_client_cls:
+            mock_client = mock_client_cls.return_value
+            alternative = MagicMock(transcript="こんにちは", confidence=0.9)
+            mock_client.recognize.return_value = MagicMock(
+                results=[MagicMock(alternatives=[alternative])]
+            )
+            from app.services.stt_service import STTService
+
+            service = STTService(metrics=metrics)
+            wav = create_test_wav()
+            first = await service.transcribe(wav, AudioFormat.WAV)
+            second = await service.transcribe(memoryview(wav), AudioFormat.WAV)
+            other_language = await service.transcribe(
+                wav, AudioFormat.WAV, language="en"
+            )
+
+        assert first == second
+        assert other_language.language == "en"
+        assert mock_client.recognize.call_count == 2
+        assert metrics.get_counter("stt.cache.hits") == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_audio_is_recognized_once(self) -> None:
+        """同じ音声の同時の認識は1回の API 呼び出しにまとめる."""
+        state = {"running": 0, "peak": 0}
+        with patch("app.services.stt_service.speech.SpeechClient") as mock_client_cls:
+            recognize = TestSTTServiceConcurrency._slow_recognize(0.05, state)
+            mock_client_cls.return_value.recognize = recognize
+            from app.services.stt_service import STTService
+
+            service = STTService(metrics=MetricsRegistry())
+            wav = create_test_wav()
+            results = await asyncio.gather(
+                *(service.transcribe(wav, AudioFormat.WAV) for _ in range(4))
             )
 
-            assert duration_ms == 1000
+        assert recognize.call_count == 1
+        assert len({r.model_dump_json() for r in results}) == 1
+
+    @pytest.mark.asyncio
+    async def test_failures_are_not_cached(self) -> None:
+        """認識に失敗した音声は次の送信で再び認識する."""
+        with patch("app.services.stt_service.speech.SpeechClient") as mock_client_cls:
+            mock_client = mock_client_cls.return_value
+            mock_client.recognize.side_effect = [
+                Exception("API Error"),
+                MagicMock(results=[]),
+            ]
+            from app.services.stt_service import STTService
+
+            service = STTService(metrics=MetricsRegistry())
+            wav = create_test_wav()
+            with pytest.raises(STTError):
+                await service.transcribe(wav, AudioFormat.WAV)
+            result = await service.transcribe(wav, AudioFormat.WAV)
+
+        assert result.text == ""
+        assert mock_client.recognize.call_count == 2
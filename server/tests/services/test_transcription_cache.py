@@ -0,0 +1,165 @@
+"""音声認識結果のキャッシュのテスト."""
+
+import asyncio
+
+import pytest
+
+from app.core.metrics import MetricsRegistry
+from app.dto.audio import AudioFormat, TranscriptionResult
+from app.services.transcription_cache import TranscriptionCache
+from tests.fakes import FakeClock
+
+
+class FakeTranscriber:
+    """呼び出し回数を数え、release されるまで認識を終えない."""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.calls = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+        self._fail = fail
+
+    async def __call__(self) -> TranscriptionResult:
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self._fail:
+            raise RuntimeError("recognize failed")
+        return TranscriptionResult(
+            text=f"result-{self.calls}", confidence=0.9, language="ja", duration_ms=1000
+        )
+
+
+def _cache(
+    clock: FakeClock | None = None, metrics: MetricsRegistry | None = None
+) -> TranscriptionCache:
+    return TranscriptionCache(
+        max_entries=4,
+        ttl_seconds=60,
+        clock=clock or FakeClock(),
+        metrics=metrics or MetricsRegistry(),
+    )
+
+
+def test_key_depends_on_audio_and_parameters() -> None:
+    """キーは音声の内容と、フォーマット・サンプリングレート・言語で決まる."""
+    key = TranscriptionCache.key(b"audio", AudioFormat.PCM, 16000, "ja")
+
+    assert key == TranscriptionCache.key(
+        memoryview(b"audio"), AudioFormat.PCM, 16000, "ja"
+    )
+    assert key != TranscriptionCache.key(b"audio2", AudioFormat.PCM, 16000, "ja")
+    assert key != TranscriptionCache.key(b"audio", AudioFormat.WAV, 16000, "ja")
+    assert key != TranscriptionCache.key(b"audio", AudioFormat.PCM, 8000, "ja")
+    assert key != TranscriptionCache.key(b"audio", AudioFormat.PCM, 16000, "en")
+    # 音声自体はキーに含まれない
+    assert "audio" not in key
+
+
+@pytest.mark.asyncio
+async def test_result_is_cached_until_ttl(clock: FakeClock) -> None:
+    """認識結果は有効期間の間キャッシュされる."""
+    metrics = MetricsRegistry()
+    cache = _cache(clock=clock, metrics=metrics)
+    transcriber = FakeTranscriber()
+    transcriber.release.set()
+
+    first = await cache.get_or_transcribe("k", transcriber)
+    clock.now = 59
+    second = await cache.get_or_transcribe("k", transcriber)
+    clock.now = 61
+    third = await cache.get_or_transcribe("k", transcriber)
+
+    assert first.text == second.text == "result-1"
+    assert third.text == "result-2"
+    assert metrics.get_counter("stt.cache.hits") == 1
+    assert metrics.get_counter("stt.cache.misses") == 2
+    assert metrics.get_gauge("stt.cache.size") == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_call() -> None:
+    """同じキーの同時の認識は1回にまとめる."""
+    metrics = MetricsRegistry()
+    cache = _cache(metrics=metrics)
+    transcriber = FakeTranscriber()
+
+    waiters = [
+        asyncio.ensure_future(cache.get_or_transcribe("k", transcriber))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    transcriber.release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert transcriber.calls == 1
+    assert {r.text for r in results} == {"result-1"}
+    assert metrics.get_counter("stt.cache.coalesced") == 2
+
+
+@pytest.mark.asyncio
+async def test_failure_is_shared_but_not_cached() -> None:
+    """失敗は待っている全員に伝わり、キャッシュされない."""
+    cache = _cache()
+    failing = FakeTranscriber(fail=True)
+
+    waiters = [
+        asyncio.ensure_future(cache.get_or_transcribe("k", failing)) for _ in range(2)
+    ]
+    await asyncio.sleep(0)
+    failing.release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert failing.calls == 1
+
+    ok = FakeTranscriber()
+    ok.release.set()
+    assert (await cache.get_or_transcribe("k", ok)).text == "result-1"
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_waiter_keeps_call_for_others() -> None:
+    """待っている呼び出しの一部がキャンセルされても、認識は続ける."""
+    cache = _cache()
+    transcriber = FakeTranscriber()
+
+    first = asyncio.ensure_future(cache.get_or_transcribe("k", transcriber))
+    second = asyncio.ensure_future(cache.get_or_transcribe("k", transcriber))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    transcriber.release.set()
+
+    assert (await second).text == "result-1"
+    assert transcriber.cancelled == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelling_all_waiters_cancels_call() -> None:
+    """待っている呼び出しが全てキャンセルされたら認識もキャンセルする."""
+    cache = _cache()
+    transcriber = FakeTranscriber()
+
+    waiter = asyncio.ensure_future(cache.get_or_transcribe("k", transcriber))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    await asyncio.sleep(0)
+
+    assert transcriber.cancelled == 1
+
+    # 次の呼び出しは新しく認識する
+    retry = FakeTranscriber()
+    retry.release.set()
+    assert (await cache.get_or_transcribe("k", retry)).text == "result-1"
+
+
+def test_invalid_ttl() -> None:
+    """ttl_seconds は正の値."""
+    with pytest.raises(ValueError, match="ttl_seconds"):
+        TranscriptionCache(max_entries=1, ttl_seconds=0)
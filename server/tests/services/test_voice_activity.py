@@ -0,0 +1,203 @@
+"""音声区間検出（VAD）のテスト."""
+
+import io
+import wave
+
+import numpy as np
+import pytest
+
+from app.dto.audio import AudioFormat
+from app.services.voice_activity import VoiceActivityDetector
+
+RATE = 16000
+
+
+def _tone(duration_ms: int, amplitude: float = 0.3) -> np.ndarray:
+    t = np.arange(RATE * duration_ms // 1000) / RATE
+    return amplitude * np.sin(2 * np.pi * 220 * t)
+
+
+def _silence(duration_ms: int) -> np.ndarray:
+    return np.zeros(RATE * duration_ms // 1000)
+
+
+def _noise(duration_ms: int, amplitude: float) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return amplitude * rng.uniform(-1, 1, RATE * duration_ms // 1000)
+
+
+def _pcm(*parts: np.ndarray) -> bytes:
+    signal = np.concatenate(parts)
+    return (signal * 32767).astype("<i2").tobytes()
+
+
+def _wav(pcm: bytes, channels: int = 1) -> bytes:
+    if channels > 1:
+        samples = np.frombuffer(pcm, dtype="<i2")
+        pcm = np.repeat(samples, channels).astype("<i2").tobytes()
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(RATE)
+        wav_file.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def test_silence_has_no_speech() -> None:
+    """無音のみの音声からは発話を検出しない."""
+    activity = VoiceActivityDetector().detect(_pcm(_silence(2000)), AudioFormat.PCM)
+
+    assert activity is not None
+    assert not activity.has_speech
+    assert activity.speech_audio == b""
+    assert activity.duration_ms == 2000
+
+
+def test_leading_and_trailing_silence_is_trimmed() -> None:
+    """前後の無音を除き、余白を付けた発話区間を返す."""
+    detector = VoiceActivityDetector(padding_ms=100)
+    pcm = _pcm(_silence(1000), _tone(500), _silence(1000))
+
+    activity = detector.detect(pcm, AudioFormat.PCM)
+
+    assert activity is not None
+    [segment] = activity.segments
+    assert segment.start_ms == 900
+    assert segment.end_ms == 1600
+    assert len(activity.speech_audio) == 700 * RATE // 1000 * 2
+
+
+def test_short_pauses_are_joined_and_long_pauses_split() -> None:
+    """短い途切れは1つの発話につなぎ、長い無音で発話を分ける."""
+    detector = VoiceActivityDetector(min_silence_ms=300, padding_ms=0)
+    pcm = _pcm(
+        _silence(500),
+        _tone(400),
+        _silence(100),
+        _tone(400),
+        _silence(800),
+        _tone(400),
+        _silence(500),
+    )
+
+    activity = detector.detect(pcm, AudioFormat.PCM)
+
+    assert activity is not None
+    assert [(s.start_ms, s.end_ms) for s in activity.segments] == [
+        (500, 1400),
+        (2200, 2600),
+    ]
+    # 発話の間の無音は残し、前後だけを除く
+    assert len(activity.speech_audio) == 2100 * RATE // 1000 * 2
+
+
+def test_clicks_shorter_than_min_speech_are_ignored() -> None:
+    """min_speech_ms 未満の短い音は発話とみなさない."""
+    detector = VoiceActivityDetector(min_speech_ms=120)
+    pcm = _pcm(_silence(500), _tone(40), _silence(500))
+
+    activity = detector.detect(pcm, AudioFormat.PCM)
+
+    assert activity is not None
+    assert not activity.has_speech
+
+
+def test_speech_is_found_over_background_noise() -> None:
+    """背景雑音より十分大きい発話だけを検出する."""
+    detector = VoiceActivityDetector(padding_ms=0)
+    pcm = _pcm(
+        _noise(1000, 0.005),
+        _tone(600) + _noise(600, 0.005),
+        _noise(1000, 0.005),
+    )
+
+    activity = detector.detect(pcm, AudioFormat.PCM)
+
+    assert activity is not None
+    [segment] = activity.segments
+    assert segment.start_ms == pytest.approx(1000, abs=20)
+    assert segment.end_ms == pytest.approx(1600, abs=20)
+
+
+def test_loud_white_noise_is_not_speech() -> None:
+    """ゼロ交差率の高い雑音は音量が大きくても発話とみなさない."""
+    pcm = _pcm(_silence(500), _noise(1000, 0.5), _silence(500))
+
+    activity = VoiceActivityDetector().detect(pcm, AudioFormat.PCM)
+
+    assert activity is not None
+    assert not activity.has_speech
+
+
+def test_speech_reaching_end_keeps_remaining_samples() -> None:
+    """末尾まで続く発話は端数のサンプルも含める."""
+    pcm = _pcm(_silence(500), _tone(505))
+
+    activity = VoiceActivityDetector().detect(pcm, AudioFormat.PCM)
+
+    assert activity is not None
+    assert activity.segments[-1].end_ms == 1005
+
+
+def test_wav_is_decoded_and_downmixed() -> None:
+    """WAV（ステレオ含む）はヘッダーを読んで mono の PCM にする."""
+    pcm = _pcm(_silence(500), _tone(500), _silence(500))
+    detector = VoiceActivityDetector(padding_ms=0)
+
+    mono = detector.detect(_wav(pcm), AudioFormat.WAV)
+    stereo = detector.detect(_wav(pcm, channels=2), AudioFormat.WAV)
+
+    assert mono is not None and stereo is not None
+    assert mono.segments == stereo.segments
+    assert mono.speech_audio == stereo.speech_audio
+    assert mono.sample_rate == RATE
+
+
+def test_unsupported_audio_returns_none() -> None:
+    """opus や壊れた WAV は解析しない."""
+    detector = VoiceActivityDetector()
+
+    assert detector.detect(b"OggS", AudioFormat.OPUS) is None
+    assert detector.detect(b"not a wav", AudioFormat.WAV) is None
+
+
+def test_accepts_memoryview_and_odd_length() -> None:
+    """memoryview と奇数長の PCM を受け付ける."""
+    pcm = _pcm(_silence(300), _tone(300), _silence(300)) + b"\x00"
+
+    activity = VoiceActivityDetector().detect(memoryview(pcm), AudioFormat.PCM)
+
+    assert activity is not None
+    assert activity.has_speech
+
+
+def test_split_points_fall_in_silence() -> None:
+    """長い音声は max_chunk_ms 以下に、無音の位置で分ける."""
+    pcm = _pcm(_tone(1500), _silence(600), _tone(2500), _silence(600), _tone(1500))
+    samples = np.frombuffer(pcm, dtype="<i2")
+
+    points = VoiceActivityDetector().split_points(samples, RATE, max_chunk_ms=3000)
+
+    bounds = [0, *points, len(samples)]
+    assert all(end - start <= 3 * RATE for start, end in zip(bounds, bounds[1:]))
+    assert len(points) == 2
+    assert 1500 * RATE // 1000 <= points[0] <= 2100 * RATE // 1000
+    assert 4600 * RATE // 1000 <= points[1] <= 5200 * RATE // 1000
+
+
+def test_split_points_without_silence_still_bound_chunks() -> None:
+    """無音がなくても max_chunk_ms 以下に分ける."""
+    samples = np.frombuffer(_pcm(_tone(7000)), dtype="<i2")
+
+    points = VoiceActivityDetector().split_points(samples, RATE, max_chunk_ms=3000)
+
+    bounds = [0, *points, len(samples)]
+    assert all(end - start <= 3 * RATE for start, end in zip(bounds, bounds[1:]))
+
+
+def test_short_audio_is_not_split() -> None:
+    """max_chunk_ms 以下の音声は分けない."""
+    samples = np.frombuffer(_pcm(_tone(3000)), dtype="<i2")
+
+    assert VoiceActivityDetector().split_points(samples, RATE, 3000) == []
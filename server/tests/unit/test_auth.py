@@ -2,12 +2,14 @@
 
 from __future__ import annotations
 
+import asyncio
+import time
 from unittest.mock import patch
 
 import pytest
 from fastapi.testclient import TestClient
 
-from app.api.auth import verify_websocket_token
+from app.api.auth import _token_cache, verify_websocket_token
 
 
 def test_health_endpoint_no_auth_required(client: TestClient) -> None:
@@ -153,23 +155,72 @@ def test_end_other_user_session_returns_403(client: TestClient) -> None:
 # verify_websocket_token のユニットテスト
 
 
-def test_verify_websocket_token_empty_string() -> None:
+@pytest.mark.asyncio
+async def test_verify_websocket_token_empty_string() -> None:
     """空文字列でValueErrorが発生する."""
     with pytest.raises(ValueError, match="Missing"):
-        verify_websocket_token("")
+        await verify_websocket_token("")
 
 
-def test_verify_websocket_token_invalid() -> None:
+@pytest.mark.asyncio
+async def test_verify_websocket_token_invalid() -> None:
     """無効なトークンでValueErrorが発生する."""
     with patch("app.api.auth.verify_id_token", side_effect=Exception("Invalid")):
         with pytest.raises(ValueError, match="Invalid or expired"):
-            verify_websocket_token("bad-token")
+            await verify_websocket_token("bad-token")
 
 
-def test_verify_websocket_token_valid() -> None:
+@pytest.mark.asyncio
+async def test_verify_websocket_token_valid() -> None:
     """有効なトークンでユーザー情報が返る."""
     mock_claims = {"uid": "ws-user-123", "email": "ws@example.com"}
     with patch("app.api.auth.verify_id_token", return_value=mock_claims):
-        result = verify_websocket_token("valid-token")
+        result = await verify_websocket_token("valid-token")
     assert result["uid"] == "ws-user-123"
     assert result["email"] == "ws@example.com"
+
+
+def test_verified_token_is_cached_across_requests(client: TestClient) -> None:
+    """同じトークンの2回目以降のリクエストでは署名検証を行わない。"""
+    mock_claims = {
+        "uid": "test-user-123",
+        "email": "test@example.com",
+        "exp": time.time() + 3600,
+    }
+    try:
+        with patch("app.api.auth.verify_id_token", return_value=mock_claims) as mock:
+            for _ in range(2):
+                response = client.post(
+                    "/api/sessions",
+                    headers={"Authorization": "Bearer cached-token"},
+                )
+                assert response.status_code == 201
+            result = asyncio.run(verify_websocket_token("cached-token"))
+        mock.assert_called_once()
+        assert result["uid"] == "test-user-123"
+    finally:
+        _token_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_token_verification_does_not_block_event_loop() -> None:
+    """署名検証（同期API）の実行中もイベントループは止まらない。"""
+    ticks = 0
+
+    def slow_verify(token: str) -> dict[str, str]:
+        time.sleep(0.1)
+        return {"uid": "ws-user-123"}
+
+    async def ticker() -> None:
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    with patch("app.api.auth.verify_id_token", side_effect=slow_verify):
+        result = await verify_websocket_token("slow-token")
+    task.cancel()
+
+    assert result["uid"] == "ws-user-123"
+    assert ticks >= 5
@@ -0,0 +1,174 @@
+"""CircuitBreaker のテスト。"""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.core.metrics import MetricsRegistry
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+from tests.fakes import FakeClock
+
+
+class FakeProbe:
+    """release されるまで終わらない回復確認。"""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.fail = fail
+
+    async def __call__(self) -> None:
+        self.calls += 1
+        await self.release.wait()
+        if self.fail:
+            raise RuntimeError("still down")
+
+
+async def _ok() -> str:
+    return "ok"
+
+
+async def _fail() -> str:
+    raise RuntimeError("down")
+
+
+def _breaker(
+    probe: FakeProbe, clock: FakeClock, metrics: MetricsRegistry | None = None
+) -> CircuitBreaker:
+    return CircuitBreaker(
+        "test.breaker",
+        probe=probe,
+        failure_threshold=2,
+        reset_timeout=10.0,
+        clock=clock,
+        metrics=metrics or MetricsRegistry(),
+    )
+
+
+async def _open(breaker: CircuitBreaker) -> None:
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            await breaker.call(_fail)
+
+
+@pytest.mark.asyncio
+async def test_opens_after_consecutive_failures() -> None:
+    """連続して失敗したら open にし、呼び出さずに即座に失敗させる。"""
+    metrics = MetricsRegistry()
+    breaker = _breaker(FakeProbe(), FakeClock(), metrics)
+    called = False
+
+    async def call() -> str:
+        nonlocal called
+        called = True
+        return "ok"
+
+    await _open(breaker)
+
+    assert breaker.state is CircuitState.OPEN
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(call)
+    assert not called
+    assert metrics.get_counter("test.breaker.opened") == 1
+    assert metrics.get_counter("test.breaker.rejected") == 1
+    assert metrics.get_gauge("test.breaker.state") == 2
+
+
+@pytest.mark.asyncio
+async def test_success_resets_failure_count() -> None:
+    """成功すると連続失敗の回数を数え直す。"""
+    breaker = _breaker(FakeProbe(), FakeClock())
+
+    with pytest.raises(RuntimeError):
+        await breaker.call(_fail)
+    assert await breaker.call(_ok) == "ok"
+    with pytest.raises(RuntimeError):
+        await breaker.call(_fail)
+
+    assert breaker.state is CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_cancellation_is_not_a_failure() -> None:
+    """キャンセルは失敗として数えない。"""
+    breaker = _breaker(FakeProbe(), FakeClock())
+
+    async def slow() -> str:
+        await asyncio.sleep(10)
+        return "ok"
+
+    for _ in range(2):
+        task = asyncio.ensure_future(breaker.call(slow))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    assert breaker.state is CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_probes_in_background_and_closes_on_success(clock: FakeClock) -> None:
+    """reset_timeout 後は裏で回復を確認し、その間も呼び出しは即座に失敗させる。"""
+    probe = FakeProbe()
+    breaker = _breaker(probe, clock)
+    await _open(breaker)
+
+    clock.now = 5.0
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(_ok)
+    await asyncio.sleep(0)
+    assert probe.calls == 0
+
+    clock.now = 10.0
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(_ok)
+    await asyncio.sleep(0)
+    assert probe.calls == 1
+    assert breaker.state is CircuitState.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(_ok)
+
+    probe.release.set()
+    await asyncio.sleep(0)
+    assert breaker.state is CircuitState.CLOSED
+    assert await breaker.call(_ok) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_failed_probe_reopens(clock: FakeClock) -> None:
+    """回復の確認に失敗したら open に戻し、reset_timeout 後に再度確認する。"""
+    metrics = MetricsRegistry()
+    probe = FakeProbe(fail=True)
+    breaker = _breaker(probe, clock, metrics)
+    await _open(breaker)
+
+    clock.now = 10.0
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(_ok)
+    probe.release.set()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    assert breaker.state is CircuitState.OPEN
+    assert metrics.get_counter("test.breaker.probe_failures") == 1
+
+    clock.now = 15.0
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(_ok)
+    assert probe.calls == 1
+
+    clock.now = 20.0
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(_ok)
+    await asyncio.sleep(0)
+    assert probe.calls == 2
+    await breaker.aclose()
+
+
+def test_invalid_threshold() -> None:
+    """failure_threshold は1以上。"""
+    with pytest.raises(ValueError, match="failure_threshold"):
+        CircuitBreaker("test.breaker", probe=FakeProbe(), failure_threshold=0)
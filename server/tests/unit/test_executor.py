@@ -0,0 +1,60 @@
+"""BoundedExecutor のテスト。"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.metrics import MetricsRegistry
+from app.utils.executor import BoundedExecutor
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_runs_off_the_event_loop() -> None:
+    """ブロッキング処理の実行中もイベントループは他のタスクを進められる。"""
+    metrics = MetricsRegistry()
+    executor = BoundedExecutor("test.executor", max_workers=1, metrics=metrics)
+    ticks = 0
+
+    async def ticker() -> None:
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    thread_name = await executor.run(
+        lambda: (time.sleep(0.1), threading.current_thread().name)[1]
+    )
+    task.cancel()
+    executor.shutdown()
+
+    assert thread_name.startswith("test.executor")
+    assert ticks >= 5
+    assert metrics.get_histogram("test.executor.queue_wait_ms") is not None
+    assert metrics.get_gauge("test.executor.in_flight") == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded_by_max_workers() -> None:
+    executor = BoundedExecutor("test.bounded", max_workers=2, metrics=MetricsRegistry())
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def work() -> None:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+
+    await asyncio.gather(*(executor.run(work) for _ in range(6)))
+    executor.shutdown()
+
+    assert peak == 2
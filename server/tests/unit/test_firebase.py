@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
+import logging
 from pathlib import Path
 from typing import Generator
 from unittest.mock import MagicMock, patch
 
 import pytest
+from firebase_admin import _token_gen
 
 from app.infra import firebase
 
@@ -251,3 +253,62 @@ class TestVerifyIdToken:
         ):
             with pytest.raises(Exception, match="Invalid token"):
                 firebase.verify_id_token("bad-token")
+
+
+class TestFetchPublicKeys:
+    """fetch_public_keys のテスト。"""
+
+    def _request(self, cache_control: str) -> MagicMock:
+        response = MagicMock(status=200, headers={"Cache-Control": cache_control})
+        return MagicMock(return_value=response)
+
+    def test_fetches_with_sdk_request_and_returns_max_age(self) -> None:
+        request = self._request("public, max-age=21600, must-revalidate")
+        client = MagicMock()
+        client._token_verifier.request = request
+        with (
+            patch.dict("os.environ", {"FIREBASE_AUTH_EMULATOR_HOST": ""}),
+            patch.object(firebase, "get_firebase_app", return_value=MagicMock()),
+            patch.object(firebase.auth, "_get_client", return_value=client),
+        ):
+            assert firebase.fetch_public_keys() == 21600
+            firebase.fetch_public_keys(force_refresh=True)
+
+        first, second = request.call_args_list
+        assert first.args == (_token_gen.ID_TOKEN_CERT_URI,)
+        assert first.kwargs["headers"] is None
+        assert second.kwargs["headers"] == {"Cache-Control": "no-cache"}
+
+    def test_http_error_raises(self) -> None:
+        client = MagicMock()
+        client._token_verifier.request.return_value = MagicMock(status=503)
+        with (
+            patch.dict("os.environ", {"FIREBASE_AUTH_EMULATOR_HOST": ""}),
+            patch.object(firebase, "get_firebase_app", return_value=MagicMock()),
+            patch.object(firebase.auth, "_get_client", return_value=client),
+        ):
+            with pytest.raises(RuntimeError, match="503"):
+                firebase.fetch_public_keys()
+
+    def test_missing_sdk_internals_fall_back_to_verification_fetch(
+        self, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        """SDK の内部構造が変わっていたら、警告して事前取得をやめる（例外にしない）。"""
+        client = MagicMock(spec=[])
+        with (
+            patch.dict("os.environ", {"FIREBASE_AUTH_EMULATOR_HOST": ""}),
+            patch.object(firebase, "get_firebase_app", return_value=MagicMock()),
+            patch.object(firebase.auth, "_get_client", return_value=client),
+            caplog.at_level(logging.WARNING, logger=firebase.__name__),
+        ):
+            assert firebase.fetch_public_keys() is None
+
+        assert "公開鍵を事前取得できません" in caplog.text
+
+    def test_emulator_mode_skips_fetch(self) -> None:
+        with (
+            patch.dict("os.environ", {"FIREBASE_AUTH_EMULATOR_HOST": "localhost:9099"}),
+            patch.object(firebase.auth, "_get_client") as mock_get_client,
+        ):
+            assert firebase.fetch_public_keys() is None
+        mock_get_client.assert_not_called()
@@ -0,0 +1,172 @@
+"""HedgePolicy のテスト。"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+import pytest
+
+from app.core.metrics import MetricsRegistry
+from app.utils.hedging import HedgePolicy
+
+
+class FakeBackend:
+    """呼び出しごとに指定した遅延で応答するバックエンド。"""
+
+    def __init__(self, latencies: list[float], fail: set[int] | None = None) -> None:
+        self._latencies = latencies
+        self._fail = fail or set()
+        self.calls = 0
+        self.cancelled: list[int] = []
+
+    def call(self) -> Callable[[], Awaitable[int]]:
+        async def run() -> int:
+            index = self.calls
+            self.calls += 1
+            try:
+                await asyncio.sleep(self._latencies[index])
+            except asyncio.CancelledError:
+                self.cancelled.append(index)
+                raise
+            if index in self._fail:
+                raise RuntimeError(f"call {index} failed")
+            return index
+
+        return run
+
+
+async def _warm_up(policy: HedgePolicy, latency: float, count: int) -> None:
+    backend = FakeBackend([latency] * count)
+    for _ in range(count):
+        await policy.run(backend.call())
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_until_enough_samples() -> None:
+    """所要時間が min_samples 件集まるまではヘッジしない。"""
+    metrics = MetricsRegistry()
+    policy = HedgePolicy("test.hedge", min_samples=3, budget=1.0, metrics=metrics)
+    backend = FakeBackend([0.05])
+
+    assert policy.threshold() is None
+    assert await policy.run(backend.call()) == 0
+    assert backend.calls == 1
+    assert metrics.get_counter("test.hedge.sent") == 0
+
+
+@pytest.mark.asyncio
+async def test_threshold_is_observed_quantile() -> None:
+    """閾値は直近の所要時間の分位になる。"""
+    policy = HedgePolicy("test.hedge", quantile=0.9, min_samples=10)
+    backend = FakeBackend([0.001 * (i + 1) for i in range(10)])
+    for _ in range(10):
+        await policy.run(backend.call())
+
+    threshold = policy.threshold()
+
+    assert threshold is not None
+    assert 0.009 <= threshold < 0.02
+
+
+@pytest.mark.asyncio
+async def test_slow_call_is_hedged_and_loser_cancelled() -> None:
+    """閾値を過ぎても返らない呼び出しはヘッジし、先に返った方を使う。"""
+    metrics = MetricsRegistry()
+    policy = HedgePolicy("test.hedge", min_samples=5, budget=0.5, metrics=metrics)
+    await _warm_up(policy, 0.01, 5)
+    backend = FakeBackend([1.0, 0.01])
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    result = await policy.run(backend.call())
+    elapsed = loop.time() - started
+    await asyncio.sleep(0)
+
+    assert result == 1
+    assert elapsed < 0.5
+    assert backend.cancelled == [0]
+    assert metrics.get_counter("test.hedge.sent") == 1
+    assert metrics.get_counter("test.hedge.won") == 1
+    assert metrics.get_gauge("test.hedge.threshold_ms") is not None
+
+
+@pytest.mark.asyncio
+async def test_cancelled_loser_is_not_sampled() -> None:
+    """キャンセルされた呼び出しの経過時間は所要時間として記録しない。"""
+    policy = HedgePolicy("test.hedge", min_samples=5, budget=1.0, window=100)
+    await _warm_up(policy, 0.01, 5)
+    backend = FakeBackend([1.0, 0.01])
+
+    await policy.run(backend.call())
+    await asyncio.sleep(0)
+
+    assert backend.cancelled == [0]
+    assert len(policy._latencies) == 6
+
+
+@pytest.mark.asyncio
+async def test_primary_winning_after_hedge_is_not_counted_as_won() -> None:
+    """ヘッジ後に最初の呼び出しが先に返った場合はヘッジの効果なしとして数える。"""
+    metrics = MetricsRegistry()
+    policy = HedgePolicy("test.hedge", min_samples=5, budget=0.5, metrics=metrics)
+    await _warm_up(policy, 0.01, 5)
+    backend = FakeBackend([0.03, 1.0])
+
+    assert await policy.run(backend.call()) == 0
+    await asyncio.sleep(0)
+
+    assert backend.cancelled == [1]
+    assert metrics.get_counter("test.hedge.sent") == 1
+    assert metrics.get_counter("test.hedge.won") == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_attempt_falls_back_to_other() -> None:
+    """片方が失敗した場合はもう一方の結果を使い、両方失敗したら例外を送出する。"""
+    policy = HedgePolicy("test.hedge", min_samples=5, budget=1.0)
+    await _warm_up(policy, 0.01, 5)
+
+    assert await policy.run(FakeBackend([0.05, 0.01], fail={1}).call()) == 0
+    with pytest.raises(RuntimeError, match="failed"):
+        await policy.run(FakeBackend([0.05, 0.01], fail={0, 1}).call())
+
+
+@pytest.mark.asyncio
+async def test_budget_limits_hedged_fraction() -> None:
+    """ヘッジした割合が budget に達したらヘッジしない。"""
+    metrics = MetricsRegistry()
+    policy = HedgePolicy(
+        "test.hedge", min_samples=5, budget=0.1, window=20, metrics=metrics
+    )
+    await _warm_up(policy, 0.01, 9)
+
+    first = FakeBackend([0.05, 0.01])
+    await policy.run(first.call())
+    second = FakeBackend([0.05, 0.01])
+    await policy.run(second.call())
+
+    assert first.calls == 2
+    assert second.calls == 1
+    assert metrics.get_counter("test.hedge.sent") == 1
+    assert metrics.get_counter("test.hedge.budget_exhausted") == 1
+
+
+@pytest.mark.asyncio
+async def test_cancellation_cancels_attempts() -> None:
+    """呼び出し側がキャンセルした場合は実行中の呼び出しもキャンセルする。"""
+    policy = HedgePolicy("test.hedge", min_samples=5, budget=1.0)
+    await _warm_up(policy, 0.01, 5)
+    backend = FakeBackend([1.0, 1.0])
+
+    with pytest.raises(TimeoutError):
+        await asyncio.wait_for(policy.run(backend.call()), 0.1)
+    await asyncio.sleep(0)
+
+    assert sorted(backend.cancelled) == [0, 1]
+
+
+def test_invalid_quantile() -> None:
+    """quantile は 0 と 1 の間。"""
+    with pytest.raises(ValueError, match="quantile"):
+        HedgePolicy("test.hedge", quantile=1.0)
@@ -0,0 +1,51 @@
+"""IncrementalJsonParser のテスト."""
+
+from app.utils.json_stream import IncrementalJsonParser, JsonStreamEvent
+
+DOCUMENT = (
+    '```json\n{"situation_analysis": "相手は \\"楽しそう\\" {", '
+    '"responses": [{"text": "a]", "intent": "b"}, "「c」", 3], '
+    '"meta": {"n": [1, 2]}, "score": 0.5}\n```'
+)
+
+EXPECTED = [
+    JsonStreamEvent("situation_analysis", None, '相手は "楽しそう" {'),
+    JsonStreamEvent("responses", 0, {"text": "a]", "intent": "b"}),
+    JsonStreamEvent("responses", 1, "「c」"),
+    JsonStreamEvent("responses", 2, 3),
+    JsonStreamEvent("meta", None, {"n": [1, 2]}),
+    JsonStreamEvent("score", None, 0.5),
+]
+
+
+def _feed_in_chunks(size: int) -> tuple[IncrementalJsonParser, list[JsonStreamEvent]]:
+    parser = IncrementalJsonParser()
+    events: list[JsonStreamEvent] = []
+    for i in range(0, len(DOCUMENT), size):
+        events.extend(parser.feed(DOCUMENT[i : i + size]))
+    return parser, events
+
+
+def test_events_do_not_depend_on_chunk_boundaries() -> None:
+    """どこで分割されても同じ値が同じ順序で取り出せる."""
+    for size in (1, 2, 5, 13, len(DOCUMENT)):
+        parser, events = _feed_in_chunks(size)
+        assert events == EXPECTED
+        assert parser.done
+
+
+def test_array_item_emitted_as_soon_as_it_closes() -> None:
+    """配列要素は閉じた時点で、後続を待たずに返る."""
+    parser = IncrementalJsonParser()
+    assert parser.feed('{"responses": [{"text": "応答1", "intent": "x"') == []
+
+    events = parser.feed("}, ")
+    assert events == [JsonStreamEvent("responses", 0, {"text": "応答1", "intent": "x"})]
+    assert not parser.done
+
+
+def test_malformed_item_is_skipped() -> None:
+    """パースできない要素はイベントを返さず、後続の要素は解析を続ける."""
+    parser = IncrementalJsonParser()
+    events = parser.feed('{"responses": [tru, "ok"]}')
+    assert events == [JsonStreamEvent("responses", 1, "ok")]
@@ -0,0 +1,154 @@
+"""LLMResponseCache の単体テスト."""
+
+import asyncio
+
+import pytest
+
+from app.core.metrics import MetricsRegistry
+from app.dto.llm import LLMResponseResult, ResponseSuggestion
+from app.services.llm_cache import LLMResponseCache, SuggestionCallback
+from tests.fakes import FakeClock, FakeGenerator
+
+
+def _cache(
+    clock: FakeClock | None = None, metrics: MetricsRegistry | None = None
+) -> LLMResponseCache:
+    return LLMResponseCache(
+        max_entries=4,
+        ttl_seconds=30,
+        clock=clock or FakeClock(),
+        metrics=metrics or MetricsRegistry(),
+    )
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.notified: list[tuple[int, str]] = []
+
+    async def __call__(self, index: int, suggestion: ResponseSuggestion) -> None:
+        self.notified.append((index, suggestion.text))
+
+
+def test_key_normalizes_whitespace_only() -> None:
+    """キーは空白の違いを無視し、プロンプト・モデル・温度の違いで変わる."""
+    key = LLMResponseCache.key("## 会話履歴\n- user: やあ", "sys", "groq:m", 0.7)
+
+    assert key == LLMResponseCache.key(
+        "  ## 会話履歴  \n-  user:   やあ\n", "sys", "groq:m", 0.7
+    )
+    assert key != LLMResponseCache.key(
+        "## 会話履歴\n- user: やぁ", "sys", "groq:m", 0.7
+    )
+    assert key != LLMResponseCache.key(
+        "## 会話履歴\n- user: やあ", "sys2", "groq:m", 0.7
+    )
+    assert key != LLMResponseCache.key(
+        "## 会話履歴\n- user: やあ", "sys", "gemini:m", 0.7
+    )
+    assert key != LLMResponseCache.key(
+        "## 会話履歴\n- user: やあ", "sys", "groq:m", 0.2
+    )
+
+
+@pytest.mark.asyncio
+async def test_hit_returns_cached_result_and_records_saved_latency(
+    clock: FakeClock,
+) -> None:
+    """有効期間内の同じキーはキャッシュから返し、省いた生成時間を記録する."""
+    metrics = MetricsRegistry()
+    cache = _cache(clock=clock, metrics=metrics)
+    generator = FakeGenerator()
+
+    first = await cache.get_or_generate("k", generator)
+    clock.now = 29
+    second = await cache.get_or_generate("k", generator)
+    clock.now = 31
+    third = await cache.get_or_generate("k", generator)
+
+    assert first is second
+    assert third.situation_analysis == "分析2"
+    assert metrics.get_counter("llm.cache.hits") == 1
+    assert metrics.get_counter("llm.cache.misses") == 2
+    assert metrics.get_gauge("llm.cache.hit_ratio") == pytest.approx(1 / 3)
+    assert metrics.get_counter("llm.cache.saved_ms") > 0
+
+
+@pytest.mark.asyncio
+async def test_hit_replays_suggestions() -> None:
+    """ヒット時は応答候補を逐次通知先にまとめて通知する."""
+    cache = _cache()
+    generator = FakeGenerator()
+    await cache.get_or_generate("k", generator)
+    recorder = Recorder()
+
+    await cache.get_or_generate("k", generator, recorder)
+
+    assert recorder.notified == [(0, "そうなんだ"), (1, "そうなんだ、それで？")]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_prompts_share_one_call() -> None:
+    """同じキーの同時の生成は1回にまとめ、相乗りした側には完成後に通知する."""
+    metrics = MetricsRegistry()
+    cache = _cache(metrics=metrics)
+    generator = FakeGenerator(gated=True)
+    leader, follower = Recorder(), Recorder()
+
+    first = asyncio.ensure_future(cache.get_or_generate("k", generator, leader))
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(cache.get_or_generate("k", generator, follower))
+    await asyncio.sleep(0)
+    # 先に生成を始めた側には逐次通知される
+    assert leader.notified == [(0, "そうなんだ")]
+    assert follower.notified == []
+    generator.release.set()
+    results = await asyncio.gather(first, second)
+
+    assert generator.calls == 1
+    assert results[0] is results[1]
+    assert (
+        leader.notified
+        == follower.notified
+        == [
+            (0, "そうなんだ"),
+            (1, "そうなんだ、それで？"),
+        ]
+    )
+    assert metrics.get_counter("llm.cache.coalesced") == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_stops_streaming_but_follower_gets_result() -> None:
+    """最初の呼び出し元がキャンセルされても、相乗りした側には結果を返す."""
+    cache = _cache()
+    generator = FakeGenerator(gated=True)
+    leader, follower = Recorder(), Recorder()
+
+    first = asyncio.ensure_future(cache.get_or_generate("k", generator, leader))
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(cache.get_or_generate("k", generator, follower))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    generator.release.set()
+
+    result = await second
+    assert first.cancelled()
+    assert result.situation_analysis == "分析1"
+    # キャンセル後の応答候補は最初の呼び出し元に通知しない
+    assert leader.notified == [(0, "そうなんだ")]
+
+
+@pytest.mark.asyncio
+async def test_failures_are_not_cached() -> None:
+    """生成に失敗した結果はキャッシュしない."""
+    cache = _cache()
+
+    async def failing(on_suggestion: SuggestionCallback | None) -> LLMResponseResult:
+        raise RuntimeError("LLM error")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_generate("k", failing)
+    generator = FakeGenerator()
+
+    assert (await cache.get_or_generate("k", generator)).situation_analysis == "分析1"
@@ -0,0 +1,171 @@
+"""LLMRouter の単体テスト."""
+
+import asyncio
+
+import pytest
+
+from app.core.metrics import MetricsRegistry
+from app.services.llm_router import LLMRouter
+from tests.fakes import FakeClock
+
+
+def _router(
+    clock: FakeClock | None = None, metrics: MetricsRegistry | None = None
+) -> LLMRouter:
+    return LLMRouter(
+        fast="groq",
+        quality="gemini",
+        short_prompt_chars=100,
+        max_error_rate=0.3,
+        alpha=0.5,
+        error_half_life=10.0,
+        clock=clock or FakeClock(),
+        metrics=metrics or MetricsRegistry(),
+    )
+
+
+def test_routes_by_prompt_length() -> None:
+    """短いプロンプトは fast、長いプロンプトは quality に送る."""
+    metrics = MetricsRegistry()
+    router = _router(metrics=metrics)
+
+    short = router.choose(prompt_chars=80)
+    long = router.choose(prompt_chars=500)
+
+    assert (short.provider, short.reason) == ("groq", "short_prompt")
+    assert (long.provider, long.reason) == ("gemini", "long_prompt")
+    assert metrics.get_counter("llm.router.groq.routed") == 1
+    assert metrics.get_counter("llm.router.gemini.routed") == 1
+
+
+def test_avoids_provider_with_high_error_rate(clock: FakeClock) -> None:
+    """エラー率が高いプロバイダーは避け、時間が経てば戻す."""
+    router = _router(clock=clock)
+    decision = router.choose(prompt_chars=500)
+    router.record(decision, 100.0, ok=False)
+
+    rerouted = router.choose(prompt_chars=500)
+    assert (rerouted.provider, rerouted.reason) == ("groq", "errors")
+
+    # エラー率 0.5 が半減期2回分で 0.125 まで下がる
+    clock.now = 20.0
+    assert router.choose(prompt_chars=500).provider == "gemini"
+
+
+def test_routes_to_faster_provider_over_budget() -> None:
+    """既定のプロバイダーでは待ち時間の目安を超えそうなら速い方に送る."""
+    router = _router()
+    router.record(router.choose(prompt_chars=500), 3000.0, ok=True)
+    router.record(router.choose(prompt_chars=80), 300.0, ok=True)
+
+    within = router.choose(prompt_chars=500, budget_ms=5000.0)
+    over = router.choose(prompt_chars=500, budget_ms=1000.0)
+
+    assert within.provider == "gemini"
+    assert (over.provider, over.reason, over.expected_ms) == ("groq", "budget", 300.0)
+    # もう一方の所要時間が分からない場合は既定のまま
+    fresh = _router()
+    fresh.record(fresh.choose(prompt_chars=500), 3000.0, ok=True)
+    assert fresh.choose(prompt_chars=500, budget_ms=1000.0).provider == "gemini"
+
+
+def test_avoids_unavailable_provider() -> None:
+    """障害中のプロバイダーはもう一方に送り、両方とも障害中なら既定のまま."""
+    router = _router()
+
+    rerouted = router.choose(prompt_chars=500, unavailable=["gemini"])
+    other_down = router.choose(prompt_chars=500, unavailable=["groq"])
+    both_down = router.choose(prompt_chars=500, unavailable=["groq", "gemini"])
+
+    assert (rerouted.provider, rerouted.reason) == ("groq", "unavailable")
+    assert (other_down.provider, other_down.reason) == ("gemini", "long_prompt")
+    assert (both_down.provider, both_down.reason) == ("gemini", "long_prompt")
+
+
+def test_does_not_switch_to_unavailable_provider_on_errors() -> None:
+    """エラー率が高くても、もう一方が障害中なら切り替えない."""
+    router = _router()
+    router.record(router.choose(prompt_chars=500), 100.0, ok=False)
+
+    decision = router.choose(prompt_chars=500, unavailable=["groq"])
+
+    assert (decision.provider, decision.reason) == ("gemini", "long_prompt")
+
+
+def test_latency_is_smoothed() -> None:
+    """所要時間は指数移動平均で保持する."""
+    metrics = MetricsRegistry()
+    router = _router(metrics=metrics)
+    router.record(router.choose(prompt_chars=80), 100.0, ok=True)
+    router.record(router.choose(prompt_chars=80), 300.0, ok=True)
+
+    assert metrics.get_gauge("llm.router.groq.latency_ewma_ms") == 200.0
+    latency = metrics.get_histogram("llm.router.groq.latency_ms")
+    assert latency is not None and latency["count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_run_records_decisions_and_outcomes() -> None:
+    """run は選んだプロバイダーで呼び出し、判断と結果を記録する."""
+    router = _router()
+
+    async def ok(provider: str) -> str:
+        return provider
+
+    async def failing(provider: str) -> str:
+        raise RuntimeError("down")
+
+    assert await router.run(80, 1000.0, ok) == "groq"
+    with pytest.raises(RuntimeError):
+        await router.run(500, None, failing)
+
+    history = router.history()
+    assert [(r["provider"], r["reason"], r["ok"]) for r in history] == [
+        ("groq", "short_prompt", True),
+        ("gemini", "long_prompt", False),
+    ]
+    assert history[0]["prompt_chars"] == 80
+    assert history[0]["budget_ms"] == 1000.0
+
+
+@pytest.mark.asyncio
+async def test_unrecorded_errors_do_not_count_as_failures() -> None:
+    """unrecorded の例外は記録せず、エラー率にも含めない."""
+    router = _router()
+
+    async def rejected(provider: str) -> str:
+        raise LookupError("not called")
+
+    for _ in range(3):
+        with pytest.raises(LookupError):
+            await router.run(500, None, rejected, unrecorded=(LookupError,))
+
+    assert router.history() == []
+    assert router.choose(prompt_chars=500).provider == "gemini"
+
+
+@pytest.mark.asyncio
+async def test_cancellation_is_not_recorded() -> None:
+    """キャンセルはプロバイダーの失敗として記録しない."""
+    router = _router()
+
+    async def slow(provider: str) -> str:
+        await asyncio.sleep(10)
+        return provider
+
+    task = asyncio.ensure_future(router.run(500, None, slow))
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert router.history() == []
+    assert router.choose(prompt_chars=500).provider == "gemini"
+
+
+def test_invalid_parameters() -> None:
+    """alpha と error_half_life の範囲を検証する."""
+    with pytest.raises(ValueError, match="alpha"):
+        LLMRouter("groq", "gemini", 100, alpha=0)
+    with pytest.raises(ValueError, match="error_half_life"):
+        LLMRouter("groq", "gemini", 100, error_half_life=0)
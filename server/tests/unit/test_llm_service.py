@@ -1,14 +1,24 @@
 """LLMService の単体テスト."""
 
+import asyncio
+from collections.abc import AsyncIterator
 from datetime import datetime, timezone
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from app.core.exceptions import LLMError, LLMRateLimitError, LLMResponseParseError
+from app.core.config import get_settings
+from app.core.exceptions import (
+    LLMError,
+    LLMRateLimitError,
+    LLMResponseParseError,
+    LLMUnavailableError,
+)
 from app.dto.conversation import Speaker, Utterance
 from app.dto.emotion import EmotionInterpretation
+from app.dto.llm import ResponseSuggestion
 from app.services.llm_service import LLMService
+from app.services.semantic_cache import SemanticSuggestionCache
 
 
 @pytest.fixture
@@ -157,16 +167,14 @@ async def test_retry_on_rate_limit(
     """レートリミット時にリトライする."""
     call_count = 0
 
-    async def mock_call_api(prompt: str) -> str:
+    async def mock_call_api(prompt: str, model: object = None) -> str:
         nonlocal call_count
         call_count += 1
         if call_count < 2:
             raise Exception("429 rate limit exceeded")
         return valid_llm_response
 
-    with patch.object(
-        LLMService, "_call_api", side_effect=mock_call_api
-    ):
+    with patch.object(LLMService, "_call_api", side_effect=mock_call_api):
         service = LLMService()
         result = await service.generate_responses(
             conversation_context=sample_context,
@@ -214,6 +222,31 @@ async def test_non_rate_limit_error_raises_immediately(
             )
 
 
+@pytest.mark.asyncio
+async def test_cancel_during_retry_backoff(
+    sample_context: list[Utterance],
+    sample_emotion: EmotionInterpretation,
+) -> None:
+    """リトライ待機中にキャンセルされると、待機を打ち切って即座に中断する."""
+    with patch.object(LLMService, "_call_api", new_callable=AsyncMock) as mock_api:
+        mock_api.side_effect = Exception("429 rate limit")
+
+        service = LLMService()
+        task = asyncio.create_task(
+            service.generate_responses(
+                conversation_context=sample_context,
+                emotion_interpretation=sample_emotion,
+                partner_last_utterance="テスト",
+            )
+        )
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(task, timeout=0.5)
+        assert mock_api.call_count == 1
+
+
 def test_build_prompt(
     sample_context: list[Utterance],
     sample_emotion: EmotionInterpretation,
@@ -233,3 +266,544 @@ def test_build_prompt(
     assert "medium" in prompt
     assert "相手の最後の発話" in prompt
     assert "この前、恋愛映画を観たんだけど、すごく良かったよ" in prompt
+
+
+def _streaming_model(chunks: list[str]) -> MagicMock:
+    """astream で chunks を順に返すチャットモデルのモック."""
+
+    async def astream(messages: object) -> AsyncIterator[MagicMock]:
+        for chunk in chunks:
+            yield MagicMock(content=chunk)
+
+    model = MagicMock()
+    model.astream = astream
+    return model
+
+
+@pytest.mark.asyncio
+async def test_streaming_notifies_each_suggestion_before_completion(
+    sample_context: list[Utterance],
+    sample_emotion: EmotionInterpretation,
+    valid_llm_response: str,
+) -> None:
+    """ストリーミング時は応答候補が完成するたびに、全文を待たずに通知される."""
+    chunks = [
+        valid_llm_response[i : i + 7] for i in range(0, len(valid_llm_response), 7)
+    ]
+    received_chunks: list[int] = []
+    notified: list[tuple[int, str]] = []
+
+    async def astream(messages: object) -> AsyncIterator[MagicMock]:
+        for n, chunk in enumerate(chunks):
+            received_chunks.append(n)
+            yield MagicMock(content=chunk)
+
+    async def on_suggestion(index: int, suggestion: ResponseSuggestion) -> None:
+        # 通知時点ではまだ全チャンクを受信していない
+        assert len(received_chunks) < len(chunks)
+        notified.append((index, suggestion.text))
+
+    service = LLMService()
+    service._model = MagicMock(astream=astream)
+    result = await service.generate_responses(
+        conversation_context=sample_context,
+        emotion_interpretation=sample_emotion,
+        partner_last_utterance="テスト",
+        on_suggestion=on_suggestion,
+    )
+
+    assert notified == [(i, r.text) for i, r in enumerate(result.responses)]
+    assert result.situation_analysis == "相手は映画の話題で盛り上がっています"
+
+
+@pytest.mark.asyncio
+async def test_streaming_applies_ft_format_normalization(
+    sample_context: list[Utterance],
+    sample_emotion: EmotionInterpretation,
+) -> None:
+    """FT形式（advice + options の文字列配列）も正規化して通知される."""
+    ft_response = (
+        '{"advice": "共感を示しましょう", "options": ["「すごいね」", "「それで？」"]}'
+    )
+    on_suggestion = AsyncMock()
+
+    service = LLMService()
+    service._model = _streaming_model(list(ft_response))
+    result = await service.generate_responses(
+        conversation_context=sample_context,
+        emotion_interpretation=sample_emotion,
+        partner_last_utterance="テスト",
+        on_suggestion=on_suggestion,
+    )
+
+    assert [c.args for c in on_suggestion.await_args_list] == [
+        (0, ResponseSuggestion(text="すごいね", intent="")),
+        (1, ResponseSuggestion(text="それで？", intent="")),
+    ]
+    assert result.situation_analysis == "共感を示しましょう"
+
+
+@pytest.mark.asyncio
+async def test_streaming_retry_renotifies_from_new_attempt(
+    sample_context: list[Utterance],
+    sample_emotion: EmotionInterpretation,
+    valid_llm_response: str,
+) -> None:
+    """ストリーム途中のレート制限でリトライした場合、新しい試行の候補を通知し直す."""
+    attempts = 0
+    retried_response = valid_llm_response.replace("気になる！", "教えて！")
+
+    async def astream(messages: object) -> AsyncIterator[MagicMock]:
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            # 1件目の候補を返した後に失敗
+            yield MagicMock(content=valid_llm_response[:200])
+            raise Exception("429 rate limit")
+        yield MagicMock(content=retried_response)
+
+    on_suggestion = AsyncMock()
+    service = LLMService()
+    service._model = MagicMock(astream=astream)
+    with patch("app.services.llm_service.asyncio.sleep", new_callable=AsyncMock):
+        result = await service.generate_responses(
+            conversation_context=sample_context,
+            emotion_interpretation=sample_emotion,
+            partner_last_utterance="テスト",
+            on_suggestion=on_suggestion,
+        )
+
+    assert attempts == 2
+    notified = [c.args for c in on_suggestion.await_args_list]
+    assert [index for index, _ in notified] == [0, 0, 1]
+    assert notified[0][1].text == "どんな恋愛映画だったの？気になる！"
+    # 最後に通知した候補は最終結果と一致する
+    assert [s for _, s in notified[1:]] == result.responses
+    assert result.responses[0].text == "どんな恋愛映画だったの？教えて！"
+
+
+@pytest.mark.asyncio
+async def test_streaming_uses_same_key_priority_as_final_result(
+    sample_context: list[Utterance],
+    sample_emotion: EmotionInterpretation,
+) -> None:
+    """応答候補配列が複数ある場合、最終結果と同じ優先順位の配列を通知する."""
+    mixed_response = (
+        '{"advices": ["「後のほう」", "「後のほう2」"], "situation_analysis": "分析",'
+        ' "responses": [{"text": "優先", "intent": "共感"},'
+        ' {"text": "優先2", "intent": "質問"}],'
+        ' "options": ["「無視される」", "「無視される2」"]}'
+    )
+    on_suggestion = AsyncMock()
+
+    service = LLMService()
+    service._model = _streaming_model(list(mixed_response))
+    result = await service.generate_responses(
+        conversation_context=sample_context,
+        emotion_interpretation=sample_emotion,
+        partner_last_utterance="テスト",
+        on_suggestion=on_suggestion,
+    )
+
+    assert [r.text for r in result.responses] == ["優先", "優先2"]
+    notified = [c.args for c in on_suggestion.await_args_list]
+    # 先に現れた advices は通知されるが、優先順位の高い responses で通知し直し、
+    # その後に現れた options は通知しない
+    assert [s.text for _, s in notified] == ["後のほう", "後のほう2", "優先", "優先2"]
+    assert notified[2:] == list(enumerate(result.responses))
+
+
+@pytest.mark.asyncio
+async def test_streaming_disabled_uses_single_call(
+    sample_context: list[Utterance],
+    sample_emotion: EmotionInterpretation,
+    valid_llm_response: str,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """LLM_STREAMING_ENABLED=false の場合は従来どおり一括で呼び出す."""
+    monkeypatch.setattr(get_settings(), "LLM_STREAMING_ENABLED", False)
+    on_suggestion = AsyncMock()
+    with patch.object(LLMService, "_call_api", new_callable=AsyncMock) as mock_api:
+        mock_api.return_value = valid_llm_response
+        service = LLMService()
+        result = await service.generate_responses(
+            conversation_context=sample_context,
+            emotion_interpretation=sample_emotion,
+            partner_last_utterance="テスト",
+            on_suggestion=on_suggestion,
+        )
+
+    mock_api.assert_awaited_once()
+    on_suggestion.assert_not_awaited()
+    assert len(result.responses) == 2
+
+
+@pytest.mark.asyncio
+async def test_identical_prompt_is_served_from_cache(
+    sample_context: list[Utterance],
+    sample_emotion: EmotionInterpretation,
+    valid_llm_response: str,
+) -> None:
+    """同じプロンプトの2回目は API を呼ばずにキャッシュから返す."""
+    with patch.object(LLMService, "_call_api", new_callable=AsyncMock) as mock_api:
+        mock_api.return_value = valid_llm_response
+        service = LLMService()
+        first = await service.generate_responses(
+            conversation_context=sample_context,
+            emotion_interpretation=sample_emotion,
+            partner_last_utterance="(発話なし)",
+        )
+        second = await service.generate_responses(
+            conversation_context=sample_context,
+            emotion_interpretation=sample_emotion,
+            partner_last_utterance="(発話なし)",
+        )
+        await service.generate_responses(
+            conversation_context=sample_context,
+            emotion_interpretation=sample_emotion,
+            partner_last_utterance="別の発話",
+        )
+
+    assert first == second
+    assert mock_api.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_can_be_disabled(
+    sample_context: list[Utterance],
+    sample_emotion: EmotionInterpretation,
+    valid_llm_response: str,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """LLM_CACHE_SIZE=0 の場合は毎回 API を呼ぶ."""
+    monkeypatch.setattr(get_settings(), "LLM_CACHE_SIZE", 0)
+    with patch.object(LLMService, "_call_api", new_callable=AsyncMock) as mock_api:
+        mock_api.return_value = valid_llm_response
+        service = LLMService()
+        for _ in range(2):
+            await service.generate_responses(
+                conversation_context=sample_context,
+                emotion_interpretation=sample_emotion,
+                partner_last_utterance="(発話なし)",
+            )
+
+    assert mock_api.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_similar_utterance_is_served_from_semantic_cache(
+    sample_context: list[Utterance],
+    sample_emotion: EmotionInterpretation,
+    valid_llm_response: str,
+) -> None:
+    """同じ感情で似た発話には、会話履歴が違っても過去の応答候補を返す."""
+    semantic_cache = SemanticSuggestionCache(max_entries=8, ttl_seconds=60)
+    with patch.object(LLMService, "_call_api", new_callable=AsyncMock) as mock_api:
+        mock_api.return_value = valid_llm_response
+        service = LLMService(semantic_cache=semantic_cache)
+        first = await service.generate_responses(
+            conversation_context=sample_context,
+            emotion_interpretation=sample_emotion,
+            partner_last_utterance="そうなんだ",
+        )
+        second = await service.generate_responses(
+            conversation_context=sample_context[:1],
+            emotion_interpretation=sample_emotion,
+            partner_last_utterance="そうなんだ！",
+        )
+        # 発話がない場合は対象外
+        for _ in range(2):
+            await service.generate_responses(
+                conversation_context=sample_context[:1],
+                emotion_interpretation=sample_emotion,
+                partner_last_utterance="(発話なし)",
+            )
+        await semantic_cache.aclose()
+
+    assert second == first
+    # 1回目と、発話なし（2回目は完全一致のキャッシュ）
+    assert mock_api.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_aclose_stops_background_work(monkeypatch: pytest.MonkeyPatch) -> None:
+    """aclose で類似発話のキャッシュの更新と回復の確認を止める."""
+    monkeypatch.setattr(get_settings(), "LLM_BREAKER_FAILURE_THRESHOLD", 1)
+    semantic_cache = MagicMock(spec=SemanticSuggestionCache, aclose=AsyncMock())
+    service = LLMService(semantic_cache=semantic_cache)
+
+    with patch(
+        "app.utils.circuit_breaker.CircuitBreaker.aclose", new_callable=AsyncMock
+    ) as breaker_aclose:
+        await service.aclose()
+
+    semantic_cache.aclose.assert_awaited_once()
+    breaker_aclose.assert_awaited_once()
+
+
+def _racing_model(response: str, delay: float = 0.0) -> MagicMock:
+    """delay 秒後に response を返すクライアント."""
+
+    async def ainvoke(messages: list[object]) -> MagicMock:
+        await asyncio.sleep(delay)
+        return MagicMock(content=response)
+
+    return MagicMock(ainvoke=AsyncMock(side_effect=ainvoke))
+
+
+def _racing_service(
+    monkeypatch: pytest.MonkeyPatch, groq: MagicMock, gemini: MagicMock
+) -> LLMService:
+    monkeypatch.setattr(get_settings(), "LLM_PROVIDER", "race")
+    with patch(
+        "app.infra.external.gemini_client.LLMClientFactory.get_clients",
+        return_value={"groq": groq, "gemini": gemini},
+    ):
+        return LLMService()
+
+
+@pytest.mark.asyncio
+async def test_race_uses_first_valid_response(
+    sample_context: list[Utterance],
+    sample_emotion: EmotionInterpretation,
+    valid_llm_response: str,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """race: 先に返ってもパースできない応答は使わず、もう一方の応答を使う."""
+    groq = _racing_model("not json")
+    gemini = _racing_model(valid_llm_response, delay=0.01)
+    service = _racing_service(monkeypatch, groq, gemini)
+    on_suggestion = AsyncMock()
+
+    result = await service.generate_responses(
+        conversation_context=sample_context,
+        emotion_interpretation=sample_emotion,
+        partner_last_utterance="テスト",
+        on_suggestion=on_suggestion,
+    )
+
+    assert result.responses[0].text == "どんな恋愛映画だったの？気になる！"
+    groq.ainvoke.assert_awaited_once()
+    gemini.ainvoke.assert_awaited_once()
+    # 勝った応答の候補を通知する
+    assert on_suggestion.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_race_quality_wait_prefers_ft_model(
+    sample_context: list[Utterance],
+    sample_emotion: EmotionInterpretation,
+    valid_llm_response: str,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """race: LLM_RACE_QUALITY_WAIT_MS 以内なら FT モデルの応答を優先する."""
+    monkeypatch.setattr(get_settings(), "LLM_RACE_QUALITY_WAIT_MS", 500.0)
+    ft_response = valid_llm_response.replace("気になる！", "教えて！")
+    groq = _racing_model(valid_llm_response)
+    gemini = _racing_model(ft_response, delay=0.01)
+    service = _racing_service(monkeypatch, groq, gemini)
+
+    result = await service.generate_responses(
+        conversation_context=sample_context,
+        emotion_interpretation=sample_emotion,
+        partner_last_utterance="テスト",
+    )
+
+    assert result.responses[0].text == "どんな恋愛映画だったの？教えて！"
+
+
+@pytest.mark.asyncio
+async def test_race_raises_when_all_providers_fail(
+    sample_context: list[Utterance],
+    sample_emotion: EmotionInterpretation,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """race: 全てのプロバイダーが失敗した場合は LLMError."""
+    groq = MagicMock(ainvoke=AsyncMock(side_effect=RuntimeError("groq down")))
+    gemini = _racing_model("not json")
+    service = _racing_service(monkeypatch, groq, gemini)
+
+    with pytest.raises(LLMError):
+        await service.generate_responses(
+            conversation_context=sample_context,
+            emotion_interpretation=sample_emotion,
+            partner_last_utterance="テスト",
+        )
+
+
+@pytest.mark.asyncio
+async def test_route_sends_short_prompt_to_groq_and_long_to_ft_model(
+    sample_context: list[Utterance],
+    sample_emotion: EmotionInterpretation,
+    valid_llm_response: str,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """route: 短いプロンプトは Groq、長い会話履歴は FT モデルに送る."""
+    monkeypatch.setattr(get_settings(), "LLM_PROVIDER", "route")
+    monkeypatch.setattr(get_settings(), "LLM_ROUTER_SHORT_PROMPT_CHARS", 300)
+    groq = _racing_model(valid_llm_response)
+    gemini = _racing_model(valid_llm_response)
+    with patch(
+        "app.infra.external.gemini_client.LLMClientFactory.get_clients",
+        return_value={"groq": groq, "gemini": gemini},
+    ):
+        service = LLMService()
+
+    await service.generate_responses(
+        conversation_context=sample_context[:1],
+        emotion_interpretation=sample_emotion,
+        partner_last_utterance="(発話なし)",
+    )
+    long_context = sample_context * 10
+    await service.generate_responses(
+        conversation_context=long_context,
+        emotion_interpretation=sample_emotion,
+        partner_last_utterance="テスト",
+    )
+
+    groq.ainvoke.assert_awaited_once()
+    gemini.ainvoke.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_breaker_fails_fast_after_repeated_errors(
+    sample_context: list[Utterance],
+    sample_emotion: EmotionInterpretation,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """連続して失敗したプロバイダーは呼び出さずに LLMUnavailableError を送出する."""
+    monkeypatch.setattr(get_settings(), "LLM_BREAKER_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(get_settings(), "LLM_CACHE_SIZE", 0)
+    with patch.object(LLMService, "_call_api", new_callable=AsyncMock) as mock_api:
+        mock_api.side_effect = Exception("503 Service Unavailable")
+        service = LLMService()
+        for _ in range(2):
+            with pytest.raises(LLMError):
+                await service.generate_responses(
+                    conversation_context=sample_context,
+                    emotion_interpretation=sample_emotion,
+                    partner_last_utterance="テスト",
+                )
+
+        with pytest.raises(LLMUnavailableError):
+            await service.generate_responses(
+                conversation_context=sample_context,
+                emotion_interpretation=sample_emotion,
+                partner_last_utterance="テスト",
+            )
+
+    assert mock_api.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_breaker_ignores_parse_errors(
+    sample_context: list[Utterance],
+    sample_emotion: EmotionInterpretation,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """応答のパースの失敗は障害として数えない."""
+    monkeypatch.setattr(get_settings(), "LLM_BREAKER_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(get_settings(), "LLM_CACHE_SIZE", 0)
+    with patch.object(LLMService, "_call_api", new_callable=AsyncMock) as mock_api:
+        mock_api.return_value = "not json"
+        service = LLMService()
+        for _ in range(4):
+            with pytest.raises(LLMResponseParseError):
+                await service.generate_responses(
+                    conversation_context=sample_context,
+                    emotion_interpretation=sample_emotion,
+                    partner_last_utterance="テスト",
+                )
+
+    assert mock_api.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_breaker_counts_each_retry_and_stops_retrying_when_open(
+    sample_context: list[Utterance],
+    sample_emotion: EmotionInterpretation,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """リトライごとに失敗を数え、ブレーカーが開いたら残りのリトライを待たない."""
+    monkeypatch.setattr(get_settings(), "LLM_BREAKER_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(get_settings(), "LLM_CACHE_SIZE", 0)
+    monkeypatch.setattr("app.services.llm_service.INITIAL_DELAY", 0.01)
+    with patch.object(LLMService, "_call_api", new_callable=AsyncMock) as mock_api:
+        mock_api.side_effect = Exception("429 rate limit")
+        service = LLMService()
+        with pytest.raises(LLMUnavailableError):
+            await service.generate_responses(
+                conversation_context=sample_context,
+                emotion_interpretation=sample_emotion,
+                partner_last_utterance="テスト",
+            )
+
+    assert mock_api.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_route_avoids_provider_with_open_breaker(
+    sample_context: list[Utterance],
+    sample_emotion: EmotionInterpretation,
+    valid_llm_response: str,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """route: ブレーカーが開いたプロバイダーを避け、もう一方で生成する."""
+    monkeypatch.setattr(get_settings(), "LLM_PROVIDER", "route")
+    monkeypatch.setattr(get_settings(), "LLM_ROUTER_SHORT_PROMPT_CHARS", 10_000)
+    monkeypatch.setattr(get_settings(), "LLM_BREAKER_FAILURE_THRESHOLD", 1)
+    monkeypatch.setattr(get_settings(), "LLM_CACHE_SIZE", 0)
+    groq = MagicMock(ainvoke=AsyncMock(side_effect=RuntimeError("groq down")))
+    gemini = _racing_model(valid_llm_response)
+    with patch(
+        "app.infra.external.gemini_client.LLMClientFactory.get_clients",
+        return_value={"groq": groq, "gemini": gemini},
+    ):
+        service = LLMService()
+
+    with pytest.raises(LLMError):
+        await service.generate_responses(
+            conversation_context=sample_context,
+            emotion_interpretation=sample_emotion,
+            partner_last_utterance="テスト",
+        )
+    for _ in range(3):
+        result = await service.generate_responses(
+            conversation_context=sample_context,
+            emotion_interpretation=sample_emotion,
+            partner_last_utterance="テスト",
+        )
+        assert result.responses
+
+    groq.ainvoke.assert_awaited_once()
+    assert gemini.ainvoke.await_count == 3
+    assert service._router is not None
+    assert [r["reason"] for r in service._router.history()] == [
+        "short_prompt",
+        "unavailable",
+        "unavailable",
+        "unavailable",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_breaker_can_be_disabled(
+    sample_context: list[Utterance],
+    sample_emotion: EmotionInterpretation,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """LLM_BREAKER_FAILURE_THRESHOLD=0 の場合は毎回呼び出す."""
+    monkeypatch.setattr(get_settings(), "LLM_BREAKER_FAILURE_THRESHOLD", 0)
+    with patch.object(LLMService, "_call_api", new_callable=AsyncMock) as mock_api:
+        mock_api.side_effect = Exception("503 Service Unavailable")
+        service = LLMService()
+        for _ in range(6):
+            with pytest.raises(LLMError) as exc_info:
+                await service.generate_responses(
+                    conversation_context=sample_context,
+                    emotion_interpretation=sample_emotion,
+                    partner_last_utterance="テスト",
+                )
+            assert not isinstance(exc_info.value, LLMUnavailableError)
+
+    assert mock_api.await_count == 6
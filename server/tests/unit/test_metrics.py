@@ -0,0 +1,58 @@
+"""メトリクスレジストリのユニットテスト。"""
+
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.core.metrics import MetricsRegistry, get_metrics
+
+
+def test_counter_and_gauge() -> None:
+    """カウンターは加算され、ゲージは上書きされる。"""
+    metrics = MetricsRegistry()
+    metrics.increment("requests")
+    metrics.increment("requests", 2)
+    metrics.set_gauge("depth", 5)
+    metrics.set_gauge("depth", 3)
+
+    assert metrics.get_counter("requests") == 3
+    assert metrics.get_counter("unknown") == 0
+    assert metrics.get_gauge("depth") == 3
+
+
+def test_histogram_buckets() -> None:
+    """ヒストグラムは件数・合計・バケットを集計する。"""
+    metrics = MetricsRegistry()
+    metrics.observe("latency_ms", 3, buckets=(5, 10))
+    metrics.observe("latency_ms", 7, buckets=(5, 10))
+    metrics.observe("latency_ms", 50, buckets=(5, 10))
+
+    histogram = metrics.get_histogram("latency_ms")
+    assert histogram is not None
+    assert histogram["count"] == 3
+    assert histogram["sum"] == 60
+    assert histogram["min"] == 3
+    assert histogram["max"] == 50
+    assert histogram["buckets"] == {"5": 1, "10": 1, "+Inf": 1}
+
+
+def test_metrics_endpoint(client: TestClient) -> None:
+    """/api/metrics でスナップショットを取得できる。"""
+    get_metrics().increment("test.endpoint")
+    with patch("app.api.auth.verify_id_token") as mock_verify:
+        mock_verify.return_value = {"uid": "metrics-user"}
+        response = client.get(
+            "/api/metrics", headers={"Authorization": "Bearer metrics-token"}
+        )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["counters"]["test.endpoint"] >= 1
+    assert "histograms" in data
+
+
+def test_metrics_endpoint_requires_auth(client: TestClient) -> None:
+    """/api/metrics は認証なしでは取得できない。"""
+    response = client.get("/api/metrics")
+
+    assert response.status_code == 401
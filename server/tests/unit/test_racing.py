@@ -0,0 +1,151 @@
+"""ProviderRace のテスト。"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+import pytest
+
+from app.core.metrics import MetricsRegistry
+from app.utils.racing import ProviderRace
+
+
+class FakeProvider:
+    """指定した遅延の後に応答する（または失敗する）プロバイダー。"""
+
+    def __init__(self, name: str, latency: float, fail: bool = False) -> None:
+        self.name = name
+        self._latency = latency
+        self._fail = fail
+        self.cancelled = False
+
+    def call(self) -> Callable[[], Awaitable[str]]:
+        async def run() -> str:
+            try:
+                await asyncio.sleep(self._latency)
+            except asyncio.CancelledError:
+                self.cancelled = True
+                raise
+            if self._fail:
+                raise RuntimeError(f"{self.name} failed")
+            return self.name
+
+        return run
+
+
+def _calls(*providers: FakeProvider) -> dict[str, Callable[[], Awaitable[str]]]:
+    return {p.name: p.call() for p in providers}
+
+
+@pytest.mark.asyncio
+async def test_first_success_wins_and_cancels_others() -> None:
+    """先に成功した結果を返し、残りはキャンセルする。"""
+    metrics = MetricsRegistry()
+    race = ProviderRace("test.race", preferred="gemini", metrics=metrics)
+    groq = FakeProvider("groq", 0.01)
+    gemini = FakeProvider("gemini", 1.0)
+
+    assert await race.run(_calls(groq, gemini)) == "groq"
+    await asyncio.sleep(0)
+
+    assert gemini.cancelled
+    assert metrics.get_counter("test.race.groq.wins") == 1
+    assert metrics.get_gauge("test.race.groq.win_rate") == 1.0
+    assert metrics.get_gauge("test.race.gemini.win_rate") == 0.0
+    latency = metrics.get_histogram("test.race.groq.latency_ms")
+    assert latency is not None and latency["count"] == 1
+    assert metrics.get_histogram("test.race.gemini.latency_ms") is None
+
+
+@pytest.mark.asyncio
+async def test_failure_loses_to_slower_success() -> None:
+    """失敗した呼び出しは負けとし、他の結果を待つ。"""
+    metrics = MetricsRegistry()
+    race = ProviderRace("test.race", metrics=metrics)
+    groq = FakeProvider("groq", 0.0, fail=True)
+    gemini = FakeProvider("gemini", 0.02)
+
+    assert await race.run(_calls(groq, gemini)) == "gemini"
+    assert metrics.get_counter("test.race.groq.errors") == 1
+
+
+@pytest.mark.asyncio
+async def test_all_failures_raise_first_error() -> None:
+    """全て失敗した場合は最初の例外を送出する。"""
+    race = ProviderRace("test.race", metrics=MetricsRegistry())
+    groq = FakeProvider("groq", 0.0, fail=True)
+    gemini = FakeProvider("gemini", 0.02, fail=True)
+
+    with pytest.raises(RuntimeError, match="groq failed"):
+        await race.run(_calls(groq, gemini))
+
+
+@pytest.mark.asyncio
+async def test_quality_wait_prefers_preferred_within_window() -> None:
+    """quality_wait 以内に preferred が返れば preferred の結果を使う。"""
+    metrics = MetricsRegistry()
+    race = ProviderRace(
+        "test.race", preferred="gemini", quality_wait=0.5, metrics=metrics
+    )
+    groq = FakeProvider("groq", 0.0)
+    gemini = FakeProvider("gemini", 0.02)
+
+    assert await race.run(_calls(groq, gemini)) == "gemini"
+    assert metrics.get_counter("test.race.quality_waits") == 1
+    assert metrics.get_counter("test.race.quality_wins") == 1
+    assert metrics.get_counter("test.race.groq.wins") == 0
+
+
+@pytest.mark.asyncio
+async def test_quality_wait_falls_back_after_window() -> None:
+    """preferred が quality_wait 以内に返らなければ先に返った結果を使う。"""
+    metrics = MetricsRegistry()
+    race = ProviderRace(
+        "test.race", preferred="gemini", quality_wait=0.02, metrics=metrics
+    )
+    groq = FakeProvider("groq", 0.0)
+    gemini = FakeProvider("gemini", 1.0)
+
+    assert await race.run(_calls(groq, gemini)) == "groq"
+    await asyncio.sleep(0)
+
+    assert gemini.cancelled
+    assert metrics.get_counter("test.race.quality_waits") == 1
+    assert metrics.get_counter("test.race.quality_wins") == 0
+
+
+@pytest.mark.asyncio
+async def test_quality_wait_falls_back_when_preferred_fails() -> None:
+    """待っている間に preferred が失敗したら先に返った結果をすぐ使う。"""
+    race = ProviderRace(
+        "test.race", preferred="gemini", quality_wait=5.0, metrics=MetricsRegistry()
+    )
+    groq = FakeProvider("groq", 0.0)
+    gemini = FakeProvider("gemini", 0.02, fail=True)
+
+    result = await asyncio.wait_for(race.run(_calls(groq, gemini)), timeout=1.0)
+    assert result == "groq"
+
+
+@pytest.mark.asyncio
+async def test_cancelling_race_cancels_all_calls() -> None:
+    """呼び出し元がキャンセルしたら全ての呼び出しをキャンセルする。"""
+    race = ProviderRace("test.race", metrics=MetricsRegistry())
+    groq = FakeProvider("groq", 1.0)
+    gemini = FakeProvider("gemini", 1.0)
+
+    task = asyncio.ensure_future(race.run(_calls(groq, gemini)))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0)
+
+    assert groq.cancelled and gemini.cancelled
+
+
+def test_invalid_quality_wait() -> None:
+    """quality_wait は0以上。"""
+    with pytest.raises(ValueError, match="quality_wait"):
+        ProviderRace("test.race", quality_wait=-1)
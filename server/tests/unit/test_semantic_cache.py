@@ -0,0 +1,208 @@
+"""SemanticSuggestionCache の単体テスト."""
+
+import asyncio
+
+import pytest
+
+from app.core.metrics import MetricsRegistry
+from app.dto.llm import LLMResponseResult, ResponseSuggestion
+from app.services.llm_cache import SuggestionCallback
+from app.services.semantic_cache import SemanticSuggestionCache, normalize_utterance
+from tests.fakes import FakeClock, FakeGenerator
+
+
+def _cache(
+    clock: FakeClock | None = None,
+    metrics: MetricsRegistry | None = None,
+    max_entries: int = 8,
+) -> SemanticSuggestionCache:
+    return SemanticSuggestionCache(
+        max_entries=max_entries,
+        ttl_seconds=600,
+        threshold=0.8,
+        max_chars=10,
+        refresh_seconds=300,
+        clock=clock or FakeClock(),
+        metrics=metrics or MetricsRegistry(),
+    )
+
+
+async def _settle(cache: SemanticSuggestionCache) -> None:
+    """裏で実行中の更新が終わるまで待つ."""
+    await asyncio.gather(*list(cache._tasks))
+
+
+def test_normalize_utterance() -> None:
+    """記号・空白・全角半角の違いを無視する."""
+    assert normalize_utterance("そうなんだ！") == normalize_utterance("そうなんだ。")
+    assert normalize_utterance(" ＯＫ、 わかった ") == "okわかった"
+
+
+@pytest.mark.asyncio
+async def test_similar_utterance_is_served_from_cache() -> None:
+    """同じ感情で似た発話には、LLM を待たずに過去の応答候補を返す."""
+    metrics = MetricsRegistry()
+    cache = _cache(metrics=metrics)
+    generator = FakeGenerator()
+    first = await cache.get_or_generate("happy", "medium", "そうなんだ", generator)
+
+    notified: list[int] = []
+
+    async def on_suggestion(index: int, suggestion: ResponseSuggestion) -> None:
+        notified.append(index)
+
+    second = await cache.get_or_generate(
+        "happy", "medium", "そうなんだね！", generator, on_suggestion
+    )
+
+    assert second is first
+    assert notified == [0, 1]
+    assert metrics.get_counter("llm.semantic_cache.hits") == 1
+    assert metrics.get_counter("llm.semantic_cache.misses") == 1
+    similarity = metrics.get_histogram("llm.semantic_cache.similarity")
+    assert similarity is not None and 0.8 <= similarity["max"] < 1.0
+    await _settle(cache)
+
+
+@pytest.mark.asyncio
+async def test_different_emotion_or_utterance_misses() -> None:
+    """感情・強度が違う場合と、似ていない発話はヒットしない."""
+    cache = _cache()
+    generator = FakeGenerator()
+    await cache.get_or_generate("happy", "medium", "そうなんだ", generator)
+
+    await cache.get_or_generate("sad", "medium", "そうなんだ", generator)
+    await cache.get_or_generate("happy", "high", "そうなんだ", generator)
+    await cache.get_or_generate("happy", "medium", "そうじゃない", generator)
+
+    assert generator.calls == 4
+    assert len(cache) == 4
+
+
+@pytest.mark.asyncio
+async def test_missing_or_long_utterance_is_skipped() -> None:
+    """発話がない場合と長い発話はキャッシュを使わない."""
+    metrics = MetricsRegistry()
+    cache = _cache(metrics=metrics)
+    generator = FakeGenerator()
+
+    for _ in range(2):
+        await cache.get_or_generate("happy", "medium", "", generator)
+        await cache.get_or_generate(
+            "happy", "medium", "昨日見た映画の話なんだけどね", generator
+        )
+
+    assert generator.calls == 4
+    assert len(cache) == 0
+    assert metrics.get_counter("llm.semantic_cache.skipped") == 4
+
+
+@pytest.mark.asyncio
+async def test_similar_hit_refreshes_in_background_and_counts_false_hits() -> None:
+    """類似発話でのヒットは裏で生成し直し、応答が大きく違えば誤ヒットとして数える."""
+    metrics = MetricsRegistry()
+    cache = _cache(metrics=metrics)
+    generator = FakeGenerator("へえ、そうなんだ", "えっ、本当に？信じられない")
+    await cache.get_or_generate("happy", "medium", "そうなんだ", generator)
+
+    served = await cache.get_or_generate("happy", "medium", "そうなんだね", generator)
+    await _settle(cache)
+
+    assert served.responses[0].text == "へえ、そうなんだ"
+    assert generator.calls == 2
+    assert metrics.get_counter("llm.semantic_cache.refreshes") == 1
+    assert metrics.get_counter("llm.semantic_cache.false_hits") == 1
+    # 生成し直した応答は、その発話のエントリとして保存される
+    exact = await cache.get_or_generate("happy", "medium", "そうなんだね", generator)
+    assert exact.responses[0].text == "えっ、本当に？信じられない"
+    assert generator.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_matching_refresh_is_not_a_false_hit() -> None:
+    """生成し直した応答が似ていれば誤ヒットとしない."""
+    metrics = MetricsRegistry()
+    cache = _cache(metrics=metrics)
+    generator = FakeGenerator("へえ、そうなんだ", "へえ、そうなんだね")
+    await cache.get_or_generate("happy", "medium", "そうなんだ", generator)
+
+    await cache.get_or_generate("happy", "medium", "そうなんだね", generator)
+    await _settle(cache)
+
+    assert metrics.get_counter("llm.semantic_cache.refreshes") == 1
+    assert metrics.get_counter("llm.semantic_cache.false_hits") == 0
+
+
+@pytest.mark.asyncio
+async def test_exact_hit_refreshes_only_when_stale(clock: FakeClock) -> None:
+    """完全一致のヒットは、エントリが refresh_seconds より古い場合のみ生成し直す."""
+    metrics = MetricsRegistry()
+    cache = _cache(clock=clock, metrics=metrics)
+    generator = FakeGenerator()
+    await cache.get_or_generate("happy", "medium", "そうなんだ", generator)
+
+    clock.now = 100
+    await cache.get_or_generate("happy", "medium", "そうなんだ", generator)
+    await _settle(cache)
+    assert generator.calls == 1
+
+    clock.now = 400
+    await cache.get_or_generate("happy", "medium", "そうなんだ", generator)
+    await _settle(cache)
+    assert generator.calls == 2
+    assert metrics.get_counter("llm.semantic_cache.refreshes") == 1
+
+
+@pytest.mark.asyncio
+async def test_refresh_failure_keeps_entry() -> None:
+    """裏での生成に失敗してもエントリは残り、エラーとして数える."""
+    metrics = MetricsRegistry()
+    cache = _cache(metrics=metrics)
+    await cache.get_or_generate("happy", "medium", "そうなんだ", FakeGenerator())
+
+    async def failing(on_suggestion: SuggestionCallback | None) -> LLMResponseResult:
+        raise RuntimeError("LLM error")
+
+    served = await cache.get_or_generate("happy", "medium", "そうなんだね", failing)
+    await _settle(cache)
+
+    assert served.responses[0].text == "そうなんだ"
+    assert metrics.get_counter("llm.semantic_cache.refresh_errors") == 1
+    assert len(cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_and_evicted_entries_are_removed(clock: FakeClock) -> None:
+    """失効したエントリはヒットせず、容量を超えたら古いものから追い出す."""
+    cache = _cache(clock=clock, max_entries=2)
+    generator = FakeGenerator()
+    await cache.get_or_generate("happy", "medium", "そうなんだ", generator)
+    await cache.get_or_generate("happy", "medium", "すごいね", generator)
+    await cache.get_or_generate("happy", "medium", "ありがとう", generator)
+
+    assert len(cache) == 2
+    await cache.get_or_generate("happy", "medium", "そうなんだ", generator)
+    assert generator.calls == 4
+
+    clock.now = 601
+    await cache.get_or_generate("happy", "medium", "ありがとう", generator)
+    assert generator.calls == 5
+
+
+@pytest.mark.asyncio
+async def test_aclose_cancels_refreshes() -> None:
+    """aclose で裏の生成をキャンセルする."""
+    cache = _cache()
+    await cache.get_or_generate("happy", "medium", "そうなんだ", FakeGenerator())
+    started = asyncio.Event()
+
+    async def slow(on_suggestion: SuggestionCallback | None) -> LLMResponseResult:
+        started.set()
+        await asyncio.sleep(10)
+        raise AssertionError("not cancelled")
+
+    await cache.get_or_generate("happy", "medium", "そうなんだね", slow)
+    await started.wait()
+    await cache.aclose()
+
+    assert not cache._tasks
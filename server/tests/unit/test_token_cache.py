@@ -0,0 +1,136 @@
+"""TokenVerificationCache / TTLCache のテスト。"""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core.metrics import MetricsRegistry
+from app.services.token_cache import TokenVerificationCache
+from app.utils.cache import TTLCache
+
+
+class _Clock:
+    def __init__(self, now: float = 1_000_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _claims(exp: float) -> dict[str, object]:
+    return {"uid": "user-1", "email": "user@example.com", "exp": exp}
+
+
+class TestTTLCache:
+    """TTLCache のテスト。"""
+
+    def test_entry_expires_at_deadline(self) -> None:
+        clock = _Clock()
+        cache: TTLCache[str, int] = TTLCache(10, clock=clock)
+        cache.set("a", 1, expires_at=clock.now + 5)
+
+        assert cache.get("a") == 1
+        clock.now += 5
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_entry_is_evicted(self) -> None:
+        cache: TTLCache[str, int] = TTLCache(2, clock=_Clock())
+        cache.set("a", 1, expires_at=float("inf"))
+        cache.set("b", 2, expires_at=float("inf"))
+        cache.get("a")
+        cache.set("c", 3, expires_at=float("inf"))
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+
+class TestTokenVerificationCache:
+    """TokenVerificationCache のテスト。"""
+
+    @pytest.mark.asyncio
+    async def test_cached_token_is_not_verified_again(self) -> None:
+        clock, metrics = _Clock(), MetricsRegistry()
+        cache = TokenVerificationCache(100, clock=clock, metrics=metrics)
+        verifier = AsyncMock(return_value=_claims(clock.now + 3600))
+
+        first = await cache.verify("token", verifier)
+        second = await cache.verify("token", verifier)
+
+        assert first == second
+        verifier.assert_awaited_once_with("token")
+        assert metrics.get_counter("auth.token_cache.misses") == 1
+        assert metrics.get_counter("auth.token_cache.hits") == 1
+
+    @pytest.mark.asyncio
+    async def test_entry_expires_with_token(self) -> None:
+        clock = _Clock()
+        cache = TokenVerificationCache(100, clock=clock, metrics=MetricsRegistry())
+        verifier = AsyncMock(return_value=_claims(clock.now + 60))
+        await cache.verify("token", verifier)
+
+        clock.now += 60
+        verifier.side_effect = Exception("Token expired")
+        with pytest.raises(Exception, match="Token expired"):
+            await cache.verify("token", verifier)
+
+    @pytest.mark.asyncio
+    async def test_claims_without_exp_are_not_cached(self) -> None:
+        cache = TokenVerificationCache(100, clock=_Clock(), metrics=MetricsRegistry())
+        verifier = AsyncMock(return_value={"uid": "user-1"})
+
+        await cache.verify("token", verifier)
+        await cache.verify("token", verifier)
+
+        assert verifier.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_verification_is_not_cached(self) -> None:
+        clock = _Clock()
+        cache = TokenVerificationCache(100, clock=clock, metrics=MetricsRegistry())
+        verifier = AsyncMock(
+            side_effect=[Exception("Invalid"), _claims(clock.now + 60)]
+        )
+
+        with pytest.raises(Exception, match="Invalid"):
+            await cache.verify("token", verifier)
+        assert (await cache.verify("token", verifier))["uid"] == "user-1"
+
+    @pytest.mark.asyncio
+    async def test_revocation_is_rechecked_after_interval(self) -> None:
+        clock, metrics = _Clock(), MetricsRegistry()
+        cache = TokenVerificationCache(
+            100, revocation_check_interval=300, clock=clock, metrics=metrics
+        )
+        verifier = AsyncMock(return_value=_claims(clock.now + 3600))
+        await cache.verify("token", verifier)
+        verifier.assert_awaited_once_with("token", check_revoked=True)
+
+        clock.now += 299
+        await cache.verify("token", verifier)
+        assert verifier.call_count == 1
+
+        clock.now += 1
+        verifier.side_effect = Exception("Token revoked")
+        with pytest.raises(Exception, match="Token revoked"):
+            await cache.verify("token", verifier)
+        assert metrics.get_counter("auth.token_cache.revocation_checks") == 1
+
+        # 失効したトークンはキャッシュから削除される
+        with pytest.raises(Exception, match="Token revoked"):
+            await cache.verify("token", verifier)
+        assert metrics.get_counter("auth.token_cache.misses") == 2
+
+    @pytest.mark.asyncio
+    async def test_zero_size_disables_cache(self) -> None:
+        clock = _Clock()
+        cache = TokenVerificationCache(0, clock=clock, metrics=MetricsRegistry())
+        verifier = AsyncMock(return_value=_claims(clock.now + 3600))
+
+        await cache.verify("token", verifier)
+        await cache.verify("token", verifier)
+
+        assert verifier.call_count == 2